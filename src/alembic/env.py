@@ -9,11 +9,15 @@ from db_schema import Base
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", os.environ["DB_URL"])
+# In-process migrations (`Database.migrate`) give their connection, the command line gives the URL in DB_URL
+shared_connection = config.attributes.get("connection", None)
+if shared_connection is None:
+    config.set_main_option("sqlalchemy.url", os.environ["DB_URL"])
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# Not in-process: the logging of the application is kept.
+if config.config_file_name is not None and shared_connection is None:
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -60,6 +64,12 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    if shared_connection is not None:
+        context.configure(connection=shared_connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section),
         prefix="sqlalchemy.",
@@ -0,0 +1,37 @@
+"""Add influxdb_sync table.
+
+Revision ID: f604b59e8a0d
+Revises: f603b59e8a0d
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f604b59e8a0d'
+down_revision = 'f603b59e8a0d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the watermarks of the InfluxDB export, by usage point, measurement and month."""
+    op.create_table(
+        'influxdb_sync',
+        sa.Column('usage_point_id', sa.Text(), nullable=False),
+        sa.Column('measurement', sa.Text(), nullable=False),
+        sa.Column('month', sa.Text(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('checksum', sa.Text(), nullable=False),
+        sa.Column('last_date', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('usage_point_id', 'measurement', 'month')
+    )
+    op.create_index(op.f('ix_influxdb_sync_usage_point_id'), 'influxdb_sync', ['usage_point_id'], unique=False)
+
+
+def downgrade():
+    """Drop the watermarks of the InfluxDB export."""
+    op.drop_index(op.f('ix_influxdb_sync_usage_point_id'), table_name='influxdb_sync')
+    op.drop_table('influxdb_sync')
@@ -0,0 +1,47 @@
+"""Store ecowatt detail as JSON.
+
+Revision ID: f605b59e8a0d
+Revises: f604b59e8a0d
+Create Date: 2026-10-19
+
+"""
+import ast
+import json
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f605b59e8a0d'
+down_revision = 'f604b59e8a0d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Convert the ecowatt detail, stored as the repr of a dict (str(dict)), to JSON."""
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT date, detail FROM ecowatt")).fetchall()
+    for date, detail in rows:
+        try:
+            value = json.dumps(ast.literal_eval(detail))
+        except (ValueError, SyntaxError):
+            continue
+        connection.execute(
+            sa.text("UPDATE ecowatt SET detail = :detail WHERE date = :date"), {"detail": value, "date": date}
+        )
+
+
+def downgrade():
+    """Convert the ecowatt detail back to the repr of a dict."""
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT date, detail FROM ecowatt")).fetchall()
+    for date, detail in rows:
+        try:
+            value = str(json.loads(detail))
+        except ValueError:
+            continue
+        connection.execute(
+            sa.text("UPDATE ecowatt SET detail = :detail WHERE date = :date"), {"detail": value, "date": date}
+        )
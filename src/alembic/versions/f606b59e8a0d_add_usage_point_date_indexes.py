@@ -0,0 +1,39 @@
+"""Add (usage_point_id, date) indexes.
+
+Revision ID: f606b59e8a0d
+Revises: f605b59e8a0d
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f606b59e8a0d'
+down_revision = 'f605b59e8a0d'
+branch_labels = None
+depends_on = None
+
+# The queries filter on the usage point and a range of dates (get_range, get_last_date, datatables).
+# The detail indexes also cover the value and the interval, so the range queries do not read the table.
+INDEXES = {
+    'consumption_daily': ['usage_point_id', 'date'],
+    'production_daily': ['usage_point_id', 'date'],
+    'consumption_daily_max_power': ['usage_point_id', 'date'],
+    'consumption_detail': ['usage_point_id', 'date', 'value', 'interval'],
+    'production_detail': ['usage_point_id', 'date', 'value', 'interval'],
+}
+
+
+def upgrade():
+    """Create the (usage_point_id, date) indexes."""
+    for table, columns in INDEXES.items():
+        op.create_index(f'ix_{table}_usage_point_id_date', table, columns, unique=False)
+    if op.get_bind().dialect.name == 'sqlite':
+        # Statistics used by the query planner to choose the new indexes
+        op.execute('ANALYZE')
+
+
+def downgrade():
+    """Drop the (usage_point_id, date) indexes."""
+    for table in INDEXES:
+        op.drop_index(f'ix_{table}_usage_point_id_date', table_name=table)
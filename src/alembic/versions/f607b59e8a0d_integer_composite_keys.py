@@ -0,0 +1,284 @@
+"""Replace the MD5 ids of the data tables with integer composite keys.
+
+Revision ID: f607b59e8a0d
+Revises: f606b59e8a0d
+Create Date: 2026-10-19
+
+"""
+import hashlib
+import logging
+from datetime import datetime
+
+import pytz
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f607b59e8a0d'
+down_revision = 'f606b59e8a0d'
+branch_labels = None
+depends_on = None
+
+TIMEZONE = pytz.timezone('Europe/Paris')
+EPOCH = datetime(1970, 1, 1, tzinfo=pytz.utc)
+CHUNK_SIZE = 10000
+
+# Columns of the data tables after (usage_point_id, date).
+# The daily and detail dates are written in Europe/Paris, the max power dates are naive.
+TABLES = {
+    'consumption_daily': {
+        'columns': [
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.Column('blacklist', sa.Integer(), nullable=False),
+            sa.Column('fail_count', sa.Integer(), nullable=False),
+        ],
+        'index': ['usage_point_id', 'date'],
+        'timezone': TIMEZONE,
+    },
+    'production_daily': {
+        'columns': [
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.Column('blacklist', sa.Integer(), nullable=False),
+            sa.Column('fail_count', sa.Integer(), nullable=False),
+        ],
+        'index': ['usage_point_id', 'date'],
+        'timezone': TIMEZONE,
+    },
+    'consumption_detail': {
+        'columns': [
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.Column('interval', sa.Integer(), nullable=False),
+            sa.Column('measure_type', sa.Text(), nullable=False),
+            sa.Column('blacklist', sa.Integer(), nullable=False),
+            sa.Column('fail_count', sa.Integer(), nullable=False),
+        ],
+        'index': ['usage_point_id', 'date', 'value', 'interval'],
+        'timezone': TIMEZONE,
+    },
+    'production_detail': {
+        'columns': [
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.Column('interval', sa.Integer(), nullable=False),
+            sa.Column('measure_type', sa.Text(), nullable=False),
+            sa.Column('blacklist', sa.Integer(), nullable=False),
+            sa.Column('fail_count', sa.Integer(), nullable=False),
+        ],
+        'index': ['usage_point_id', 'date', 'value', 'interval'],
+        'timezone': TIMEZONE,
+    },
+    'consumption_daily_max_power': {
+        'columns': [
+            sa.Column('event_date', sa.DateTime(), nullable=True),
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.Column('blacklist', sa.Integer(), nullable=False),
+            sa.Column('fail_count', sa.Integer(), nullable=False),
+        ],
+        'index': ['usage_point_id', 'date'],
+        'timezone': None,
+        # Created nullable by c70a0702d76b, restored as such by the downgrade
+        'nullable_before': ['value'],
+    },
+}
+
+
+def column_names(table):
+    """Return the columns of a data table copied by the migrations."""
+    return ['usage_point_id', 'date'] + [column.name for column in TABLES[table]['columns']]
+
+
+def typed_columns(table):
+    """Return the typed columns of a data table copied by the migrations."""
+    return [
+        sa.column('usage_point_id', sa.Text()),
+        sa.column('date', sa.DateTime()),
+        *[sa.column(column.name, column.type) for column in TABLES[table]['columns']],
+    ]
+
+
+def epoch_minute(date):
+    """Return the minute of an aware date since 1970-01-01 UTC (see `database.keys.epoch_minute`)."""
+    return int((date - EPOCH).total_seconds()) // 60
+
+
+def source_timezone(connection, table):
+    """Return the time zone of the wall-clock dates stored in a data table.
+
+    The max power dates, and all the dates on SQLite and MySQL, are the wall-clock time in Europe/Paris. On
+    PostgreSQL, the aware daily and detail dates were converted to the time zone of the session when written.
+    """
+    if TABLES[table]['timezone'] is None or connection.dialect.name != 'postgresql':
+        return TIMEZONE
+    return pytz.timezone(connection.execute(sa.text("SELECT current_setting('TimeZone')")).scalar())
+
+
+def localize(table, timezone, row):
+    """Return the aware date of a row.
+
+    The wall-clock time of the hour repeated by the autumn DST change has two offsets: the one hashed in the MD5 id of
+    the row by the previous code is kept.
+    """
+    dst, standard = timezone.localize(row['date'], is_dst=True), timezone.localize(row['date'], is_dst=False)
+    if dst.utcoffset() == standard.utcoffset() or TABLES[table]['timezone'] is None:
+        return standard
+    for date in (dst, standard):
+        unique_id = hashlib.md5(f"{row['usage_point_id']}/{date.astimezone(TIMEZONE)}".encode('utf-8')).hexdigest()  # noqa: S324
+        if unique_id == row['id']:
+            return date
+    return standard
+
+
+def copy_rows(connection, table):
+    """Copy the rows of a data table to the new table, keyed by (usage_point_key, minute).
+
+    The rows of an unknown usage point (no key) and the rows sharing the key of a previous row are not copied: they
+    are logged.
+
+    Returns:
+        int: The number of rows copied.
+    """
+    keys = dict(connection.execute(sa.text('SELECT usage_point_id, key FROM usage_points')).all())
+    timezone = source_timezone(connection, table)
+    new_table = sa.table(
+        f'{table}_new',
+        sa.column('usage_point_key', sa.Integer()),
+        sa.column('minute', sa.Integer()),
+        *typed_columns(table),
+    )
+    result = connection.execution_options(stream_results=True).execute(
+        sa.select(sa.column('id', sa.String()), *typed_columns(table))
+        .select_from(sa.table(table))
+        .order_by(sa.column('usage_point_id'), sa.column('date'), sa.column('id'))
+    )
+    copied, orphans, usage_point_id, minutes = 0, {}, None, set()
+    while True:
+        rows = result.mappings().fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        values = []
+        for row in rows:
+            if row['usage_point_id'] not in keys:
+                # Rows sorted by date: number of rows, first and last date
+                orphan = orphans.setdefault(row['usage_point_id'], [0, row['date'], None])
+                orphan[0] += 1
+                orphan[2] = row['date']
+                continue
+            if row['usage_point_id'] != usage_point_id:
+                usage_point_id, minutes = row['usage_point_id'], set()
+            minute = epoch_minute(localize(table, timezone, row))
+            if minute in minutes:
+                logging.warning(
+                    f"[{usage_point_id}] {table} : la ligne du {row['date']} (id {row['id']}) a la même clé "
+                    "qu'une ligne précédente, elle n'est pas copiée"
+                )
+                continue
+            minutes.add(minute)
+            values.append(
+                {
+                    'usage_point_key': keys[usage_point_id],
+                    'minute': minute,
+                    **{name: row[name] for name in column_names(table)},
+                }
+            )
+        if values:
+            connection.execute(new_table.insert(), values)
+            copied += len(values)
+    for orphan, (count, first, last) in orphans.items():
+        logging.warning(
+            f"[{orphan}] {table} : {count} ligne(s) du {first} au {last} supprimée(s), le point de livraison n'existe "
+            "plus dans la table usage_points"
+        )
+    return copied
+
+
+def rename_table(dialect, source, target):
+    """Rename a table and its primary key."""
+    op.rename_table(source, target)
+    if dialect == 'postgresql':
+        op.execute(f'ALTER INDEX {source}_pkey RENAME TO {target}_pkey')
+
+
+def upgrade():
+    """Number the usage points and rebuild the data tables with the (usage_point_key, minute) primary key."""
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+
+    # Integer key of the usage points
+    op.add_column('usage_points', sa.Column('key', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_usage_points_key'), 'usage_points', ['key'], unique=True)
+    usage_point_ids = connection.execute(
+        sa.text('SELECT usage_point_id FROM usage_points ORDER BY usage_point_id')
+    ).scalars().all()
+    for key, usage_point_id in enumerate(usage_point_ids, start=1):
+        connection.execute(
+            sa.text('UPDATE usage_points SET key = :key WHERE usage_point_id = :usage_point_id'),
+            {'key': key, 'usage_point_id': usage_point_id},
+        )
+
+    # Data tables rebuilt with the (usage_point_key, minute) primary key, the minute of the UTC date
+    for table, definition in TABLES.items():
+        op.create_table(
+            f'{table}_new',
+            sa.Column('usage_point_key', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('minute', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('usage_point_id', sa.Text(), nullable=False),
+            sa.Column('date', sa.DateTime(), nullable=False),
+            *[column.copy() for column in definition['columns']],
+            sa.ForeignKeyConstraint(['usage_point_id'], ['usage_points.usage_point_id']),
+            sa.PrimaryKeyConstraint('usage_point_key', 'minute'),
+            sqlite_with_rowid=False,
+        )
+        copied = copy_rows(connection, table)
+        logging.info(f"Migration de {table} : {copied} ligne(s) copiée(s)")
+        op.drop_table(table)
+        rename_table(dialect, f'{table}_new', table)
+        op.create_index(f'ix_{table}_usage_point_id_date', table, definition['index'], unique=False)
+
+    if dialect == 'sqlite':
+        op.execute('ANALYZE')
+
+
+def downgrade():
+    """Rebuild the data tables with the MD5 ids."""
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+    for table, definition in TABLES.items():
+        nullable_before = definition.get('nullable_before', [])
+        op.create_table(
+            f'{table}_old',
+            sa.Column('id', sa.String(), nullable=False),
+            sa.Column('usage_point_id', sa.Text(), nullable=False),
+            sa.Column('date', sa.DateTime(), nullable=False),
+            *[
+                sa.Column(column.name, column.type, nullable=column.nullable or column.name in nullable_before)
+                for column in definition['columns']
+            ],
+            sa.ForeignKeyConstraint(['usage_point_id'], ['usage_points.usage_point_id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        # The MD5 of "usage_point_id/date" is computed as the previous code did, so it is copied chunk by chunk
+        old_table = sa.table(f'{table}_old', sa.column('id', sa.String()), *typed_columns(table))
+        result = connection.execution_options(stream_results=True).execute(
+            sa.select(*typed_columns(table)).select_from(sa.table(table))
+        )
+        while True:
+            rows = result.mappings().fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            values = []
+            for row in rows:
+                date = row['date']
+                if definition['timezone'] is not None:
+                    date = definition['timezone'].localize(date)
+                unique_id = hashlib.md5(f"{row['usage_point_id']}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
+                values.append({'id': unique_id, **row})
+            connection.execute(old_table.insert(), values)
+        op.drop_table(table)
+        rename_table(dialect, f'{table}_old', table)
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=True)
+        op.create_index(op.f(f'ix_{table}_usage_point_id'), table, ['usage_point_id'], unique=False)
+        op.create_index(f'ix_{table}_usage_point_id_date', table, definition['index'], unique=False)
+
+    op.drop_index(op.f('ix_usage_points_key'), table_name='usage_points')
+    with op.batch_alter_table('usage_points') as batch_op:
+        batch_op.drop_column('key')
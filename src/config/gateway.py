@@ -1,7 +1,8 @@
 """Gateway configuration."""
 import inspect
 
-from utils import edit_config, str2bool
+from config.store import CONFIG_STORE
+from utils import str2bool
 
 
 class Gateway:
@@ -39,14 +40,18 @@ class Gateway:
 
         # Save configuration
         if self.write:
-            edit_config(data={self.key: self.json}, comments=self.comments)
+            self.save()
+
+    def save(self):
+        """Save the configuration in the configuration file."""
+        CONFIG_STORE.edit(data={self.key: self.json}, comments=self.comments)
 
     def change(self, key: str, value: str, write_file: bool = True) -> None:
         """Change configuration."""
         setattr(self, f"_{key}", value)
         self.json[key] = value
         if write_file:
-            edit_config({self.key: {key: value}})
+            CONFIG_STORE.edit({self.key: {key: value}})
 
     @property
     def url(self) -> str:
@@ -1,8 +1,8 @@
 """Server configuration."""
 import inspect
 
-from database.config import DatabaseConfig
-from utils import edit_config, str2bool
+from config.store import CONFIG_STORE
+from utils import str2bool
 
 
 class HomeAssistantWs:
@@ -11,7 +11,6 @@ class HomeAssistantWs:
     def __init__(self, config: dict, write: bool = True) -> None:
         self.config: dict = config
         self.write = write
-        self.db = DatabaseConfig()
         # LOCAL PROPERTIES
         self._enable: bool = None
         self._ssl: bool = None
@@ -20,6 +19,8 @@ class HomeAssistantWs:
         self._purge: bool = None
         self._batch_size: int = None
         self._max_date: str = None
+        self._incremental: bool = None
+        self._window_size: int = None
         # PROPERTIES
         self.key: str = "home_assistant_ws"
         self.json: dict = {}
@@ -40,6 +41,8 @@ class HomeAssistantWs:
             "purge": False,
             "batch_size": 1000,
             "max_date": None,
+            "incremental": True,
+            "window_size": 10,
         }
 
     def load(self):  # noqa: PLR0912
@@ -79,21 +82,35 @@ class HomeAssistantWs:
             self.change(sub_key, self.config[self.key][sub_key], False)
         except Exception:
             self.change(sub_key, self.default()[sub_key], False)
+        try:
+            sub_key = "incremental"
+            self.change(sub_key, str2bool(self.config[self.key][sub_key]), False)
+        except Exception:
+            self.change(sub_key, self.default()[sub_key], False)
+        try:
+            sub_key = "window_size"
+            self.change(sub_key, int(self.config[self.key][sub_key]), False)
+        except Exception:
+            self.change(sub_key, self.default()[sub_key], False)
 
         # Save configuration
         if self.write:
-            edit_config(data={self.key: self.json}, comments=self.comments)
-            self.db.set(self.key, self.json)
+            self.save()
+
+    def save(self):
+        """Save the configuration in the configuration file and in the database."""
+        with CONFIG_STORE.batch():
+            CONFIG_STORE.edit(data={self.key: self.json}, comments=self.comments)
+            CONFIG_STORE.set_config(self.key, self.json)
 
     def change(self, key: str, value: str, write_file: bool = True) -> None:
         """Change configuration."""
         setattr(self, f"_{key}", value)
         self.json[key] = value
         if write_file:
-            edit_config({self.key: {key: value}})
-            current_config = self.db.get(self.key)
-            new_config = {**current_config, **{key: value}}
-            self.db.set(self.key, new_config)
+            with CONFIG_STORE.batch():
+                CONFIG_STORE.edit({self.key: {key: value}})
+                CONFIG_STORE.set_config(self.key, self.json)
 
     @property
     def enable(self) -> bool:
@@ -157,3 +174,21 @@ class HomeAssistantWs:
     @max_date.setter
     def max_date(self, value):
         self.change(inspect.currentframe().f_code.co_name, value)
+
+    @property
+    def incremental(self) -> bool:
+        """Home assistant WS incremental import (resume from the last imported hour)."""
+        return self._incremental
+
+    @incremental.setter
+    def incremental(self, value):
+        self.change(inspect.currentframe().f_code.co_name, value)
+
+    @property
+    def window_size(self) -> int:
+        """Home assistant WS maximum number of requests in flight."""
+        return self._window_size
+
+    @window_size.setter
+    def window_size(self, value):
+        self.change(inspect.currentframe().f_code.co_name, value)
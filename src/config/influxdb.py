@@ -2,8 +2,8 @@
 import inspect
 import sys
 
-from database.config import DatabaseConfig
-from utils import edit_config, str2bool
+from config.store import CONFIG_STORE
+from utils import str2bool
 
 
 class BatchOptions:
@@ -51,22 +51,22 @@ class BatchOptions:
         """Load configuration from file."""
         try:
             sub_key = "batch_size"
-            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key], False))
+            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key]), False)
         except Exception:
             self.change(sub_key, self.default()[sub_key], False)
         try:
             sub_key = "flush_interval"
-            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key], False))
+            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key]), False)
         except Exception:
             self.change(sub_key, self.default()[sub_key], False)
         try:
             sub_key = "jitter_interval"
-            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key], False))
+            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key]), False)
         except Exception:
             self.change(sub_key, self.default()[sub_key], False)
         try:
             sub_key = "retry_interval"
-            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key], False))
+            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key]), False)
         except Exception:
             self.change(sub_key, self.default()[sub_key], False)
         try:
@@ -76,7 +76,7 @@ class BatchOptions:
             self.change(sub_key, self.default()[sub_key], False)
         try:
             sub_key = "max_retries"
-            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key], False))
+            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key]), False)
         except Exception:
             self.change(sub_key, self.default()[sub_key], False)
         try:
@@ -86,20 +86,24 @@ class BatchOptions:
             self.change(sub_key, self.default()[sub_key], False)
         try:
             sub_key = "exponential_base"
-            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key], False))
+            self.change(sub_key, int(self.config[self.key][self.sub_key][sub_key]), False)
         except Exception:
             self.change(sub_key, self.default()[sub_key], False)
 
         # Save configuration
         if self.write:
-            edit_config(data={self.key: {self.sub_key: self.json}}, comments=self.comments)
+            self.save()
+
+    def save(self):
+        """Save the configuration in the configuration file."""
+        CONFIG_STORE.edit(data={self.key: {self.sub_key: self.json}}, comments=self.comments)
 
     def change(self, key: str, value: str, write_file: bool = True) -> None:
         """Change configuration."""
         setattr(self, f"_{key}", value)
         self.json[key] = value
         if write_file:
-            edit_config({self.key: {self.sub_key: {key: value}}})
+            CONFIG_STORE.edit({self.key: {self.sub_key: {key: value}}})
 
     @property
     def batch_size(self) -> int:
@@ -189,7 +193,6 @@ class InfluxDB:
     def __init__(self, config: dict, write: bool = True) -> None:
         self.config: dict = config
         self.write: dict = write
-        self.db = DatabaseConfig()
         # LOCAL PROPERTIES
         self._batching_options: BatchOptions = BatchOptions(self.config, self.write)
         self._enable: bool = self.default()["enable"]
@@ -202,6 +205,7 @@ class InfluxDB:
         self._method: Method = self.default()["method"]
         self._timezone: str = self.default()["timezone"]
         self._wipe: str = self.default()["wipe"]
+        self._workers: int = self.default()["workers"]
         # PROPERTIES
         self.key: str = "influxdb"
         self.json: dict = {"batching_options": self._batching_options.json}
@@ -221,6 +225,7 @@ class InfluxDB:
             "method": Method().synchronous,
             "timezone": "UTC",
             "wipe": False,
+            "workers": 4,
             "batching_options": self._batching_options.json,
         }
 
@@ -286,21 +291,30 @@ class InfluxDB:
             self.change(sub_key, self.config[self.key][sub_key], False)
         except Exception:
             self.change(sub_key, self.default()[sub_key], False)
+        try:
+            sub_key = "workers"
+            self.change(sub_key, int(self.config[self.key][sub_key]), False)
+        except Exception:
+            self.change(sub_key, self.default()[sub_key], False)
 
         # Save configuration
         if self.write:
-            edit_config({self.key: self.json})
-            self.db.set(self.key, self.json)
+            self.save()
+
+    def save(self):
+        """Save the configuration in the configuration file and in the database."""
+        with CONFIG_STORE.batch():
+            CONFIG_STORE.edit({self.key: self.json})
+            CONFIG_STORE.set_config(self.key, self.json)
 
     def change(self, key: str, value: str, write_file: bool = True) -> None:
         """Change configuration."""
         setattr(self, f"_{key}", value)
         self.json[key] = value
         if write_file:
-            edit_config({self.key: {key: value}})
-            current_config = self.db.get(self.key)
-            new_config = {**current_config, **{key: value}}
-            self.db.set(self.key, new_config)
+            with CONFIG_STORE.batch():
+                CONFIG_STORE.edit({self.key: {key: value}})
+                CONFIG_STORE.set_config(self.key, self.json)
 
     @property
     def enable(self) -> bool:
@@ -392,6 +406,15 @@ class InfluxDB:
     def wipe(self, value):
         self.change(inspect.currentframe().f_code.co_name, value)
 
+    @property
+    def workers(self) -> int:
+        """InfluxDB number of writer workers."""
+        return self._workers
+
+    @workers.setter
+    def workers(self, value):
+        self.change(inspect.currentframe().f_code.co_name, value)
+
     @property
     def batching_options(self) -> str:
         """Batching options."""
@@ -5,14 +5,7 @@ import sys
 from os import getenv
 from typing import List
 
-from deepdiff import DeepDiff
 from opentelemetry import trace
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
-from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
-from opentelemetry.sdk.trace import Resource, TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
 from __version__ import VERSION
 from config.backend import Backend
@@ -25,6 +18,7 @@ from config.mqtt import MQTT
 from config.myelectricaldata import MyElectricalData, UsagePointId
 from config.optel import OpTel
 from config.server import Server
+from config.store import CONFIG_STORE
 from const import URL_CONFIG_FILE
 from database.usage_points import DatabaseUsagePoints
 from utils import barcode_message, edit_config, load_config, logo, str2bool, title
@@ -33,7 +27,10 @@ locale.setlocale(locale.LC_ALL, "fr_FR.UTF-8")
 
 
 class Configuration:
-    """Configuration Templates."""
+    """Configuration Templates.
+
+    The sections are only parsed: they are saved in the configuration file and in the database by `save`.
+    """
 
     def __init__(self) -> None:
         self.dev = str2bool(getenv("DEV", "False"))
@@ -46,20 +43,41 @@ class Configuration:
         self.config = file_config.config
 
         # Load config
-        self.opentelemetry: OpTel = OpTel(self.config)
-        self.logging: Logging = Logging(self.config)
-        self.myelectricaldata: MyElectricalData = MyElectricalData(self.config)
-        self.influxdb: InfluxDB = InfluxDB(self.config)
-        self.home_assistant_ws: HomeAssistantWs = HomeAssistantWs(self.config)
-        self.home_assistant: HomeAssistant = HomeAssistant(self.config)
-        self.mqtt: MQTT = MQTT(self.config)
-        self.gateway: Gateway = Gateway(self.config)
-        self.backend: Backend = Backend(self.config)
-        self.server: Server = Server(self.config)
+        self.opentelemetry: OpTel = OpTel(self.config, write=False)
+        self.logging: Logging = Logging(self.config, write=False)
+        self.myelectricaldata: MyElectricalData = MyElectricalData(self.config, write=False)
+        self.influxdb: InfluxDB = InfluxDB(self.config, write=False)
+        self.home_assistant_ws: HomeAssistantWs = HomeAssistantWs(self.config, write=False)
+        self.home_assistant: HomeAssistant = HomeAssistant(self.config, write=False)
+        self.mqtt: MQTT = MQTT(self.config, write=False)
+        self.gateway: Gateway = Gateway(self.config, write=False)
+        self.backend: Backend = Backend(self.config, write=False)
+        self.server: Server = Server(self.config, write=False)
+
+    def save(self):
+        """Save the sections in the configuration file and in the database (one write, one transaction)."""
+        with CONFIG_STORE.batch():
+            for section in [
+                self.opentelemetry,
+                self.logging,
+                self.myelectricaldata,
+                self.influxdb,
+                self.home_assistant_ws,
+                self.home_assistant,
+                self.mqtt,
+                self.gateway,
+                self.backend,
+                self.server,
+            ]:
+                section.save()
 
 
 class Config:
-    """Represent the configuration settings for the application."""
+    """Represent the configuration settings for the application.
+
+    The construction is cheap (parse of the file, logging and tracer), the side effects (check and save of the
+    configuration, cleaning of the database) are run once by `setup`, when the application starts.
+    """
 
     def __init__(self):
         self.config = Configuration()
@@ -87,8 +105,15 @@ class Config:
         self.debug = str2bool(getenv("DEBUG", "False"))
 
         self.tracer = None
+        self.ready = False
         self.load_logging()
         self.setup_tracing()
+
+    def setup(self):
+        """Run the side effects of the configuration, once (check, save, display, cleaning of the database)."""
+        if self.ready:
+            return
+        self.ready = True
         logo(VERSION)
 
         comments = None
@@ -99,6 +124,7 @@ class Config:
                 self.default[key] = attr.default()
 
         self.check_config()
+        self.config.save()
         if self.dev:
             barcode_message("DEV MODE")
             exemple_file = "config.example.yaml"
@@ -126,6 +152,8 @@ class Config:
 
     def check_config(self):
         """Check current config file."""
+        from deepdiff import DeepDiff  # Only needed at startup
+
         # CHECK CLASSIC KEYS
         diff_config = DeepDiff(self.default, self.config.config, ignore_order=True, exclude_paths=["myelectricaldata"])
         found = ""
@@ -272,6 +300,12 @@ class Config:
     def setup_tracing(self):
         """OTEL setup."""
         if self.config.opentelemetry.enable: # no pragma: no cover
+            # The SDK and the instrumentations are only imported when the tracing is enabled
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            from opentelemetry.instrumentation.requests import RequestsInstrumentor
+            from opentelemetry.sdk.trace import Resource, TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
             RequestsInstrumentor().instrument()
             resource_attributes = {
                 "service.name": self.config.opentelemetry.service_name,
@@ -296,12 +330,16 @@ class Config:
     def tracing_sqlalchemy(self):
         """SQLAchemy Tracing."""
         if self.config.opentelemetry.enable and "sqlalchemy" in self.config.opentelemetry.extension:
+            from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
             logging.debug("[OpenTelemetry] SQLAchemy loaded")
             SQLAlchemyInstrumentor().instrument(enable_commenter=True, commenter_options={})
 
     def tracing_fastapi(self, app):
         """FastAPI Tracing."""
         if self.config.opentelemetry.enable and "fastapi" in self.config.opentelemetry.extension:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
             logging.debug("[OpenTelemetry] FastAPI loaded")
             FastAPIInstrumentor.instrument_app(app)
 
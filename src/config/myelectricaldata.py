@@ -3,9 +3,9 @@ import inspect
 import sys
 from datetime import datetime
 
+from config.store import CONFIG_STORE
 from const import TIMEZONE_UTC
-from database.usage_points import DatabaseUsagePoints
-from utils import edit_config, str2bool
+from utils import str2bool
 
 
 class Plan:
@@ -25,7 +25,6 @@ class UsagePointId:
         self.usage_point_id: str = usage_point_id
         self.config: dict = config
         self.write: bool = write
-        self.db = DatabaseUsagePoints(self.usage_point_id)
         # LOCAL PROPERTIES
         self._enable: bool = None
         self._name: str = None
@@ -306,11 +305,16 @@ class UsagePointId:
 
         # Save configuration
         if self.write:
-            edit_config({self.key: {self.usage_point_id: self.json}})
-            data = {}
-            for key, value in self.json.items():
-                data[key] = self.check_format(key, value)
-            self.db.set(data)
+            self.save()
+
+    def save(self):
+        """Save the configuration in the configuration file and in the database."""
+        data = {}
+        for key, value in self.json.items():
+            data[key] = self.check_format(key, value)
+        with CONFIG_STORE.batch():
+            CONFIG_STORE.edit({self.key: {self.usage_point_id: self.json}})
+            CONFIG_STORE.set_usage_point(self.usage_point_id, data)
 
     def __str__(self):
         return f"UsagePointId(usage_point_id={self.usage_point_id}, json={self.json})"
@@ -340,8 +344,9 @@ class UsagePointId:
         setattr(self, f"_{key}", value)
         self.json[key] = value
         if write_file:
-            edit_config({self.key: {self.usage_point_id: {key: value}}})
-            self.db.set_value(key, self.check_format(key, value))
+            with CONFIG_STORE.batch():
+                CONFIG_STORE.edit({self.key: {self.usage_point_id: {key: value}}})
+                CONFIG_STORE.set_usage_point(self.usage_point_id, {key: self.check_format(key, value)})
 
     @property
     def enable(self) -> bool:
@@ -671,8 +676,9 @@ class UsagePointId:
 class MyElectricalData:
     """MyElectricalData configuration."""
 
-    def __init__(self, config: dict) -> None:
+    def __init__(self, config: dict, write: bool = True) -> None:
         self.config = config
+        self.write = write
         self.key = "myelectricaldata"
         self.usage_point_config = {}
         self.json: dict = {}
@@ -688,10 +694,15 @@ class MyElectricalData:
             self.config = {"myelectricaldata": self.default()}
 
         for usage_point_id in self.config["myelectricaldata"]:
-            usage_point_config: UsagePointId = UsagePointId(self.config, str(usage_point_id))
+            usage_point_config: UsagePointId = UsagePointId(self.config, str(usage_point_id), self.write)
             self.usage_point_config[usage_point_id] = usage_point_config
             self.json[usage_point_id] = usage_point_config.json
 
+    def save(self):
+        """Save the configuration of the usage points in the configuration file and in the database."""
+        for usage_point_config in self.usage_point_config.values():
+            usage_point_config.save()
+
     def new(self, usage_point_id: str):
         """Create new usage point."""
         usage_point_config: UsagePointId = UsagePointId(self.config, str(usage_point_id))
@@ -1,8 +1,8 @@
 """OpenTelemetry configuration."""
 import inspect
 
-from database.config import DatabaseConfig
-from utils import edit_config, str2bool
+from config.store import CONFIG_STORE
+from utils import str2bool
 
 
 class OpTel:
@@ -11,7 +11,6 @@ class OpTel:
     def __init__(self, config: dict, write: bool = True) -> None:
         self.config = config
         self.write = write
-        self.db = DatabaseConfig()
         # LOCAL PROPERTIES
         self._enable: bool = None
         self._service_name: str = None
@@ -65,18 +64,22 @@ class OpTel:
 
         # Save configuration
         if self.write:
-            edit_config(data={self.key: self.json}, comments=self.comments)
-            self.db.set(self.key, self.json)
+            self.save()
+
+    def save(self):
+        """Save the configuration in the configuration file and in the database."""
+        with CONFIG_STORE.batch():
+            CONFIG_STORE.edit(data={self.key: self.json}, comments=self.comments)
+            CONFIG_STORE.set_config(self.key, self.json)
 
     def change(self, key: str, value: str, write_file: bool = True) -> None:
         """Change configuration."""
         setattr(self, f"_{key}", value)
         self.json[key] = value
         if write_file:
-            edit_config({self.key: {key: value}})
-            current_config = self.db.get(self.key)
-            new_config = {**current_config, **{key: value}}
-            self.db.set(self.key, new_config)
+            with CONFIG_STORE.batch():
+                CONFIG_STORE.edit({self.key: {key: value}})
+                CONFIG_STORE.set_config(self.key, self.json)
 
     @property
     def enable(self) -> bool:
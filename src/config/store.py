@@ -0,0 +1,127 @@
+"""Pending changes of the configuration, saved in one write of the file and one transaction."""
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from mergedeep import Strategy, merge
+
+from utils import edit_config
+
+
+class ConfigChanges:
+    """Changes of the configuration not written yet."""
+
+    def __init__(self):
+        """Initialize ConfigChanges."""
+        self.file: dict = {}
+        self.comments: dict = {}
+        self.config: dict = {}
+        self.usage_points: dict = {}
+
+
+class ConfigStore:
+    """Store of the configuration changes.
+
+    The sections record their changes (`edit`, `set_config`, `set_usage_point`) instead of writing them. Out of a
+    batch, a change is committed at once; in a batch (`batch`), the changes are accumulated and committed at the end of
+    the outermost batch: the configuration file is written once and the database is updated in one transaction.
+
+    The changes of a batch belong to its thread, so a change made by another thread is neither delayed nor committed
+    by the batch. The changes of a batch left by an exception are dropped.
+
+    Example:
+        with CONFIG_STORE.batch():
+            usage_point_config.name = "Maison"
+            usage_point_config.plan = "HC/HP"
+    """
+
+    def __init__(self):
+        """Initialize ConfigStore."""
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @contextmanager
+    def batch(self):
+        """Accumulate the changes of the block and commit them at the end of the outermost batch, if it succeeds."""
+        if getattr(self.local, "changes", None) is not None:
+            yield self
+            return
+        self.local.changes = ConfigChanges()
+        try:
+            yield self
+        except BaseException:
+            self.local.changes = None
+            raise
+        changes, self.local.changes = self.local.changes, None
+        self.commit(changes)
+
+    @contextmanager
+    def changes(self):
+        """Yield the changes of the running batch, or new changes committed at the end of the block out of a batch.
+
+        Yields:
+            ConfigChanges: The changes to update.
+        """
+        changes = getattr(self.local, "changes", None)
+        if changes is not None:
+            yield changes
+            return
+        changes = ConfigChanges()
+        yield changes
+        self.commit(changes)
+
+    def edit(self, data: dict, comments: Optional[dict] = None):
+        """Record a change of the configuration file.
+
+        Args:
+            data (dict): The values, merged in the file.
+            comments (dict, optional): The comments of the keys. Defaults to None.
+        """
+        with self.changes() as changes:
+            merge(changes.file, data, strategy=Strategy.REPLACE)
+            if comments is not None:
+                changes.comments.update(comments)
+
+    def set_config(self, key: str, value: dict):
+        """Record a change of a section in the config table.
+
+        Args:
+            key (str): The section.
+            value (dict): The whole section.
+        """
+        with self.changes() as changes:
+            changes.config[key] = dict(value)
+
+    def set_usage_point(self, usage_point_id: str, data: dict):
+        """Record a change of the columns of a usage point.
+
+        Args:
+            usage_point_id (str): The usage point id.
+            data (dict): The values by column.
+        """
+        with self.changes() as changes:
+            changes.usage_points.setdefault(usage_point_id, {}).update(data)
+
+    def commit(self, changes: ConfigChanges):
+        """Write changes: one write of the configuration file, one transaction in the database.
+
+        Args:
+            changes (ConfigChanges): The changes.
+        """
+        # The store is imported by the backend configuration, which is read before the database is created
+        from database import DB
+        from database.config import DatabaseConfig
+        from database.usage_points import DatabaseUsagePoints
+
+        with self.lock:
+            if changes.file:
+                edit_config(data=changes.file, comments=changes.comments or None)
+            if changes.config or changes.usage_points:
+                with DB.unit_of_work():
+                    for key, value in changes.config.items():
+                        DatabaseConfig().set(key, value)
+                    for usage_point_id, data in changes.usage_points.items():
+                        DatabaseUsagePoints(usage_point_id).set(data)
+
+
+CONFIG_STORE = ConfigStore()
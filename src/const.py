@@ -20,6 +20,10 @@ DETAIL_MAX_DAYS = 728
 TEMPO_BEGIN = 600
 TEMPO_END = 2200
 
+# Thread pools (import jobs, API)
+JOB_WORKERS = 3
+READ_WORKERS = 8
+
 # Return code
 CODE_200_SUCCESS = 200
 CODE_204_NO_CONTENT = 204
@@ -7,6 +7,7 @@ from db_schema import (
 )
 
 from . import DB
+from .records import ADDRESSES_CACHE, Record
 
 
 class DatabaseAddresses:
@@ -19,8 +20,17 @@ class DatabaseAddresses:
 
     def get(
         self,
-    ) -> Addresses:
-        """Retrieve the address associated with the given usage point ID."""
+    ) -> Record:
+        """Retrieve the address associated with the given usage point ID.
+
+        The row is cached for the process (read-only record), until a write of the address.
+        """
+        if self.session.in_unit_of_work():
+            return Record.of(self.load())
+        return ADDRESSES_CACHE.get(self.usage_point_id, self.load)
+
+    def load(self) -> Addresses:
+        """Read the address from the database."""
         query = (
             select(Addresses)
             .join(UsagePoints.relation_addressess)
@@ -30,6 +40,10 @@ class DatabaseAddresses:
         self.session.close()
         return data
 
+    def invalidate(self):
+        """Remove the address from the cache (after a write)."""
+        ADDRESSES_CACHE.invalidate(self.usage_point_id, self.session)
+
     def set(self, data, count=0):
         """Set the address associated with the given usage point ID.
 
@@ -68,6 +82,7 @@ class DatabaseAddresses:
             )
         self.session.flush()
         self.session.close()
+        self.invalidate()
 
     def delete(self):
         """Delete the address associated with the given usage point ID.
@@ -78,4 +93,5 @@ class DatabaseAddresses:
         self.session.execute(delete(Addresses).where(Addresses.usage_point_id == self.usage_point_id))
         self.session.flush()
         self.session.close()
+        self.invalidate()
         return True
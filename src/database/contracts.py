@@ -8,6 +8,7 @@ from db_schema import (
 )
 
 from . import DB
+from .records import CONTRACTS_CACHE, Record
 
 
 class DatabaseContracts:
@@ -18,12 +19,20 @@ class DatabaseContracts:
         self.session = DB.session()
         self.usage_point_id = usage_point_id
 
-    def get(self) -> Contracts:
+    def get(self) -> Record:
         """Retrieve the contract associated with the given usage point ID.
 
+        The row is cached for the process (read-only record), until a write of the contract.
+
         Returns:
-            Contracts: The contract object if found, None otherwise.
+            Record: The contract if found, None otherwise.
         """
+        if self.session.in_unit_of_work():
+            return Record.of(self.load())
+        return CONTRACTS_CACHE.get(self.usage_point_id, self.load)
+
+    def load(self) -> Contracts:
+        """Read the contract from the database."""
         query = (
             select(Contracts)
             .join(UsagePoints.relation_contract)
@@ -33,6 +42,10 @@ class DatabaseContracts:
         self.session.close()
         return data
 
+    def invalidate(self):
+        """Remove the contract from the cache (after a write)."""
+        CONTRACTS_CACHE.invalidate(self.usage_point_id, self.session)
+
     def set(self, data: dict, count: int = 0) -> None:
         """Set the contract details for the given usage point ID.
 
@@ -91,6 +104,7 @@ class DatabaseContracts:
             )
         self.session.flush()
         self.session.close()
+        self.invalidate()
 
     def delete(self):
         """Delete the contract associated with the given usage point ID.
@@ -104,4 +118,5 @@ class DatabaseContracts:
         self.session.execute(delete(Contracts).where(Contracts.usage_point_id == self.usage_point_id))
         self.session.flush()
         self.session.close()
+        self.invalidate()
         return True
@@ -1,6 +1,5 @@
 """Manage Config table in database."""
 
-import hashlib
 import logging
 from datetime import datetime, timedelta
 
@@ -10,6 +9,8 @@ from const import MAX_IMPORT_TRY, TIMEZONE
 from db_schema import ConsumptionDaily, ProductionDaily, UsagePoints
 
 from . import DB
+from .keys import data_key, where_data_key
+from .search import DatatableSearch
 
 
 class DatabaseDaily:
@@ -38,42 +39,96 @@ class DatabaseDaily:
         self.session.close()
         return data
 
-    def get_datatable(
-        self,
-        order_column="date",
-        order_dir="asc",
-        search=None,
+    def get_all_by_chunk(self, chunk_size=1000):
+        """Retrieve all daily data, chunk by chunk in ascending date order.
+
+        The chunks are read with a keyset pagination on (date, id), so only one chunk is kept in memory and no cursor
+        stays open between two chunks.
+
+        Args:
+            chunk_size (int, optional): The number of records by chunk. Defaults to 1000.
+
+        Yields:
+            list: A chunk of records.
+        """
+        query = (
+            select(self.table)
+            .join(self.relation)
+            .where(UsagePoints.usage_point_id == self.usage_point_id)
+            .order_by(asc(self.table.date), asc(self.table.minute))
+            .limit(chunk_size)
+        )
+        last = None
+        while True:
+            if last is None:
+                chunk = self.session.scalars(query).all()
+            else:
+                chunk = self.session.scalars(
+                    query.filter(
+                        (self.table.date > last.date)
+                        | ((self.table.date == last.date) & (self.table.minute > last.minute))
+                    )
+                ).all()
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            last = chunk[-1]
+
+    def datatable_query(self, search=None):
+        """Build the query of the datatable (data until yesterday, filtered by the search term).
+
+        The query filters the indexed columns (usage_point_id, date), see `DatatableSearch`.
+
+        Args:
+            search (str, optional): The search term. Defaults to None.
+
+        Returns:
+            Select: The query.
+        """
+        yesterday = datetime.combine(datetime.now(tz=TIMEZONE) - timedelta(days=1), datetime.max.time())
+        query = (
+            select(self.table)
+            .where(self.table.usage_point_id == self.usage_point_id)
+            .where(self.table.date <= yesterday)
+        )
+        where = DatatableSearch(search).where(self.table)
+        if where is not None:
+            query = query.where(where)
+        return query
+
+    def get_datatable(  # noqa: PLR0913
+        self, order_column="date", order_dir="asc", search=None, start=0, length=None
     ):
-        """Retrieve datatable for a given usage point, search term, and measurement direction.
+        """Retrieve a page of the datatable for a given usage point, search term, and measurement direction.
 
         Args:
             order_column (str, optional): The column to order the datatable by. Defaults to "date".
             order_dir (str, optional): The direction to order the datatable. Defaults to "asc".
             search (str, optional): The search term. Defaults to None.
+            start (int, optional): The index of the first record of the page. Defaults to 0.
+            length (int, optional): The number of records of the page. Defaults to None (all the records).
 
         Returns:
-            list: The datatable.
+            list: The page of the datatable.
         """
-        yesterday = datetime.combine(datetime.now(tz=TIMEZONE) - timedelta(days=1), datetime.max.time())
-        sort = asc(order_column) if order_dir == "desc" else desc(order_column)
-        if search is not None and search != "":
-            result = self.session.scalars(
-                select(self.table)
-                .join(self.relation)
-                .where(UsagePoints.usage_point_id == self.usage_point_id)
-                .where((self.table.date.like(f"%{search}%")) | (self.table.value.like(f"%{search}%")))
-                .where(self.table.date <= yesterday)
-                .order_by(sort)
-            )
-        else:
-            result = self.session.scalars(
-                select(self.table)
-                .join(self.relation)
-                .where(UsagePoints.usage_point_id == self.usage_point_id)
-                .where(self.table.date <= yesterday)
-                .order_by(sort)
-            )
-        return result.all()
+        sort = asc if order_dir == "desc" else desc
+        query = self.datatable_query(search).order_by(sort(order_column), sort(self.table.minute)).offset(start)
+        if length is not None and length >= 0:
+            query = query.limit(length)
+        return self.session.scalars(query).all()
+
+    def get_datatable_count(self, search=None):
+        """Retrieve the number of records of the datatable matching the search term.
+
+        Args:
+            search (str, optional): The search term. Defaults to None.
+
+        Returns:
+            int: The number of records.
+        """
+        return self.session.scalar(select(func.count()).select_from(self.datatable_query(search).subquery()))
 
     def get_count(self):
         """Retrieve the count of daily data for a given usage point and measurement direction.
@@ -100,8 +155,8 @@ class DatabaseDaily:
             object: The data.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-        data = self.session.scalars(select(self.table).join(self.relation).where(self.table.id == unique_id)).first()
+        query = select(self.table).where(where_data_key(self.table, self.usage_point_id, date))
+        data = self.session.scalars(query).first()
         self.session.flush()
         self.session.close()
         return data
@@ -200,8 +255,8 @@ class DatabaseDaily:
             int: The updated fail count.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-        query = select(self.table).join(self.relation).where(self.table.id == unique_id)
+        usage_point_key, minute = data_key(self.usage_point_id, date)
+        query = select(self.table).where(self.table.usage_point_key == usage_point_key, self.table.minute == minute)
         logging.debug(query.compile(compile_kwargs={"literal_binds": True}))
         daily = self.session.scalars(query).one_or_none()
         if daily is not None:
@@ -211,7 +266,6 @@ class DatabaseDaily:
                 fail_count = 0
             else:
                 blacklist = 0
-            daily.id = unique_id
             daily.usage_point_id = self.usage_point_id
             daily.date = date
             daily.value = 0
@@ -221,7 +275,8 @@ class DatabaseDaily:
             fail_count = 0
             self.session.add(
                 self.table(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     value=0,
@@ -323,12 +378,11 @@ class DatabaseDaily:
             fail_count (int, optional): The fail count. Defaults to 0.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-        query = select(self.table).join(self.relation).where(self.table.id == unique_id)
+        usage_point_key, minute = data_key(self.usage_point_id, date)
+        query = select(self.table).where(self.table.usage_point_key == usage_point_key, self.table.minute == minute)
         daily = self.session.scalars(query).one_or_none()
         logging.debug(query.compile(compile_kwargs={"literal_binds": True}))
         if daily is not None:
-            daily.id = unique_id
             daily.usage_point_id = self.usage_point_id
             daily.date = date
             daily.value = value
@@ -337,7 +391,8 @@ class DatabaseDaily:
         else:
             self.session.add(
                 self.table(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     value=value,
@@ -368,8 +423,9 @@ class DatabaseDaily:
                 self.table.blacklist: 0,
                 self.table.fail_count: 0,
             }
-            unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-            self.session.execute(update(self.table, values=values).where(self.table.id == unique_id))
+            self.session.execute(
+                update(self.table, values=values).where(where_data_key(self.table, self.usage_point_id, date))
+            )
             self.session.flush()
             return True
         return False
@@ -385,8 +441,7 @@ class DatabaseDaily:
         """
         if date is not None:
             date = date.astimezone(TIMEZONE)
-            unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-            self.session.execute(delete(self.table).where(self.table.id == unique_id))
+            self.session.execute(delete(self.table).where(where_data_key(self.table, self.usage_point_id, date)))
         else:
             self.session.execute(delete(self.table).where(self.table.usage_point_id == self.usage_point_id))
         self.session.flush()
@@ -403,15 +458,16 @@ class DatabaseDaily:
             bool: True if the data was blacklisted or unblacklisted, False otherwise.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-        query = select(self.table).join(self.relation).where(self.table.id == unique_id)
+        usage_point_key, minute = data_key(self.usage_point_id, date)
+        query = select(self.table).where(self.table.usage_point_key == usage_point_key, self.table.minute == minute)
         daily = self.session.scalars(query).one_or_none()
         if daily is not None:
             daily.blacklist = action
         else:
             self.session.add(
                 self.table(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     value=0,
@@ -1,6 +1,5 @@
 """Manage Config table in database."""
 
-import hashlib
 import logging
 from datetime import datetime, timedelta
 
@@ -10,6 +9,9 @@ from const import MAX_IMPORT_TRY, TIMEZONE
 from db_schema import ConsumptionDetail, ProductionDetail, UsagePoints
 
 from . import DB
+from .keys import data_key, where_data_key
+from .partitions import PARTITIONS
+from .search import DatatableSearch
 
 
 class DatabaseDetail:
@@ -61,6 +63,7 @@ class DatabaseDetail:
                 select(self.table)
                 .join(self.relation)
                 .where(self.table.usage_point_id == self.usage_point_id)
+                .where(*PARTITIONS.range_clauses(self.table, begin, end))
                 .filter(self.table.date >= begin)
                 .order_by(sort)
             ).all()
@@ -69,6 +72,7 @@ class DatabaseDetail:
                 select(self.table)
                 .join(self.relation)
                 .where(self.table.usage_point_id == self.usage_point_id)
+                .where(*PARTITIONS.range_clauses(self.table, begin, end))
                 .filter(self.table.date <= end)
                 .order_by(sort)
             ).all()
@@ -77,47 +81,107 @@ class DatabaseDetail:
                 select(self.table)
                 .join(self.relation)
                 .where(self.table.usage_point_id == self.usage_point_id)
+                .where(*PARTITIONS.range_clauses(self.table, begin, end))
                 .filter(self.table.date <= end)
                 .filter(self.table.date >= begin)
                 .order_by(sort)
             ).all()
 
-    def get_datatable(
-        self,
-        order_column="date",
-        order_dir="asc",
-        search=None,
+    def get_all_by_chunk(self, begin=None, chunk_size=1000):
+        """Retrieve all records from the database, chunk by chunk in ascending date order.
+
+        The chunks are read with a keyset pagination on (date, id), so only one chunk is kept in memory and no cursor
+        stays open between two chunks.
+
+        Args:
+            begin (datetime, optional): The start date of the range. Defaults to None.
+            chunk_size (int, optional): The number of records by chunk. Defaults to 1000.
+
+        Yields:
+            list: A chunk of records.
+        """
+        query = (
+            select(self.table)
+            .join(self.relation)
+            .where(self.table.usage_point_id == self.usage_point_id)
+            .order_by(asc(self.table.date), asc(self.table.minute))
+            .limit(chunk_size)
+        )
+        if begin is not None:
+            query = query.filter(self.table.date >= begin.astimezone(TIMEZONE))
+            query = query.where(*PARTITIONS.range_clauses(self.table, begin.astimezone(TIMEZONE)))
+        last = None
+        while True:
+            if last is None:
+                chunk = self.session.scalars(query).all()
+            else:
+                chunk = self.session.scalars(
+                    query.filter(
+                        (self.table.date > last.date)
+                        | ((self.table.date == last.date) & (self.table.minute > last.minute))
+                    )
+                ).all()
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            last = chunk[-1]
+
+    def datatable_query(self, search=None):
+        """Build the query of the datatable (data until yesterday, filtered by the search term).
+
+        The query filters the indexed columns (usage_point_id, date): the free text search (LIKE) is disabled on the
+        detail table, a term which is neither a date nor a value matches nothing. See `DatatableSearch`.
+
+        Args:
+            search (str, optional): The search term. Defaults to None.
+
+        Returns:
+            Select: The query.
+        """
+        yesterday = datetime.combine(datetime.now(tz=TIMEZONE) - timedelta(days=1), datetime.max.time())
+        query = (
+            select(self.table)
+            .where(self.table.usage_point_id == self.usage_point_id)
+            .where(self.table.date <= yesterday)
+        )
+        where = DatatableSearch(search).where(self.table, free_text=False)
+        if where is not None:
+            query = query.where(where)
+        return query
+
+    def get_datatable(  # noqa: PLR0913
+        self, order_column="date", order_dir="asc", search=None, start=0, length=None
     ):
-        """Retrieve datatable from the database.
+        """Retrieve a page of the datatable from the database.
 
         Args:
             order_column (str, optional): The column to order the datatable by. Defaults to "date".
-            order_dir (str, optional): The order direction. Defaults to "asc".
-            search (str, optional): The search query to filter the datatable. Defaults to None.
+            order_dir (str, optional): The direction to order the datatable. Defaults to "asc".
+            search (str, optional): The search term. Defaults to None.
+            start (int, optional): The index of the first record of the page. Defaults to 0.
+            length (int, optional): The number of records of the page. Defaults to None (all the records).
 
         Returns:
-            list: A list of datatable records.
+            list: The page of the datatable.
         """
-        yesterday = datetime.combine(datetime.now(tz=TIMEZONE) - timedelta(days=1), datetime.max.time())
-        sort = asc(order_column) if order_dir == "desc" else desc(order_column)
-        if search is not None and search != "":
-            result = self.session.scalars(
-                select(self.table)
-                .join(self.relation)
-                .where(UsagePoints.usage_point_id == self.usage_point_id)
-                .where((self.table.date.like(f"%{search}%")) | (self.table.value.like(f"%{search}%")))
-                .where(self.table.date <= yesterday)
-                .order_by(sort)
-            )
-        else:
-            result = self.session.scalars(
-                select(self.table)
-                .join(self.relation)
-                .where(UsagePoints.usage_point_id == self.usage_point_id)
-                .where(self.table.date <= yesterday)
-                .order_by(sort)
-            )
-        return result.all()
+        sort = asc if order_dir == "desc" else desc
+        query = self.datatable_query(search).order_by(sort(order_column), sort(self.table.minute)).offset(start)
+        if length is not None and length >= 0:
+            query = query.limit(length)
+        return self.session.scalars(query).all()
+
+    def get_datatable_count(self, search=None):
+        """Retrieve the number of records of the datatable matching the search term.
+
+        Args:
+            search (str, optional): The search term. Defaults to None.
+
+        Returns:
+            int: The number of records.
+        """
+        return self.session.scalar(select(func.count()).select_from(self.datatable_query(search).subquery()))
 
     def get_count(self):
         """Retrieve the count of records for a specific usage point and measurement direction.
@@ -142,8 +206,8 @@ class DatabaseDetail:
             object: The data for the specified date.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-        return self.session.scalars(select(self.table).join(self.relation).where(self.table.id == unique_id)).first()
+        query = select(self.table).where(where_data_key(self.table, self.usage_point_id, date))
+        return self.session.scalars(query).first()
 
     def get_range(
         self,
@@ -173,6 +237,7 @@ class DatabaseDetail:
             .where(self.table.usage_point_id == self.usage_point_id)
             .where(self.table.date >= begin)
             .where(self.table.date <= end)
+            .where(*PARTITIONS.range_clauses(self.table, begin, end))
             .order_by(order)
         )
         logging.debug(query.compile(compile_kwargs={"literal_binds": True}))
@@ -228,15 +293,23 @@ class DatabaseDetail:
             bool: True if the data record exists, False otherwise.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
         current_data = self.session.scalars(
-            select(self.table).join(self.relation).where(self.table.id == unique_id)
+            select(self.table).where(where_data_key(self.table, self.usage_point_id, date))
         ).one_or_none()
         if current_data is None:
             return False
         else:
             return True
 
+    def prepare(self, begin: datetime, end: datetime):
+        """Create the monthly partitions of a range before an import (PostgreSQL with partitioned detail tables).
+
+        Args:
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+        """
+        PARTITIONS.prepare(self.table.__tablename__, begin.astimezone(TIMEZONE), end.astimezone(TIMEZONE))
+
     def insert(  # noqa: PLR0913
         self,
         date: datetime,
@@ -255,10 +328,9 @@ class DatabaseDetail:
             fail_count (int, optional): The fail count of the record. Defaults to 0.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
+        usage_point_key, minute = data_key(self.usage_point_id, date)
         detail = self.get_date(date)
         if detail is not None:
-            detail.id = unique_id
             detail.usage_point_id = self.usage_point_id
             detail.date = date
             detail.value = value
@@ -267,9 +339,11 @@ class DatabaseDetail:
             detail.blacklist = blacklist
             detail.fail_count = fail_count
         else:
+            PARTITIONS.ensure(self.session, self.table.__tablename__, date)
             self.session.add(
                 self.table(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     value=value,
@@ -336,8 +410,7 @@ class DatabaseDetail:
         """
         if date is not None:
             date = date.astimezone(TIMEZONE)
-            unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-            self.session.execute(delete(self.table).where(self.table.id == unique_id))
+            self.session.execute(delete(self.table).where(where_data_key(self.table, self.usage_point_id, date)))
         else:
             self.session.execute(delete(self.table).where(self.table.usage_point_id == self.usage_point_id))
         self.session.flush()
@@ -354,8 +427,7 @@ class DatabaseDetail:
         """
         if date is not None:
             date = date.astimezone(TIMEZONE)
-            unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-            self.session.execute(delete(self.table).where(self.table.id == unique_id))
+            self.session.execute(delete(self.table).where(where_data_key(self.table, self.usage_point_id, date)))
         else:
             self.session.execute(delete(self.table).where(self.table.usage_point_id == self.usage_point_id))
         self.session.flush()
@@ -410,8 +482,8 @@ class DatabaseDetail:
             int: The updated fail count.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-        query = select(self.table).join(self.relation).where(self.table.id == unique_id)
+        usage_point_key, minute = data_key(self.usage_point_id, date)
+        query = select(self.table).where(self.table.usage_point_key == usage_point_key, self.table.minute == minute)
         detail = self.session.scalars(query).one_or_none()
         if detail is not None:
             fail_count = int(detail.fail_count) + 1
@@ -429,9 +501,11 @@ class DatabaseDetail:
             detail.fail_count = fail_count
         else:
             fail_count = 0
+            PARTITIONS.ensure(self.session, self.table.__tablename__, date)
             self.session.add(
                 self.table(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     value=0,
@@ -503,15 +577,17 @@ class DatabaseDetail:
             bool: True if the data was blacklisted or unblacklisted, False otherwise.
         """
         date = date.astimezone(TIMEZONE)
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-        query = select(self.table).join(self.relation).where(self.table.id == unique_id)
+        usage_point_key, minute = data_key(self.usage_point_id, date)
+        query = select(self.table).where(self.table.usage_point_key == usage_point_key, self.table.minute == minute)
         daily = self.session.scalars(query).one_or_none()
         if daily is not None:
             daily.blacklist = action
         else:
+            PARTITIONS.ensure(self.session, self.table.__tablename__, date)
             self.session.add(
                 self.table(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     value=0,
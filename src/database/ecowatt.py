@@ -21,17 +21,12 @@ class DatabaseEcowatt:
     @contextmanager
     def _session_scope(self):
         """Provide a transactional scope around a series of operations."""
-        session = DB.session()
         try:
-            yield session
-            if session.dirty:  # Check if there are changes to commit
-                session.commit()
+            with DB.unit_of_work() as session:
+                yield session
         except Exception as e:
-            session.rollback()
             logging.error(f"Transaction failed: {e}")  # Log the error for debugging
             raise
-        finally:
-            session.close()
 
     def get(self, order="desc"):
         """Retrieve Ecowatt data from the database."""
@@ -41,7 +41,7 @@ class DatabaseFlex:
         normalized_date = datetime(dt.year, dt.month, dt.day).date()
         logging.info(f"Vérification de l'existence de la date : {normalized_date}")
         try:
-            with self.session.begin():
+            with DB.unit_of_work():
                 # Utiliser merge au lieu de add pour gérer à la fois l'insertion et la mise à jour
                 flex_day = FlexDay(date=normalized_date, status=status)
                 self.session.merge(flex_day)
@@ -58,7 +58,7 @@ class DatabaseFlex:
 
     def set_flex_config(self, key, value):
         """Définit la valeur d'une clé de configuration Flex."""
-        with self.session.begin():  # Assurer une transaction
+        with DB.unit_of_work():  # Assurer une transaction
             config = self.session.scalars(select(FlexConfig).where(FlexConfig.key == key)).one_or_none()
             if config:
                 config.value = json.dumps(value)
@@ -0,0 +1,105 @@
+"""Manage InfluxdbSync table in database."""
+
+from sqlalchemy import delete, select, update
+
+from db_schema import InfluxdbSync
+
+from . import DB
+
+# Checksum of a month whose detail data was rolled up by the retention (see `DatabaseRetention.downsample`)
+COMPACTED = "compacted"
+
+
+class DatabaseInfluxdbSync:
+    """Manage the InfluxDB export watermarks of a measurement."""
+
+    def __init__(self, usage_point_id, measurement):
+        """Initialize DatabaseInfluxdbSync.
+
+        Args:
+            usage_point_id (str): The usage point id.
+            measurement (str): The InfluxDB measurement.
+        """
+        self.session = DB.session()
+        self.usage_point_id = usage_point_id
+        self.measurement = measurement
+
+    def get(self):
+        """Retrieve the watermarks of the measurement.
+
+        Returns:
+            dict: The watermarks by month (YYYY-MM).
+        """
+        data = self.session.scalars(
+            select(InfluxdbSync)
+            .where(InfluxdbSync.usage_point_id == self.usage_point_id)
+            .where(InfluxdbSync.measurement == self.measurement)
+        ).all()
+        return {item.month: item for item in data}
+
+    def set(self, month, count, checksum, last_date):
+        """Set the watermark of a month.
+
+        Args:
+            month (str): The month (YYYY-MM).
+            count (int): The number of points exported.
+            checksum (str): The checksum of the points exported.
+            last_date (datetime): The date of the last point exported.
+        """
+        query = (
+            select(InfluxdbSync)
+            .where(InfluxdbSync.usage_point_id == self.usage_point_id)
+            .where(InfluxdbSync.measurement == self.measurement)
+            .where(InfluxdbSync.month == month)
+        )
+        sync = self.session.scalars(query).one_or_none()
+        if sync:
+            sync.count = count
+            sync.checksum = checksum
+            sync.last_date = last_date
+        else:
+            self.session.add(
+                InfluxdbSync(
+                    usage_point_id=self.usage_point_id,
+                    measurement=self.measurement,
+                    month=month,
+                    count=count,
+                    checksum=checksum,
+                    last_date=last_date,
+                )
+            )
+        self.session.flush()
+
+    def compacted(self, months):
+        """Mark the watermarks of months whose data was rolled up by the retention.
+
+        The next export keeps the points already written in InfluxDB and only stores the checksum of the rollups, so
+        they are not written next to the original points.
+
+        Args:
+            months (list): The months (YYYY-MM).
+        """
+        self.session.execute(
+            update(InfluxdbSync)
+            .where(InfluxdbSync.usage_point_id == self.usage_point_id)
+            .where(InfluxdbSync.measurement == self.measurement)
+            .where(InfluxdbSync.month.in_(months))
+            .values(checksum=COMPACTED)
+        )
+        self.session.flush()
+
+    def reset(self):
+        """Delete the watermarks of the measurement."""
+        self.session.execute(
+            delete(InfluxdbSync)
+            .where(InfluxdbSync.usage_point_id == self.usage_point_id)
+            .where(InfluxdbSync.measurement == self.measurement)
+        )
+        self.session.flush()
+
+    @staticmethod
+    def reset_all():
+        """Delete all the watermarks (the next export is a full resync)."""
+        session = DB.session()
+        session.execute(delete(InfluxdbSync))
+        session.flush()
@@ -0,0 +1,127 @@
+"""Compact primary keys of the data tables (daily, detail and max power).
+
+A record is identified by the integer key of its usage point and the minute of its date since 1970-01-01 UTC,
+instead of the MD5 of "usage_point_id/date": the key is two integers, computed without hashing, and the tables are
+clustered on it (WITHOUT ROWID on SQLite).
+"""
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, select, update
+
+from const import TIMEZONE, TIMEZONE_UTC
+from db_schema import UsagePoints
+
+from . import DB
+from .records import USAGE_POINTS_CACHE
+
+EPOCH = datetime(1970, 1, 1, tzinfo=TIMEZONE_UTC)
+
+USAGE_POINT_KEYS = {}
+USAGE_POINT_KEYS_LOCK = threading.Lock()
+
+
+def epoch_minute(date):
+    """Return the minute of a date since 1970-01-01 UTC.
+
+    A naive date is the wall-clock time in TIMEZONE, as stored in the `date` column. The minute is computed on the UTC
+    time, so the two occurrences of the hour repeated by the autumn DST change get different keys.
+
+    Args:
+        date (datetime): The date.
+
+    Returns:
+        int: The number of minutes since 1970-01-01 UTC.
+    """
+    if date.tzinfo is None or date.tzinfo is TIMEZONE:
+        # Naive, or `replace(tzinfo=TIMEZONE)` which gives the LMT offset of the zone: localized on the wall-clock time
+        date = TIMEZONE.localize(date.replace(tzinfo=None))
+    return int((date - EPOCH).total_seconds()) // 60
+
+
+def minute_date(minute):
+    """Return the date of a minute since 1970-01-01 UTC (inverse of `epoch_minute`).
+
+    Args:
+        minute (int): The number of minutes since 1970-01-01 UTC.
+
+    Returns:
+        datetime: The date in TIMEZONE.
+    """
+    return (EPOCH + timedelta(minutes=minute)).astimezone(TIMEZONE)
+
+
+def next_usage_point_key(session):
+    """Return the key of a new usage point.
+
+    Args:
+        session (Session): The session.
+
+    Returns:
+        int: The greatest key + 1.
+    """
+    return session.scalar(select(func.coalesce(func.max(UsagePoints.key), 0) + 1))
+
+
+def usage_point_key(usage_point_id):
+    """Return the integer key of a usage point (assigned if missing), cached for the process.
+
+    Args:
+        usage_point_id (str): The usage point id.
+
+    Returns:
+        int: The key of the usage point.
+    """
+    key = USAGE_POINT_KEYS.get(usage_point_id)
+    if key is not None:
+        return key
+    with USAGE_POINT_KEYS_LOCK:
+        session = DB.session()
+        key = session.scalar(select(UsagePoints.key).where(UsagePoints.usage_point_id == usage_point_id))
+        if key is None:
+            key = next_usage_point_key(session)
+            session.execute(
+                update(UsagePoints, values={UsagePoints.key: key}).where(UsagePoints.usage_point_id == usage_point_id)
+            )
+            session.flush()
+            USAGE_POINTS_CACHE.invalidate(usage_point_id, session)
+        USAGE_POINT_KEYS[usage_point_id] = key
+    return key
+
+
+def forget_usage_point_key(usage_point_id):
+    """Remove a usage point from the cache of the keys (usage point deleted).
+
+    Args:
+        usage_point_id (str): The usage point id.
+    """
+    with USAGE_POINT_KEYS_LOCK:
+        USAGE_POINT_KEYS.pop(usage_point_id, None)
+
+
+def data_key(usage_point_id, date):
+    """Return the primary key of a record.
+
+    Args:
+        usage_point_id (str): The usage point id.
+        date (datetime): The date of the record.
+
+    Returns:
+        tuple: The key of the usage point and the minute of the date.
+    """
+    return usage_point_key(usage_point_id), epoch_minute(date)
+
+
+def where_data_key(table, usage_point_id, date):
+    """Build the predicate on the primary key of a record.
+
+    Args:
+        table (Base): The data table.
+        usage_point_id (str): The usage point id.
+        date (datetime): The date of the record.
+
+    Returns:
+        ClauseElement: The predicate.
+    """
+    key, minute = data_key(usage_point_id, date)
+    return and_(table.usage_point_key == key, table.minute == minute)
@@ -1,21 +1,61 @@
 """Manage all database operations."""
 import logging
-import subprocess
+import re
 import sys
 import traceback
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
-from sqlalchemy import create_engine, inspect, select
-from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy import create_engine, event, inspect, select, text
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
-from const import TIMEZONE
+from config.backend import Backend
+from const import JOB_WORKERS, READ_WORKERS, TIMEZONE
 from db_schema import (
     Config as ConfigSchema,
 )
 from utils import get_version, load_config
 
+# `revision = "..."` and `down_revision = "..."` of a migration script
+REVISION_PATTERN = re.compile(r"^(down_revision|revision)\b[^=\n]*=\s*['\"]([0-9a-zA-Z_]+)['\"]", re.MULTILINE)
+
+
+class UnitOfWorkSession(Session):
+    """Session of the application, aware of the units of work.
+
+    The session is in the autocommit mode of SQLAlchemy 1.4 (`autocommit=True`), on which the database classes rely:
+    outside a unit of work, each `flush` runs in its own transaction, committed at the end of the flush, and each read
+    checks a connection out of the pool for the statement only (no transaction is left open by a thread).
+
+    A unit of work (`Database.unit_of_work`) opens an explicit transaction with `begin`, which the flushes join
+    instead of committing. The database classes still call `flush`, `commit` and `close` after each operation:
+    `commit` only flushes and `close` is deferred, the transaction is committed once at the end of the unit of work,
+    or rolled back as a whole if it raises. The two modes never mix on a session: the unit of work is thread-local
+    (scoped session) and `begin` fails if a transaction is already running.
+    """
+
+    def in_unit_of_work(self):
+        """Check if a unit of work is running on the session.
+
+        Returns:
+            bool: True if a unit of work is running.
+        """
+        return self.info.get("unit_of_work", False)
+
+    def commit(self):
+        """Commit the transaction (only flush inside a unit of work)."""
+        if self.in_unit_of_work():
+            self.flush()
+        else:
+            super().commit()
+
+    def close(self):
+        """Close the session (deferred to the end of the unit of work)."""
+        if not self.in_unit_of_work():
+            super().close()
+
 
 class Database:
     """Represents a database connection and provides methods for database operations."""
@@ -49,25 +89,149 @@ class Database:
             logging.critical("Database not supported (only SQLite & PostgresSQL)")
             sys.exit(1)
 
+        self.backend = Backend(self.config.config, write=False)
         self.engine = create_engine(
             self.uri,
             echo=False,
-            query_cache_size=0,
             isolation_level="READ UNCOMMITTED",
-            poolclass=NullPool,
+            **self.engine_options(self.backend),
         )
+        if self.uri.startswith("sqlite"):
+            event.listen(self.engine, "connect", self.sqlite_connect)
 
-        subprocess.run(
-            f"cd {self.application_path}; DB_URL='{self.uri}' alembic upgrade head",
-            shell=True,  # noqa: S602
-            check=True,
-        )
+        self.migrate()
 
-        self.session_factory = sessionmaker(self.engine, autocommit=True, autoflush=True)
+        # Autocommit outside a unit of work, one transaction inside (see UnitOfWorkSession)
+        self.session_factory = sessionmaker(self.engine, class_=UnitOfWorkSession, autocommit=True, autoflush=True)
         self.session = scoped_session(self.session_factory)
         self.inspector = inspect(self.engine)
         self.lock_file = f"{self.application_path_data}/.lock"
 
+    def migrate(self):
+        """Upgrade the schema of the database to the last revision, in the process.
+
+        The revision stored in the database is read first (one row) and compared to the last revision of the scripts:
+        nothing is done if it is already the last one, and alembic (slow to import) is only imported to upgrade.
+        """
+        current = self.current_revision()
+        if current is not None and current == self.head_revision():
+            return
+        # alembic only imported when the schema is upgraded
+        from alembic import command
+        from alembic.config import Config as AlembicConfig
+        from alembic.script import ScriptDirectory
+
+        alembic_config = AlembicConfig(f"{self.application_path}/alembic.ini")
+        alembic_config.set_main_option("script_location", f"{self.application_path}/alembic")
+        head = ScriptDirectory.from_config(alembic_config).get_current_head()
+        if current == head:
+            return
+        logging.info(f"Migration de la base de données : {current} => {head}")
+        with self.engine.begin() as connection:
+            alembic_config.attributes["connection"] = connection
+            command.upgrade(alembic_config, "head")
+
+    def current_revision(self):
+        """Return the revision of the schema stored in the database.
+
+        Returns:
+            str: The revision, None if the database has never been migrated.
+        """
+        with self.engine.connect() as connection:
+            if not inspect(connection).has_table("alembic_version"):
+                return None
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+    def head_revision(self):
+        """Return the last revision of the migration scripts, read without alembic.
+
+        Returns:
+            str: The revision no other script revises, None if it is not unique.
+        """
+        revisions = set()
+        revised = set()
+        for script in Path(f"{self.application_path}/alembic/versions").glob("*.py"):
+            for name, revision in REVISION_PATTERN.findall(script.read_text(encoding="utf-8")):
+                (revisions if name == "revision" else revised).add(revision)
+        heads = revisions - revised
+        return heads.pop() if len(heads) == 1 else None
+
+    def engine_options(self, backend: Backend) -> dict:
+        """Return the options of the engine (connection pool, cache of the compiled statements).
+
+        Args:
+            backend (Backend): The backend configuration.
+
+        Returns:
+            dict: The keyword arguments of `create_engine`.
+        """
+        options = {"query_cache_size": backend.query_cache_size}
+        if backend.pool == "null":
+            options["poolclass"] = NullPool
+            return options
+        options["poolclass"] = QueuePool
+        # One connection by thread of the import jobs and of the API
+        options["pool_size"] = backend.pool_size if backend.pool_size > 0 else JOB_WORKERS + READ_WORKERS
+        options["max_overflow"] = backend.max_overflow
+        options["pool_pre_ping"] = backend.pool_pre_ping
+        if self.uri.startswith("sqlite"):
+            # The pooled connections are used by several threads (one at a time)
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    @contextmanager
+    def unit_of_work(self):
+        """Run a series of operations in one transaction.
+
+        The transaction is committed at the end of the block, or rolled back if an exception is raised. A nested unit
+        of work joins the running one.
+
+        Example:
+            with DB.unit_of_work():
+                for date, value in data:
+                    DatabaseDaily(usage_point_id).insert(date, value)
+
+        Yields:
+            UnitOfWorkSession: The session of the current thread.
+        """
+        session = self.session()
+        if session.in_unit_of_work():
+            yield session
+            return
+        session.info["unit_of_work"] = True
+        try:
+            with session.begin():
+                yield session
+        finally:
+            session.info["unit_of_work"] = False
+            session.close()
+
+    def sqlite_connect(self, dbapi_connection, connection_record):  # pylint: disable=unused-argument
+        """Apply the SQLite tuning (WAL, synchronous, mmap, cache...) on a new connection.
+
+        Args:
+            dbapi_connection (sqlite3.Connection): The new connection.
+            connection_record (object): The pool record of the connection.
+        """
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in self.backend.sqlite.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    def maintenance(self):
+        """Checkpoint the WAL file and refresh the statistics of the query planner (SQLite only)."""
+        if not self.uri.startswith("sqlite"):
+            return
+        try:
+            with self.engine.connect() as connection:
+                if self.backend.sqlite.journal_mode == "WAL":
+                    connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+                connection.execute(text("PRAGMA optimize"))
+        except Exception as e:
+            logging.error(f"Echec de la maintenance de la base de données : {e}")
+
     def init_database(self):
         """Initialize the database with default values."""
         try:
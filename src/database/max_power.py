@@ -1,6 +1,5 @@
 """Manage Config table in database."""
 
-import hashlib
 import logging
 from datetime import datetime, timedelta
 
@@ -11,6 +10,8 @@ from const import MAX_IMPORT_TRY
 from db_schema import ConsumptionDailyMaxPower, UsagePoints
 
 from . import DB
+from .keys import data_key, where_data_key
+from .search import DatatableSearch
 
 
 class DatabaseMaxPower:
@@ -138,11 +139,10 @@ class DatabaseMaxPower:
         Returns:
             ConsumptionDailyMaxPower: The consumption daily max power record for the given date.
         """
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
         return self.session.scalars(
-            select(ConsumptionDailyMaxPower)
-            .join(UsagePoints.relation_consumption_daily_max_power)
-            .where(ConsumptionDailyMaxPower.id == unique_id)
+            select(ConsumptionDailyMaxPower).where(
+                where_data_key(ConsumptionDailyMaxPower, self.usage_point_id, date)
+            )
         ).one_or_none()
 
     def insert(self, date, event_date, value, blacklist=0, fail_count=0):  # noqa: PLR0913, D417
@@ -153,10 +153,9 @@ class DatabaseMaxPower:
             event_date (datetime): The event date of the record.
             value (float): The value of the record.
         """
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
+        usage_point_key, minute = data_key(self.usage_point_id, date)
         daily = self.get_date(date)
         if daily is not None:
-            daily.id = unique_id
             daily.usage_point_id = self.usage_point_id
             daily.date = date
             daily.event_date = event_date
@@ -166,7 +165,8 @@ class DatabaseMaxPower:
         else:
             self.session.add(
                 ConsumptionDailyMaxPower(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     event_date=event_date,
@@ -190,40 +190,63 @@ class DatabaseMaxPower:
             .where(UsagePoints.usage_point_id == self.usage_point_id)
         ).one_or_none()
 
-    def get_daily_datatable(self, order_column="date", order_dir="asc", search=None):
-        """Retrieve the datatable of consumption daily max power records from the database.
+    def daily_datatable_query(self, search=None):
+        """Build the query of the datatable (data until yesterday, filtered by the search term).
+
+        The query filters the indexed columns (usage_point_id, date), see `DatatableSearch`.
+
+        Args:
+            search (str, optional): The search term. Defaults to None.
+
+        Returns:
+            Select: The query.
+        """
+        yesterday = datetime.combine(datetime.now(pytz.utc) - timedelta(days=1), datetime.max.time())
+        query = (
+            select(ConsumptionDailyMaxPower)
+            .where(ConsumptionDailyMaxPower.usage_point_id == self.usage_point_id)
+            .where(ConsumptionDailyMaxPower.date <= yesterday)
+        )
+        where = DatatableSearch(search).where(ConsumptionDailyMaxPower)
+        if where is not None:
+            query = query.where(where)
+        return query
+
+    def get_daily_datatable(  # noqa: PLR0913
+        self, order_column="date", order_dir="asc", search=None, start=0, length=None
+    ):
+        """Retrieve a page of the datatable of consumption daily max power records from the database.
 
         Args:
             order_column (str, optional): The column to order the datatable by. Defaults to "date".
             order_dir (str, optional): The direction to order the datatable in. Defaults to "asc".
             search (str, optional): The search term to filter the datatable. Defaults to None.
+            start (int, optional): The index of the first record of the page. Defaults to 0.
+            length (int, optional): The number of records of the page. Defaults to None (all the records).
 
         Returns:
-            list: The datatable of consumption daily max power records.
+            list: The page of the datatable of consumption daily max power records.
         """
-        yesterday = datetime.combine(datetime.now(pytz.utc) - timedelta(days=1), datetime.max.time())
-        sort = asc(order_column) if order_dir == "desc" else desc(order_column)
-        if search is not None and search != "":
-            result = self.session.scalars(
-                select(ConsumptionDailyMaxPower)
-                .join(UsagePoints.relation_consumption_daily_max_power)
-                .where(UsagePoints.usage_point_id == self.usage_point_id)
-                .where(
-                    (ConsumptionDailyMaxPower.date.like(f"%{search}%"))
-                    | (ConsumptionDailyMaxPower.value.like(f"%{search}%"))
-                )
-                .where(ConsumptionDailyMaxPower.date <= yesterday)
-                .order_by(sort)
-            )
-        else:
-            result = self.session.scalars(
-                select(ConsumptionDailyMaxPower)
-                .join(UsagePoints.relation_consumption_daily_max_power)
-                .where(UsagePoints.usage_point_id == self.usage_point_id)
-                .where(ConsumptionDailyMaxPower.date <= yesterday)
-                .order_by(sort)
-            )
-        return result.all()
+        sort = asc if order_dir == "desc" else desc
+        query = (
+            self.daily_datatable_query(search)
+            .order_by(sort(order_column), sort(ConsumptionDailyMaxPower.minute))
+            .offset(start)
+        )
+        if length is not None and length >= 0:
+            query = query.limit(length)
+        return self.session.scalars(query).all()
+
+    def get_daily_datatable_count(self, search=None):
+        """Retrieve the number of consumption daily max power records of the datatable matching the search term.
+
+        Args:
+            search (str, optional): The search term to filter the datatable. Defaults to None.
+
+        Returns:
+            int: The number of records.
+        """
+        return self.session.scalar(select(func.count()).select_from(self.daily_datatable_query(search).subquery()))
 
     def daily_fail_increment(self, date):
         """Increment the fail count for a specific date in the consumption daily max power records.
@@ -234,7 +257,7 @@ class DatabaseMaxPower:
         Returns:
             int: The updated fail count.
         """
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
+        usage_point_key, minute = data_key(self.usage_point_id, date)
         daily = self.get_date(date)
         if daily is not None:
             fail_count = int(daily.fail_count) + 1
@@ -243,7 +266,6 @@ class DatabaseMaxPower:
                 fail_count = 0
             else:
                 blacklist = 0
-            daily.id = unique_id
             daily.usage_point_id = self.usage_point_id
             daily.date = date
             daily.event_date = None
@@ -254,7 +276,8 @@ class DatabaseMaxPower:
             fail_count = 0
             self.session.add(
                 ConsumptionDailyMaxPower(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     event_date=None,
@@ -296,8 +319,11 @@ class DatabaseMaxPower:
             bool: True if the deletion is successful, False otherwise.
         """
         if date is not None:
-            unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
-            self.session.execute(delete(ConsumptionDailyMaxPower).where(ConsumptionDailyMaxPower.id == unique_id))
+            self.session.execute(
+                delete(ConsumptionDailyMaxPower).where(
+                    where_data_key(ConsumptionDailyMaxPower, self.usage_point_id, date)
+                )
+            )
         else:
             self.session.execute(
                 delete(ConsumptionDailyMaxPower).where(ConsumptionDailyMaxPower.usage_point_id == self.usage_point_id)
@@ -315,14 +341,15 @@ class DatabaseMaxPower:
         Returns:
             bool: True if the operation is successful, False otherwise.
         """
-        unique_id = hashlib.md5(f"{self.usage_point_id}/{date}".encode("utf-8")).hexdigest()  # noqa: S324
+        usage_point_key, minute = data_key(self.usage_point_id, date)
         daily = self.get_date(date)
         if daily is not None:
             daily.blacklist = action
         else:
             self.session.add(
                 ConsumptionDailyMaxPower(
-                    id=unique_id,
+                    usage_point_key=usage_point_key,
+                    minute=minute,
                     usage_point_id=self.usage_point_id,
                     date=date,
                     value=0,
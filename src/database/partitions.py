@@ -0,0 +1,284 @@
+"""Monthly partitions of the detail tables (PostgreSQL only).
+
+The detail tables are partitioned by range of `minute` (see `database.keys`), one partition by month named
+`<table>_pYYYYMM`. As `minute` is in the primary key and in the predicates of the range queries, PostgreSQL reads only
+the partitions of the requested months, and the retention drops a whole month with a `DROP TABLE`.
+"""
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from const import DETAIL_MAX_DAYS, TIMEZONE
+
+from . import DB
+from .keys import epoch_minute, minute_date
+
+DETAIL_TABLES = ["consumption_detail", "production_detail"]
+
+
+def month_start(date):
+    """Return the first day of the month of a date (wall-clock time).
+
+    Args:
+        date (datetime): The date.
+
+    Returns:
+        datetime: The first day of the month at 00:00, without time zone.
+    """
+    return datetime(date.year, date.month, 1)  # noqa: DTZ001 (wall-clock time)
+
+
+def next_month(date):
+    """Return the first day of the next month.
+
+    Args:
+        date (datetime): The first day of a month.
+
+    Returns:
+        datetime: The first day of the next month.
+    """
+    if date.month == 12:  # noqa: PLR2004
+        return datetime(date.year + 1, 1, 1)  # noqa: DTZ001
+    return datetime(date.year, date.month + 1, 1)  # noqa: DTZ001
+
+
+class DetailPartitions:
+    """Monthly partitions of the detail tables.
+
+    The partitions are created before the import of a window (`prepare`), on their own connection, so the import
+    transaction never waits for the lock of the parent table. The partitions known to exist are cached.
+    """
+
+    def __init__(self, engine, enabled=False, retention_days=None):
+        """Initialize DetailPartitions.
+
+        Args:
+            engine (Engine): The engine of the database.
+            enabled (bool, optional): The detail tables are partitioned (PostgreSQL only). Defaults to False.
+            retention_days (int, optional): The partitions older than this number of days are dropped. Defaults to
+                None (kept).
+        """
+        self.engine = engine
+        self.enabled = enabled and engine.dialect.name == "postgresql"
+        self.retention_days = retention_days
+        self.lock = threading.Lock()
+        self.partitions = set()
+
+    @staticmethod
+    def partition_name(table, month):
+        """Return the name of the partition of a month.
+
+        Args:
+            table (str): The detail table.
+            month (datetime): The first day of the month.
+
+        Returns:
+            str: The name of the partition.
+        """
+        return f"{table}_p{month.strftime('%Y%m')}"
+
+    def create_sql(self, table, month):
+        """Return the statement creating the partition of a month.
+
+        Args:
+            table (str): The detail table.
+            month (datetime): The first day of the month.
+
+        Returns:
+            str: The statement.
+        """
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.partition_name(table, month)} PARTITION OF {table} "
+            f"FOR VALUES FROM ({epoch_minute(month)}) TO ({epoch_minute(next_month(month))})"
+        )
+
+    def months(self, begin, end):
+        """Return the months of a range of dates.
+
+        Args:
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+
+        Returns:
+            list: The first day of each month.
+        """
+        month = month_start(begin)
+        months = []
+        while month <= end.replace(tzinfo=None):
+            months.append(month)
+            month = next_month(month)
+        return months
+
+    def prepare(self, table, begin, end):
+        """Create the missing partitions of a range of dates, before an import.
+
+        Args:
+            table (str): The detail table.
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+        """
+        if not self.enabled:
+            return
+        missing = [
+            month for month in self.months(begin, end) if self.partition_name(table, month) not in self.partitions
+        ]
+        if not missing:
+            return
+        with self.lock, self.engine.execution_options(isolation_level="AUTOCOMMIT").connect() as connection:
+            for month in missing:
+                connection.execute(text(self.create_sql(table, month)))
+                self.partitions.add(self.partition_name(table, month))
+
+    def ensure(self, session, table, date):
+        """Create the partition of a date in the transaction of the session, if it was not prepared.
+
+        Args:
+            session (Session): The session of the insert.
+            table (str): The detail table.
+            date (datetime): The date of the record.
+        """
+        if not self.enabled:
+            return
+        month = month_start(date)
+        if self.partition_name(table, month) in self.partitions:
+            return
+        # Not cached: the transaction may still be rolled back
+        session.execute(text(self.create_sql(table, month)))
+
+    def range_clauses(self, table, begin=None, end=None):
+        """Return the predicates on `minute` of a range of dates, so the partitions out of the range are pruned.
+
+        Args:
+            table (Base): The detail table.
+            begin (datetime, optional): The start of the range. Defaults to None.
+            end (datetime, optional): The end of the range. Defaults to None.
+
+        Returns:
+            list: The predicates (empty if the tables are not partitioned).
+        """
+        if not self.enabled:
+            return []
+        clauses = []
+        if begin is not None:
+            clauses.append(table.minute >= epoch_minute(begin))
+        if end is not None:
+            clauses.append(table.minute <= epoch_minute(end))
+        return clauses
+
+    def existing(self, connection, table):
+        """Return the partitions of a detail table.
+
+        Args:
+            connection (Connection): The connection.
+            table (str): The detail table.
+
+        Returns:
+            dict: The first day of the month by partition name.
+        """
+        rows = connection.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table},
+        ).scalars()
+        partitions = {}
+        for name in rows:
+            match = re.fullmatch(rf"{table}_p(\d{{4}})(\d{{2}})", name)
+            if match is not None:
+                partitions[name] = datetime(int(match.group(1)), int(match.group(2)), 1)  # noqa: DTZ001
+        return partitions
+
+    def setup(self):
+        """Partition the detail tables, if enabled and not done yet (the rows are moved to the partitions).
+
+        Run at startup, before the jobs (see `main.bootstrap`). The partitions the next maintenance will drop are
+        logged.
+        """
+        if not self.enabled:
+            return
+        with self.lock, self.engine.begin() as connection:
+            for table in DETAIL_TABLES:
+                relkind = connection.execute(
+                    text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+                ).scalar()
+                if relkind != "p":
+                    self.partition_table(connection, table)
+                self.partitions.update(self.existing(connection, table))
+        self.drop_expired(dry_run=True)
+
+    def partition_table(self, connection, table):
+        """Replace a detail table with a partitioned table holding the same rows.
+
+        Args:
+            connection (Connection): The connection (in a transaction).
+            table (str): The detail table.
+        """
+        logging.info(f"Partitionnement mensuel de la table {table}")
+        old = f"{table}_unpartitioned"
+        connection.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+        connection.execute(text(f"ALTER INDEX {table}_pkey RENAME TO {old}_pkey"))
+        connection.execute(text(f"ALTER INDEX ix_{table}_usage_point_id_date RENAME TO ix_{old}_usage_point_id_date"))
+        connection.execute(
+            text(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (minute)")
+        )
+        connection.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (usage_point_key, minute)"))
+        connection.execute(
+            text(
+                f"ALTER TABLE {table} ADD FOREIGN KEY (usage_point_id) REFERENCES usage_points (usage_point_id)"
+            )
+        )
+        connection.execute(
+            text(f"CREATE INDEX ix_{table}_usage_point_id_date ON {table} (usage_point_id, date, value, interval)")
+        )
+        first, last = connection.execute(text(f"SELECT MIN(minute), MAX(minute) FROM {old}")).one()  # noqa: S608 (detail table)
+        if first is not None:
+            for month in self.months(minute_date(first), minute_date(last)):
+                connection.execute(text(self.create_sql(table, month)))
+        connection.execute(text(f"INSERT INTO {table} SELECT * FROM {old}"))  # noqa: S608
+        connection.execute(text(f"DROP TABLE {old}"))
+
+    def drop_expired(self, dry_run=False):
+        """Drop the partitions whose month is entirely older than the retention.
+
+        Args:
+            dry_run (bool, optional): Only log the partitions to drop. Defaults to False.
+
+        Returns:
+            list: The names of the partitions dropped (to drop, in dry run).
+        """
+        if not self.enabled or not self.retention_days:
+            return []
+        limit = month_start(datetime.now(tz=TIMEZONE) - timedelta(days=int(self.retention_days)))
+        expired = []
+        with self.lock, self.engine.execution_options(isolation_level="AUTOCOMMIT").connect() as connection:
+            for table in DETAIL_TABLES:
+                for name, month in sorted(self.existing(connection, table).items()):
+                    if next_month(month) > limit:
+                        continue
+                    expired.append(name)
+                    if dry_run:
+                        logging.warning(
+                            f"La partition {name} ({month.strftime('%Y-%m')}) sera supprimée par la maintenance "
+                            f"(plus de {self.retention_days} jours)"
+                        )
+                        continue
+                    logging.info(
+                        f"Suppression de la partition {name} ({month.strftime('%Y-%m')}, "
+                        f"plus de {self.retention_days} jours)"
+                    )
+                    connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    self.partitions.discard(name)
+        return expired
+
+
+PARTITIONS = DetailPartitions(
+    DB.engine,
+    enabled=DB.backend.postgresql.partition_detail,
+    retention_days=DETAIL_MAX_DAYS if DB.backend.postgresql.detail_retention else None,
+)
@@ -0,0 +1,112 @@
+"""Read-only records of the rows and process-wide cache of the usage point metadata."""
+import threading
+
+from sqlalchemy import event
+
+
+class Record:
+    """Read-only copy of the columns of an ORM object.
+
+    The `__table__` of the object is kept, so a record can be used instead of the object to iterate over the columns.
+    """
+
+    __slots__ = ("__table__", "_values")
+
+    def __init__(self, row):
+        object.__setattr__(self, "__table__", row.__table__)
+        values = {column.name: getattr(row, column.name) for column in row.__table__.columns}
+        object.__setattr__(self, "_values", values)
+
+    def __getattr__(self, name):
+        """Return the value of a column."""
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        """Refuse the changes: a record is read-only."""
+        raise AttributeError(f"{self.__table__.name} record is read-only")
+
+    def __repr__(self):
+        """Return the string representation of the record."""
+        return f"Record({self.__table__.name}, {self._values!r})"
+
+    def as_dict(self):
+        """Return the values of the columns.
+
+        Returns:
+            dict: A copy of the values by column name.
+        """
+        return dict(self._values)
+
+    @classmethod
+    def of(cls, row):
+        """Copy an ORM object (None, False and records are kept as is).
+
+        Args:
+            row (object): The ORM object.
+
+        Returns:
+            Record: The copy of the object.
+        """
+        if isinstance(row, Record) or not hasattr(row, "__table__"):
+            return row
+        return cls(row)
+
+
+class RecordCache:
+    """Read-through cache of one row by usage point, kept as records.
+
+    The rows are read once and shared by all the threads; the writers of the table invalidate the usage point. A read
+    started before an invalidation is not cached, so a stale row is never kept.
+    """
+
+    def __init__(self):
+        """Initialize RecordCache."""
+        self.lock = threading.Lock()
+        self.records = {}
+        self.generation = 0
+
+    def get(self, usage_point_id, load):
+        """Return the record of a usage point, read with `load` if it is not cached.
+
+        Args:
+            usage_point_id (str): The usage point id.
+            load (callable): Read the ORM object (or None) from the database.
+
+        Returns:
+            Record: The record, None if there is no row.
+        """
+        with self.lock:
+            if usage_point_id in self.records:
+                return self.records[usage_point_id]
+            generation = self.generation
+        record = Record.of(load())
+        with self.lock:
+            if generation == self.generation:
+                self.records[usage_point_id] = record
+        return record
+
+    def invalidate(self, usage_point_id=None, session=None):
+        """Remove a usage point from the cache.
+
+        Args:
+            usage_point_id (str, optional): The usage point id. Defaults to None (all the usage points).
+            session (UnitOfWorkSession, optional): The session of the write. In a unit of work, the usage point is
+                removed again after the commit, as the other threads may have cached the previous row meanwhile.
+                Defaults to None.
+        """
+        with self.lock:
+            self.generation += 1
+            if usage_point_id is None:
+                self.records.clear()
+            else:
+                self.records.pop(usage_point_id, None)
+        if session is not None and session.in_unit_of_work():
+            event.listen(session, "after_commit", lambda _session: self.invalidate(usage_point_id), once=True)
+
+
+USAGE_POINTS_CACHE = RecordCache()
+CONTRACTS_CACHE = RecordCache()
+ADDRESSES_CACHE = RecordCache()
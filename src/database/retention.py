@@ -0,0 +1,331 @@
+"""Retention and compaction of the cache: old data, rollups of the detail data, empty records of the failed imports."""
+import inspect
+import logging
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from sqlalchemy import and_, delete, func, insert, or_, select, text
+
+from config.main import APP_CONFIG
+from const import DAILY_MAX_DAYS, DETAIL_MAX_DAYS, TEMPO_BEGIN, TIMEZONE
+from db_schema import (
+    ConsumptionDaily,
+    ConsumptionDailyMaxPower,
+    ConsumptionDetail,
+    ProductionDaily,
+    ProductionDetail,
+    Statistique,
+    UsagePoints,
+)
+from utils import get_mesure_type
+
+from . import DB
+from .influxdb_sync import DatabaseInfluxdbSync
+from .keys import epoch_minute, minute_date
+from .usage_points import DatabaseUsagePoints
+
+DETAIL_TABLES = [ConsumptionDetail, ProductionDetail]
+DAILY_TABLES = [ConsumptionDaily, ProductionDaily, ConsumptionDailyMaxPower]
+DOWNSAMPLE_MINUTES = {"hourly": 60, "daily": 1440}
+# Windows of the rollup, in days (one transaction by window)
+DOWNSAMPLE_WINDOW_DAYS = 30
+
+
+class DatabaseRetention:
+    """Retention and compaction of the cache (see `RetentionOptions`).
+
+    The steps run in their own transactions:
+        - delete the records older than the retention of their table;
+        - delete the empty records of the failed imports (`fail_increment`) which are out of the import range, they
+          will never be imported again;
+        - roll the old detail data up to hourly or daily records (average power weighted by the interval), a rollup
+          never crosses an HC/HP slot or a tempo day, so the energy and its split are kept;
+        - delete the statistics of the removed usage points and the duplicated statistics;
+        - give the free pages back to the file system and refresh the statistics of the query planner.
+    """
+
+    def __init__(self, options=None):
+        """Initialize DatabaseRetention.
+
+        Args:
+            options (RetentionOptions, optional): The options. Defaults to None (configuration of the backend).
+        """
+        self.session = DB.session()
+        self.options = options if options is not None else DB.backend.retention
+        self.sqlite = DB.uri.startswith("sqlite")
+
+    def run(self):
+        """Run the retention and the compaction.
+
+        Returns:
+            dict: The report (deleted and rolled up records, size of the database before and after).
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            report = {"size_before": self.size(), "deleted": {}, "placeholders": {}, "downsampled": {}}
+            report["deleted"] = self.delete_expired()
+            if self.options.purge_fail_placeholders:
+                report["placeholders"] = self.purge_fail_placeholders()
+            if self.options.downsample in DOWNSAMPLE_MINUTES:
+                report["downsampled"] = self.downsample()
+            report["statistique"] = self.purge_statistique()
+            if self.options.vacuum:
+                self.vacuum()
+            report["size_after"] = self.size()
+            report["reclaimed"] = max(0, report["size_before"] - report["size_after"])
+            logging.info(
+                f"Rétention : {sum(report['deleted'].values())} données expirées supprimées, "
+                f"{sum(report['placeholders'].values())} données en échec purgées, "
+                f"{sum(report['downsampled'].values())} données détaillées agrégées, "
+                f"{report['statistique']} statistiques purgées, "
+                f"{round(report['reclaimed'] / 1024 / 1024, 2)} Mo récupérés"
+            )
+            return report
+
+    @staticmethod
+    def horizon(days):
+        """Return the date before which the records are removed.
+
+        Args:
+            days (int): The number of days kept.
+
+        Returns:
+            datetime: The start of the first day kept.
+        """
+        return datetime.combine(datetime.now(tz=TIMEZONE) - timedelta(days=days), datetime.min.time()).replace(
+            tzinfo=TIMEZONE
+        )
+
+    def delete_rows(self, table, where):
+        """Delete the records of a table matching a predicate, in one transaction.
+
+        Args:
+            table (Base): The table.
+            where (ClauseElement): The predicate.
+
+        Returns:
+            int: The number of records deleted.
+        """
+        with DB.unit_of_work() as session:
+            return session.execute(delete(table).where(where)).rowcount
+
+    def delete_expired(self):
+        """Delete the records older than the retention of their table.
+
+        Returns:
+            dict: The number of records deleted by table.
+        """
+        retentions = {
+            ConsumptionDetail: self.options.detail_days,
+            ProductionDetail: self.options.detail_days,
+            ConsumptionDaily: self.options.daily_days,
+            ProductionDaily: self.options.daily_days,
+            ConsumptionDailyMaxPower: self.options.max_power_days,
+        }
+        deleted = {}
+        for table, days in retentions.items():
+            if days > 0:
+                deleted[table.__tablename__] = self.delete_rows(table, table.date < self.horizon(days))
+        return deleted
+
+    def purge_fail_placeholders(self):
+        """Delete the empty records of the failed imports (value 0, failed or blacklisted) out of the import range.
+
+        Returns:
+            dict: The number of records deleted by table.
+        """
+        deleted = {}
+        for table in DETAIL_TABLES + DAILY_TABLES:
+            days = DETAIL_MAX_DAYS if table in DETAIL_TABLES else DAILY_MAX_DAYS
+            deleted[table.__tablename__] = self.delete_rows(
+                table,
+                and_(
+                    table.date < self.horizon(days),
+                    table.value == 0,
+                    or_(table.blacklist != 0, table.fail_count > 0),
+                ),
+            )
+        return deleted
+
+    def downsample(self):
+        """Roll the old detail data up (hourly or daily), one window of 30 days by transaction.
+
+        Returns:
+            dict: The number of records removed by the rollup, by table.
+        """
+        size = DOWNSAMPLE_MINUTES[self.options.downsample]
+        # Start of a day: a rollup (hour, day) never crosses the horizon
+        end = epoch_minute(self.horizon(self.options.downsample_after_days))
+        usage_points = self.session.execute(
+            select(UsagePoints.key, UsagePoints.usage_point_id).where(UsagePoints.key.isnot(None))
+        ).all()
+        removed = {}
+        for table in DETAIL_TABLES:
+            removed[table.__tablename__] = 0
+            for key, usage_point_id in usage_points:
+                first = self.session.scalar(
+                    select(func.min(table.minute)).where(
+                        table.usage_point_key == key, table.interval < size, table.minute < end
+                    )
+                )
+                if first is None:
+                    continue
+                usage_point = DatabaseUsagePoints(usage_point_id).get()
+                offpeak_hours = {day: getattr(usage_point, f"offpeak_hours_{day}", None) for day in range(7)}
+                # Windows of 30 days starting at midnight, so a daily rollup is never split
+                begin = epoch_minute(datetime.combine(minute_date(first).date(), datetime.min.time()))
+                while begin < end:
+                    window_end = minute_date(begin).date() + timedelta(days=DOWNSAMPLE_WINDOW_DAYS)
+                    window_end = epoch_minute(datetime.combine(window_end, datetime.min.time()))
+                    removed[table.__tablename__] += self.downsample_window(
+                        table, key, begin, min(window_end, end), size, offpeak_hours
+                    )
+                    begin = window_end
+        self.session.close()
+        return removed
+
+    @staticmethod
+    def rollups(rows, size, offpeak_hours):
+        """Group the detail data in rollups.
+
+        A rollup covers consecutive records of the same hour (or day), of the same HC/HP slot and of the same tempo
+        day: the HC/HP and the tempo color of the records are computed from their date when they are read, the date of
+        a rollup (its first record) gives them for the whole rollup. The power is the average of the records weighted
+        by their interval, rounded to the watt.
+
+        Args:
+            rows (list): The detail data, sorted by minute.
+            size (int): The size of a rollup, in minutes.
+            offpeak_hours (dict): The off-peak hours of the usage point by weekday.
+
+        Returns:
+            list: The rollups (dict of the columns).
+        """
+        slots = {}
+
+        def rollup_key(row):
+            date = row.date
+            slot = (date.weekday(), date.hour, date.minute)
+            if slot not in slots:
+                slots[slot] = get_mesure_type(date, offpeak_hours)
+            bucket = date.date() if size == DOWNSAMPLE_MINUTES["daily"] else row.minute - row.minute % size
+            tempo_day = date.date()
+            if date.hour * 100 + date.minute < TEMPO_BEGIN:
+                tempo_day -= timedelta(days=1)
+            return bucket, row.measure_type, slots[slot], tempo_day
+
+        rollups = []
+        for _, records in groupby(rows, key=rollup_key):
+            group = list(records)
+            interval = sum(row.interval for row in group)
+            rollups.append(
+                {
+                    "usage_point_key": group[0].usage_point_key,
+                    "minute": group[0].minute,
+                    "usage_point_id": group[0].usage_point_id,
+                    "date": group[0].date,
+                    "value": round(sum(row.value * row.interval for row in group) / interval),
+                    "interval": interval,
+                    "measure_type": group[0].measure_type,
+                    "blacklist": 0,
+                    "fail_count": 0,
+                }
+            )
+        return rollups
+
+    def downsample_window(self, table, key, begin, end, size, offpeak_hours):  # noqa: PLR0913
+        """Roll the detail data of a usage point up in a window.
+
+        The InfluxDB watermarks of the months rolled up are marked, so the export keeps the points already written
+        instead of adding the rollups next to them.
+
+        Args:
+            table (Base): The detail table.
+            key (int): The key of the usage point.
+            begin (int): The start of the window, in minutes (included).
+            end (int): The end of the window, in minutes (excluded).
+            size (int): The size of a rollup, in minutes.
+            offpeak_hours (dict): The off-peak hours of the usage point by weekday.
+
+        Returns:
+            int: The number of records removed.
+        """
+        source = and_(
+            table.usage_point_key == key,
+            table.minute >= begin,
+            table.minute < end,
+            table.interval > 0,
+            table.interval < size,
+            table.blacklist == 0,
+        )
+        query = select(
+            table.usage_point_key,
+            table.minute,
+            table.usage_point_id,
+            table.date,
+            table.value,
+            table.interval,
+            table.measure_type,
+        ).where(source)
+        with DB.unit_of_work() as session:
+            rows = session.execute(query.order_by(table.minute)).all()
+            rollups = self.rollups(rows, size, offpeak_hours)
+            if len(rollups) == len(rows):
+                return 0
+            session.execute(delete(table).where(source))
+            session.execute(insert(table), rollups)
+            DatabaseInfluxdbSync(rows[0].usage_point_id, table.__tablename__).compacted(
+                sorted({row.date.strftime("%Y-%m") for row in rows})
+            )
+            return len(rows) - len(rollups)
+
+    def purge_statistique(self):
+        """Delete the statistics of the removed usage points and the duplicated statistics (the last one is kept).
+
+        Returns:
+            int: The number of statistics deleted.
+        """
+        last = select(func.max(Statistique.id)).group_by(Statistique.usage_point_id, Statistique.key)
+        return self.delete_rows(
+            Statistique,
+            or_(
+                Statistique.usage_point_id.notin_(select(UsagePoints.usage_point_id)),
+                Statistique.id.notin_(last),
+            ),
+        )
+
+    def size(self):
+        """Return the size of the database.
+
+        Returns:
+            int: The size in bytes (without the free pages on SQLite).
+        """
+        with DB.engine.connect() as connection:
+            if self.sqlite:
+                page_size = connection.execute(text("PRAGMA page_size")).scalar()
+                page_count = connection.execute(text("PRAGMA page_count")).scalar()
+                freelist_count = connection.execute(text("PRAGMA freelist_count")).scalar()
+                return page_size * (page_count - freelist_count)
+            return connection.execute(text("SELECT pg_database_size(current_database())")).scalar()
+
+    def vacuum(self):
+        """Give the free pages back to the file system and refresh the statistics of the query planner.
+
+        On SQLite, the first run switches the database to `auto_vacuum=INCREMENTAL` (one full VACUUM), the next runs
+        only release the free pages (`incremental_vacuum`).
+        """
+        try:
+            if self.sqlite:
+                with DB.engine.connect() as connection:
+                    if connection.execute(text("PRAGMA auto_vacuum")).scalar() != 2:  # noqa: PLR2004
+                        logging.info("Passage de la base de données en auto_vacuum incrémental (VACUUM complet)")
+                        connection.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+                        connection.execute(text("VACUUM"))
+                    else:
+                        connection.execute(text("PRAGMA incremental_vacuum"))
+                    connection.execute(text("ANALYZE"))
+            else:
+                with DB.engine.execution_options(isolation_level="AUTOCOMMIT").connect() as connection:
+                    for table in DETAIL_TABLES + DAILY_TABLES + [Statistique]:
+                        connection.execute(text(f"VACUUM (ANALYZE) {table.__tablename__}"))
+        except Exception as e:
+            logging.error(f"Echec du VACUUM de la base de données : {e}")
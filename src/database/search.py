@@ -0,0 +1,131 @@
+"""Search of the datatables, translated to range predicates on the indexed columns."""
+
+import re
+from datetime import datetime
+
+from sqlalchemy import String, and_, cast, false, or_
+
+DATE_PATTERNS = [
+    (re.compile(r"^(?P<year>\d{4})$"), "year"),
+    (re.compile(r"^(?P<year>\d{4})-(?P<month>\d{1,2})$"), "month"),
+    (re.compile(r"^(?P<month>\d{1,2})/(?P<year>\d{4})$"), "month"),
+    (re.compile(r"^(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})$"), "day"),
+    (re.compile(r"^(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{4})$"), "day"),
+]
+VALUE_PATTERN = re.compile(r"^(?P<operator><=|>=|<|>|=)?(?P<value>\d+(?:[.,]\d+)?)(?P<unit>kw|w)?$", re.IGNORECASE)
+YEARS = range(1900, 2100)
+
+
+class DatatableSearch:
+    """Search term of a datatable.
+
+    The term is split on the spaces, each part must match (AND):
+        - a date: `2024`, `2024-05`, `05/2024`, `2024-05-12` or `12/05/2024`, searched as a range on the date.
+        - a value: `1200`, `>1200`, `<=1.5kw`..., compared to the value in W.
+        - any other text, searched with LIKE on the date and the value (full scan: small tables only).
+    """
+
+    def __init__(self, search=None):
+        """Initialize DatatableSearch.
+
+        Args:
+            search (str, optional): The search term. Defaults to None.
+        """
+        self.search = search.strip() if search else ""
+        self.date_ranges = []
+        self.values = []
+        self.texts = []
+        for term in self.search.split():
+            date_range = self.parse_date(term)
+            if date_range is not None:
+                self.date_ranges.append(date_range)
+                continue
+            value = self.parse_value(term)
+            if value is not None:
+                self.values.append(value)
+                continue
+            self.texts.append(term)
+
+    @staticmethod
+    def parse_date(term):
+        """Parse a date term.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            tuple: The range (begin included, end excluded), None if the term is not a date.
+        """
+        for pattern, precision in DATE_PATTERNS:
+            match = pattern.match(term)
+            if match is None:
+                continue
+            year = int(match.group("year"))
+            if year not in YEARS:
+                return None
+            try:
+                if precision == "year":
+                    return datetime(year, 1, 1), datetime(year + 1, 1, 1)  # noqa: DTZ001
+                month = int(match.group("month"))
+                if precision == "month":
+                    begin = datetime(year, month, 1)  # noqa: DTZ001
+                    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)  # noqa: DTZ001, PLR2004
+                    return begin, end
+                begin = datetime(year, month, int(match.group("day")))  # noqa: DTZ001
+                return begin, datetime.fromordinal(begin.toordinal() + 1)
+            except ValueError:
+                return None
+        return None
+
+    @staticmethod
+    def parse_value(term):
+        """Parse a value term.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            tuple: The operator and the value in W, None if the term is not a value.
+        """
+        match = VALUE_PATTERN.match(term)
+        if match is None:
+            return None
+        value = float(match.group("value").replace(",", "."))
+        if (match.group("unit") or "").lower() == "kw":
+            value = value * 1000
+        return match.group("operator") or "=", value
+
+    def where(self, table, free_text=True):
+        """Build the predicate of the search.
+
+        Args:
+            table (Base): The table searched (with `date` and `value` columns).
+            free_text (bool, optional): Search the other texts with LIKE. Defaults to True. When False, a search
+                with another text matches nothing, so the table is never scanned.
+
+        Returns:
+            ClauseElement: The predicate, None if there is no search.
+        """
+        if not self.search:
+            return None
+        clauses = []
+        for begin, end in self.date_ranges:
+            clauses.append(and_(table.date >= begin, table.date < end))
+        for operator, value in self.values:
+            if operator == "<":
+                clauses.append(table.value < value)
+            elif operator == "<=":
+                clauses.append(table.value <= value)
+            elif operator == ">":
+                clauses.append(table.value > value)
+            elif operator == ">=":
+                clauses.append(table.value >= value)
+            else:
+                clauses.append(table.value == value)
+        for text in self.texts:
+            if not free_text:
+                return false()
+            clauses.append(
+                or_(cast(table.date, String).like(f"%{text}%"), cast(table.value, String).like(f"%{text}%"))
+            )
+        return and_(*clauses)
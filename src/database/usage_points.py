@@ -20,6 +20,8 @@ from db_schema import (
 )
 
 from . import DB
+from .keys import forget_usage_point_key, next_usage_point_key
+from .records import ADDRESSES_CACHE, CONTRACTS_CACHE, USAGE_POINTS_CACHE, Record
 
 
 class UsagePointsConfig:  # pylint: disable=R0902
@@ -88,12 +90,32 @@ class DatabaseUsagePoints:
         return data
 
     def get(self):
-        """Get data from usage point table."""
+        """Get data from usage point table.
+
+        The row is cached for the process (read-only record), until a write of the usage point.
+
+        Returns:
+            Record: The usage point, None if unknown.
+        """
+        if self.session.in_unit_of_work():
+            return Record.of(self.load())
+        return USAGE_POINTS_CACHE.get(self.usage_point_id, self.load)
+
+    def load(self):
+        """Read the usage point from the database.
+
+        Returns:
+            UsagePoints: The usage point, None if unknown.
+        """
         query = select(UsagePoints).where(UsagePoints.usage_point_id == self.usage_point_id)
         data = self.session.scalars(query).one_or_none()
         self.session.close()
         return data
 
+    def invalidate(self):
+        """Remove the usage point from the cache (after a write)."""
+        USAGE_POINTS_CACHE.invalidate(self.usage_point_id, self.session)
+
     def get_plan(
         self,
     ):
@@ -111,6 +133,7 @@ class DatabaseUsagePoints:
         )
         self.session.flush()
         self.session.close()
+        self.invalidate()
 
     def set(self, data: dict) -> None:
         """Set data from usage point table."""
@@ -121,12 +144,13 @@ class DatabaseUsagePoints:
                 update(UsagePoints, values=data).where(UsagePoints.usage_point_id == self.usage_point_id)
             )
         else:
-            usage_points = UsagePoints(usage_point_id=self.usage_point_id)
+            usage_points = UsagePoints(usage_point_id=self.usage_point_id, key=next_usage_point_key(self.session))
             for key, value in data.items():
                 setattr(usage_points, key, value)
             self.session.add(usage_points)
         self.session.flush()
         self.session.close()
+        self.invalidate()
 
     def set_data(self, usage_point_data):
         """Set usage point data in the database.
@@ -134,8 +158,10 @@ class DatabaseUsagePoints:
         Args:
             usage_point_data: The usage point data to store.
         """
+        key = self.session.scalar(select(UsagePoints.key).where(UsagePoints.usage_point_id == self.usage_point_id))
         usage_point = UsagePoints(
             usage_point_id=self.usage_point_id,
+            key=key if key is not None else next_usage_point_key(self.session),
             enable=usage_point_data.enable,
             name=usage_point_data.name,
             token=usage_point_data.token,
@@ -171,6 +197,7 @@ class DatabaseUsagePoints:
         )
         self.session.merge(usage_point)
         self.session.commit()
+        self.invalidate()
 
     def progress(self, increment):
         """Update progress in database."""
@@ -178,6 +205,7 @@ class DatabaseUsagePoints:
         usage_points = self.session.scalars(query).one_or_none()
         usage_points.progress = usage_points.progress + increment
         self.session.close()
+        self.invalidate()
 
     def last_call_update(self) -> None:
         """Update last call in database."""
@@ -186,6 +214,7 @@ class DatabaseUsagePoints:
         usage_points.last_call = datetime.now(tz=TIMEZONE_UTC)
         self.session.flush()
         self.session.close()
+        self.invalidate()
 
     def update(  # noqa: PLR0913
         self,
@@ -216,6 +245,7 @@ class DatabaseUsagePoints:
             usage_points.ban = ban
         self.session.flush()
         self.session.close()
+        self.invalidate()
 
     def delete(self) -> True:
         """Delete usage point from database."""
@@ -232,6 +262,10 @@ class DatabaseUsagePoints:
         self.session.execute(delete(Statistique).where(Statistique.usage_point_id == self.usage_point_id))
         self.session.flush()
         self.session.close()
+        forget_usage_point_key(self.usage_point_id)
+        self.invalidate()
+        CONTRACTS_CACHE.invalidate(self.usage_point_id, self.session)
+        ADDRESSES_CACHE.invalidate(self.usage_point_id, self.session)
         return True
 
     def get_error_log(self):
@@ -246,4 +280,5 @@ class DatabaseUsagePoints:
             update(UsagePoints, values=values).where(UsagePoints.usage_point_id == self.usage_point_id)
         )
         self.session.flush()
+        self.invalidate()
         return True
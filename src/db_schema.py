@@ -2,7 +2,7 @@
 
 import typing
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -32,6 +32,7 @@ class UsagePoints(Base):
     __tablename__ = "usage_points"
 
     usage_point_id = Column(Text, primary_key=True, unique=True, nullable=False, index=True)
+    key = Column(Integer, nullable=True, unique=True, index=True)
     name = Column(Text, nullable=False)
     cache = Column(Boolean, nullable=False, default=False)
     consumption = Column(Boolean, nullable=False, default=True)
@@ -93,6 +94,7 @@ class UsagePoints(Base):
         return (
             f"UsagePoints("
             f"usage_point_id={self.usage_point_id!r}, "
+            f"key={self.key!r}, "
             f"name={self.name!r}, "
             f"cache={self.cache!r}, "
             f"consumption={self.consumption!r}, "
@@ -237,9 +239,15 @@ class ConsumptionDaily(Base):
     """Represents the ConsumptionDaily class."""
 
     __tablename__ = "consumption_daily"
-
-    id = Column(String, primary_key=True, index=True, unique=True)
-    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False, index=True)
+    __table_args__: typing.ClassVar[tuple] = (
+        Index("ix_consumption_daily_usage_point_id_date", "usage_point_id", "date"),
+        {"sqlite_with_rowid": False},
+    )
+
+    # Compact primary key: integer key of the usage point and minute of the date (see `database.keys`)
+    usage_point_key = Column(Integer, primary_key=True, autoincrement=False)
+    minute = Column(Integer, primary_key=True, autoincrement=False)
+    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False)
     date = Column(DateTime, nullable=False)
     value = Column(Integer, nullable=False)
     blacklist = Column(Integer, nullable=False, default=0)
@@ -251,7 +259,8 @@ class ConsumptionDaily(Base):
         """Return the string representation of the Config object."""
         return (
             f"ConsumptionDaily("
-            f"id={self.id!r}, "
+            f"usage_point_key={self.usage_point_key!r}, "
+            f"minute={self.minute!r}, "
             f"usage_point_id={self.usage_point_id!r}, "
             f"date={self.date!r}, "
             f"value={self.value!r}, "
@@ -266,9 +275,16 @@ class ConsumptionDetail(Base):
     """Represents the ConsumptionDetail class."""
 
     __tablename__ = "consumption_detail"
-
-    id = Column(String, primary_key=True, index=True, unique=True)
-    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False, index=True)
+    __table_args__: typing.ClassVar[tuple] = (
+        # Covering index of the range queries (the value and the interval are read from the index)
+        Index("ix_consumption_detail_usage_point_id_date", "usage_point_id", "date", "value", "interval"),
+        {"sqlite_with_rowid": False},
+    )
+
+    # Compact primary key: integer key of the usage point and minute of the date (see `database.keys`)
+    usage_point_key = Column(Integer, primary_key=True, autoincrement=False)
+    minute = Column(Integer, primary_key=True, autoincrement=False)
+    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False)
     date = Column(DateTime, nullable=False)
     value = Column(Integer, nullable=False)
     interval = Column(Integer, nullable=False)
@@ -282,7 +298,8 @@ class ConsumptionDetail(Base):
         """Return the string representation of the Config object."""
         return (
             f"ConsumptionDetail("
-            f"id={self.id!r}, "
+            f"usage_point_key={self.usage_point_key!r}, "
+            f"minute={self.minute!r}, "
             f"usage_point_id={self.usage_point_id!r}, "
             f"date={self.date!r},"
             f"value={self.value!r}, "
@@ -298,9 +315,15 @@ class ProductionDaily(Base):
     """Represents the ProductionDaily class."""
 
     __tablename__ = "production_daily"
-
-    id = Column(String, primary_key=True, index=True, unique=True)
-    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False, index=True)
+    __table_args__: typing.ClassVar[tuple] = (
+        Index("ix_production_daily_usage_point_id_date", "usage_point_id", "date"),
+        {"sqlite_with_rowid": False},
+    )
+
+    # Compact primary key: integer key of the usage point and minute of the date (see `database.keys`)
+    usage_point_key = Column(Integer, primary_key=True, autoincrement=False)
+    minute = Column(Integer, primary_key=True, autoincrement=False)
+    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False)
     date = Column(DateTime, nullable=False)
     value = Column(Integer, nullable=False)
     blacklist = Column(Integer, nullable=False, default=0)
@@ -312,7 +335,8 @@ class ProductionDaily(Base):
         """Return the string representation of the Config object."""
         return (
             f"ProductionDaily("
-            f"id={self.id!r}, "
+            f"usage_point_key={self.usage_point_key!r}, "
+            f"minute={self.minute!r}, "
             f"usage_point_id={self.usage_point_id!r}, "
             f"date={self.date!r}, "
             f"value={self.value!r}, "
@@ -326,9 +350,16 @@ class ProductionDetail(Base):
     """Represents the ProductionDetail class."""
 
     __tablename__ = "production_detail"
-
-    id = Column(String, primary_key=True, index=True, unique=True)
-    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False, index=True)
+    __table_args__: typing.ClassVar[tuple] = (
+        # Covering index of the range queries (the value and the interval are read from the index)
+        Index("ix_production_detail_usage_point_id_date", "usage_point_id", "date", "value", "interval"),
+        {"sqlite_with_rowid": False},
+    )
+
+    # Compact primary key: integer key of the usage point and minute of the date (see `database.keys`)
+    usage_point_key = Column(Integer, primary_key=True, autoincrement=False)
+    minute = Column(Integer, primary_key=True, autoincrement=False)
+    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False)
     date = Column(DateTime, nullable=False)
     value = Column(Integer, nullable=False)
     interval = Column(Integer, nullable=False)
@@ -342,7 +373,8 @@ class ProductionDetail(Base):
         """Return the string representation of the Config object."""
         return (
             f"ProductionDetail("
-            f"id={self.id!r}, "
+            f"usage_point_key={self.usage_point_key!r}, "
+            f"minute={self.minute!r}, "
             f"usage_point_id={self.usage_point_id!r}, "
             f"date={self.date!r},"
             f"value={self.value!r}, "
@@ -383,9 +415,15 @@ class ConsumptionDailyMaxPower(Base):
     """Represents the ConsumptionDailyMaxPower class."""
 
     __tablename__ = "consumption_daily_max_power"
-
-    id = Column(String, primary_key=True, index=True, unique=True)
-    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False, index=True)
+    __table_args__: typing.ClassVar[tuple] = (
+        Index("ix_consumption_daily_max_power_usage_point_id_date", "usage_point_id", "date"),
+        {"sqlite_with_rowid": False},
+    )
+
+    # Compact primary key: integer key of the usage point and minute of the date (see `database.keys`)
+    usage_point_key = Column(Integer, primary_key=True, autoincrement=False)
+    minute = Column(Integer, primary_key=True, autoincrement=False)
+    usage_point_id = Column(Text, ForeignKey("usage_points.usage_point_id"), nullable=False)
     date = Column(DateTime, nullable=False)
     event_date = Column(DateTime, nullable=True)
     value = Column(Integer, nullable=False)
@@ -398,7 +436,8 @@ class ConsumptionDailyMaxPower(Base):
         """Return the string representation of the Config object."""
         return (
             f"ConsumptionDailyMaxPower("
-            f"id={self.id!r}, "
+            f"usage_point_key={self.usage_point_key!r}, "
+            f"minute={self.minute!r}, "
             f"usage_point_id={self.usage_point_id!r}, "
             f"date={self.date!r}, "
             f"event_date={self.event_date!r}, "
@@ -488,3 +527,29 @@ class Ecowatt(Base):
             f"detail={self.detail!r}, "
             f")"
         )
+
+
+class InfluxdbSync(Base):
+    """Represents the InfluxdbSync class (InfluxDB export watermark of a month)."""
+
+    __tablename__ = "influxdb_sync"
+
+    usage_point_id = Column(Text, primary_key=True, index=True)
+    measurement = Column(Text, primary_key=True)
+    month = Column(Text, primary_key=True)
+    count = Column(Integer, nullable=False)
+    checksum = Column(Text, nullable=False)
+    last_date = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        """Return the string representation of the InfluxdbSync object."""
+        return (
+            f"InfluxdbSync("
+            f"usage_point_id={self.usage_point_id!r}, "
+            f"measurement={self.measurement!r}, "
+            f"month={self.month!r}, "
+            f"count={self.count!r}, "
+            f"checksum={self.checksum!r}, "
+            f"last_date={self.last_date!r}, "
+            f")"
+        )
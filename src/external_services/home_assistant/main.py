@@ -10,24 +10,36 @@ from dateutil.relativedelta import relativedelta
 from config.main import APP_CONFIG
 from config.myelectricaldata import UsagePointId
 from const import TIMEZONE
-from database.contracts import Contracts, DatabaseContracts
-from database.daily import DatabaseDaily
-from database.detail import DatabaseDetail
-from database.ecowatt import DatabaseEcowatt
-from database.tempo import DatabaseTempo
-from database.usage_points import DatabaseUsagePoints
-from external_services.mqtt.client import Mqtt
-from models.stat import Stat
+from database.contracts import Contracts
+from models.export import Exporter, SharedDataset, UsagePointDataset, register_exporter
 from utils import convert_kw, convert_kw_to_euro, convert_price, get_version
 
 
 class HomeAssistant:  # pylint: disable=R0902
     """Represents a Home Assistant instance."""
 
-    def __init__(self, usage_point_id):
+    def __init__(self, usage_point_id=None, dataset=None):
+        """Initialize HomeAssistant for a usage point, or for the global data (tempo, ecowatt) without usage point.
+
+        Args:
+            usage_point_id (str, optional): The usage point id. Defaults to None (global data).
+            dataset (UsagePointDataset | SharedDataset, optional): The snapshot. Defaults to None (read).
+        """
         self.usage_point_id = usage_point_id
-        self.usage_point: UsagePointId = APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id]
-        self.contract: Contracts = DatabaseContracts(self.usage_point_id).get()
+        if self.usage_point_id is None:
+            self.usage_point: UsagePointId = None
+            self.dataset = None
+            self.shared: SharedDataset = dataset if dataset is not None else SharedDataset.load()
+            self.contract: Contracts = None
+        else:
+            self.usage_point: UsagePointId = APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id]
+            self.dataset: UsagePointDataset = (
+                dataset if dataset is not None else UsagePointDataset.load(self.usage_point_id)
+            )
+            self.shared: SharedDataset = self.dataset.shared
+            self.contract: Contracts = self.dataset.contract
+        from external_services.mqtt.client import Mqtt  # paho only imported when enabled
+
         self.mqtt = Mqtt()
         self.date_format = "%Y-%m-%d"
         self.date_format_detail = "%Y-%m-%d %H:%M:%S"
@@ -36,7 +48,7 @@ class HomeAssistant:  # pylint: disable=R0902
     def export(self):
         """Export data to Home Assistant.
 
-        This method exports consumption, production, tempo, and ecowatt data to Home Assistant.
+        This method exports the consumption and production data of the usage point to Home Assistant.
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             try:
@@ -52,7 +64,16 @@ class HomeAssistant:  # pylint: disable=R0902
                         self.myelectricaldata_usage_point_id("production")
                         self.last_x_day(5, "production")
                         self.history_usage_point_id("production")
+                else:
+                    logging.critical("=> Export MQTT Désactivée (Echec de connexion)")
+            except Exception:
+                traceback.print_exc()
 
+    def export_shared(self):
+        """Export the global data (tempo and ecowatt) to Home Assistant."""
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            try:
+                if self.mqtt.valid:
                     self.tempo()
                     self.tempo_info()
                     self.tempo_days()
@@ -130,7 +151,7 @@ class HomeAssistant:  # pylint: disable=R0902
             uniq_id = f"myelectricaldata_linky_{self.usage_point_id}_{measurement_direction}_last{days}day"
             end = datetime.combine(datetime.now(tz=TIMEZONE) - timedelta(days=1), datetime.max.time())
             begin = datetime.combine(end - timedelta(days), datetime.min.time())
-            range_detail = DatabaseDetail(self.usage_point_id, measurement_direction).get_range(begin, end)
+            range_detail = self.dataset.detail[measurement_direction].get_range(begin, end)
             attributes = {"time": [], measurement_direction: []}
             for data in range_detail:
                 attributes["time"].append(data.date.strftime("%Y-%m-%d %H:%M:%S"))
@@ -157,8 +178,8 @@ class HomeAssistant:  # pylint: disable=R0902
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             uniq_id = f"myelectricaldata_linky_{self.usage_point_id}_{measurement_direction}_history"
-            stats = Stat(self.usage_point_id, measurement_direction)
-            state = DatabaseDaily(self.usage_point_id, measurement_direction).get_last()
+            stats = self.dataset.stats[measurement_direction]
+            state = self.dataset.last_daily[measurement_direction]
             if state:
                 state = state.value
             else:
@@ -190,8 +211,8 @@ class HomeAssistant:  # pylint: disable=R0902
                   monthly, and yearly values.
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            stats = Stat(self.usage_point_id, measurement_direction)
-            state = DatabaseDaily(self.usage_point_id, measurement_direction).get_last()
+            stats = self.dataset.stats[measurement_direction]
+            state = self.dataset.last_daily[measurement_direction]
             if state:
                 state = state.value
             else:
@@ -316,7 +337,7 @@ class HomeAssistant:  # pylint: disable=R0902
             yesterday_evolution = stats.yesterday_evolution()
             monthly_evolution = stats.monthly_evolution()
             yearly_evolution = stats.yearly_evolution()
-            yesterday_last_year = DatabaseDaily(self.usage_point_id).get_date(
+            yesterday_last_year = self.dataset.daily["consumption"].get_date(
                 datetime.combine(yesterday_last_year, datetime.min.time()),
             )
             dailyweek_cost = []
@@ -345,7 +366,7 @@ class HomeAssistant:  # pylint: disable=R0902
                             yesterday_hp_value_cost = convert_kw_to_euro(hp, self.usage_point.consumption_price_hp)
                         dailyweek_cost.append(round(value, 1))
                 elif plan == "TEMPO":
-                    tempo_config = DatabaseTempo().get_config("price")
+                    tempo_config = self.shared.tempo_price
                     for i in range(7):
                         tempo_data = stats.tempo(i)["value"]
                         hp = tempo_data["blue_hp"] + tempo_data["white_hp"] + tempo_data["red_hp"]
@@ -421,7 +442,7 @@ class HomeAssistant:  # pylint: disable=R0902
             if self.usage_point.consumption_max_power:
                 yesterday_consumption_max_power = stats.max_power(0)["value"]
 
-            error_last_call = DatabaseUsagePoints(self.usage_point_id).get_error_log()
+            error_last_call = getattr(self.dataset.usage_point, "last_error", None)
             if error_last_call is None:
                 error_last_call = ""
 
@@ -572,11 +593,10 @@ class HomeAssistant:  # pylint: disable=R0902
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             uniq_id = "myelectricaldata_tempo_today"
             begin = datetime.combine(datetime.now(tz=TIMEZONE), datetime.min.time())
-            end = datetime.combine(datetime.now(tz=TIMEZONE), datetime.max.time())
-            tempo_data = DatabaseTempo().get_range(begin, end, "asc")
+            tempo_data = self.shared.tempo_color(begin)
             if tempo_data:
-                date = tempo_data[0].date.strftime(self.date_format_detail)
-                state = tempo_data[0].color
+                date = tempo_data.date.strftime(self.date_format_detail)
+                state = tempo_data.color
             else:
                 date = begin.strftime(self.date_format_detail)
                 state = "Inconnu"
@@ -595,10 +615,10 @@ class HomeAssistant:  # pylint: disable=R0902
 
             uniq_id = "myelectricaldata_tempo_tomorrow"
             begin = begin + timedelta(days=1)
-            end = end + timedelta(days=1)
+            tempo_data = self.shared.tempo_color(begin)
             if tempo_data:
-                date = tempo_data[0].date.strftime(self.date_format_detail)
-                state = tempo_data[0].color
+                date = tempo_data.date.strftime(self.date_format_detail)
+                state = tempo_data.color
             else:
                 date = begin.strftime(self.date_format_detail)
                 state = "Inconnu"
@@ -624,7 +644,7 @@ class HomeAssistant:  # pylint: disable=R0902
             None
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            tempo_days = DatabaseTempo().get_config("days")
+            tempo_days = self.shared.tempo_days
             for color, days in tempo_days.items():
                 self.tempo_days_sensor(f"{color}", days)
 
@@ -664,8 +684,8 @@ class HomeAssistant:  # pylint: disable=R0902
             tempo_begin = 6
             tempo_end = 22
             uniq_id = "myelectricaldata_tempo_info"
-            tempo_days = DatabaseTempo().get_config("days")
-            tempo_price = DatabaseTempo().get_config("price")
+            tempo_days = self.shared.tempo_days
+            tempo_price = self.shared.tempo_price
             if tempo_end > int(datetime.now(tz=TIMEZONE).strftime("%H")) < tempo_begin:
                 measure_type = "hc"
             else:
@@ -708,7 +728,7 @@ class HomeAssistant:  # pylint: disable=R0902
             None
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            tempo_price = DatabaseTempo().get_config("price")
+            tempo_price = self.shared.tempo_price
             for color, price in tempo_price.items():
                 self.tempo_price_sensor(
                     f"{color}",
@@ -777,13 +797,13 @@ class HomeAssistant:  # pylint: disable=R0902
             uniq_id = f"myelectricaldata_ecowatt_{name}"
             current_date = datetime.combine(datetime.now(tz=TIMEZONE), datetime.min.time()) + timedelta(days=delta)
             fetch_date = current_date - timedelta(days=1)
-            ecowatt_data = DatabaseEcowatt().get_range(fetch_date, fetch_date, "asc")
+            ecowatt_data = self.shared.ecowatt_range(fetch_date, fetch_date)
             day_value = 0
             if ecowatt_data:
                 forecast = {}
                 for data in ecowatt_data:
                     day_value = data.value
-                    for date, value in json.loads(data.detail.replace("'", '"')).items():
+                    for date, value in json.loads(data.detail).items():
                         date_datetime = datetime.strptime(date, self.date_format_detail).replace(tzinfo=TIMEZONE)
                         forecast[f'{date_datetime.strftime("%H")} h'] = value
                 attributes = {
@@ -800,3 +820,28 @@ class HomeAssistant:  # pylint: disable=R0902
                     attributes=attributes,
                     state=day_value,
                 )
+
+
+@register_exporter
+class HomeAssistantExporter(Exporter):
+    """Export the data of a usage point to Home Assistant (MQTT discovery)."""
+
+    name = "home_assistant"
+    description = "Home Assistant (via MQTT)"
+
+    def enabled(self):
+        """Check if Home Assistant is enabled, the export depends on MQTT."""
+        if APP_CONFIG.home_assistant.enable and not APP_CONFIG.mqtt.enable:
+            logging.critical(
+                "L'export Home Assistant est dépendant de MQTT, "
+                "merci de configurer MQTT avant d'exporter vos données dans Home Assistant"
+            )
+        return APP_CONFIG.home_assistant.enable and APP_CONFIG.mqtt.enable
+
+    def export_shared(self, dataset):
+        """Export the tempo and ecowatt data to Home Assistant."""
+        HomeAssistant(dataset=dataset).export_shared()
+
+    def export(self, dataset):
+        """Export the data of a usage point to Home Assistant."""
+        HomeAssistant(dataset.usage_point_id, dataset).export()
@@ -0,0 +1,209 @@
+"""Asynchronous client for the Home Assistant WebSocket API."""
+import asyncio
+import json
+import logging
+
+import aiohttp
+
+
+class HomeAssistantWsClient:
+    """Pipelined Home Assistant WebSocket client.
+
+    Requests are correlated with their response through the message `id`, so several requests can be in flight
+    at the same time (up to `window_size`).
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        uri,
+        token,
+        ssl=False,
+        window_size=10,
+        max_retries=3,
+        retry_delay=5,
+        timeout=300,
+    ):
+        """Initialize the client.
+
+        Args:
+            uri (str): The WebSocket uri (ws://host:port/api/websocket)
+            token (str): The Home Assistant long life token
+            ssl (bool, optional): Use wss without certificate check. Defaults to False.
+            window_size (int, optional): Maximum number of requests in flight. Defaults to 10.
+            max_retries (int, optional): Number of reconnection attempts. Defaults to 3.
+            retry_delay (int, optional): Delay between two reconnection attempts in seconds. Defaults to 5.
+            timeout (int, optional): Maximum time to wait for a response in seconds. Defaults to 300.
+        """
+        self.uri = uri
+        self.token = token
+        self.ssl = ssl
+        self.window_size = max(1, int(window_size))
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.id = 0
+        self.session = None
+        self.websocket = None
+        self.reader = None
+        self.pending = {}
+        self.send_lock = asyncio.Lock()
+        self.connect_lock = asyncio.Lock()
+
+    @property
+    def connected(self):
+        """Return True if the WebSocket is open."""
+        return self.websocket is not None and not self.websocket.closed
+
+    async def connect(self):
+        """Open the WebSocket and authenticate.
+
+        Returns:
+            bool: True if the connection and the authentication are successful, False otherwise
+        """
+        await self.close()
+        self.session = aiohttp.ClientSession()
+        self.websocket = await self.session.ws_connect(
+            self.uri,
+            ssl=False if self.ssl else None,
+            heartbeat=30,
+            max_msg_size=0,
+        )
+        output = await self.websocket.receive_json(timeout=5)
+        if output.get("type") == "auth_required":
+            logging.info("Authentification requise")
+            await self.websocket.send_str(json.dumps({"type": "auth", "access_token": self.token}))
+            output = await self.websocket.receive_json(timeout=5)
+            if output.get("type") != "auth_ok":
+                logging.error(" => Authentification impossible, merci de vérifier votre url & token.")
+                await self.close()
+                return False
+            logging.info(" => OK")
+        self.pending = {}
+        self.reader = asyncio.create_task(self.read(self.websocket, self.pending))
+        return True
+
+    async def ensure_connection(self):
+        """Ensure the WebSocket connection is active, attempt to reconnect if not.
+
+        Returns:
+            bool: True if connection is active or successfully reconnected
+        """
+        async with self.connect_lock:
+            if self.connected:
+                return True
+            for attempt in range(self.max_retries):
+                logging.warning(f"Tentative de reconnexion ({attempt + 1}/{self.max_retries})...")
+                try:
+                    if await self.connect():
+                        return True
+                except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                    logging.error(f"Erreur de connexion : {e!s}")
+                await asyncio.sleep(self.retry_delay)
+            return False
+
+    @staticmethod
+    async def read(websocket, pending):
+        """Dispatch the incoming messages of a connection to its pending requests.
+
+        Args:
+            websocket (ClientWebSocketResponse): The connection
+            pending (dict): The futures waiting for a response, by message id
+        """
+        try:
+            async for message in websocket:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                output = json.loads(message.data)
+                future = pending.pop(output.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(output)
+        finally:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connexion WebSocket fermée"))
+            pending.clear()
+
+    async def request(self, data):
+        """Send a message and wait for its response.
+
+        The message is sent again after a reconnection if the connection is lost before the response is received.
+
+        Args:
+            data (dict): The message to send (the id is set by the client)
+
+        Returns:
+            dict: The output from the server
+        """
+        for attempt in range(self.max_retries + 1):
+            if not await self.ensure_connection():
+                raise ConnectionError("Impossible de maintenir la connexion WebSocket")
+            future = asyncio.get_running_loop().create_future()
+            websocket, pending = self.websocket, self.pending
+            if websocket is None:
+                continue
+            async with self.send_lock:
+                # Home Assistant requires increasing ids, assignment and send must not be interleaved.
+                self.id = self.id + 1
+                message_id = self.id
+                pending[message_id] = future
+                try:
+                    await websocket.send_str(json.dumps({**data, "id": message_id}))
+                except (aiohttp.ClientError, ConnectionError) as e:
+                    pending.pop(message_id, None)
+                    future.set_exception(ConnectionError(str(e)))
+            try:
+                output = await asyncio.wait_for(future, self.timeout)
+            except (ConnectionError, asyncio.TimeoutError) as e:
+                pending.pop(message_id, None)
+                logging.error(f"Erreur de connexion lors de l'envoi: {e!s}")
+                if attempt == self.max_retries:
+                    raise ConnectionError("Impossible de maintenir la connexion WebSocket") from e
+                if self.websocket is websocket:
+                    # Another request may already have reconnected.
+                    await self.close()
+                continue
+            if output.get("type") == "result" and not output.get("success"):
+                logging.error(f"Erreur d'envoi : {data.get('type')}")
+                logging.error(output)
+            return output
+        return None
+
+    async def request_many(self, messages):
+        """Send messages keeping at most `window_size` requests in flight.
+
+        The messages are consumed lazily, so a generator can be used to keep the memory bounded.
+
+        Args:
+            messages (iterable): The messages to send
+        Returns:
+            int: The number of messages sent
+        """
+        in_flight = set()
+        count = 0
+        try:
+            for data in messages:
+                if len(in_flight) >= self.window_size:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                in_flight.add(asyncio.create_task(self.request(data)))
+                count = count + 1
+            if in_flight:
+                await asyncio.gather(*in_flight)
+                in_flight = set()
+        finally:
+            for task in in_flight:
+                task.cancel()
+        return count
+
+    async def close(self):
+        """Close the WebSocket and the HTTP session."""
+        # Detach first: a concurrent reconnection must not be closed by this call.
+        websocket, reader, session = self.websocket, self.reader, self.session
+        self.websocket, self.reader, self.session = None, None, None
+        if websocket is not None and not websocket.closed:
+            await websocket.close()
+        if reader is not None:
+            await asyncio.gather(reader, return_exceptions=True)
+        if session is not None and not session.closed:
+            await session.close()
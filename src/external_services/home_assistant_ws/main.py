@@ -1,50 +1,47 @@
 """Import data in statistique recorder of Home Assistant."""
+import asyncio
 import inspect
-import json
 import logging
-import ssl
-import time
 import traceback
-import websocket
-import calendar
-
 from datetime import datetime, timedelta
 
 from config.main import APP_CONFIG
 from config.myelectricaldata import UsagePointId
-from const import TEMPO_BEGIN, TIMEZONE, URL_CONFIG_FILE
+from const import TIMEZONE, TIMEZONE_UTC, URL_CONFIG_FILE
 from database.config import DatabaseConfig
-from database.detail import DatabaseDetail
-from database.tempo import DatabaseTempo
-from database.flex import DatabaseFlex, FlexDayManager
 from database.usage_points import DatabaseUsagePoints
-from models.stat import Stat
-from utils import chunks_list
+from external_services.home_assistant_ws.statistics import HourlyStatistics
+from models.export import Exporter, UsagePointDataset, register_exporter
+
 
 class HomeAssistantWs:
     """Class to interact with Home Assistant WebSocket API."""
 
-    def __init__(self, usage_point_id):
+    def __init__(self, usage_point_id, dataset=None):
         """Initialize the class with the usage point id.
 
         Args:
             usage_point_id (str): The usage point id
+            dataset (UsagePointDataset, optional): The snapshot of the usage point. Defaults to None (read).
         """
-        self.websocket = None
+        self.client = None
+        self.loop = asyncio.new_event_loop()
         self.usage_point_id = usage_point_id
+        self.dataset: UsagePointDataset = dataset if dataset is not None else UsagePointDataset.load(usage_point_id)
         self.usage_point_id_config: UsagePointId = APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id]
-        self.id = 1
         self.purge_force = False
         self.current_stats = []
         self.max_retries = 3
         self.retry_delay = 5  # seconds
-        
-        if self.connect():
-            self.import_data()
-        else:
-            logging.critical("La configuration Home Assistant WebSocket est erronée")
-        if self.websocket and self.websocket.connected:
-            self.websocket.close()
+        self.resume_lookback = 31  # days
+
+        try:
+            if self.connect():
+                self.import_data()
+            else:
+                logging.critical("La configuration Home Assistant WebSocket est erronée")
+        finally:
+            self.close()
 
     def connect(self):
         """Connect to the Home Assistant WebSocket server.
@@ -54,31 +51,30 @@ class HomeAssistantWs:
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             try:
+                from external_services.home_assistant_ws.client import (  # aiohttp only imported when enabled
+                    HomeAssistantWsClient,
+                )
+
                 prefix = "ws"
-                sslopt = None
                 if APP_CONFIG.home_assistant_ws.ssl:
-                    sslopt = {"cert_reqs": ssl.CERT_NONE}
                     prefix = "wss"
                 self.uri = f"{prefix}://{APP_CONFIG.home_assistant_ws.url}/api/websocket"
-                
-                # Enable ping/pong to keep connection alive
-                self.websocket = websocket.WebSocket(sslopt=sslopt)
-                self.websocket.ping_interval = 30
-                self.websocket.ping_timeout = 10
-                
+                self.client = HomeAssistantWsClient(
+                    self.uri,
+                    APP_CONFIG.home_assistant_ws.token,
+                    ssl=APP_CONFIG.home_assistant_ws.ssl,
+                    window_size=APP_CONFIG.home_assistant_ws.window_size,
+                    max_retries=self.max_retries,
+                    retry_delay=self.retry_delay,
+                )
                 logging.info("Connexion au WebSocket Home Assistant %s", self.uri)
-                self.websocket.connect(self.uri, timeout=5)
-                output = json.loads(self.websocket.recv())
-                if "type" in output and output["type"] == "auth_required":
-                    logging.info("Authentification requise")
-                    return self.authentificate()
-                return True
+                return self.loop.run_until_complete(self.client.connect())
             except Exception as e:
-                if self.websocket:
-                    self.websocket.close()
+                if self.client:
+                    self.loop.run_until_complete(self.client.close())
                 logging.error(
                     f"""
-    Impossible de se connecter au WebSocket Home Assistant: {str(e)}
+    Impossible de se connecter au WebSocket Home Assistant: {e!s}
 
     Vous pouvez récupérer un exemple ici :
 {URL_CONFIG_FILE}
@@ -86,35 +82,11 @@ class HomeAssistantWs:
                 )
                 return False
 
-    def ensure_connection(self):
-        """Ensure the WebSocket connection is active, attempt to reconnect if not.
-        
-        Returns:
-            bool: True if connection is active or successfully reconnected
-        """
-        if not self.websocket or not self.websocket.connected:
-            for attempt in range(self.max_retries):
-                logging.warning(f"Tentative de reconnexion ({attempt + 1}/{self.max_retries})...")
-                if self.connect() and self.authentificate():
-                    return True
-                time.sleep(self.retry_delay)
-            return False
-        return True
-
-    def authentificate(self):
-        """Authenticate with the Home Assistant WebSocket server.
-
-        Returns:
-            bool: True if the authentication is successful, False otherwise
-        """
-        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            data = {"type": "auth", "access_token": APP_CONFIG.home_assistant_ws.token}
-            auth_output = self.send(data)
-            if auth_output["type"] == "auth_ok":
-                logging.info(" => OK")
-                return True
-            logging.error(" => Authentification impossible, merci de vérifier votre url & token.")
-            return False
+    def close(self):
+        """Close the connection and the event loop."""
+        if self.client is not None:
+            self.loop.run_until_complete(self.client.close())
+        self.loop.close()
 
     def send(self, data):
         """Send data to the Home Assistant WebSocket server.
@@ -125,23 +97,18 @@ class HomeAssistantWs:
             dict: The output from the server
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            if not self.ensure_connection():
-                raise ConnectionError("Impossible de maintenir la connexion WebSocket")
-            
-            try:
-                self.websocket.send(json.dumps(data))
-                self.id = self.id + 1
-                output = json.loads(self.websocket.recv())
-                if "type" in output and output["type"] == "result":
-                    if not output["success"]:
-                        logging.error(f"Erreur d'envoi : {data}")
-                        logging.error(output)
-                return output
-            except (websocket.WebSocketConnectionClosedException, ConnectionError) as e:
-                logging.error(f"Erreur de connexion lors de l'envoi: {str(e)}")
-                if self.ensure_connection():
-                    return self.send(data)  # Retry once if reconnection successful
-                raise
+            return self.loop.run_until_complete(self.client.request(data))
+
+    def send_many(self, messages):
+        """Send independent messages, several requests being kept in flight (see `window_size`).
+
+        Args:
+            messages (iterable): The messages to send
+        Returns:
+            int: The number of messages sent
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            return self.loop.run_until_complete(self.client.request_many(messages))
 
     def list_data(self):
         """List the data already cached in Home Assistant.
@@ -152,7 +119,6 @@ class HomeAssistantWs:
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Liste les données déjà en cache.")
             import_statistics = {
-                "id": self.id,
                 "type": "recorder/list_statistic_ids",
                 "statistic_type": "sum",
             }
@@ -175,7 +141,6 @@ class HomeAssistantWs:
             for key in statistic_ids:
                 logging.info(f" - {key}")
             clear_statistics = {
-                "id": self.id,
                 "type": "recorder/clear_statistics",
                 "statistic_ids": statistic_ids,
             }
@@ -184,29 +149,242 @@ class HomeAssistantWs:
             clear_stat = self.send(clear_statistics)
             return clear_stat
 
-    def get_data(self, statistic_ids, begin: datetime, end: datetime):
+    def get_data(self, statistic_ids, begin: datetime, end: datetime, period="hour"):
         """Get the data for a given period.
 
         Args:
-            statistic_ids (list): The list of statistic ids
+            statistic_ids (str|list): The statistic id or the list of statistic ids
             begin (datetime): The start of the period
             end (datetime): The end of the period
+            period (str, optional): The statistics period (hour, day, week, month). Defaults to "hour".
+
         Returns:
             dict: The data for the period
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            if isinstance(statistic_ids, str):
+                statistic_ids = [statistic_ids]
             statistics_during_period = {
-                "id": self.id,
                 "type": "recorder/statistics_during_period",
                 "start_time": begin.isoformat(),
                 "end_time": end.isoformat(),
-                "statistic_ids": [statistic_ids],
-                "period": "hour",
+                "statistic_ids": statistic_ids,
+                "period": period,
             }
             stat_period = self.send(statistics_during_period)
             return stat_period
 
-    def import_data(self):  # noqa: C901, PLR0915
+    @staticmethod
+    def parse_start(start):
+        """Convert the "start" of a recorder statistic into a datetime.
+
+        Recent Home Assistant versions return a timestamp in milliseconds, older ones an ISO 8601 string.
+
+        Args:
+            start (float|str): The start returned by the recorder
+        Returns:
+            datetime: The start as an aware datetime
+        """
+        if isinstance(start, (int, float)):
+            return datetime.fromtimestamp(start / 1000, tz=TIMEZONE_UTC)
+        return datetime.fromisoformat(start)
+
+    def get_statistic_ids(self, measurement_direction):
+        """Return the statistic ids of the usage point already known by Home Assistant.
+
+        Args:
+            measurement_direction (str): consumption or production
+        Returns:
+            list: The statistic ids
+        """
+        if not self.current_stats:
+            self.list_data()
+        prefix = f"myelectricaldata:{self.usage_point_id}_"
+        statistic_ids = []
+        for statistic_id in self.current_stats:
+            if not statistic_id.startswith(prefix):
+                continue
+            is_production = "_production" in statistic_id
+            if is_production == (measurement_direction == "production"):
+                statistic_ids.append(statistic_id)
+        return statistic_ids
+
+    def get_resume_point(self, measurement_direction):
+        """Find where the previous import stopped in the Home Assistant recorder.
+
+        The last imported hour is searched over the last `resume_lookback` days, the import then restarts at the
+        beginning of that day (so the daily charge stays consistent) and each statistic continues from the sum it
+        had just before.
+
+        Args:
+            measurement_direction (str): consumption or production
+        Returns:
+            tuple|None: (begin, {statistic_id: sum}) or None when a full import is required
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            if not APP_CONFIG.home_assistant_ws.incremental or APP_CONFIG.home_assistant_ws.purge or self.purge_force:
+                return None
+            statistic_ids = self.get_statistic_ids(measurement_direction)
+            if not statistic_ids:
+                logging.info(" => Aucune donnée dans Home Assistant, import complet.")
+                return None
+
+            now = datetime.now(tz=TIMEZONE_UTC)
+            window = self.get_data(statistic_ids, now - timedelta(days=self.resume_lookback), now).get("result")
+            if not isinstance(window, dict):
+                return None
+            last_start = max((self.parse_start(rows[-1]["start"]) for rows in window.values() if rows), default=None)
+            if last_start is None:
+                logging.info(
+                    " => Aucune donnée importée depuis %s jours dans Home Assistant, import complet.",
+                    self.resume_lookback,
+                )
+                return None
+            begin = TIMEZONE.localize(datetime.combine(last_start.astimezone(TIMEZONE).date(), datetime.min.time()))
+
+            sums = {}
+            missing = []
+            for statistic_id in statistic_ids:
+                previous = [row for row in window.get(statistic_id, []) if self.parse_start(row["start"]) < begin]
+                if previous:
+                    sums[statistic_id] = previous[-1]["sum"] or 0
+                else:
+                    missing.append(statistic_id)
+            if missing:
+                sums.update(self.get_sums_before(missing, measurement_direction, begin))
+            logging.info(" => Reprise de l'import à partir du %s", begin.strftime("%Y-%m-%d"))
+            return begin, sums
+
+    def get_sums_before(self, statistic_ids, measurement_direction, begin):
+        """Return the sum of statistics not updated recently (ex: tempo red days) just before `begin`.
+
+        The monthly aggregate of a month includes all its hours, so it is only read up to the last complete month
+        before `begin`, and the hours between the beginning of the month of `begin` and `begin` are read hourly.
+
+        Args:
+            statistic_ids (list): The statistic ids
+            measurement_direction (str): consumption or production
+            begin (datetime): The resume point
+        Returns:
+            dict: {statistic_id: sum} of the statistics found
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            sums = {}
+            first_date = self.dataset.detail[measurement_direction].first_date
+            if not first_date:
+                return sums
+            month_begin = TIMEZONE.localize(datetime.combine(begin.date().replace(day=1), datetime.min.time()))
+            for period, period_begin, period_end in [
+                ("month", TIMEZONE.localize(first_date), month_begin),
+                ("hour", month_begin, begin),
+            ]:
+                if period_begin >= period_end:
+                    continue
+                history = self.get_data(statistic_ids, period_begin, period_end, period=period).get("result") or {}
+                for statistic_id in statistic_ids:
+                    rows = [
+                        row for row in history.get(statistic_id, []) if self.parse_start(row["start"]) < period_end
+                    ]
+                    if rows:
+                        sums[statistic_id] = rows[-1]["sum"] or 0
+            return sums
+
+    @staticmethod
+    def statistics_metadata(statistic_id, name, unit_of_measurement):
+        """Build the metadata of an external statistic.
+
+        Args:
+            statistic_id (str): The statistic id
+            name (str): The statistic name
+            unit_of_measurement (str): The unit (kWh, EURO)
+
+        Returns:
+            dict: The metadata
+        """
+        return {
+            "has_mean": False,
+            "has_sum": True,
+            "name": name,
+            "source": "myelectricaldata",
+            "statistic_id": statistic_id,
+            "unit_of_measurement": unit_of_measurement,
+        }
+
+    def import_statistics_messages(self, batches):
+        """Yield the recorder/import_statistics messages.
+
+        Args:
+            batches (iterable): The statistics chunks (see HourlyStatistics.stream)
+
+        Yields:
+            dict: The message to send
+        """
+        for statistic, rows in batches:
+            logging.info(
+                "   * %s (%s) : %s => %s (%s) ",
+                statistic["tag"].upper() if statistic["tag"] else statistic["name"],
+                statistic["unit"],
+                rows[-1]["start"],
+                rows[0]["start"],
+                statistic["chunks"],
+            )
+            yield {
+                "type": "recorder/import_statistics",
+                "metadata": self.statistics_metadata(statistic["statistic_id"], statistic["name"], statistic["unit"]),
+                "stats": rows,
+            }
+
+    def import_statistics(self, measurement_direction, plan=None, tariff_change_date=None):
+        """Stream the statistics of a measurement direction into Home Assistant.
+
+        The detail data of the dataset is processed by chunks, the statistics are built in time order and sent as soon
+        as `batch_size` hours are ready.
+
+        Args:
+            measurement_direction (str): consumption or production
+            plan (str, optional): The plan of the usage point (consumption only). Defaults to None.
+            tariff_change_date (datetime, optional): FLEX only, BASE prices are used before this date.
+
+        Returns:
+            int: The number of messages sent
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            begin = None
+            max_date = APP_CONFIG.home_assistant_ws.max_date
+            if max_date is not None:
+                logging.warning("Max date détectée %s", max_date)
+                begin = datetime.strptime(max_date, "%Y-%m-%d").replace(tzinfo=TIMEZONE)
+            sum_offset = {}
+            resume = self.get_resume_point(measurement_direction)
+            if resume is not None:
+                resume_begin, sum_offset = resume
+                if begin is None or resume_begin > begin:
+                    begin = resume_begin
+
+            # CLEAN OLD DATA
+            if APP_CONFIG.home_assistant_ws.purge or self.purge_force:
+                logging.info(f"Clean old data import In Home Assistant Recorder {self.usage_point_id}")
+                statistic_ids = self.get_statistic_ids(measurement_direction)
+                if statistic_ids:
+                    self.clear_data(statistic_ids)
+                APP_CONFIG.home_assistant_ws.purge = False
+                DatabaseConfig().set("purge", False)
+
+            batch_size = APP_CONFIG.home_assistant_ws.batch_size
+            statistics = HourlyStatistics(
+                self.usage_point_id,
+                self.usage_point_id_config,
+                measurement_direction,
+                plan=plan,
+                tariff_change_date=tariff_change_date,
+                sum_offset=sum_offset,
+                batch_size=batch_size,
+                dataset=self.dataset,
+            )
+            detail = self.dataset.detail[measurement_direction].chunks(begin=begin, chunk_size=batch_size)
+            return self.send_many(self.import_statistics_messages(statistics.stream(detail)))
+
+    def import_data(self):
         """Import the data for the usage point into Home Assistant."""
         # Check and parse tariff_change_date
         if hasattr(self.usage_point_id_config, "tariff_change_date") and self.usage_point_id_config.tariff_change_date:
@@ -223,441 +401,28 @@ class HomeAssistantWs:
             try:
                 plan = DatabaseUsagePoints(self.usage_point_id).get_plan()
                 if self.usage_point_id_config.consumption_detail:
-                    logging.info(" => Préparation des données de consommation...")
-                    measurement_direction = "consumption"
-                    max_date = APP_CONFIG.home_assistant_ws.max_date
-                    if max_date is not None:
-                        logging.warning("Max date détectée %s", max_date)
-                        begin = datetime.strptime(max_date, "%Y-%m-%d").replace(tzinfo=TIMEZONE)
-                        detail = DatabaseDetail(self.usage_point_id).get_all(begin=begin, order_dir="desc")
-                    else:
-                        detail = DatabaseDetail(self.usage_point_id).get_all(order_dir="desc")
-
-                    cost = 0
-                    last_year = None
-                    last_month = None
-
-                    stats_kwh = {}
-                    stats_euro = {}
-
-                    db_tempo_price = DatabaseTempo().get_config("price")
-                    tempo_color_ref = {}
-                    for tempo_data in DatabaseTempo().get():
-                        tempo_color_ref[tempo_data.date] = tempo_data.color
-
-                    stats = Stat(usage_point_id=self.usage_point_id, measurement_direction="consumption")
-                    strdate = ""
-                    day_flex = "Inconnu"
-
-                    first_time_slot = None
-                    daily_charge = 0
-
-                    for data in detail:
-                        year = int(f'{data.date.strftime("%Y")}')
-                        if last_year is None or year != last_year:
-                            logging.info(f"  - {year} :")
-                        month = int(f'{data.date.strftime("%m")}')
-                        if last_month is None or month != last_month:
-                            logging.info(f"    * {month}")
-                        day = int(f'{data.date.strftime("%d")}')    
-                        last_year = year
-                        last_month = month
-                        hour_minute = int(f'{data.date.strftime("%H")}{data.date.strftime("%M")}')
-
-                        # Check if it's the first time slot of the day
-                        if first_time_slot is None or (year, month, day) != (last_year, last_month, last_day):
-                            first_time_slot = data
-                            last_day =  day
-                        # Calculate daily charge based on the first time slot
-                        if data == first_time_slot:
-                            num_days_in_month = calendar.monthrange(year, month)[1]
-                            daily_charge = self.usage_point_id_config.monthly_charge / num_days_in_month
-                        else:
-                            daily_charge = 0
-
-                        name = f"MyElectricalData - {self.usage_point_id}"
-                        statistic_id = f"myelectricaldata:{self.usage_point_id}"
-                        day_interval = data.interval if hasattr(data, "interval") and data.interval != 0 else 1
-                        value = data.value / (60 / day_interval)                     
-                        
-                        tag = None
-                        if plan == "BASE":
-                            name = f"{name} {plan} {measurement_direction}"
-                            statistic_id = f"{statistic_id}_{plan.lower()}_{measurement_direction}"
-                            cost = value * self.usage_point_id_config.consumption_price_base / 1000
-                            tag = "base"
-                        elif plan == "HC/HP":
-                            measure_type = stats.get_mesure_type(data.date)
-                            if measure_type == "HC":
-                                name = f"{name} HC {measurement_direction}"
-                                statistic_id = f"{statistic_id}_hc_{measurement_direction}"
-                                cost = value * self.usage_point_id_config.consumption_price_hc / 1000
-                                tag = "hc"
-                            else:
-                                name = f"{name} HP {measurement_direction}"
-                                statistic_id = f"{statistic_id}_hp_{measurement_direction}"
-                                cost = value * self.usage_point_id_config.consumption_price_hp / 1000
-                                tag = "hp"
-                        elif plan.upper() == "TEMPO" :
-                            hour_type = stats.get_mesure_type(data.date)
-                            max_time = 2359
-                            if TEMPO_BEGIN <= hour_minute <= max_time:
-                                date = datetime.combine(data.date, datetime.min.time())
-                            else:
-                                date = datetime.combine(data.date - timedelta(days=1), datetime.min.time())
-
-                            if date not in tempo_color_ref:
-                                logging.error(f"Import impossible, pas de donnée tempo sur la date du {data.date}")
-                            else:                   
-                                day_color = tempo_color_ref[date]
-                                tempo_color = f"{day_color}{hour_type}"
-                                tempo_color_price_key = f"{day_color.lower()}_{hour_type.lower()}"
-                                tempo_price = float(db_tempo_price[tempo_color_price_key])
-                                cost = value / 1000 * tempo_price
-                                name = f"{name} {tempo_color} {measurement_direction}"
-                                statistic_id = f"{statistic_id}_{tempo_color.lower()}_{measurement_direction}"
-                                tag = tempo_color.lower()                        
-                        elif plan.upper() == "FLEX" :
-                            # Check if we should use BASE tariff based on date
-                            tariff_change_date = datetime.strptime(self.usage_point_id_config.tariff_change_date, "%Y-%m-%d") if hasattr(self.usage_point_id_config, "tariff_change_date") else None
-
-                            if tariff_change_date and data.date < tariff_change_date:
-                                # Use BASE tariff pricing with normal_HP for all consumption
-                                flex_hour = "normal_HP"
-                                cost = value * self.usage_point_id_config.consumption_price_base / 1000
-                                name = f"{name} {flex_hour} {measurement_direction}"
-                                statistic_id = f"{statistic_id}_{flex_hour.lower()}_{measurement_direction}"
-                                tag = flex_hour.lower()
-                            else:
-                                # Use FLEX tariff logic
-                                # Récupérer le statut Flex
-                                db_flex = DatabaseFlex()  # Utilise la session de DB par défaut
-                                flex_manager = FlexDayManager(db_flex)
-                                hour_type = stats.get_mesure_type(data.date)
-                                newstrdate = data.date.strftime("%Y-%m-%d")
-
-                                if newstrdate != strdate:
-                                    strdate = newstrdate
-                                    day_flex = flex_manager.get_flex_status(strdate)
-
-                                if day_flex == "Inconnu":
-                                  logging.info(f"Day flex : Inconnu {strdate}")
-                                  if hour_type == "HC":
-                                    flex_hour = "normal_HC"
-                                    cost = value * self.usage_point_id_config.consumption_price_hc / 1000
-                                  elif hour_type == "HP":
-                                    flex_hour = "normal_HP"
-                                    cost = value * self.usage_point_id_config.consumption_price_hp / 1000
-
-                                  name = f"{name} {flex_hour} {measurement_direction}"
-                                  statistic_id = f"{statistic_id}_{flex_hour.lower()}_{measurement_direction}"
-                                  tag = flex_hour.lower()
-
-                                else:
-                                  flex_hour = f"{day_flex.lower()}_{hour_type}"
-                                  name = f"{name} {flex_hour} {measurement_direction}"
-                                  statistic_id = f"{statistic_id}_{flex_hour.lower()}_{measurement_direction}"
-                                  tag = flex_hour.lower()
-                                  #logging.info(f"self.usage_point_id_config : {self.usage_point_id_config}")
-                                  if flex_hour == "normal_HC":
-                                    #logging.info(f"Tariff {data.date} consumption_price_flex_normal_hc {self.usage_point_id_config.consumption_price_flex_normal_hc}")
-                                    cost = value * self.usage_point_id_config.consumption_price_flex_normal_hc / 1000
-                                  elif flex_hour == "normal_HP":
-                                    #logging.info(f"Tariff {data.date} consumption_price_flex_normal_hp {self.usage_point_id_config.consumption_price_flex_normal_hp}")
-                                    cost = value * self.usage_point_id_config.consumption_price_flex_normal_hp / 1000
-                                  elif flex_hour == "sobriete_HC":
-                                    #logging.info(f"Tariff {data.date} consumption_price_flex_sobriete_hc {self.usage_point_id_config.consumption_price_flex_sobriete_hc}")
-                                    cost = value * self.usage_point_id_config.consumption_price_flex_sobriete_hc / 1000
-                                  elif flex_hour == "sobriete_HP":
-                                    #logging.info(f"Tariff {data.date} consumption_price_flex_sobriete_hp {self.usage_point_id_config.consumption_price_flex_sobriete_hp}")
-                                    cost = value * self.usage_point_id_config.consumption_price_flex_sobriete_hp / 1000
-                                  elif flex_hour == "bonus_HC":
-                                    #logging.info(f"Tariff {data.date} consumption_price_flex_bonus_hc {self.usage_point_id_config.consumption_price_flex_bonus_hc}")
-                                    cost = value * self.usage_point_id_config.consumption_price_flex_bonus_hc / 1000
-                                  elif flex_hour == "bonus_HP":
-                                    #logging.info(f"Tariff {data.date} consumption_price_flex_bonus_hp {self.usage_point_id_config.consumption_price_flex_bonus_hp}")
-                                    cost = value * self.usage_point_id_config.consumption_price_flex_bonus_hp / 1000
-                                  else:
-                                    cost = 0.0                                                                                
-                        else:
-                            logging.error(f"Plan {plan} inconnu.")
-
-                        date = TIMEZONE.localize(data.date, "%Y-%m-%d %H:%M:%S")
-                        date = date.replace(minute=0, second=0, microsecond=0)
-                        key = date.strftime("%Y-%m-%d %H:%M:%S")
-
-                        # KWH
-                        if statistic_id not in stats_kwh:
-                            stats_kwh[statistic_id] = {"name": name, "sum": 0, "data": {}}
-                        if key not in stats_kwh[statistic_id]["data"]:
-                            stats_kwh[statistic_id]["data"][key] = {
-                                "start": date.isoformat(),
-                                "state": 0,
-                                "sum": 0,
-                            }
-                        value = value / 1000
-                        stats_kwh[statistic_id]["data"][key]["state"] = (
-                            stats_kwh[statistic_id]["data"][key]["state"] + value
-                        )
-                        stats_kwh[statistic_id]["tag"] = tag
-                        stats_kwh[statistic_id]["sum"] += value
-                        stats_kwh[statistic_id]["data"][key]["sum"] = stats_kwh[statistic_id]["sum"]
-                        
-                        # EURO
-                        statistic_id = f"{statistic_id}_cost"
-                        if statistic_id not in stats_euro:
-                            stats_euro[statistic_id] = {
-                                "name": f"{name} Cost",
-                                "sum": 0,
-                                "data": {},
-                            }
-                        if key not in stats_euro[statistic_id]["data"]:
-                            stats_euro[statistic_id]["data"][key] = {
-                                "start": date.isoformat(),
-                                "state": 0,
-                                "sum": 0,
-                            }
-
-                        stats_euro[statistic_id]["tag"] = tag
-                        stats_euro[statistic_id]["data"][key]["state"] += cost
-                        stats_euro[statistic_id]["sum"] += cost
-                        stats_euro[statistic_id]["data"][key]["sum"] = stats_euro[statistic_id]["sum"]
-                        
-                        if daily_charge > 0:
-                            # fake kwh consumption for charges
-                            name_radical = f"MyElectricalData - {self.usage_point_id}"
-                            name_charge = f"{name_radical} charge"
-
-                            statistic_id_charge = f"myelectricaldata:{self.usage_point_id}_charge"
-                            if statistic_id_charge not in stats_kwh:
-                                stats_kwh[statistic_id_charge] = {"name": name_charge, "sum": 0, "data": {}}
-                            if key not in stats_kwh[statistic_id_charge]["data"]:
-                                stats_kwh[statistic_id_charge]["data"][key] = {
-                                    "start": date.isoformat(),
-                                    "state": 0,
-                                    "sum": 0,
-                                }
-                            stats_kwh[statistic_id_charge]["data"][key]["state"] = 0
-                            stats_kwh[statistic_id_charge]["tag"] = "charge"
-                            stats_kwh[statistic_id_charge]["sum"] = 0
-                            stats_kwh[statistic_id_charge]["data"][key]["sum"] = 0
-
-                            # charge cost                      
-                            statistic_id_charge_cost = f"{statistic_id_charge}_cost"
-                            if statistic_id_charge_cost not in stats_euro:
-                                stats_euro[statistic_id_charge_cost] = {
-                                    "name": f"{name_charge} Cost",
-                                    "sum": 0,
-                                    "data": {},
-                                }
-                            if key not in stats_euro[statistic_id_charge_cost]["data"]:
-                                stats_euro[statistic_id_charge_cost]["data"][key] = {
-                                    "start": date.isoformat(),
-                                    "state": 0,
-                                    "sum": 0,
-                                }
-
-                            # Add charge to cost
-
-                            stats_euro[statistic_id_charge_cost]["tag"] = "charge"
-                            stats_euro[statistic_id_charge_cost]["data"][key]["state"] = stats_euro[statistic_id_charge_cost]["data"][key]["state"] + daily_charge
-                            stats_euro[statistic_id_charge_cost]["sum"] += daily_charge
-                            stats_euro[statistic_id_charge_cost]["data"][key]["sum"] = stats_euro[statistic_id_charge_cost]["sum"]
-
-                    # CLEAN OLD DATA
-                    if APP_CONFIG.home_assistant_ws.purge or self.purge_force:
-                        logging.info(f"Clean old data import In Home Assistant Recorder {self.usage_point_id}")
-                        list_statistic_ids = []
-                        for statistic_id, _ in stats_kwh.items():
-                            list_statistic_ids.append(statistic_id)
-                        self.clear_data(list_statistic_ids)
-                        APP_CONFIG.home_assistant_ws.purge = False
-                        DatabaseConfig().set("purge", False)
-
-                    logging.info(" => Envoie des données...")
-                    logging.info(" - Consommation :")
-                    for statistic_id, data in stats_kwh.items():
-                        metadata = {
-                            "has_mean": False,
-                            "has_sum": True,
-                            "name": data["name"],
-                            "source": "myelectricaldata",
-                            "statistic_id": statistic_id,
-                            "unit_of_measurement": "kWh",
-                        }
-                        chunks = list(
-                            chunks_list(list(data["data"].values()), APP_CONFIG.home_assistant_ws.batch_size)
-                        )
-                        chunks_len = len(chunks)
-                        for i, chunk in enumerate(chunks):
-                            current_plan = data["tag"].upper()
-                            logging.info(
-                                "   * %s : %s => %s (%s/%s) ",
-                                current_plan,
-                                chunk[-1]["start"],
-                                chunk[0]["start"],
-                                i + 1,
-                                chunks_len,
-                            )
-                            self.send(
-                                {
-                                    "id": self.id,
-                                    "type": "recorder/import_statistics",
-                                    "metadata": metadata,
-                                    "stats": chunk,
-                                }
-                            )
-
-                    logging.info(" - Coût :")
-                    for statistic_id, data in stats_euro.items():
-                        metadata = {
-                            "has_mean": False,
-                            "has_sum": True,
-                            "name": data["name"],
-                            "source": "myelectricaldata",
-                            "statistic_id": statistic_id,
-                            "unit_of_measurement": "EURO",
-                        }
-                        chunks = list(
-                            chunks_list(list(data["data"].values()), APP_CONFIG.home_assistant_ws.batch_size)
-                        )
-                        chunks_len = len(chunks)
-                        for i, chunk in enumerate(chunks):
-                            current_plan = data["tag"].upper()
-                            logging.info(
-                                "   * %s : %s => %s (%s/%s) ",
-                                current_plan,
-                                chunk[-1]["start"],
-                                chunk[0]["start"],
-                                i + 1,
-                                chunks_len,
-                            )
-                            self.send(
-                                {
-                                    "id": self.id,
-                                    "type": "recorder/import_statistics",
-                                    "metadata": metadata,
-                                    "stats": list(chunk),
-                                }
-                            )
-
+                    logging.info(" => Import des données de consommation...")
+                    self.import_statistics("consumption", plan=plan, tariff_change_date=tariff_change_date)
                 if self.usage_point_id_config.production_detail:
-                    logging.info(" => Préparation des données de production...")
-                    measurement_direction = "production"
-                    max_date = APP_CONFIG.home_assistant_ws.max_date
-                    if max_date is not None:
-                        logging.warning("Max date détectée %s", max_date)
-                        begin = datetime.strptime(max_date, "%Y-%m-%d").replace(tzinfo=TIMEZONE)
-                        detail = DatabaseDetail(self.usage_point_id, "production")
-                        detail = detail.get_all(begin=begin, order_dir="desc")
-                    else:
-                        detail = DatabaseDetail(self.usage_point_id, "production").get_all(order_dir="desc")
-
-                    cost = 0
-                    last_year = None
-                    last_month = None
-
-                    stats_kwh = {}
-                    stats_euro = {}
-                    for data in detail:
-                        year = int(f'{data.date.strftime("%Y")}')
-                        if last_year is None or year != last_year:
-                            logging.info(f"{year} :")
-                        month = int(f'{data.date.strftime("%m")}')
-                        if last_month is None or month != last_month:
-                            logging.info(f"- {month}")
-                        last_year = year
-                        last_month = month
-                        hour_minute = int(f'{data.date.strftime("%H")}{data.date.strftime("%M")}')
-                        name = f"MyElectricalData - {self.usage_point_id} {measurement_direction}"
-                        statistic_id = f"myelectricaldata:{self.usage_point_id}_{measurement_direction}"
-                        day_interval = data.interval if hasattr(data, "interval") and data.interval != 0 else 1
-                        value = data.value / (60 / day_interval)
-                        cost = value * self.usage_point_id_config.production_price / 1000
-                        date = TIMEZONE.localize(data.date, "%Y-%m-%d %H:%M:%S")
-                        date = date.replace(minute=0, second=0, microsecond=0)
-                        key = date.strftime("%Y-%m-%d %H:%M:%S")
-
-                        # KWH
-                        if statistic_id not in stats_kwh:
-                            stats_kwh[statistic_id] = {"name": name, "sum": 0, "data": {}}
-                        if key not in stats_kwh[statistic_id]["data"]:
-                            stats_kwh[statistic_id]["data"][key] = {
-                                "start": date.isoformat(),
-                                "state": 0,
-                                "sum": 0,
-                            }
-                        value = value / 1000
-                        stats_kwh[statistic_id]["data"][key]["state"] = (
-                            stats_kwh[statistic_id]["data"][key]["state"] + value
-                        )
-                        stats_kwh[statistic_id]["sum"] += value
-                        stats_kwh[statistic_id]["data"][key]["sum"] = stats_kwh[statistic_id]["sum"]
-
-                        # EURO
-                        statistic_id = f"{statistic_id}_revenue"
-                        if statistic_id not in stats_euro:
-                            stats_euro[statistic_id] = {
-                                "name": f"{name} Revenue",
-                                "sum": 0,
-                                "data": {},
-                            }
-                        if key not in stats_euro[statistic_id]["data"]:
-                            stats_euro[statistic_id]["data"][key] = {
-                                "start": date.isoformat(),
-                                "state": 0,
-                                "sum": 0,
-                            }
-                        stats_euro[statistic_id]["data"][key]["state"] += cost
-                        stats_euro[statistic_id]["sum"] += cost
-                        stats_euro[statistic_id]["data"][key]["sum"] = stats_euro[statistic_id]["sum"]
-
-                    if APP_CONFIG.home_assistant_ws.purge or self.purge_force:
-                        list_statistic_ids = []
-                        for statistic_id, _ in stats_kwh.items():
-                            list_statistic_ids.append(statistic_id)
-                        self.clear_data(list_statistic_ids)
-                        APP_CONFIG.home_assistant_ws.purge = False
-                        DatabaseConfig().set("purge", False)
-
-                    logging.info(" => Envoie des données de production...")
-
-                    for statistic_id, data in stats_kwh.items():
-                        metadata = {
-                            "has_mean": False,
-                            "has_sum": True,
-                            "name": data["name"],
-                            "source": "myelectricaldata",
-                            "statistic_id": statistic_id,
-                            "unit_of_measurement": "kWh",
-                        }
-                        import_statistics = {
-                            "id": self.id,
-                            "type": "recorder/import_statistics",
-                            "metadata": metadata,
-                            "stats": list(data["data"].values()),
-                        }
-                        self.send(import_statistics)
-
-                    for statistic_id, data in stats_euro.items():
-                        metadata = {
-                            "has_mean": False,
-                            "has_sum": True,
-                            "name": data["name"],
-                            "source": "myelectricaldata",
-                            "statistic_id": statistic_id,
-                            "unit_of_measurement": "EURO",
-                        }
-                        import_statistics = {
-                            "id": self.id,
-                            "type": "recorder/import_statistics",
-                            "metadata": metadata,
-                            "stats": list(data["data"].values()),
-                        }
-                        self.send(import_statistics)
-
+                    logging.info(" => Import des données de production...")
+                    self.import_statistics("production")
             except Exception as _e:
-                self.websocket.close()
                 traceback.print_exc()
                 logging.error(_e)
                 logging.critical("Erreur lors de l'export des données vers Home Assistant")
+
+
+@register_exporter
+class HomeAssistantWsExporter(Exporter):
+    """Import the statistics of a usage point in Home Assistant (WebSocket)."""
+
+    name = "home_assistant_ws"
+    description = "Home Assistant Energy (WebSocket)"
+
+    def enabled(self):
+        """Check if Home Assistant WebSocket is enabled."""
+        return APP_CONFIG.home_assistant_ws.enable
+
+    def export(self, dataset):
+        """Import the statistics of a usage point in Home Assistant."""
+        HomeAssistantWs(dataset.usage_point_id, dataset)
@@ -0,0 +1,377 @@
+"""Build the hourly statistics imported in the Home Assistant recorder."""
+import calendar
+import logging
+from datetime import datetime, timedelta
+from functools import reduce
+from itertools import accumulate, groupby
+from operator import add
+
+from const import TEMPO_BEGIN, TIMEZONE
+from database.flex import DatabaseFlex, FlexDayManager
+from database.tempo import DatabaseTempo
+from models.stat import Stat
+
+FLEX_PRICES = {
+    "normal_HC": "consumption_price_flex_normal_hc",
+    "normal_HP": "consumption_price_flex_normal_hp",
+    "sobriete_HC": "consumption_price_flex_sobriete_hc",
+    "sobriete_HP": "consumption_price_flex_sobriete_hp",
+    "bonus_HC": "consumption_price_flex_bonus_hc",
+    "bonus_HP": "consumption_price_flex_bonus_hp",
+}
+
+
+class HourlyStatistics:
+    """Hourly statistics builder of a usage point.
+
+    The detail data is processed chunk by chunk and column by column: the tariff bucket of every point is classified
+    with lookup tables computed once (off-peak slots by weekday, tempo color and flex status by day), then the values
+    of each bucket are aggregated by hour with cumulative sums.
+
+    The statistics are produced in time order: only the hours not sent yet are kept in memory (at most `batch_size`
+    by statistic), so the memory does not depend on the length of the history.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        usage_point_id,
+        usage_point_config,
+        measurement_direction="consumption",
+        plan="BASE",
+        tariff_change_date=None,
+        sum_offset=None,
+        batch_size=1000,
+        dataset=None,
+    ):
+        """Initialize the builder.
+
+        Args:
+            usage_point_id (str): The usage point id
+            usage_point_config (UsagePointId): The usage point configuration
+            measurement_direction (str, optional): consumption or production. Defaults to "consumption".
+            plan (str, optional): The plan of the usage point. Defaults to "BASE".
+            tariff_change_date (datetime, optional): FLEX only, BASE prices are used before this date.
+            sum_offset (dict, optional): The sum to start from, by statistic id. Defaults to None.
+            batch_size (int, optional): The number of hours by chunk. Defaults to 1000.
+            dataset (UsagePointDataset, optional): The snapshot of the usage point, the off-peak hours and the tempo
+                data are taken from it. Defaults to None (read).
+        """
+        self.usage_point_id = usage_point_id
+        self.usage_point_config = usage_point_config
+        self.measurement_direction = measurement_direction
+        self.plan = plan
+        self.tariff_change_date = tariff_change_date
+        self.sum_offset = sum_offset if sum_offset is not None else {}
+        self.batch_size = max(1, int(batch_size))
+        self.dataset = dataset
+        self.name = f"MyElectricalData - {usage_point_id}"
+        self.statistic_id = f"myelectricaldata:{usage_point_id}"
+        self.statistics = {}
+        self.stat = None
+        self.offpeak_slots = {}
+        self.buckets = {}
+        self.last_period = None
+        self.last_day = None
+        self.tempo_price = None
+        self.tempo_color_ref = None
+        self.tempo_missing = set()
+        self.flex_manager = None
+        self.day_flex = {}
+
+    def stream(self, chunks):
+        """Yield the statistics chunks, in time order.
+
+        Args:
+            chunks (iterable): The detail data, by chunks sorted by date
+        Yields:
+            tuple: The statistic (statistic_id, name, unit, tag, chunks) and its next hours
+        """
+        for detail in chunks:
+            yield from self.process(detail)
+        yield from self.flush()
+
+    def process(self, detail):
+        """Process a chunk of detail data.
+
+        Args:
+            detail (list): The detail data, sorted by date
+        Returns:
+            list: The statistics chunks completed by this detail data
+        """
+        dates = [data.date for data in detail]
+        if not dates:
+            return []
+        values = [
+            data.value / (60 / (data.interval if hasattr(data, "interval") and data.interval != 0 else 1))
+            for data in detail
+        ]
+        self.log_periods(dates)
+        hours = self.hours(dates)
+        kwh = [value / 1000 for value in values]
+        batches = []
+
+        if self.measurement_direction == "production":
+            statistic_id = f"{self.statistic_id}_{self.measurement_direction}"
+            name = f"{self.name} {self.measurement_direction}"
+            price = self.usage_point_config.production_price
+            costs = [value * price / 1000 for value in values]
+            indexes = list(range(len(dates)))
+            batches.extend(self.aggregate(self.statistic(statistic_id, name, "kWh"), indexes, kwh, hours))
+            batches.extend(
+                self.aggregate(
+                    self.statistic(f"{statistic_id}_revenue", f"{name} Revenue", "EURO"), indexes, costs, hours
+                )
+            )
+            return batches
+
+        buckets, costs = self.classify(dates, values)
+        groups = {}
+        for index, bucket in enumerate(buckets):
+            groups.setdefault(bucket, []).append(index)
+        for (statistic_id, name, tag), indexes in groups.items():
+            if tag is None:
+                # Unclassified points (unknown plan, missing tempo day), already logged.
+                continue
+            batches.extend(self.aggregate(self.statistic(statistic_id, name, "kWh", tag), indexes, kwh, hours))
+            batches.extend(
+                self.aggregate(
+                    self.statistic(f"{statistic_id}_cost", f"{name} Cost", "EURO", tag), indexes, costs, hours
+                )
+            )
+
+        charges = self.daily_charges(dates)
+        charge_indexes = [index for index, charge in enumerate(charges) if charge > 0]
+        if charge_indexes:
+            # fake kwh consumption for charges
+            statistic_id_charge = f"{self.statistic_id}_charge"
+            name_charge = f"{self.name} charge"
+            statistic = self.statistic(statistic_id_charge, name_charge, "kWh", "charge", offset=0)
+            batches.extend(self.aggregate(statistic, charge_indexes, [0] * len(dates), hours))
+            statistic = self.statistic(f"{statistic_id_charge}_cost", f"{name_charge} Cost", "EURO", "charge")
+            batches.extend(self.aggregate(statistic, charge_indexes, charges, hours))
+        return batches
+
+    def flush(self):
+        """Yield the remaining hours of every statistic."""
+        for statistic in self.statistics.values():
+            if statistic["rows"]:
+                rows = statistic["rows"]
+                statistic["rows"] = []
+                statistic["chunks"] = statistic["chunks"] + 1
+                yield statistic, rows
+
+    def statistic(self, statistic_id, name, unit, tag=None, offset=None):  # noqa: PLR0913
+        """Return the state of a statistic, created on its first point.
+
+        Args:
+            statistic_id (str): The statistic id
+            name (str): The statistic name
+            unit (str): The unit (kWh, EURO)
+            tag (str, optional): The statistic tag (consumption only). Defaults to None.
+            offset (float, optional): The sum to start from. Defaults to the sum_offset of the statistic.
+
+        Returns:
+            dict: The statistic
+        """
+        if statistic_id not in self.statistics:
+            self.statistics[statistic_id] = {
+                "statistic_id": statistic_id,
+                "name": name,
+                "unit": unit,
+                "tag": tag,
+                "sum": self.sum_offset.get(statistic_id, 0) if offset is None else offset,
+                "key": None,
+                "rows": [],
+                "chunks": 0,
+            }
+        return self.statistics[statistic_id]
+
+    def aggregate(self, statistic, indexes, amounts, hours):
+        """Aggregate the amounts of a statistic by hour.
+
+        Args:
+            statistic (dict): The statistic
+            indexes (list): The indexes of the points of the statistic
+            amounts (list): The amount of each point
+            hours (list): The (key, start) hour of each point
+        Returns:
+            list: The chunks of `batch_size` hours completed
+        """
+        batches = []
+        values = [amounts[index] for index in indexes]
+        sums = list(accumulate(values, initial=statistic["sum"]))
+        position = 0
+        for (key, start), group in groupby(indexes, key=hours.__getitem__):
+            count = len(list(group))
+            if key != statistic["key"]:
+                # A new hour begins, the previous ones are complete.
+                if len(statistic["rows"]) >= self.batch_size:
+                    statistic["chunks"] = statistic["chunks"] + 1
+                    batches.append((statistic, statistic["rows"]))
+                    statistic["rows"] = []
+                statistic["key"] = key
+                statistic["rows"].append({"start": start, "state": 0, "sum": 0})
+            row = statistic["rows"][-1]
+            # Sequential additions, sum() compensates the rounding errors and would change the payload.
+            row["state"] = reduce(add, values[position : position + count], row["state"])
+            position = position + count
+            row["sum"] = sums[position]
+        statistic["sum"] = sums[-1]
+        return batches
+
+    def log_periods(self, dates):
+        """Log the years and months of the detail data."""
+        for (year, month), _ in groupby(dates, key=lambda date: (date.year, date.month)):
+            if self.last_period == (year, month):
+                continue
+            if self.measurement_direction == "production":
+                if self.last_period is None or year != self.last_period[0]:
+                    logging.info(f"{year} :")
+                logging.info(f"- {month}")
+            else:
+                if self.last_period is None or year != self.last_period[0]:
+                    logging.info(f"  - {year} :")
+                logging.info(f"    * {month}")
+            self.last_period = (year, month)
+
+    @staticmethod
+    def hours(dates):
+        """Return the (key, start) of the hour of each date.
+
+        The localized hour is computed once per hour instead of once per point.
+        """
+        cache = {}
+        hours = []
+        for date in dates:
+            hour = date.replace(minute=0, second=0, microsecond=0)
+            item = cache.get(hour)
+            if item is None:
+                local_hour = TIMEZONE.localize(hour, is_dst=True)
+                item = cache[hour] = (local_hour.strftime("%Y-%m-%d %H:%M:%S"), local_hour.isoformat())
+            hours.append(item)
+        return hours
+
+    def daily_charges(self, dates):
+        """Return the daily charge of each point, set on the first time slot of the day only."""
+        monthly_charge = self.usage_point_config.monthly_charge
+        charges = []
+        for date in dates:
+            if self.last_day is None or date.day != self.last_day:
+                charges.append(monthly_charge / calendar.monthrange(date.year, date.month)[1])
+            else:
+                charges.append(0)
+            self.last_day = date.day
+        return charges
+
+    def bucket(self, label=None):
+        """Return the (statistic id, name, tag) of a tariff bucket."""
+        if label not in self.buckets:
+            if label is None:
+                self.buckets[label] = (self.statistic_id, self.name, None)
+            else:
+                self.buckets[label] = (
+                    f"{self.statistic_id}_{label.lower()}_{self.measurement_direction}",
+                    f"{self.name} {label} {self.measurement_direction}",
+                    label.lower(),
+                )
+        return self.buckets[label]
+
+    def mesure_types(self, dates):
+        """Return the measurement type (HP or HC) of each date.
+
+        The off-peak hours only depend on the weekday and the time slot, the lookup is computed once per slot.
+        """
+        if self.stat is None and self.dataset is not None:
+            self.stat = self.dataset.stats["consumption"]
+        elif self.stat is None:
+            self.stat = Stat(usage_point_id=self.usage_point_id, measurement_direction="consumption")
+        types = []
+        for date in dates:
+            slot = (date.weekday(), date.hour, date.minute)
+            if slot not in self.offpeak_slots:
+                self.offpeak_slots[slot] = self.stat.get_mesure_type(date)
+            types.append(self.offpeak_slots[slot])
+        return types
+
+    def classify(self, dates, values):
+        """Classify the tariff bucket and compute the cost of each point.
+
+        Args:
+            dates (list): The date of each point
+            values (list): The consumption of each point in Wh
+        Returns:
+            tuple: The bucket (statistic id, name, tag) and the cost of each point
+        """
+        config = self.usage_point_config
+        plan = self.plan.upper()
+        if plan == "BASE":
+            buckets = [self.bucket("BASE")] * len(dates)
+            costs = [value * config.consumption_price_base / 1000 for value in values]
+        elif plan == "HC/HP":
+            types = self.mesure_types(dates)
+            prices = {"HC": config.consumption_price_hc, "HP": config.consumption_price_hp}
+            buckets = [self.bucket(measure_type) for measure_type in types]
+            costs = [value * prices[measure_type] / 1000 for value, measure_type in zip(values, types)]
+        elif plan == "TEMPO":
+            buckets, costs = self.classify_tempo(dates, values)
+        elif plan == "FLEX":
+            buckets, costs = self.classify_flex(dates, values)
+        else:
+            logging.error(f"Plan {self.plan} inconnu.")
+            buckets = [self.bucket()] * len(dates)
+            costs = [0] * len(dates)
+        return buckets, costs
+
+    def classify_tempo(self, dates, values):
+        """Classify the tempo color of each point, the tempo day begins at TEMPO_BEGIN."""
+        if self.tempo_color_ref is None and self.dataset is not None:
+            self.tempo_price = self.dataset.shared.tempo_price
+            self.tempo_color_ref = {tempo_data.date: tempo_data.color for tempo_data in self.dataset.shared.tempo}
+        elif self.tempo_color_ref is None:
+            self.tempo_price = DatabaseTempo().get_config("price")
+            self.tempo_color_ref = {tempo_data.date: tempo_data.color for tempo_data in DatabaseTempo().get()}
+        buckets = []
+        costs = []
+        for date, value, hour_type in zip(dates, values, self.mesure_types(dates)):
+            day = date if TEMPO_BEGIN <= date.hour * 100 + date.minute else date - timedelta(days=1)
+            day = datetime.combine(day, datetime.min.time())
+            day_color = self.tempo_color_ref.get(day)
+            if day_color is None:
+                if day not in self.tempo_missing:
+                    self.tempo_missing.add(day)
+                    logging.error(f"Import impossible, pas de donnée tempo sur la date du {day.date()}")
+                buckets.append(self.bucket())
+                costs.append(0)
+            else:
+                tempo_price = float(self.tempo_price[f"{day_color.lower()}_{hour_type.lower()}"])
+                buckets.append(self.bucket(f"{day_color}{hour_type}"))
+                costs.append(value / 1000 * tempo_price)
+        return buckets, costs
+
+    def classify_flex(self, dates, values):
+        """Classify the flex day status of each point, BASE prices are used before the tariff change date."""
+        config = self.usage_point_config
+        if self.flex_manager is None:
+            self.flex_manager = FlexDayManager(DatabaseFlex())
+        day_flex = self.day_flex
+        buckets = []
+        costs = []
+        for date, value, hour_type in zip(dates, values, self.mesure_types(dates)):
+            if self.tariff_change_date and date < self.tariff_change_date:
+                buckets.append(self.bucket("normal_HP"))
+                costs.append(value * config.consumption_price_base / 1000)
+                continue
+            strdate = date.strftime("%Y-%m-%d")
+            if strdate not in day_flex:
+                day_flex[strdate] = self.flex_manager.get_flex_status(strdate) or "Inconnu"
+                if day_flex[strdate] == "Inconnu":
+                    logging.info(f"Day flex : Inconnu {strdate}")
+            if day_flex[strdate] == "Inconnu":
+                flex_hour = f"normal_{hour_type}"
+                price = config.consumption_price_hc if hour_type == "HC" else config.consumption_price_hp
+            else:
+                flex_hour = f"{day_flex[strdate].lower()}_{hour_type}"
+                price = getattr(config, FLEX_PRICES[flex_hour]) if flex_hour in FLEX_PRICES else None
+            buckets.append(self.bucket(flex_hour))
+            costs.append(value * price / 1000 if price is not None else 0.0)
+        return buckets, costs
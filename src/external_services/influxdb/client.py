@@ -1,18 +1,28 @@
 """This module contains the InfluxDB class for connecting to and interacting with InfluxDB."""
+import calendar
 import datetime
 import inspect
 import logging
+import math
+import threading
+from itertools import islice
 
 import influxdb_client
 from dateutil.tz import tzlocal
 from influxdb_client.client.util import date_utils
 from influxdb_client.client.util.date_utils import DateHelper
 from influxdb_client.client.write_api import ASYNCHRONOUS, SYNCHRONOUS
+from influxdb_client.domain.write_precision import WritePrecision
 
 from config.main import APP_CONFIG
 from const import TIMEZONE_UTC, URL_CONFIG_FILE
+from database.influxdb_sync import DatabaseInfluxdbSync
 from utils import separator, separator_warning, title
 
+ESCAPE_MEASUREMENT = str.maketrans({",": r"\,", " ": r"\ ", "\n": r"\n"})
+ESCAPE_KEY = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ ", "\n": r"\n"})
+ESCAPE_STRING = str.maketrans({'"': r'\"', "\\": r"\\"})
+
 
 class InfluxDB:
     """Class for connecting to and interacting with InfluxDB."""
@@ -26,6 +36,11 @@ class InfluxDB:
         self.retention = 0
         self.max_retention = None
         self.valid = False
+        self.lock = threading.Lock()
+        self.pending = []
+        self.queued = 0
+        self.acknowledged = 0
+        self.write_errors = []
         if APP_CONFIG.influxdb.enable:
             self.connect()
             if self.valid:
@@ -65,21 +80,7 @@ class InfluxDB:
                         ' <!> ATTENTION, le mode d\'importation "ASYNCHRONOUS"'
                         "est très consommateur de ressources système."
                     )
-                    self.write_api = self.influxdb.write_api(write_options=ASYNCHRONOUS)
-                elif APP_CONFIG.influxdb.method.upper() == "SYNCHRONOUS":
-                    self.write_api = self.influxdb.write_api(write_options=SYNCHRONOUS)
-                else:
-                    self.write_api = self.influxdb.write_api(
-                        write_options=influxdb_client.WriteOptions(
-                            batch_size=APP_CONFIG.influxdb.batching_options.batch_size,
-                            flush_interval=APP_CONFIG.influxdb.batching_options.flush_interval,
-                            jitter_interval=APP_CONFIG.influxdb.batching_options.jitter_interval,
-                            retry_interval=APP_CONFIG.influxdb.batching_options.retry_interval,
-                            max_retries=APP_CONFIG.influxdb.batching_options.max_retries,
-                            max_retry_delay=APP_CONFIG.influxdb.batching_options.max_retry_delay,
-                            exponential_base=APP_CONFIG.influxdb.batching_options.exponential_base,
-                        )
-                    )
+                self.write_api = self.create_write_api()
                 self.query_api = self.influxdb.query_api()
                 self.delete_api = self.influxdb.delete_api()
                 self.buckets_api = self.influxdb.buckets_api()
@@ -94,6 +95,45 @@ class InfluxDB:
 """
                 )
 
+    def create_write_api(self):
+        """Create the write API of the configured method.
+
+        The batching write API reports the batches written or rejected in the background (see `flush`).
+
+        Returns:
+            WriteApi: The write API.
+        """
+        method = APP_CONFIG.influxdb.method.upper()
+        if method == "ASYNCHRONOUS":
+            return self.influxdb.write_api(write_options=ASYNCHRONOUS)
+        if method == "SYNCHRONOUS":
+            return self.influxdb.write_api(write_options=SYNCHRONOUS)
+        return self.influxdb.write_api(
+            write_options=influxdb_client.WriteOptions(
+                batch_size=APP_CONFIG.influxdb.batching_options.batch_size,
+                flush_interval=APP_CONFIG.influxdb.batching_options.flush_interval,
+                jitter_interval=APP_CONFIG.influxdb.batching_options.jitter_interval,
+                retry_interval=APP_CONFIG.influxdb.batching_options.retry_interval,
+                max_retries=APP_CONFIG.influxdb.batching_options.max_retries,
+                max_retry_delay=APP_CONFIG.influxdb.batching_options.max_retry_delay,
+                exponential_base=APP_CONFIG.influxdb.batching_options.exponential_base,
+            ),
+            success_callback=self.on_batch_written,
+            error_callback=self.on_batch_error,
+        )
+
+    def on_batch_written(self, _conf, data):
+        """Count the points of a batch written by the batching write API."""
+        with self.lock:
+            self.acknowledged = self.acknowledged + data.count(b"\n") + 1
+
+    def on_batch_error(self, _conf, data, exception):
+        """Keep the error of a batch rejected by the batching write API (after its retries)."""
+        logging.error(f"Echec de l'écriture dans InfluxDB : {exception}")
+        with self.lock:
+            self.acknowledged = self.acknowledged + data.count(b"\n") + 1
+            self.write_errors.append(exception)
+
     def purge_influxdb(self):
         """Purge the InfluxDB database.
 
@@ -114,6 +154,7 @@ class InfluxDB:
                 self.delete_api.delete(
                     start, stop, f'_measurement="{mesure}"', APP_CONFIG.influxdb.bucket, org=APP_CONFIG.influxdb.org
                 )
+            DatabaseInfluxdbSync.reset_all()
             logging.warning(" => Data reset")
 
     def get_list_retention_policies(self):
@@ -234,3 +275,136 @@ class InfluxDB:
                     for key, value in fields.items():
                         record["fields"][key] = value
                 self.write_api.write(bucket=APP_CONFIG.influxdb.bucket, org=APP_CONFIG.influxdb.org, record=record)
+
+    def in_retention(self, date):
+        """Check if a date is inside the retention period of the bucket.
+
+        Args:
+            date (datetime.datetime): The aware date of the point.
+
+        Returns:
+            bool: True if the point can be written.
+        """
+        return self.retention == 0 or self.max_retention is None or date > self.max_retention
+
+    @staticmethod
+    def line_prefix(measurement, tags):
+        """Serialize the measurement and the tags of a point in line protocol.
+
+        The prefix only depends on the tags, so it can be computed once and shared by all the points of a tag set.
+
+        Args:
+            measurement (str): Name of the measurement.
+            tags (dict): Dictionary of tags associated with the data.
+
+        Returns:
+            str: The measurement and the tags, sorted by key.
+        """
+        prefix = measurement.translate(ESCAPE_MEASUREMENT)
+        for key, value in sorted(tags.items()):
+            if value is None or str(value) == "":
+                continue
+            prefix = f"{prefix},{str(key).translate(ESCAPE_KEY)}={str(value).translate(ESCAPE_KEY)}"
+        return prefix
+
+    @staticmethod
+    def line(prefix, fields, date):
+        """Serialize a point in line protocol (second precision).
+
+        The field types follow the influxdb_client serialization (int fields are written as integers).
+
+        Args:
+            prefix (str): The measurement and the tags (see `line_prefix`).
+            fields (dict): Dictionary of fields and their values.
+            date (datetime.datetime): The aware date of the point.
+
+        Returns:
+            str|None: The point, None when none of its fields can be written (a point needs a field).
+        """
+        values = []
+        for key, value in fields.items():
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                serialized = str(value).lower()
+            elif isinstance(value, int):
+                serialized = f"{value}i"
+            elif isinstance(value, float):
+                if not math.isfinite(value):
+                    continue
+                serialized = repr(value)
+            else:
+                serialized = f'"{str(value).translate(ESCAPE_STRING)}"'
+            values.append(f"{str(key).translate(ESCAPE_KEY)}={serialized}")
+        if not values:
+            return None
+        return f"{prefix} {','.join(values)} {calendar.timegm(date.utctimetuple())}"
+
+    def write_lines(self, lines):
+        """Write points serialized in line protocol, by batches of `batching_options.batch_size` points.
+
+        Args:
+            lines (iterable): The points (see `line`), consumed lazily. The empty points (None) are skipped.
+
+        Returns:
+            int: The number of points written.
+        """
+        batch_size = max(1, int(APP_CONFIG.influxdb.batching_options.batch_size))
+        lines = (line for line in lines if line is not None)
+        count = 0
+        while True:
+            batch = list(islice(lines, batch_size))
+            if not batch:
+                return count
+            self.write_batch(batch)
+            count = count + len(batch)
+
+    def write_batch(self, batch):
+        """Write a batch of points serialized in line protocol (second precision).
+
+        With the ASYNCHRONOUS and BATCHING methods, the batch is only queued by the client: see `flush`.
+
+        Args:
+            batch (list): The points (see `line`).
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            with self.lock:
+                self.queued = self.queued + len(batch)
+            result = self.write_api.write(
+                bucket=APP_CONFIG.influxdb.bucket,
+                org=APP_CONFIG.influxdb.org,
+                record=batch,
+                write_precision=WritePrecision.S,
+            )
+            if result is not None:
+                with self.lock:
+                    self.pending.append(result)
+
+    def flush(self):
+        """Wait for the batches queued by `write_batch` to be written, and raise the first write error.
+
+        The watermarks of a sync must only be saved once its points are in InfluxDB:
+        - ASYNCHRONOUS: the result of each request is awaited.
+        - BATCHING: the write API is closed, which sends its buffer, then created again. The points not
+          acknowledged once closed (`max_close_wait` reached) are reported as an error.
+
+        Raises:
+            Exception: The first write error.
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            with self.lock:
+                pending, self.pending = self.pending, []
+            for result in pending:
+                result.get()
+            if APP_CONFIG.influxdb.method.upper() not in ["ASYNCHRONOUS", "SYNCHRONOUS"]:
+                self.write_api.close()
+                self.write_api = self.create_write_api()
+                with self.lock:
+                    missing = self.queued - self.acknowledged
+                    errors, self.write_errors = self.write_errors, []
+                    self.queued = 0
+                    self.acknowledged = 0
+                if errors:
+                    raise errors[0]
+                if missing > 0:
+                    raise TimeoutError(f"{missing} point(s) non confirmé(s) par InfluxDB à la fermeture du client")
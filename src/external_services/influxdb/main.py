@@ -1,39 +1,62 @@
 """Class for exporting data to InfluxDB."""
-import ast
+import hashlib
 import inspect
+import json
 import logging
 import traceback
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import groupby
 
 import pytz
 
+from config.influxdb import Method
 from config.main import APP_CONFIG
 from config.myelectricaldata import UsagePointId
 from const import TIMEZONE_UTC
-from database.daily import DatabaseDaily
-from database.detail import DatabaseDetail
-from database.ecowatt import DatabaseEcowatt
-from database.tempo import DatabaseTempo
-from external_services.influxdb.client import InfluxDB
-from models.stat import Stat
+from database.influxdb_sync import COMPACTED, DatabaseInfluxdbSync
+from external_services.influxdb.writer import InfluxDBWriter
+from models.export import Exporter, SharedDataset, UsagePointDataset, register_exporter
 from utils import force_round
 
 
 class ExportInfluxDB:
     """Class for exporting data to InfluxDB."""
 
-    def __init__(self, usage_point_id, measurement_direction="consumption"):
+    def __init__(self, usage_point_id=None, measurement_direction="consumption", dataset=None):
+        """Export the data of a usage point, or the global data (tempo, ecowatt) without usage point.
+
+        The global points are tagged with the usage point id, they are written for each usage point of the dataset.
+
+        Args:
+            usage_point_id (str, optional): The usage point id. Defaults to None (global data).
+            measurement_direction (str, optional): The measurement direction. Defaults to "consumption".
+            dataset (UsagePointDataset | SharedDataset, optional): The snapshot. Defaults to None (read).
+        """
         self.usage_point_id = usage_point_id
-        self.usage_point_config: UsagePointId = APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id]
-        self.usage_point_id = self.usage_point_config.usage_point_id
         self.measurement_direction = measurement_direction
-        self.stat = Stat(self.usage_point_id, measurement_direction=measurement_direction)
+        if self.usage_point_id is None:
+            self.usage_point_config: UsagePointId = None
+            self.dataset = None
+            self.stat = None
+            self.shared = dataset if dataset is not None else SharedDataset.load()
+        else:
+            self.usage_point_config: UsagePointId = APP_CONFIG.myelectricaldata.usage_point_config[
+                self.usage_point_id
+            ]
+            self.usage_point_id = self.usage_point_config.usage_point_id
+            self.dataset: UsagePointDataset = (
+                dataset if dataset is not None else UsagePointDataset.load(self.usage_point_id)
+            )
+            self.stat = self.dataset.stats[measurement_direction]
+            self.shared = self.dataset.shared
         self.time_format = "%Y-%m-%dT%H:%M:%SZ"
         timezone = getattr(APP_CONFIG.influxdb, "timezone", "UTC")
         if timezone == "UTC":
             self.tz = TIMEZONE_UTC
         else:
             self.tz = pytz.timezone(timezone)
+        from external_services.influxdb.client import InfluxDB  # influxdb_client only imported when enabled
+
         self.influxdb_client = InfluxDB()
         self.bootstap()
 
@@ -48,17 +71,36 @@ class ExportInfluxDB:
             traceback.print_exc()
 
     def run(self):
-        """Runner."""
-        if self.usage_point_config.consumption:
-            self.daily()
-        if self.usage_point_config.production:
-            self.daily(measurement_direction="production")
-        if self.usage_point_config.consumption_detail:
-            self.detail()
-        if self.usage_point_config.production_detail:
-            self.detail(measurement_direction="production")
-        self.tempo()
-        self.ecowatt()
+        """Runner.
+
+        The points are queued to a pool of writer threads while the cache is read. The watermarks are
+        saved once all the points have been written and flushed by the client (see `InfluxDB.flush`): after a write
+        error, the next export sends the points again.
+        """
+        workers = APP_CONFIG.influxdb.workers
+        if APP_CONFIG.influxdb.method == Method().batching:
+            # The batching write API already sends the points in a background thread.
+            workers = 1
+        self.watermarks = []
+        with InfluxDBWriter(
+            self.influxdb_client, APP_CONFIG.influxdb.batching_options.batch_size, workers
+        ) as self.writer:
+            if self.usage_point_config is None:
+                for usage_point_id in self.shared.usage_point_ids:
+                    self.usage_point_id = usage_point_id
+                    self.tempo()
+                    self.ecowatt()
+            else:
+                if self.usage_point_config.consumption:
+                    self.daily()
+                if self.usage_point_config.production:
+                    self.daily(measurement_direction="production")
+                if self.usage_point_config.consumption_detail:
+                    self.detail()
+                if self.usage_point_config.production_detail:
+                    self.detail(measurement_direction="production")
+        for watermarks, month, count, checksum, last_date in self.watermarks:
+            watermarks.set(month, count, checksum, last_date)
 
     def daily(self, measurement_direction="consumption"):
         """Export daily data to InfluxDB.
@@ -67,54 +109,18 @@ class ExportInfluxDB:
             measurement_direction (str, optional): The measurement direction. Defaults to "consumption".
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            current_month = ""
             if measurement_direction == "consumption":
                 price = self.usage_point_config.consumption_price_base
             else:
                 price = self.usage_point_config.production_price
             logging.info(f'Envoi des données "{measurement_direction.upper()}" dans influxdb')
-            get_daily_all = DatabaseDaily(self.usage_point_id).get_all()
-            get_daily_all_count = len(get_daily_all)
-            last_data = DatabaseDaily(self.usage_point_id, measurement_direction).get_last_date()
-            first_data = DatabaseDaily(self.usage_point_id, measurement_direction).get_first_date()
-            if last_data and first_data:
-                start = datetime.strftime(last_data, self.time_format)
-                end = datetime.strftime(first_data, self.time_format)
-                influxdb_data = self.influxdb_client.count(start, end, measurement_direction)
-                count = 1
-                for data in influxdb_data:
-                    for record in data.records:
-                        count += record.get_value()
-                if get_daily_all_count != count:
-                    logging.info(f" Cache : {get_daily_all_count} / InfluxDb : {count}")
-                    for daily in get_daily_all:
-                        date = daily.date
-                        if current_month != date.strftime("%m"):
-                            logging.info(f" - {date.strftime('%Y')}-{date.strftime('%m')}")
-                        # if len(INFLUXDB.get(start, end, measurement_direction)) == 0:
-                        watt = float(daily.value)
-                        kwatt = watt / 1000
-                        euro = kwatt * float(price)
-                        self.influxdb_client.write(
-                            measurement=measurement_direction,
-                            date=self.tz.localize(date),
-                            tags={
-                                "usage_point_id": self.usage_point_id,
-                                "year": daily.date.strftime("%Y"),
-                                "month": daily.date.strftime("%m"),
-                            },
-                            fields={
-                                "Wh": float(watt),
-                                "kWh": float(force_round(kwatt, 5)),
-                                "price": float(force_round(euro, 5)),
-                            },
-                        )
-                        current_month = date.strftime("%m")
-                    logging.info(" => OK")
-                else:
-                    logging.info(f" => Données synchronisées ({count} valeurs)")
-            else:
-                logging.info(" => Aucune donnée")
+            written, count = self.sync(
+                measurement_direction,
+                self.dataset.daily[measurement_direction],
+                lambda chunk: self.daily_lines(chunk, measurement_direction, price),
+                f"{price}|{self.tz}",
+            )
+            self.log_sync(written, count)
 
     def detail(self, measurement_direction="consumption"):
         """Export detailed data to InfluxDB.
@@ -123,115 +129,295 @@ class ExportInfluxDB:
             measurement_direction (str, optional): The measurement direction. Defaults to "consumption".
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            current_month = ""
             measurement = f"{measurement_direction}_detail"
             logging.info(f'Envoi des données "{measurement.upper()}" dans influxdb')
-            get_detail_all = DatabaseDetail(self.usage_point_id, measurement_direction).get_all()
-            get_detail_all_count = len(get_detail_all)
-            last_data = DatabaseDetail(self.usage_point_id, measurement_direction).get_last_date()
-            first_data = DatabaseDetail(self.usage_point_id, measurement_direction).get_first_date()
-            if last_data and first_data:
-                start = datetime.strftime(last_data, self.time_format)
-                end = datetime.strftime(first_data, self.time_format)
-                influxdb_data = self.influxdb_client.count(start, end, measurement)
-                count = 1
-                for data in influxdb_data:
-                    for record in data.records:
-                        count += record.get_value()
-
-                if get_detail_all_count != count:
-                    logging.info(f" Cache : {get_detail_all_count} / InfluxDb : {count}")
-                    for _, detail in enumerate(get_detail_all):
-                        date = detail.date
-                        if current_month != date.strftime("%m"):
-                            logging.info(f" - {date.strftime('%Y')}-{date.strftime('%m')}")
-                        watt = detail.value
-                        kwatt = watt / 1000
-                        interval = getattr(detail, "interval", 1)
-                        interval = 1 if interval == 0 else interval
-                        watth = watt / (60 / interval)
-                        kwatth = watth / 1000
-                        if measurement_direction == "consumption":
-                            measure_type = self.stat.get_mesure_type(date)
-                            if measure_type == "HP":
-                                euro = kwatth * self.usage_point_config.consumption_price_hp
-                            else:
-                                euro = kwatth * self.usage_point_config.consumption_price_hc
-                        else:
-                            measure_type = "BASE"
-                            euro = kwatth * self.usage_point_config.production_price
-                        self.influxdb_client.write(
-                            measurement=measurement,
-                            date=self.tz.localize(date),
-                            tags={
-                                "usage_point_id": self.usage_point_id,
-                                "year": detail.date.strftime("%Y"),
-                                "month": detail.date.strftime("%m"),
-                                "internal": interval,
-                                "measure_type": measure_type,
-                            },
-                            fields={
-                                "W": float(watt),
-                                "kW": float(force_round(kwatt, 5)),
-                                "Wh": float(watth),
-                                "kWh": float(force_round(kwatth, 5)),
-                                "price": float(force_round(euro, 5)),
-                            },
-                        )
-                        current_month = date.strftime("%m")
-                    logging.info(" => OK")
+            if measurement_direction == "consumption":
+                settings = [
+                    self.usage_point_config.consumption_price_hc,
+                    self.usage_point_config.consumption_price_hp,
+                ] + [getattr(self.usage_point_config, f"offpeak_hours_{day}") for day in range(7)]
+            else:
+                settings = [self.usage_point_config.production_price]
+            written, count = self.sync(
+                measurement,
+                self.dataset.detail[measurement_direction],
+                lambda chunk: self.detail_lines(chunk, measurement_direction),
+                f"{'|'.join(str(setting) for setting in settings)}|{self.tz}",
+            )
+            self.log_sync(written, count)
+
+    def sync(self, measurement, rows, lines, fingerprint, digest=None):  # noqa: PLR0913
+        """Export the new or changed points of a measurement.
+
+        A watermark is stored for each month (number of points, checksum and date of the last point exported):
+        - unchanged month: nothing is written;
+        - points added after the watermark (ex: yesterday): only the new points are written;
+        - month changed: the whole month is written again;
+        - month unknown (first export): the month is verified against InfluxDB and written if needed;
+        - month rolled up by the retention: the points already written are kept, only the watermark is updated.
+
+        The rows are consumed month by month and the points are queued to the writer threads, the new watermarks are
+        kept in `self.watermarks` until the points are written.
+
+        Args:
+            measurement (str): The InfluxDB measurement
+            rows (iterable): The data, sorted by date
+            lines (callable): Serialize a list of rows in line protocol
+            fingerprint (str): The settings used to compute the points (prices, timezone...)
+            digest (callable, optional): Serialize the values of a row for the checksum. Defaults to the value and
+                the interval of the row.
+
+        Returns:
+            tuple: The number of points queued and the number of rows
+        """
+        if digest is None:
+            digest = lambda row: f"{row.value}/{getattr(row, 'interval', '')}"  # noqa: E731
+        watermarks = DatabaseInfluxdbSync(self.usage_point_id, measurement)
+        stored = watermarks.get()
+        written = 0
+        count = 0
+        for month, grouped_rows in groupby(rows, key=lambda row: row.date.strftime("%Y-%m")):
+            month_rows = list(grouped_rows)
+            count = count + len(month_rows)
+            watermark = stored.get(month)
+            checksum = hashlib.md5(fingerprint.encode("utf-8"))  # noqa: S324
+            previous_checksum = None
+            for index, row in enumerate(month_rows):
+                checksum.update(f"|{row.date.isoformat()}={digest(row)}".encode("utf-8"))
+                if watermark is not None and index + 1 == watermark.count and row.date == watermark.last_date:
+                    previous_checksum = checksum.hexdigest()
+            checksum = checksum.hexdigest()
+            if watermark is not None and watermark.checksum == checksum:
+                continue
+            if watermark is not None and watermark.checksum == COMPACTED:
+                new_rows = []
+            elif watermark is not None and watermark.checksum == previous_checksum:
+                new_rows = month_rows[watermark.count :]
+            elif watermark is None and self.count(measurement, month_rows) == len(month_rows):
+                new_rows = []
+            else:
+                new_rows = month_rows
+            written = written + self.writer.put(lines(new_rows))
+            self.watermarks.append((watermarks, month, len(month_rows), checksum, month_rows[-1].date))
+        return written, count
+
+    def count(self, measurement, rows):
+        """Count the points of a measurement stored in InfluxDB between the first and the last row.
+
+        Args:
+            measurement (str): The InfluxDB measurement
+            rows (list): The data, sorted by date
+        Returns:
+            int: The number of points
+        """
+        start = self.tz.localize(rows[0].date).astimezone(TIMEZONE_UTC)
+        end = self.tz.localize(rows[-1].date).astimezone(TIMEZONE_UTC) + timedelta(seconds=1)
+        count = 0
+        for data in self.influxdb_client.count(
+            datetime.strftime(start, self.time_format), datetime.strftime(end, self.time_format), measurement
+        ):
+            for record in data.records:
+                count += record.get_value()
+        return count
+
+    @staticmethod
+    def log_sync(written, count):
+        """Log the result of a sync.
+
+        Args:
+            written (int): The number of points sent
+            count (int): The number of points in cache
+        """
+        if not count:
+            logging.info(" => Aucune donnée")
+        elif written:
+            logging.info(f" => OK ({written} valeurs envoyées)")
+        else:
+            logging.info(f" => Données synchronisées ({count} valeurs)")
+
+    def daily_lines(self, rows, measurement_direction, price):
+        """Yield the daily points in line protocol.
+
+        Args:
+            rows (list): The daily data
+            measurement_direction (str): The measurement direction
+            price (float): The price of a kWh
+        Yields:
+            str: The point
+        """
+        prefixes = {}
+        for daily in rows:
+            date = daily.date
+            month = (date.year, date.month)
+            if month not in prefixes:
+                logging.info(f" - {date.strftime('%Y')}-{date.strftime('%m')}")
+                prefixes[month] = self.influxdb_client.line_prefix(
+                    measurement_direction,
+                    {
+                        "usage_point_id": self.usage_point_id,
+                        "year": date.strftime("%Y"),
+                        "month": date.strftime("%m"),
+                    },
+                )
+            date = self.tz.localize(date)
+            if not self.influxdb_client.in_retention(date):
+                continue
+            watt = float(daily.value)
+            kwatt = watt / 1000
+            euro = kwatt * float(price)
+            yield self.influxdb_client.line(
+                prefixes[month],
+                {
+                    "Wh": watt,
+                    "kWh": float(force_round(kwatt, 5)),
+                    "price": float(force_round(euro, 5)),
+                },
+                date,
+            )
+
+    def detail_lines(self, rows, measurement_direction):
+        """Yield the detail points in line protocol.
+
+        The HC/HP slot is computed once per (weekday, time slot) and the tags once per tag set.
+
+        Args:
+            rows (list): The detail data
+            measurement_direction (str): The measurement direction
+        Yields:
+            str: The point
+        """
+        measurement = f"{measurement_direction}_detail"
+        prefixes = {}
+        measure_types = {}
+        current_month = None
+        for detail in rows:
+            date = detail.date
+            if current_month != (date.year, date.month):
+                current_month = (date.year, date.month)
+                logging.info(f" - {date.strftime('%Y')}-{date.strftime('%m')}")
+            watt = detail.value
+            kwatt = watt / 1000
+            interval = getattr(detail, "interval", 1)
+            interval = 1 if interval == 0 else interval
+            watth = watt / (60 / interval)
+            kwatth = watth / 1000
+            if measurement_direction == "consumption":
+                slot = (date.weekday(), date.hour, date.minute)
+                if slot not in measure_types:
+                    measure_types[slot] = self.stat.get_mesure_type(date)
+                measure_type = measure_types[slot]
+                if measure_type == "HP":
+                    euro = kwatth * self.usage_point_config.consumption_price_hp
                 else:
-                    logging.info(f" => Données synchronisées ({count} valeurs)")
+                    euro = kwatth * self.usage_point_config.consumption_price_hc
             else:
-                logging.info(" => Aucune donnée")
+                measure_type = "BASE"
+                euro = kwatth * self.usage_point_config.production_price
+            tag_set = (date.year, date.month, interval, measure_type)
+            if tag_set not in prefixes:
+                prefixes[tag_set] = self.influxdb_client.line_prefix(
+                    measurement,
+                    {
+                        "usage_point_id": self.usage_point_id,
+                        "year": date.strftime("%Y"),
+                        "month": date.strftime("%m"),
+                        "internal": interval,
+                        "measure_type": measure_type,
+                    },
+                )
+            date = self.tz.localize(date)
+            if not self.influxdb_client.in_retention(date):
+                continue
+            yield self.influxdb_client.line(
+                prefixes[tag_set],
+                {
+                    "W": float(watt),
+                    "kW": float(force_round(kwatt, 5)),
+                    "Wh": float(watth),
+                    "kWh": float(force_round(kwatth, 5)),
+                    "price": float(force_round(euro, 5)),
+                },
+                date,
+            )
 
     def tempo(self):
-        """Export tempo data to InfluxDB."""
+        """Export tempo data to InfluxDB (only the months changed since the last export)."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             measurement = "tempo"
             logging.info('Envoi des données "TEMPO" dans influxdb')
-            tempo_data = DatabaseTempo().get()
-            if tempo_data:
-                for data in tempo_data:
-                    self.influxdb_client.write(
-                        measurement=measurement,
-                        date=self.tz.localize(data.date),
-                        tags={
-                            "usage_point_id": self.usage_point_id,
-                        },
-                        fields={"color": data.color},
-                    )
-                logging.info(" => OK")
-            else:
-                logging.info(" => Pas de donnée")
+            written, count = self.sync(
+                measurement,
+                self.shared.tempo,
+                self.tempo_lines,
+                str(self.tz),
+                digest=lambda row: row.color,
+            )
+            self.log_sync(written, count)
+
+    def tempo_lines(self, rows):
+        """Yield the tempo points in line protocol.
+
+        Args:
+            rows (list): The tempo data
+        Yields:
+            str: The point
+        """
+        prefix = self.influxdb_client.line_prefix("tempo", {"usage_point_id": self.usage_point_id})
+        for data in rows:
+            date = self.tz.localize(data.date)
+            if self.influxdb_client.in_retention(date):
+                yield self.influxdb_client.line(prefix, {"color": data.color}, date)
 
     def ecowatt(self):
-        """Export ecowatt data to InfluxDB."""
+        """Export ecowatt data to InfluxDB (only the months changed since the last export)."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             measurement = "ecowatt"
             logging.info('Envoi des données "ECOWATT" dans influxdb')
-            ecowatt_data = DatabaseEcowatt().get()
-            if ecowatt_data:
-                for data in ecowatt_data:
-                    self.influxdb_client.write(
-                        measurement=f"{measurement}_daily",
-                        date=self.tz.localize(data.date),
-                        tags={
-                            "usage_point_id": self.usage_point_id,
-                        },
-                        fields={"value": data.value, "message": data.message},
-                    )
-                    data_detail = ast.literal_eval(data.detail)
-                    for date, value in data_detail.items():
-                        date_format = datetime.strptime(date, "%Y-%m-%d %H:%M:%S").replace(tzinfo=TIMEZONE_UTC)
-                        self.influxdb_client.write(
-                            measurement=f"{measurement}_detail",
-                            date=date_format,
-                            tags={
-                                "usage_point_id": self.usage_point_id,
-                            },
-                            fields={"value": value},
-                        )
-                logging.info(" => OK")
-            else:
-                logging.info(" => Pas de donnée")
+            written, count = self.sync(
+                measurement,
+                self.shared.ecowatt,
+                self.ecowatt_lines,
+                str(self.tz),
+                digest=lambda row: f"{row.value}/{row.message}/{row.detail}",
+            )
+            self.log_sync(written, count)
+
+    def ecowatt_lines(self, rows):
+        """Yield the ecowatt points (daily and hourly detail) in line protocol.
+
+        Args:
+            rows (list): The ecowatt data
+        Yields:
+            str: The point
+        """
+        tags = {"usage_point_id": self.usage_point_id}
+        prefix_daily = self.influxdb_client.line_prefix("ecowatt_daily", tags)
+        prefix_detail = self.influxdb_client.line_prefix("ecowatt_detail", tags)
+        for data in rows:
+            date = self.tz.localize(data.date)
+            if self.influxdb_client.in_retention(date):
+                yield self.influxdb_client.line(prefix_daily, {"value": data.value, "message": data.message}, date)
+            for hour, value in json.loads(data.detail).items():
+                date = datetime.strptime(hour, "%Y-%m-%d %H:%M:%S").replace(tzinfo=TIMEZONE_UTC)
+                if self.influxdb_client.in_retention(date):
+                    yield self.influxdb_client.line(prefix_detail, {"value": value}, date)
+
+
+@register_exporter
+class InfluxDBExporter(Exporter):
+    """Export the data of a usage point to InfluxDB."""
+
+    name = "influxdb"
+    description = "InfluxDB"
+
+    def enabled(self):
+        """Check if InfluxDB is enabled."""
+        return APP_CONFIG.influxdb.enable
+
+    def export_shared(self, dataset):
+        """Export the tempo and ecowatt data to InfluxDB."""
+        ExportInfluxDB(dataset=dataset)
+
+    def export(self, dataset):
+        """Export the data of a usage point to InfluxDB."""
+        ExportInfluxDB(dataset.usage_point_id, dataset=dataset)
@@ -0,0 +1,111 @@
+"""Write points to InfluxDB with a pool of writer threads."""
+import logging
+import threading
+from itertools import islice
+from queue import Queue
+
+
+class InfluxDBWriter:
+    """Pool of writer threads fed by a bounded queue of batches.
+
+    The producer (the thread reading the cache) serializes the points and queues them by batches, while the workers
+    send the batches to InfluxDB: the database reads overlap the network writes. The queue is bounded, so the
+    producer waits when the workers are late and the memory stays limited to a few batches.
+
+    The first write error is raised by `put` or `close`, the batches still queued are then dropped. `close` also
+    flushes the client, so the points are in InfluxDB (and not only queued by the write API) once it returns.
+    """
+
+    def __init__(self, client, batch_size=1000, workers=4):
+        """Initialize InfluxDBWriter and start the workers.
+
+        Args:
+            client (InfluxDB): The connected InfluxDB client.
+            batch_size (int, optional): The number of points by batch. Defaults to 1000.
+            workers (int, optional): The number of writer threads. Defaults to 4.
+        """
+        self.client = client
+        self.batch_size = max(1, int(batch_size))
+        self.queue = Queue(maxsize=max(1, int(workers)) * 2)
+        self.lock = threading.Lock()
+        self.written = 0
+        self.error = None
+        self.closed = False
+        self.threads = [
+            threading.Thread(target=self.worker, name=f"influxdb-writer-{index}", daemon=True)
+            for index in range(max(1, int(workers)))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self):
+        """Return the writer, closed when leaving the block."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the writer, its errors raised only when the block succeeded."""
+        self.close(raise_error=exc_type is None)
+
+    def worker(self):
+        """Send the queued batches until the end marker (None) is received."""
+        while True:
+            batch = self.queue.get()
+            try:
+                if batch is None:
+                    return
+                if self.error is None:
+                    self.client.write_batch(batch)
+                    with self.lock:
+                        self.written = self.written + len(batch)
+            except Exception as e:
+                logging.error(f"Echec de l'écriture dans InfluxDB : {e}")
+                with self.lock:
+                    if self.error is None:
+                        self.error = e
+            finally:
+                self.queue.task_done()
+
+    def put(self, lines):
+        """Queue points by batches of `batch_size`.
+
+        Args:
+            lines (iterable): The points in line protocol, consumed lazily. The empty points (None) are skipped.
+
+        Returns:
+            int: The number of points queued.
+        """
+        lines = (line for line in lines if line is not None)
+        count = 0
+        while True:
+            if self.error is not None:
+                raise self.error
+            batch = list(islice(lines, self.batch_size))
+            if not batch:
+                return count
+            self.queue.put(batch)
+            count = count + len(batch)
+
+    def close(self, raise_error=True):
+        """Wait for the queued batches to be written, stop the workers and flush the client.
+
+        Args:
+            raise_error (bool, optional): Raise the first write error. Defaults to True.
+
+        Returns:
+            int: The number of points written.
+        """
+        if not self.closed:
+            self.closed = True
+            for _ in self.threads:
+                self.queue.put(None)
+            for thread in self.threads:
+                thread.join()
+            try:
+                self.client.flush()
+            except Exception as e:
+                logging.error(f"Echec de l'écriture dans InfluxDB : {e}")
+                if self.error is None:
+                    self.error = e
+        if raise_error and self.error is not None:
+            raise self.error
+        return self.written
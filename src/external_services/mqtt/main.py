@@ -2,6 +2,7 @@
 
 import ast
 import inspect
+import json
 import logging
 import traceback
 from datetime import datetime, timedelta
@@ -10,46 +11,60 @@ from dateutil.relativedelta import relativedelta
 
 from config.main import APP_CONFIG
 from const import TIMEZONE_UTC
-from database.addresses import DatabaseAddresses
-from database.contracts import DatabaseContracts
-from database.daily import DatabaseDaily
-from database.detail import DatabaseDetail
-from database.ecowatt import DatabaseEcowatt
-from database.max_power import DatabaseMaxPower
 from database.statistique import DatabaseStatistique
-from database.tempo import DatabaseTempo
-from database.usage_points import DatabaseUsagePoints
-from external_services.mqtt.client import Mqtt
-from models.stat import Stat
+from models.export import Exporter, SharedDataset, UsagePointDataset, register_exporter
 
 
 class ExportMqtt:
     """A class for exporting MQTT data."""
 
-    def __init__(self, usage_point_id):
+    def __init__(self, usage_point_id=None, dataset=None):
+        """Export the data of a usage point, or the global data (tempo, ecowatt) without usage point.
+
+        Args:
+            usage_point_id (str, optional): The usage point id. Defaults to None (global data).
+            dataset (UsagePointDataset | SharedDataset, optional): The snapshot. Defaults to None (read).
+        """
         self.usage_point_id = usage_point_id
-        self.usage_point_config = APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id]
+        if self.usage_point_id is None:
+            self.usage_point_config = None
+            self.dataset = None
+            self.shared: SharedDataset = dataset if dataset is not None else SharedDataset.load()
+        else:
+            self.usage_point_config = APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id]
+            self.dataset: UsagePointDataset = (
+                dataset if dataset is not None else UsagePointDataset.load(self.usage_point_id)
+            )
+            self.shared: SharedDataset = self.dataset.shared
         self.date_format = "%Y-%m-%d"
         self.date_format_detail = "%Y-%m-%d %H:%M:%S"
+        from external_services.mqtt.client import Mqtt  # paho only imported when enabled
+
         self.mqtt_client = Mqtt()
         self.bootstrap()
 
     def bootstrap(self):
         """Bootstrap apps."""
         try:
-            if self.mqtt_client.valid:
-                self.run()
-            else:
+            if not self.mqtt_client.valid:
                 logging.critical("=> Export MQTT Désactivée (Echec de connexion)")
+            elif self.usage_point_id is None:
+                self.run_shared()
+            else:
+                self.run()
         except Exception:
             traceback.print_exc()
 
+    def run_shared(self):
+        """Run the jobs of the global data."""
+        self.ecowatt()
+        self.tempo_info()
+
     def run(self):
         """Run jobs."""
         self.status()
         self.contract()
         self.address()
-        self.ecowatt()
         if getattr(self.usage_point_config, "consumption", False) or getattr(
             self.usage_point_config, "consumption_detail", False
         ):
@@ -76,7 +91,7 @@ class ExportMqtt:
         """Get the status of the account."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Statut du compte.")
-            usage_point_config = DatabaseUsagePoints(self.usage_point_id).get()
+            usage_point_config = self.dataset.usage_point
             send_data = [
                 "consentement_expiration",
                 "call_number",
@@ -101,7 +116,7 @@ class ExportMqtt:
         """Get the contract data."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Génération des messages du contrat")
-            contract_data = DatabaseContracts(self.usage_point_id).get()
+            contract_data = self.dataset.contract
             if hasattr(contract_data, "__table__"):
                 output = {}
                 for column in contract_data.__table__.columns:
@@ -115,7 +130,7 @@ class ExportMqtt:
         """Get the address data."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Génération des messages d'addresse")
-            address_data = DatabaseAddresses(self.usage_point_id).get()
+            address_data = self.dataset.address
             if hasattr(address_data, "__table__"):
                 output = {}
                 for column in address_data.__table__.columns:
@@ -129,8 +144,8 @@ class ExportMqtt:
         """Get the daily annual data."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Génération des données annuelles")
-            date_range = DatabaseDaily(self.usage_point_id).get_date_range()
-            stat = Stat(self.usage_point_id, measurement_direction)
+            date_range = self.dataset.date_range["daily"]
+            stat = self.dataset.stats[measurement_direction]
             if date_range["begin"] and date_range["end"]:
                 date_begin = datetime.combine(date_range["begin"], datetime.min.time()).astimezone(TIMEZONE_UTC)
                 date_end = datetime.combine(date_range["end"], datetime.max.time()).astimezone(TIMEZONE_UTC)
@@ -208,8 +223,8 @@ class ExportMqtt:
         """Get the daily linear data."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Génération des données linéaires journalières.")
-            date_range = DatabaseDaily(self.usage_point_id).get_date_range()
-            stat = Stat(self.usage_point_id, measurement_direction)
+            date_range = self.dataset.date_range["daily"]
+            stat = self.dataset.stats[measurement_direction]
             if date_range["begin"] and date_range["end"]:
                 date_begin = datetime.combine(date_range["begin"], datetime.min.time()).astimezone(TIMEZONE_UTC)
                 date_end = datetime.combine(date_range["end"], datetime.max.time()).astimezone(TIMEZONE_UTC)
@@ -266,8 +281,8 @@ class ExportMqtt:
         """Get the detailed annual data."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Génération des données annuelles détaillé.")
-            date_range = DatabaseDetail(self.usage_point_id).get_date_range()
-            stat = Stat(self.usage_point_id, measurement_direction)
+            date_range = self.dataset.date_range["detail"]
+            stat = self.dataset.stats[measurement_direction]
             if date_range["begin"] and date_range["end"]:
                 date_begin = datetime.combine(date_range["begin"], datetime.min.time()).astimezone(TIMEZONE_UTC)
                 date_end = datetime.combine(date_range["end"], datetime.max.time()).astimezone(TIMEZONE_UTC)
@@ -380,8 +395,8 @@ class ExportMqtt:
         """Get the detailed linear data."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Génération des données linéaires détaillées")
-            date_range = DatabaseDetail(self.usage_point_id).get_date_range()
-            stat = Stat(self.usage_point_id, measurement_direction)
+            date_range = self.dataset.date_range["detail"]
+            stat = self.dataset.stats[measurement_direction]
             if date_range["begin"] and date_range["end"]:
                 date_begin = datetime.combine(date_range["begin"], datetime.min.time()).astimezone(TIMEZONE_UTC)
                 date_end = datetime.combine(date_range["end"], datetime.max.time()).astimezone(TIMEZONE_UTC)
@@ -457,9 +472,9 @@ class ExportMqtt:
         """Get the maximum power data."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             logging.info("Génération des données de puissance max journalières.")
-            max_power_data = DatabaseMaxPower(self.usage_point_id).get_all(order="asc")
+            max_power_data = self.dataset.max_power
             mqtt_data = {}
-            contract = DatabaseContracts(self.usage_point_id).get()
+            contract = self.dataset.contract
             if max_power_data:
                 max_value = 0
                 if hasattr(contract, "subscribed_power"):
@@ -490,7 +505,7 @@ class ExportMqtt:
             logging.info("Génération des données Ecowatt")
             begin = datetime.combine(datetime.now(tz=TIMEZONE_UTC) - relativedelta(days=1), datetime.min.time())
             end = begin + timedelta(days=7)
-            ecowatt = DatabaseEcowatt().get_range(begin, end)
+            ecowatt = self.shared.ecowatt_range(begin, end)
             today = datetime.combine(datetime.now(tz=TIMEZONE_UTC), datetime.min.time())
             mqtt_data = {}
             if ecowatt:
@@ -504,7 +519,7 @@ class ExportMqtt:
                     mqtt_data[f"ecowatt/{queue}/date"] = data.date.strftime(self.date_format_detail)
                     mqtt_data[f"ecowatt/{queue}/value"] = data.value
                     mqtt_data[f"ecowatt/{queue}/message"] = data.message
-                    for date, value in ast.literal_eval(data.detail).items():
+                    for date, value in json.loads(data.detail).items():
                         date_tmp = (
                             datetime.strptime(date, self.date_format_detail).astimezone(TIMEZONE_UTC).strftime("%H")
                         )
@@ -514,28 +529,37 @@ class ExportMqtt:
             else:
                 logging.info(" => Pas de donnée")
 
-    def tempo(self):  # noqa: C901
-        """Get the tempo data."""
+    def tempo_info(self):
+        """Get the tempo prices, days and colors."""
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            logging.info("Envoie des données Tempo")
+            logging.info("Envoie des informations Tempo")
             mqtt_data = {}
-            tempo_data = DatabaseStatistique(self.usage_point_id).get("price_consumption")
-            tempo_price = DatabaseTempo().get_config("price")
-            if tempo_price:
-                for color, price in tempo_price.items():
+            if self.shared.tempo_price:
+                for color, price in self.shared.tempo_price.items():
                     mqtt_data[f"tempo/price/{color}"] = price
-            tempo_days = DatabaseTempo().get_config("days")
-            if tempo_days:
-                for color, days in tempo_days.items():
+            if self.shared.tempo_days:
+                for color, days in self.shared.tempo_days.items():
                     mqtt_data[f"tempo/days/{color}"] = days
             today = datetime.combine(datetime.now(tz=TIMEZONE_UTC), datetime.min.time())
-            tempo_color = DatabaseTempo().get_range(today, today)
+            tempo_color = self.shared.tempo_color(today)
             if tempo_color:
-                mqtt_data["tempo/color/today"] = tempo_color[0].color
+                mqtt_data["tempo/color/today"] = tempo_color.color
             tomorrow = today + timedelta(days=1)
-            tempo_color = DatabaseTempo().get_range(tomorrow, tomorrow)
+            tempo_color = self.shared.tempo_color(tomorrow)
             if tempo_color:
-                mqtt_data["tempo/color/tomorrow"] = tempo_color[0].color
+                mqtt_data["tempo/color/tomorrow"] = tempo_color.color
+            if mqtt_data:
+                self.mqtt_client.publish_multiple(mqtt_data)
+                logging.info(" => OK")
+            else:
+                logging.info(" => Pas de donnée")
+
+    def tempo(self):
+        """Get the tempo statistics of the usage point."""
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            logging.info("Envoie des données Tempo")
+            mqtt_data = {}
+            tempo_data = DatabaseStatistique(self.usage_point_id).get("price_consumption")
             if tempo_data:
                 for year, data in ast.literal_eval(tempo_data[0].value).items():
                     select_year = year
@@ -578,3 +602,23 @@ class ExportMqtt:
                 logging.info(" => OK")
             else:
                 logging.info(" => Pas de donnée")
+
+
+@register_exporter
+class MqttExporter(Exporter):
+    """Export the data of a usage point to MQTT."""
+
+    name = "mqtt"
+    description = "MQTT"
+
+    def enabled(self):
+        """Check if MQTT is enabled."""
+        return APP_CONFIG.mqtt.enable
+
+    def export_shared(self, dataset):
+        """Export the tempo and ecowatt data to MQTT."""
+        ExportMqtt(dataset=dataset)
+
+    def export(self, dataset):
+        """Export the data of a usage point to MQTT."""
+        ExportMqtt(dataset.usage_point_id, dataset)
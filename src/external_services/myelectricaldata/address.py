@@ -8,7 +8,6 @@ import traceback
 from config.main import APP_CONFIG
 from const import CODE_200_SUCCESS, URL
 from database.addresses import DatabaseAddresses
-from database.usage_points import DatabaseUsagePoints
 from models.query import Query
 
 
@@ -91,7 +90,6 @@ class Address:
                 logging.info(" =>  Mise à jour du cache")
                 result = self.run()
                 self.usage_point_config.refresh_addresse = False
-                DatabaseUsagePoints(self.usage_point_id).set(self.usage_point_config.__dict__)
             else:
                 # Get data in cache
                 logging.info(" =>  Récupération du cache")
@@ -109,8 +109,7 @@ class Contract:
             elif hasattr(self.usage_point_config, "refresh_contract") and self.usage_point_config.refresh_contract:
                 logging.info(" =>  Mise à jour du cache")
                 result = self.run()
-                self.usage_point_config.refresh_contract = False
-                DatabaseUsagePoints(self.usage_point_id).set(self.usage_point_config.__dict__)
+                DatabaseUsagePoints(self.usage_point_id).set_value("refresh_contract", False)
             else:
                 # Get data in cache
                 logging.info(" =>  Récupération du cache")
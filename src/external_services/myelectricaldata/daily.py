@@ -17,6 +17,7 @@ from const import (
     TIMEZONE,
     URL,
 )
+from database import DB
 from database.contracts import DatabaseContracts
 from database.daily import DatabaseDaily
 from database.usage_points import DatabaseUsagePoints
@@ -169,22 +170,26 @@ class Daily:
                                         "value"
                                     ]
                                 single_date: datetime
-                                for single_date in daterange(begin, end):
-                                    single_date_tz: datetime = single_date.replace(tzinfo=TIMEZONE)
-                                    max_histo = max_histo.replace(tzinfo=TIMEZONE)
-                                    if single_date_tz < max_histo:
-                                        if single_date_tz.strftime(self.date_format) in interval_reading_tmp:
-                                            # FOUND
-                                            self.daily.insert(
-                                                date=datetime.combine(single_date_tz, datetime.min.time()),
-                                                value=interval_reading_tmp[single_date_tz.strftime(self.date_format)],
-                                                blacklist=blacklist,
-                                            )
-                                        else:
-                                            # NOT FOUND
-                                            self.daily.fail_increment(
-                                                date=datetime.combine(single_date_tz, datetime.min.time()),
-                                            )
+                                # ONE TRANSACTION BY WINDOW
+                                with DB.unit_of_work():
+                                    for single_date in daterange(begin, end):
+                                        single_date_tz: datetime = single_date.replace(tzinfo=TIMEZONE)
+                                        max_histo = max_histo.replace(tzinfo=TIMEZONE)
+                                        if single_date_tz < max_histo:
+                                            if single_date_tz.strftime(self.date_format) in interval_reading_tmp:
+                                                # FOUND
+                                                self.daily.insert(
+                                                    date=datetime.combine(single_date_tz, datetime.min.time()),
+                                                    value=interval_reading_tmp[
+                                                        single_date_tz.strftime(self.date_format)
+                                                    ],
+                                                    blacklist=blacklist,
+                                                )
+                                            else:
+                                                # NOT FOUND
+                                                self.daily.fail_increment(
+                                                    date=datetime.combine(single_date_tz, datetime.min.time()),
+                                                )
                                 return interval_reading
                             return {
                                 "error": True,
@@ -18,6 +18,7 @@ from const import (
     TIMEZONE,
     URL,
 )
+from database import DB
 from database.config import DatabaseConfig
 from database.contracts import DatabaseContracts
 from database.detail import DatabaseDetail
@@ -122,23 +123,29 @@ class Detail:
                         meter_reading = json.loads(data.text)["meter_reading"]
                         if meter_reading is not None and "interval_reading" in meter_reading:
                             interval_reading = meter_reading["interval_reading"]
-                            for interval_reading_data in interval_reading:
-                                value = interval_reading_data["value"]
-                                interval = re.findall(r"\d+", interval_reading_data["interval_length"])[0]
-                                date = interval_reading_data["date"]
-                                date_object = datetime.strptime(date, self.date_detail_format).astimezone(TIMEZONE)
-                                # CHANGE DATE TO BEGIN RANGE
-                                date = date_object - timedelta(minutes=int(interval))
-                                if int(value) == 0:
-                                    logging.debug(f" => {date} blacklint incrementation.")
-                                    DatabaseDetail(self.usage_point_id, self.measure_type).fail_increment(date)
-                                else:
-                                    DatabaseDetail(self.usage_point_id, self.measure_type).insert(
-                                        date=date,
-                                        value=value,
-                                        interval=interval,
-                                        blacklist=0,
-                                    )
+                            # THE RECORDS START ONE INTERVAL BEFORE THE WINDOW
+                            DatabaseDetail(self.usage_point_id, self.measure_type).prepare(
+                                begin - timedelta(days=1), end
+                            )
+                            # ONE TRANSACTION BY WINDOW
+                            with DB.unit_of_work():
+                                for interval_reading_data in interval_reading:
+                                    value = interval_reading_data["value"]
+                                    interval = re.findall(r"\d+", interval_reading_data["interval_length"])[0]
+                                    date = interval_reading_data["date"]
+                                    date_object = datetime.strptime(date, self.date_detail_format).astimezone(TIMEZONE)
+                                    # CHANGE DATE TO BEGIN RANGE
+                                    date = date_object - timedelta(minutes=int(interval))
+                                    if int(value) == 0:
+                                        logging.debug(f" => {date} blacklint incrementation.")
+                                        DatabaseDetail(self.usage_point_id, self.measure_type).fail_increment(date)
+                                    else:
+                                        DatabaseDetail(self.usage_point_id, self.measure_type).insert(
+                                            date=date,
+                                            value=value,
+                                            interval=interval,
+                                            blacklist=0,
+                                        )
                             return interval_reading
                         return {
                             "error": True,
@@ -1,6 +1,5 @@
 """Fetch and store Ecowatt data."""
 
-import ast
 import inspect
 import json
 import logging
@@ -11,6 +10,7 @@ from dateutil.relativedelta import relativedelta
 
 from config.main import APP_CONFIG
 from const import CODE_200_SUCCESS, TIMEZONE, URL
+from database import DB
 from database.ecowatt import DatabaseEcowatt
 from models.query import Query
 from utils import title
@@ -33,9 +33,10 @@ class Ecowatt:
             if query_response.status_code == CODE_200_SUCCESS:
                 try:
                     response_json = json.loads(query_response.text)
-                    for date, data in response_json.items():
-                        date_obj = datetime.strptime(date, "%Y-%m-%d").astimezone(TIMEZONE)
-                        DatabaseEcowatt().set(date_obj, data["value"], data["message"], str(data["detail"]))
+                    with DB.unit_of_work():
+                        for date, data in response_json.items():
+                            date_obj = datetime.strptime(date, "%Y-%m-%d").astimezone(TIMEZONE)
+                            DatabaseEcowatt().set(date_obj, data["value"], data["message"], json.dumps(data["detail"]))
                     response = response_json
                 except Exception as e:
                     logging.error(e)
@@ -60,7 +61,7 @@ class Ecowatt:
                     output[d.date] = {
                         "value": d.value,
                         "message": d.message,
-                        "detail": ast.literal_eval(d.detail),
+                        "detail": json.loads(d.detail),
                     }
             return output
 
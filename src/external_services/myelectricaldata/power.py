@@ -17,6 +17,7 @@ from const import (
     TIMEZONE_UTC,
     URL,
 )
+from database import DB
 from database.contracts import DatabaseContracts
 from database.max_power import DatabaseMaxPower
 from database.usage_points import DatabaseUsagePoints
@@ -94,26 +95,28 @@ class Power:
                                         "date": date_1,
                                         "value": interval_reading_data["value"],
                                     }
-                                for single_date in daterange(begin, end):
-                                    single_date_tz: datetime = single_date.replace(tzinfo=TIMEZONE_UTC)
-                                    max_histo = max_histo.replace(tzinfo=TIMEZONE_UTC)
-                                    if single_date_tz < max_histo:
-                                        if single_date_tz.strftime(self.date_format) in interval_reading_tmp:
-                                            # FOUND
-                                            single_date_value = interval_reading_tmp[
-                                                single_date_tz.strftime(self.date_format)
-                                            ]
-                                            self.power.insert(
-                                                date=datetime.combine(single_date_tz, datetime.min.time()),
-                                                event_date=single_date_value["date"],
-                                                value=single_date_value["value"],
-                                                blacklist=blacklist,
-                                            )
-                                        else:
-                                            # NOT FOUND
-                                            self.power.daily_fail_increment(
-                                                date=datetime.combine(single_date, datetime.min.time()),
-                                            )
+                                # ONE TRANSACTION BY WINDOW
+                                with DB.unit_of_work():
+                                    for single_date in daterange(begin, end):
+                                        single_date_tz: datetime = single_date.replace(tzinfo=TIMEZONE_UTC)
+                                        max_histo = max_histo.replace(tzinfo=TIMEZONE_UTC)
+                                        if single_date_tz < max_histo:
+                                            if single_date_tz.strftime(self.date_format) in interval_reading_tmp:
+                                                # FOUND
+                                                single_date_value = interval_reading_tmp[
+                                                    single_date_tz.strftime(self.date_format)
+                                                ]
+                                                self.power.insert(
+                                                    date=datetime.combine(single_date_tz, datetime.min.time()),
+                                                    event_date=single_date_value["date"],
+                                                    value=single_date_value["value"],
+                                                    blacklist=blacklist,
+                                                )
+                                            else:
+                                                # NOT FOUND
+                                                self.power.daily_fail_increment(
+                                                    date=datetime.combine(single_date, datetime.min.time()),
+                                                )
                                 return interval_reading
                             return {
                                 "error": True,
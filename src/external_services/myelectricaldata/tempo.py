@@ -9,6 +9,7 @@ from dateutil.relativedelta import relativedelta
 
 from config.main import APP_CONFIG
 from const import CODE_200_SUCCESS, TIMEZONE, URL
+from database import DB
 from database.tempo import DatabaseTempo
 from models.query import Query
 from utils import title
@@ -46,9 +47,10 @@ class Tempo:
             if query_response.status_code == CODE_200_SUCCESS:
                 try:
                     response_json: dict = json.loads(query_response.text)
-                    for date, color in response_json.items():
-                        date_obj = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=TIMEZONE)
-                        DatabaseTempo().set(date_obj, color)
+                    with DB.unit_of_work():
+                        for date, color in response_json.items():
+                            date_obj = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=TIMEZONE)
+                            DatabaseTempo().set(date_obj, color)
                     response = response_json
                 except Exception as e:
                     logging.error(e)
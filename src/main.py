@@ -11,6 +11,9 @@ from fastapi_utils.tasks import repeat_every
 from uvicorn.config import LOGGING_CONFIG
 
 from config.main import APP_CONFIG
+from database import DB
+from database.partitions import PARTITIONS
+from models.executor import run_job, shutdown
 from models.jobs import Job
 from routers import account, action, data, html, info
 from utils import get_version
@@ -19,30 +22,53 @@ from utils import get_version
 #######################################################################################################################
 # JOBS
 @repeat_every(seconds=APP_CONFIG.server.cycle, wait_first=False)
-def job_boot():
+async def job_boot():
     """Bootstap jobs."""
-    Job().boot()
+    await run_job(lambda: Job().boot())
 
 
 @repeat_every(seconds=3600, wait_first=True)
-def job_home_assistant():
+async def job_home_assistant():
     """Home Assistant Ecowatt."""
-    Job().export_home_assistant(target="ecowatt")
+    await run_job(lambda: Job().export_home_assistant(target="ecowatt"))
 
 
 @repeat_every(seconds=600, wait_first=False)
-def job_gateway_status():
+async def job_gateway_status():
     """Gateway status check."""
-    Job().get_gateway_status()
+    await run_job(lambda: Job().get_gateway_status())
+
+
+@repeat_every(seconds=3600, wait_first=True)
+async def job_database_maintenance():
+    """Database maintenance (WAL checkpoint, statistics, retention of the detail partitions)."""
+    await run_job(DB.maintenance)
+    await run_job(PARTITIONS.drop_expired)
+
+
+@repeat_every(seconds=86400, wait_first=True)
+async def job_database_retention():
+    """Retention and compaction of the cache (expired data, rollups, failed imports, VACUUM)."""
+    await run_job(lambda: Job().job_retention())
 
 
 @asynccontextmanager
 async def bootstrap(app: FastAPI):  # pylint: disable=unused-argument
-    """Bootstap jobs."""
+    """Bootstap jobs.
+
+    The jobs are only scheduled: they run in the job thread pool, so the server accepts requests immediately and
+    the progress of the first import is reported by `/ready`. The side effects of the configuration (check, save,
+    cleaning of the database) and the partitioning of the detail tables run first, once.
+    """
+    APP_CONFIG.setup()
+    await run_job(PARTITIONS.setup)
     await job_boot()
     await job_home_assistant()
     await job_gateway_status()
+    await job_database_maintenance()
+    await job_database_retention()
     yield
+    shutdown()
 
 
 APP = FastAPI(
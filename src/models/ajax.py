@@ -6,6 +6,7 @@ import pytz
 from fastapi import Request
 
 from config.main import APP_CONFIG
+from config.store import CONFIG_STORE
 from database.contracts import DatabaseContracts
 from database.daily import DatabaseDaily
 from database.detail import DatabaseDetail
@@ -561,11 +562,14 @@ class Ajax:
             if not hasattr(APP_CONFIG.myelectricaldata.usage_point_config, self.usage_point_id):
                 APP_CONFIG.myelectricaldata.new(self.usage_point_id)
             print(APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id])
-            for key, value in configs.items():
-                if key != "usage_point_id":
-                    setattr(
-                        APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id], key, check_format(value)
-                    )
+            with CONFIG_STORE.batch():
+                for key, value in configs.items():
+                    if key != "usage_point_id":
+                        setattr(
+                            APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id],
+                            key,
+                            check_format(value),
+                        )
             return output
 
     def configuration(self, configs):
@@ -579,8 +583,11 @@ class Ajax:
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
             title(f"[{self.usage_point_id}] Changement de configuration:")
-            for key, value in configs.items():
-                setattr(APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id], key, check_format(value))
+            with CONFIG_STORE.batch():
+                for key, value in configs.items():
+                    setattr(
+                        APP_CONFIG.myelectricaldata.usage_point_config[self.usage_point_id], key, check_format(value)
+                    )
 
     def datatable(self, measurement_direction, args: Request):
         """Retrieve datatable for the specified measurement direction.
@@ -599,10 +606,9 @@ class Ajax:
             length = int(args.get("length"))
             search = args.get("search[value]")
             start_index = int(args.get("start"))
-            end_index = start_index + length
             order_column = int(args.get("order[0][column]"))
             order_dir = args.get("order[0][dir]")
-            all_data = []
+            records_filtered = 0
             data = []
             if measurement_direction == "consumption":
                 records_total = DatabaseDaily(self.usage_point_id, "consumption").get_count()
@@ -617,12 +623,15 @@ class Ajax:
                     7: "import_clean",
                     8: "blacklist",
                 }
-                all_data = DatabaseDaily(self.usage_point_id, "consumption").get_datatable(
+                records_filtered = DatabaseDaily(self.usage_point_id, "consumption").get_datatable_count(search=search)
+                page_data = DatabaseDaily(self.usage_point_id, "consumption").get_datatable(
                     order_column=col_spec[order_column],
                     order_dir=order_dir,
                     search=search,
+                    start=start_index,
+                    length=length,
                 )
-                data = self.datatable_daily(all_data, start_index, end_index, measurement_direction)
+                data = self.datatable_daily(page_data, measurement_direction)
 
             elif measurement_direction == "consumption_detail":
                 records_total = DatabaseDetail(self.usage_point_id, "consumption").get_count()
@@ -636,12 +645,16 @@ class Ajax:
                     6: "import_clean",
                     7: "blacklist",
                 }
-                all_data = DatabaseDetail(self.usage_point_id, "consumption").get_datatable(
+                database = DatabaseDetail(self.usage_point_id, "consumption")
+                records_filtered = database.get_datatable_count(search=search)
+                page_data = database.get_datatable(
                     order_column=col_spec[order_column],
                     order_dir=order_dir,
                     search=search,
+                    start=start_index,
+                    length=length,
                 )
-                data = self.datatable_detail(all_data, start_index, end_index, measurement_direction)
+                data = self.datatable_detail(page_data, measurement_direction)
 
             elif measurement_direction == "production":
                 records_total = DatabaseDaily(self.usage_point_id, "production").get_count()
@@ -654,12 +667,15 @@ class Ajax:
                     5: "import_clean",
                     6: "blacklist",
                 }
-                all_data = DatabaseDaily(self.usage_point_id, "consumption").get_datatable(
+                records_filtered = DatabaseDaily(self.usage_point_id, "production").get_datatable_count(search=search)
+                page_data = DatabaseDaily(self.usage_point_id, "production").get_datatable(
                     order_column=col_spec[order_column],
                     order_dir=order_dir,
                     search=search,
+                    start=start_index,
+                    length=length,
                 )
-                data = self.datatable_daily(all_data, start_index, end_index, measurement_direction)
+                data = self.datatable_daily(page_data, measurement_direction)
             elif measurement_direction == "production_detail":
                 records_total = DatabaseDetail(self.usage_point_id, "production").get_count()
                 col_spec = {
@@ -672,12 +688,16 @@ class Ajax:
                     6: "import_clean",
                     7: "blacklist",
                 }
-                all_data = DatabaseDetail(self.usage_point_id, "production").get_datatable(
+                database = DatabaseDetail(self.usage_point_id, "production")
+                records_filtered = database.get_datatable_count(search=search)
+                page_data = database.get_datatable(
                     order_column=col_spec[order_column],
                     order_dir=order_dir,
                     search=search,
+                    start=start_index,
+                    length=length,
                 )
-                data = self.datatable_detail(all_data, start_index, end_index, measurement_direction)
+                data = self.datatable_detail(page_data, measurement_direction)
             elif measurement_direction == "consumption_max_power":
                 records_total = DatabaseMaxPower(self.usage_point_id).get_daily_count()
                 col_spec = {
@@ -691,16 +711,19 @@ class Ajax:
                     7: "import_clean",
                     8: "blacklist",
                 }
-                all_data = DatabaseMaxPower(self.usage_point_id).get_daily_datatable(
+                records_filtered = DatabaseMaxPower(self.usage_point_id).get_daily_datatable_count(search=search)
+                page_data = DatabaseMaxPower(self.usage_point_id).get_daily_datatable(
                     order_column=col_spec[order_column],
                     order_dir=order_dir,
                     search=search,
+                    start=start_index,
+                    length=length,
                 )
-                data = self.datatable_max_power(all_data, start_index, end_index)
+                data = self.datatable_max_power(page_data)
             result = {
                 "draw": draw + 1,
                 "recordsTotal": records_total,
-                "recordsFiltered": len(all_data),
+                "recordsFiltered": records_filtered,
                 "data": data,
             }
             return result
@@ -769,158 +792,145 @@ class Ajax:
             btn = {"cache": cache_html, "blacklist": blacklist_html}
             return btn
 
-    def datatable_daily(self, all_data, start_index, end_index, measurement_direction):
+    def datatable_daily(self, page_data, measurement_direction):
         """Generate the HTML code for the daily datatable based on the provided data.
 
         Args:
-            all_data (list): The list of database data.
-            start_index (int): The start index of the datatable.
-            end_index (int): The end index of the datatable.
+            page_data (list): The page of database data.
             measurement_direction (str): The measurement direction.
 
         Returns:
             list: The generated HTML code for the daily datatable.
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            index = 0
             result = []
-            for db_data in all_data:
-                if start_index <= index <= end_index:
-                    date_text = db_data.date.strftime(self.date_format)
-                    target = "daily"
-                    # VALUE
-                    conso_w = f"""<div id="{measurement_direction}_conso_w_{date_text}">{db_data.value}</div>"""
-                    conso_kw = (
-                        f"""<div id="{measurement_direction}_conso_kw_{date_text}">{db_data.value / 1000}</div>"""
+            for db_data in page_data:
+                date_text = db_data.date.strftime(self.date_format)
+                target = "daily"
+                # VALUE
+                conso_w = f"""<div id="{measurement_direction}_conso_w_{date_text}">{db_data.value}</div>"""
+                conso_kw = (
+                    f"""<div id="{measurement_direction}_conso_kw_{date_text}">{db_data.value / 1000}</div>"""
+                )
+                fail_count = (
+                    f"""<div id="{measurement_direction}_fail_count_{date_text}">{db_data.fail_count}</div>"""
+                )
+                # CACHE STATE
+                if db_data.fail_count == 0:
+                    cache_state = (
+                        f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_success">1</div>'
                     )
-                    fail_count = (
-                        f"""<div id="{measurement_direction}_fail_count_{date_text}">{db_data.fail_count}</div>"""
+                else:
+                    cache_state = (
+                        f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_failed">0</div>'
                     )
-                    # CACHE STATE
-                    if db_data.fail_count == 0:
-                        cache_state = (
-                            f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_success">1</div>'
-                        )
-                    else:
-                        cache_state = (
-                            f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_failed">0</div>'
-                        )
-                    tempo = DatabaseTempo().get_range(db_data.date, db_data.date)
-                    if tempo and tempo[0]:
-                        if tempo[0].color == "RED":
-                            temp_color = f"""
+                tempo = DatabaseTempo().get_range(db_data.date, db_data.date)
+                if tempo and tempo[0]:
+                    if tempo[0].color == "RED":
+                        temp_color = f"""
 <div id="{measurement_direction}_tempo_{target}_{date_text}" class="tempo_red">2</div>"""
-                        elif tempo[0].color == "WHITE":
-                            temp_color = f"""
+                    elif tempo[0].color == "WHITE":
+                        temp_color = f"""
 <div id="{measurement_direction}_tempo_{target}_{date_text}" class="tempo_white">1</div>"""
-                        else:
-                            temp_color = f"""
-<div id="{measurement_direction}_tempo_{target}_{date_text}" class="tempo_blue">0</div>"""
-                    else:
-                        temp_color = f'<div id="{measurement_direction}_tempo_{target}_{date_text}" class="">-</div>'
-                    hc = Stat(self.usage_point_id, "consumption").get_daily(db_data.date, "hc")
-                    if hc == 0:
-                        hc = "-"
-                    else:
-                        hc = hc / 1000
-                    hp = Stat(self.usage_point_id, "consumption").get_daily(db_data.date, "hp")
-                    if hp == 0:
-                        hp = "-"
-                    else:
-                        hp = hp / 1000
-                    hc_kw = f'<div id="{measurement_direction}_hc_{target}_{date_text}" class="">{hc}</div>'
-                    hp_kw = f'<div id="{measurement_direction}_hp_{target}_{date_text}" class="">{hp}</div>'
-                    if measurement_direction == "consumption":
-                        day_data = [
-                            date_text,
-                            conso_w,
-                            conso_kw,
-                            hc_kw,
-                            hp_kw,
-                            temp_color,
-                            fail_count,
-                            cache_state,
-                            self.datatable_button(measurement_direction, db_data)["cache"],
-                            self.datatable_button(measurement_direction, db_data)["blacklist"],
-                        ]
                     else:
-                        day_data = [
-                            date_text,
-                            conso_w,
-                            conso_kw,
-                            fail_count,
-                            cache_state,
-                            self.datatable_button(measurement_direction, db_data)["cache"],
-                            self.datatable_button(measurement_direction, db_data)["blacklist"],
-                        ]
-                    result.append(day_data)
-                index = index + 1
+                        temp_color = f"""
+<div id="{measurement_direction}_tempo_{target}_{date_text}" class="tempo_blue">0</div>"""
+                else:
+                    temp_color = f'<div id="{measurement_direction}_tempo_{target}_{date_text}" class="">-</div>'
+                hc = Stat(self.usage_point_id, "consumption").get_daily(db_data.date, "hc")
+                if hc == 0:
+                    hc = "-"
+                else:
+                    hc = hc / 1000
+                hp = Stat(self.usage_point_id, "consumption").get_daily(db_data.date, "hp")
+                if hp == 0:
+                    hp = "-"
+                else:
+                    hp = hp / 1000
+                hc_kw = f'<div id="{measurement_direction}_hc_{target}_{date_text}" class="">{hc}</div>'
+                hp_kw = f'<div id="{measurement_direction}_hp_{target}_{date_text}" class="">{hp}</div>'
+                if measurement_direction == "consumption":
+                    day_data = [
+                        date_text,
+                        conso_w,
+                        conso_kw,
+                        hc_kw,
+                        hp_kw,
+                        temp_color,
+                        fail_count,
+                        cache_state,
+                        self.datatable_button(measurement_direction, db_data)["cache"],
+                        self.datatable_button(measurement_direction, db_data)["blacklist"],
+                    ]
+                else:
+                    day_data = [
+                        date_text,
+                        conso_w,
+                        conso_kw,
+                        fail_count,
+                        cache_state,
+                        self.datatable_button(measurement_direction, db_data)["cache"],
+                        self.datatable_button(measurement_direction, db_data)["blacklist"],
+                    ]
+                result.append(day_data)
             return result
 
-    def datatable_detail(self, all_data, start_index, end_index, measurement_direction):
+    def datatable_detail(self, page_data, measurement_direction):
         """Generate the datatable for the detailed view of the electrical data.
 
         Args:
-            all_data (list): List of all data.
-            start_index (int): Start index of the data.
-            end_index (int): End index of the data.
+            page_data (list): The page of database data.
             measurement_direction (str): Measurement direction.
 
         Returns:
             list: Resulting datatable.
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            index = 0
             result = []
-            for db_data in all_data:
-                if start_index <= index <= end_index:
-                    date_text = db_data.date.strftime(self.date_format)
-                    date_hour = db_data.date.strftime("%H:%M:%S")
-                    target = "detail"
-                    # VALUE
-                    conso_w = f"""<div id="{measurement_direction}_conso_w_{date_text}">{db_data.value}</div>"""
-                    conso_kw = (
-                        f"""<div id="{measurement_direction}_conso_kw_{date_text}">{db_data.value / 1000}</div>"""
+            for db_data in page_data:
+                date_text = db_data.date.strftime(self.date_format)
+                date_hour = db_data.date.strftime("%H:%M:%S")
+                target = "detail"
+                # VALUE
+                conso_w = f"""<div id="{measurement_direction}_conso_w_{date_text}">{db_data.value}</div>"""
+                conso_kw = (
+                    f"""<div id="{measurement_direction}_conso_kw_{date_text}">{db_data.value / 1000}</div>"""
+                )
+                fail_count = (
+                    f"""<div id="{measurement_direction}_fail_count_{date_text}">{db_data.fail_count}</div>"""
+                )
+                # CACHE STATE
+                if db_data.fail_count == 0:
+                    cache_state = (
+                        f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_success">1</div>'
                     )
-                    fail_count = (
-                        f"""<div id="{measurement_direction}_fail_count_{date_text}">{db_data.fail_count}</div>"""
+                else:
+                    cache_state = (
+                        f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_failed">0</div>'
                     )
-                    # CACHE STATE
-                    if db_data.fail_count == 0:
-                        cache_state = (
-                            f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_success">1</div>'
-                        )
-                    else:
-                        cache_state = (
-                            f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_failed">0</div>'
-                        )
-                    day_data = [
-                        date_text,
-                        date_hour,
-                        conso_w,
-                        conso_kw,
-                        fail_count,
-                        cache_state,
-                        self.datatable_button(measurement_direction, db_data)["cache"],
-                        self.datatable_button(measurement_direction, db_data)["blacklist"],
-                    ]
-                    result.append(day_data)
-                index = index + 1
+                day_data = [
+                    date_text,
+                    date_hour,
+                    conso_w,
+                    conso_kw,
+                    fail_count,
+                    cache_state,
+                    self.datatable_button(measurement_direction, db_data)["cache"],
+                    self.datatable_button(measurement_direction, db_data)["blacklist"],
+                ]
+                result.append(day_data)
             return result
 
-    def datatable_max_power(self, all_data, start_index, end_index):
+    def datatable_max_power(self, page_data):
         """Generate the datatable for the maximum power data.
 
         Args:
-            all_data (list): List of all data.
-            start_index (int): Start index of the data.
-            end_index (int): End index of the data.
+            page_data (list): The page of database data.
 
         Returns:
             list: Resulting datatable.
         """
         with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-            index = 0
             result = []
             measurement_direction = "consumption_max_power"
             event_date = ""
@@ -930,50 +940,48 @@ class Ajax:
                 max_power = int(contract.subscribed_power.split(" ")[0]) * 1000
             else:
                 max_power = 999000
-            for db_data in all_data:
-                if start_index <= index <= end_index:
-                    date_text = db_data.date.strftime(self.date_format)
-                    ampere = f"{round(int(db_data.value) / 230, 2)}"
-                    if isinstance(db_data.event_date, datetime):
-                        event_date = db_data.event_date.strftime("%H:%M:%S")
-                    # VALUE
-                    if max_power <= int(db_data.value):
-                        style = 'style="color:#FF0000; font-weight:bolder"'
-                    elif (max_power * 90 / 100) <= db_data.value:
-                        style = 'style="color:#FFB600; font-weight:bolder"'
-                    else:
-                        style = ""
-                    data_text_event_date = f"""<div id="{measurement_direction}_conso_event_date_{date_text}"
-                    {style}>{event_date}</div>"""
-                    conso_w = (
-                        f"""<div id="{measurement_direction}_conso_w_{date_text}" {style}>{db_data.value}</div>"""
+            for db_data in page_data:
+                date_text = db_data.date.strftime(self.date_format)
+                ampere = f"{round(int(db_data.value) / 230, 2)}"
+                if isinstance(db_data.event_date, datetime):
+                    event_date = db_data.event_date.strftime("%H:%M:%S")
+                # VALUE
+                if max_power <= int(db_data.value):
+                    style = 'style="color:#FF0000; font-weight:bolder"'
+                elif (max_power * 90 / 100) <= db_data.value:
+                    style = 'style="color:#FFB600; font-weight:bolder"'
+                else:
+                    style = ""
+                data_text_event_date = f"""<div id="{measurement_direction}_conso_event_date_{date_text}"
+                {style}>{event_date}</div>"""
+                conso_w = (
+                    f"""<div id="{measurement_direction}_conso_w_{date_text}" {style}>{db_data.value}</div>"""
+                )
+                conso_kw = f"""<div id="{measurement_direction}_conso_kw_{date_text}"
+                {style}>{db_data.value / 1000}</div>"""
+                conso_a = f"""<div id="{measurement_direction}_conso_a_{date_text}" {style}>{ampere}</div>"""
+                fail_count = f"""<div id="{measurement_direction}_fail_count_{date_text}"
+                {style}>{db_data.fail_count}</div>"""
+
+                # CACHE STATE
+                if db_data.fail_count == 0:
+                    cache_state = (
+                        f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_success">1</div>'
                     )
-                    conso_kw = f"""<div id="{measurement_direction}_conso_kw_{date_text}"
-                    {style}>{db_data.value / 1000}</div>"""
-                    conso_a = f"""<div id="{measurement_direction}_conso_a_{date_text}" {style}>{ampere}</div>"""
-                    fail_count = f"""<div id="{measurement_direction}_fail_count_{date_text}"
-                    {style}>{db_data.fail_count}</div>"""
-
-                    # CACHE STATE
-                    if db_data.fail_count == 0:
-                        cache_state = (
-                            f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_success">1</div>'
-                        )
-                    else:
-                        cache_state = (
-                            f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_failed">0</div>'
-                        )
-                    day_data = [
-                        date_text,
-                        data_text_event_date,
-                        conso_w,
-                        conso_kw,
-                        conso_a,
-                        fail_count,
-                        cache_state,
-                        self.datatable_button(measurement_direction, db_data)["cache"],
-                        self.datatable_button(measurement_direction, db_data)["blacklist"],
-                    ]
-                    result.append(day_data)
-                index = index + 1
+                else:
+                    cache_state = (
+                        f'<div id="{measurement_direction}_icon_{target}_{date_text}" class="icon_failed">0</div>'
+                    )
+                day_data = [
+                    date_text,
+                    data_text_event_date,
+                    conso_w,
+                    conso_kw,
+                    conso_a,
+                    fail_count,
+                    cache_state,
+                    self.datatable_button(measurement_direction, db_data)["cache"],
+                    self.datatable_button(measurement_direction, db_data)["blacklist"],
+                ]
+                result.append(day_data)
             return result
@@ -0,0 +1,67 @@
+"""Dedicated thread pools of the application (import jobs and reads of the cache).
+
+The handlers and the jobs are coroutines: the synchronous work (SQLAlchemy, calls to the gateway) is sent to a
+dedicated pool, so a long import never takes the threads serving the web interface and the API, and the event loop
+stays free.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from const import JOB_WORKERS, READ_WORKERS
+
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+READ_EXECUTOR = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="read")
+
+
+async def run_in_executor(executor, func, *args, **kwargs):
+    """Run a synchronous function in a thread pool, with the context of the caller (tracing span).
+
+    Args:
+        executor (ThreadPoolExecutor): The thread pool.
+        func (callable): The function.
+        *args: The positional arguments of the function.
+        **kwargs: The keyword arguments of the function.
+
+    Returns:
+        The result of the function (its exception is raised in the caller).
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+async def run_job(func, *args, **kwargs):
+    """Run an import job (import, reset, export) in the pool of the jobs.
+
+    Args:
+        func (callable): The function.
+        *args: The positional arguments of the function.
+        **kwargs: The keyword arguments of the function.
+
+    Returns:
+        The result of the function.
+    """
+    return await run_in_executor(JOB_EXECUTOR, func, *args, **kwargs)
+
+
+async def run_read(func, *args, **kwargs):
+    """Run a read or a short update of the cache (API, web interface) in the pool of the reads.
+
+    Args:
+        func (callable): The function.
+        *args: The positional arguments of the function.
+        **kwargs: The keyword arguments of the function.
+
+    Returns:
+        The result of the function.
+    """
+    return await run_in_executor(READ_EXECUTOR, func, *args, **kwargs)
+
+
+def shutdown():
+    """Stop the thread pools, without waiting for the running jobs."""
+    JOB_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    READ_EXECUTOR.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,420 @@
+"""Exporter framework: snapshots of the cache shared by all the exporters (global data and usage points)."""
+import inspect
+import logging
+import traceback
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import chain
+from types import MappingProxyType
+
+from config.main import APP_CONFIG
+from const import TIMEZONE
+from database.addresses import DatabaseAddresses
+from database.contracts import DatabaseContracts
+from database.daily import DatabaseDaily
+from database.detail import DatabaseDetail
+from database.ecowatt import DatabaseEcowatt
+from database.max_power import DatabaseMaxPower
+from database.records import Record
+from database.tempo import DatabaseTempo
+from database.usage_points import DatabaseUsagePoints
+from models.stat import Stat
+from utils import title
+
+EXPORTERS = {}
+MEASUREMENT_DIRECTIONS = ("consumption", "production")
+
+
+@dataclass(frozen=True)
+class DataSeries:
+    """Immutable series of the rows of a table, by ascending date.
+
+    The ranges are found by bisection and follow the queries of the table: the bounds are included and converted to
+    the timezone of the stored dates.
+
+    Attributes:
+        rows: The rows (records), by ascending date.
+        timezone: The timezone of the stored dates, the bounds are converted to it. Defaults to None (the bounds are
+            compared without their timezone).
+    """
+
+    rows: tuple = ()
+    timezone: object = None
+    dates: tuple = field(init=False, repr=False)
+
+    def __post_init__(self):
+        """Index the dates of the rows."""
+        object.__setattr__(self, "dates", tuple(row.date for row in self.rows))
+
+    def __iter__(self):
+        """Iterate over the rows, by ascending date."""
+        return iter(self.rows)
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.rows)
+
+    @classmethod
+    def of(cls, rows, timezone=None):
+        """Copy the rows of a query.
+
+        Args:
+            rows (iterable): The ORM objects, by ascending date.
+            timezone (tzinfo, optional): The timezone of the stored dates. Defaults to None.
+
+        Returns:
+            DataSeries: The series.
+        """
+        return cls(rows=tuple(Record.of(row) for row in rows), timezone=timezone)
+
+    def naive(self, date):
+        """Convert a bound to a stored date.
+
+        Args:
+            date (datetime): The bound.
+
+        Returns:
+            datetime: The bound in the timezone of the stored dates, without timezone.
+        """
+        if self.timezone is not None:
+            date = date.astimezone(self.timezone)
+        return date.replace(tzinfo=None)
+
+    @property
+    def first_date(self):
+        """Return the date of the first row, None if the series is empty."""
+        return self.dates[0] if self.dates else None
+
+    def get_range(self, begin, end, order="desc"):
+        """Return the rows between two dates (included).
+
+        Args:
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+            order (str, optional): The order direction. Defaults to "desc".
+
+        Returns:
+            list: The rows within the range.
+        """
+        rows = list(self.rows[bisect_left(self.dates, self.naive(begin)) : bisect_right(self.dates, self.naive(end))])
+        if order == "desc":
+            rows.reverse()
+        return rows
+
+    def get_date(self, date):
+        """Return the row of a date.
+
+        Args:
+            date (datetime): The date.
+
+        Returns:
+            Record: The row, None if unknown.
+        """
+        date = self.naive(date)
+        index = bisect_left(self.dates, date)
+        if index < len(self.dates) and self.dates[index] == date:
+            return self.rows[index]
+        return None
+
+    def chunks(self, begin=None, chunk_size=1000):
+        """Yield the rows chunk by chunk, in ascending date order.
+
+        Args:
+            begin (datetime, optional): The start date of the range. Defaults to None.
+            chunk_size (int, optional): The number of rows by chunk. Defaults to 1000.
+
+        Yields:
+            list: A chunk of rows.
+        """
+        start = 0 if begin is None else bisect_left(self.dates, self.naive(begin))
+        for index in range(start, len(self.rows), chunk_size):
+            yield list(self.rows[index : index + chunk_size])
+
+
+@dataclass(frozen=True)
+class SharedDataset:
+    """Immutable snapshot of the global data (tempo, ecowatt), built once per cycle.
+
+    Attributes:
+        usage_point_ids: The enabled usage points of the cycle.
+        tempo: The tempo colors, by ascending date.
+        tempo_price: The tempo prices.
+        tempo_days: The number of tempo days left by color.
+        ecowatt: The ecowatt signals, by ascending date.
+    """
+
+    usage_point_ids: tuple = ()
+    tempo: tuple = ()
+    tempo_price: MappingProxyType = None
+    tempo_days: MappingProxyType = None
+    ecowatt: tuple = ()
+    tempo_by_date: MappingProxyType = field(init=False, repr=False)
+
+    def __post_init__(self):
+        """Index the tempo days by date."""
+        object.__setattr__(self, "tempo_by_date", MappingProxyType({data.date: data for data in self.tempo}))
+
+    @classmethod
+    def load(cls, usage_point_ids=None):
+        """Read the global data.
+
+        Args:
+            usage_point_ids (list, optional): The usage points of the cycle. Defaults to None (all the enabled
+                usage points).
+
+        Returns:
+            SharedDataset: The snapshot.
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            if usage_point_ids is None:
+                usage_point_ids = [
+                    usage_point.usage_point_id for usage_point in DatabaseUsagePoints().get_all() if usage_point.enable
+                ]
+            tempo_price = DatabaseTempo().get_config("price")
+            tempo_days = DatabaseTempo().get_config("days")
+            return cls(
+                usage_point_ids=tuple(usage_point_ids),
+                tempo=tuple(Record.of(data) for data in DatabaseTempo().get(order="asc")),
+                tempo_price=MappingProxyType(tempo_price) if tempo_price else None,
+                tempo_days=MappingProxyType(tempo_days) if tempo_days else None,
+                ecowatt=tuple(Record.of(data) for data in DatabaseEcowatt().get(order="asc")),
+            )
+
+    def tempo_color(self, date):
+        """Return the tempo color of a day.
+
+        Args:
+            date (datetime): The day (the time is ignored).
+
+        Returns:
+            Record: The tempo color, None if unknown.
+        """
+        return self.tempo_by_date.get(datetime.combine(date, datetime.min.time()))
+
+    def ecowatt_range(self, begin, end):
+        """Return the ecowatt signals between two dates (included).
+
+        Args:
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+
+        Returns:
+            list: The ecowatt signals, by ascending date.
+        """
+        begin = begin.replace(tzinfo=None)
+        end = end.replace(tzinfo=None)
+        return [data for data in self.ecowatt if begin <= data.date <= end]
+
+
+@dataclass(frozen=True)
+class UsagePointDataset:
+    """Immutable snapshot of the cache of a usage point, built once per cycle and shared by the exporters.
+
+    Attributes:
+        usage_point_id: The usage point id.
+        shared: The global data of the cycle.
+        usage_point: The usage point (status, quota...).
+        contract: The contract of the usage point.
+        address: The address of the usage point.
+        last_daily: The last daily value (not 0) by measurement direction.
+        date_range: The date range of the "daily" and "detail" consumption data.
+        max_power: The daily max power.
+        daily: The daily data by measurement direction.
+        detail: The detail data by measurement direction.
+        stats: The statistics by measurement direction, computed from the series of the dataset.
+    """
+
+    usage_point_id: str
+    shared: SharedDataset = None
+    usage_point: object = None
+    contract: object = None
+    address: object = None
+    last_daily: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    date_range: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    max_power: DataSeries = field(default_factory=DataSeries)
+    daily: MappingProxyType = field(
+        default_factory=lambda: MappingProxyType({direction: DataSeries() for direction in MEASUREMENT_DIRECTIONS})
+    )
+    detail: MappingProxyType = field(
+        default_factory=lambda: MappingProxyType({direction: DataSeries() for direction in MEASUREMENT_DIRECTIONS})
+    )
+    stats: MappingProxyType = field(init=False, repr=False)
+
+    def __post_init__(self):
+        """Build the statistics of each measurement direction on the dataset."""
+        object.__setattr__(
+            self,
+            "stats",
+            MappingProxyType(
+                {
+                    direction: Stat(self.usage_point_id, measurement_direction=direction, dataset=self)
+                    for direction in MEASUREMENT_DIRECTIONS
+                }
+            ),
+        )
+
+    @classmethod
+    def load(cls, usage_point_id, shared=None):
+        """Read the cache of a usage point.
+
+        The daily and detail tables are read once, chunk by chunk, for each measurement direction.
+
+        Args:
+            usage_point_id (str): The usage point id.
+            shared (SharedDataset, optional): The global data of the cycle. Defaults to None (read).
+
+        Returns:
+            UsagePointDataset: The snapshot.
+        """
+        with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
+            if shared is None:
+                shared = SharedDataset.load([usage_point_id])
+            return cls(
+                usage_point_id=usage_point_id,
+                shared=shared,
+                usage_point=Record.of(DatabaseUsagePoints(usage_point_id).get()),
+                contract=Record.of(DatabaseContracts(usage_point_id).get()),
+                address=Record.of(DatabaseAddresses(usage_point_id).get()),
+                last_daily=MappingProxyType(
+                    {
+                        measurement_direction: Record.of(
+                            DatabaseDaily(usage_point_id, measurement_direction).get_last()
+                        )
+                        for measurement_direction in MEASUREMENT_DIRECTIONS
+                    }
+                ),
+                date_range=MappingProxyType(
+                    {
+                        "daily": MappingProxyType(DatabaseDaily(usage_point_id).get_date_range()),
+                        "detail": MappingProxyType(DatabaseDetail(usage_point_id).get_date_range()),
+                    }
+                ),
+                max_power=DataSeries.of(DatabaseMaxPower(usage_point_id).get_all(order="asc")),
+                daily=MappingProxyType(
+                    {
+                        measurement_direction: DataSeries.of(
+                            chain.from_iterable(
+                                DatabaseDaily(usage_point_id, measurement_direction).get_all_by_chunk()
+                            ),
+                            timezone=TIMEZONE,
+                        )
+                        for measurement_direction in MEASUREMENT_DIRECTIONS
+                    }
+                ),
+                detail=MappingProxyType(
+                    {
+                        measurement_direction: DataSeries.of(
+                            chain.from_iterable(
+                                DatabaseDetail(usage_point_id, measurement_direction).get_all_by_chunk()
+                            ),
+                            timezone=TIMEZONE,
+                        )
+                        for measurement_direction in MEASUREMENT_DIRECTIONS
+                    }
+                ),
+            )
+
+
+class Exporter:
+    """Base class of the exporters.
+
+    An exporter is registered with `register_exporter`. It receives the global data once per cycle (`export_shared`)
+    and the dataset of each usage point (`export`): it must not read the data of the datasets from the database, the
+    series and the statistics (`UsagePointDataset.stats`) are shared by all the exporters.
+    """
+
+    name = None
+    description = None
+
+    def enabled(self):
+        """Check if the exporter is enabled in the configuration.
+
+        Returns:
+            bool: True if the exporter must run.
+        """
+        return True
+
+    def export_shared(self, dataset):
+        """Export the global data (tempo, ecowatt), once per cycle.
+
+        Args:
+            dataset (SharedDataset): The snapshot of the global data.
+        """
+
+    def export(self, dataset):
+        """Export the data of a usage point.
+
+        Args:
+            dataset (UsagePointDataset): The snapshot of the usage point.
+        """
+        raise NotImplementedError
+
+
+def register_exporter(exporter_class):
+    """Register an exporter (class decorator).
+
+    Args:
+        exporter_class (type): The Exporter subclass.
+
+    Returns:
+        type: The class, unchanged.
+    """
+    EXPORTERS[exporter_class.name] = exporter_class
+    return exporter_class
+
+
+def exporters_enabled(target=None):
+    """Check if at least one registered exporter must run.
+
+    Args:
+        target (str, optional): Check only this exporter. Defaults to None (all the exporters).
+
+    Returns:
+        bool: True if an exporter is enabled.
+    """
+    return any(
+        exporter_class().enabled()
+        for name, exporter_class in EXPORTERS.items()
+        if target is None or target == name
+    )
+
+
+def run_exporters(dataset, target=None, max_workers=4):
+    """Run the registered exporters concurrently.
+
+    Args:
+        dataset (UsagePointDataset | SharedDataset): The snapshot of a usage point, or the global data.
+        target (str, optional): Run only this exporter. Defaults to None (all the exporters).
+        max_workers (int, optional): The number of exporters run at the same time. Defaults to 4.
+    """
+    if isinstance(dataset, SharedDataset):
+        label = "Données globales"
+        method = "export_shared"
+    else:
+        label = dataset.usage_point_id
+        method = "export"
+
+    def run(exporter):
+        try:
+            getattr(exporter, method)(dataset)
+        except Exception as e:
+            traceback.print_exc()
+            logging.error(f"[{label}] Erreur lors de l'export {exporter.description}")
+            logging.error(e)
+
+    exporters = []
+    for name, exporter_class in EXPORTERS.items():
+        if target is not None and target != name:
+            continue
+        exporter = exporter_class()
+        if exporter.enabled():
+            title(f"[{label}] Export {exporter.description}")
+            exporters.append(exporter)
+        else:
+            title(f"[{label}] Export {exporter.description} désactivé dans la configuration")
+    if not exporters:
+        return
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="exporter") as executor:
+        list(executor.map(run, exporters))
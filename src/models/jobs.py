@@ -8,11 +8,12 @@ from typing import List
 from config.main import APP_CONFIG
 from config.myelectricaldata import UsagePointId
 from database import DB
+from database.retention import DatabaseRetention
 from database.usage_points import DatabaseUsagePoints
 from external_services.home_assistant.main import HomeAssistant
-from external_services.home_assistant_ws.main import HomeAssistantWs
-from external_services.influxdb.main import ExportInfluxDB
-from external_services.mqtt.main import ExportMqtt
+from external_services.home_assistant_ws.main import HomeAssistantWsExporter  # noqa: F401 (registered exporter)
+from external_services.influxdb.main import InfluxDBExporter  # noqa: F401 (registered exporter)
+from external_services.mqtt.main import MqttExporter  # noqa: F401 (registered exporter)
 from external_services.myelectricaldata.address import Address
 from external_services.myelectricaldata.contract import Contract
 from external_services.myelectricaldata.daily import Daily
@@ -21,6 +22,8 @@ from external_services.myelectricaldata.ecowatt import Ecowatt
 from external_services.myelectricaldata.power import Power
 from external_services.myelectricaldata.status import Status
 from external_services.myelectricaldata.tempo import Tempo
+from models.export import EXPORTERS, SharedDataset, UsagePointDataset, exporters_enabled, run_exporters
+from models.progress import IMPORT_PROGRESS
 from models.stat import Stat
 from utils import export_finish, finish, get_version, log_usage_point_id, title
 
@@ -43,16 +46,59 @@ class Job:
         if APP_CONFIG.dev:
             logging.warning("=> Import job disable")
         else:
-            self.job_import_data()
+            self.job_import_data(wait=False)
 
-    def job_import_data(self, wait=True, target=None):  # noqa: PLR0912, C901
-        """Import data from the API."""
+    def job_import_data(self, wait=True, target=None):
+        """Import data from the API.
+
+        The progress of the import is reported in `IMPORT_PROGRESS`.
+
+        Args:
+            wait (bool, optional): Wait `wait_job_start` seconds before the import. Defaults to True.
+            target (str, optional): Import only this target. Defaults to None (all the data).
+
+        Returns:
+            dict: The status of the import.
+        """
         if DB.lock_status():
             return {"status": False, "notif": "Importation déjà en cours..."}
         DB.lock()
+        IMPORT_PROGRESS.start(
+            target, len([usage_point for usage_point in self.usage_points_all if usage_point and usage_point.enable])
+        )
+        try:
+            self.import_data(wait, target)
+        except Exception as e:
+            IMPORT_PROGRESS.finish(e)
+            raise
+        finally:
+            self.usage_point_id = None
+            DB.unlock()
+        IMPORT_PROGRESS.finish()
+        return {"status": True, "notif": "Importation terminée"}
 
+    def job_retention(self):
+        """Run the retention and the compaction of the cache, between two imports.
+
+        Returns:
+            dict: The status and the report of the retention.
+        """
+        if DB.lock_status():
+            logging.warning("Importation en cours, rétention reportée")
+            return {"status": False, "notif": "Importation en cours..."}
+        DB.lock()
+        try:
+            title("Rétention et compaction du cache")
+            report = DatabaseRetention().run()
+        finally:
+            DB.unlock()
+        return {"status": True, "notif": "Rétention terminée", "report": report}
+
+    def import_data(self, wait=True, target=None):
+        """Run the steps of the import (the database must be locked)."""
         if wait:
-            title("Démarrage du job d'importation dans 10s")
+            IMPORT_PROGRESS.update("wait")
+            title(f"Démarrage du job d'importation dans {self.wait_job_start}s")
             i = self.wait_job_start
             while i > 0:
                 logging.info(f"{i}s")
@@ -62,75 +108,29 @@ class Job:
         # ######################################################################################################
         # FETCH TEMPO DATA
         if target == "tempo" or target is None:
+            IMPORT_PROGRESS.update("tempo")
             self.get_tempo()
 
         # ######################################################################################################
         # FETCH ECOWATT DATA
         if target == "ecowatt" or target is None:
+            IMPORT_PROGRESS.update("ecowatt")
             self.get_ecowatt()
 
+        # ######################################################################################################
+        # EXPORT GLOBAL DATA (TEMPO / ECOWATT), ONCE PER CYCLE
+        shared = None
+        if target in EXPORTERS or target is None:
+            IMPORT_PROGRESS.update("export")
+            shared = self.export_shared(target)
+
         for usage_point_config in self.usage_points_all:
             self.usage_point_config = usage_point_config
             usage_point_id = usage_point_config.usage_point_id
             log_usage_point_id(usage_point_id)
             DatabaseUsagePoints(usage_point_id).last_call_update()
             if usage_point_config.enable:
-                #######################################################################################################
-                # CHECK ACCOUNT DATA
-                if target == "account_status" or target is None:
-                    self.get_account_status()
-
-                #######################################################################################################
-                # CONTRACT
-                if target == "contract" or target is None:
-                    self.get_contract()
-
-                #######################################################################################################
-                # ADDRESSE
-                if target == "addresses" or target is None:
-                    self.get_addresses()
-
-                #######################################################################################################
-                # CONSUMPTION / PRODUCTION
-                if target == "consumption" or target is None:
-                    self.get_consumption()
-
-                if target == "consumption_detail" or target is None:
-                    self.get_consumption_detail()
-
-                if target == "production" or target is None:
-                    self.get_production()
-
-                if target == "production_detail" or target is None:
-                    self.get_production_detail()
-
-                if target == "consumption_max_power" or target is None:
-                    self.get_consumption_max_power()
-
-                #######################################################################################################
-                # STATISTIQUES
-                if target == "stat" or target is None:
-                    self.stat_price()
-
-                #######################################################################################################
-                # MQTT
-                if target == "mqtt" or target is None:
-                    self.export_mqtt()
-
-                #######################################################################################################
-                # HOME ASSISTANT
-                if target == "home_assistant" or target is None:
-                    self.export_home_assistant()
-
-                #######################################################################################################
-                # HOME ASSISTANT WS
-                if target == "home_assistant_ws" or target is None:
-                    self.export_home_assistant_ws()
-
-                #######################################################################################################
-                # INFLUXDB
-                if target == "influxdb" or target is None:
-                    self.export_influxdb()
+                self.import_usage_point(usage_point_id, target, shared)
             else:
                 logging.info(
                     " => Point de livraison Désactivé dans la configuration (Exemple: https://tinyurl.com/2kbd62s9)."
@@ -138,9 +138,66 @@ class Job:
 
         finish()
 
-        self.usage_point_id = None
-        DB.unlock()
-        return {"status": True, "notif": "Importation terminée"}
+    def import_usage_point(self, usage_point_id, target=None, shared=None):  # noqa: C901
+        """Run the steps of the import of the current usage point.
+
+        Args:
+            usage_point_id (str): The usage point id.
+            target (str, optional): The only step to run. Defaults to None (all the steps).
+            shared (SharedDataset, optional): The global data of the cycle. Defaults to None (read).
+        """
+        #######################################################################################################
+        # CHECK ACCOUNT DATA
+        if target == "account_status" or target is None:
+            IMPORT_PROGRESS.update("account_status", usage_point_id)
+            self.get_account_status()
+
+        #######################################################################################################
+        # CONTRACT
+        if target == "contract" or target is None:
+            IMPORT_PROGRESS.update("contract", usage_point_id)
+            self.get_contract()
+
+        #######################################################################################################
+        # ADDRESSE
+        if target == "addresses" or target is None:
+            IMPORT_PROGRESS.update("addresses", usage_point_id)
+            self.get_addresses()
+
+        #######################################################################################################
+        # CONSUMPTION / PRODUCTION
+        if target == "consumption" or target is None:
+            IMPORT_PROGRESS.update("consumption", usage_point_id)
+            self.get_consumption()
+
+        if target == "consumption_detail" or target is None:
+            IMPORT_PROGRESS.update("consumption_detail", usage_point_id)
+            self.get_consumption_detail()
+
+        if target == "production" or target is None:
+            IMPORT_PROGRESS.update("production", usage_point_id)
+            self.get_production()
+
+        if target == "production_detail" or target is None:
+            IMPORT_PROGRESS.update("production_detail", usage_point_id)
+            self.get_production_detail()
+
+        if target == "consumption_max_power" or target is None:
+            IMPORT_PROGRESS.update("consumption_max_power", usage_point_id)
+            self.get_consumption_max_power()
+
+        #######################################################################################################
+        # STATISTIQUES
+        if target == "stat" or target is None:
+            IMPORT_PROGRESS.update("stat", usage_point_id)
+            self.stat_price()
+
+        #######################################################################################################
+        # EXPORTS (MQTT, HOME ASSISTANT, HOME ASSISTANT WS, INFLUXDB)
+        if target in EXPORTERS or target is None:
+            IMPORT_PROGRESS.update("export", usage_point_id)
+            self.export(target, shared)
+        IMPORT_PROGRESS.usage_point_done()
 
     def header_generate(self, token=True):
         """Generate the header for the API request.
@@ -479,16 +536,18 @@ class Job:
 
         def run(usage_point_id, target):
             title(f"[{usage_point_id}] {detail}")
-            if target is None:
-                HomeAssistant(usage_point_id).export()
-            elif target == "ecowatt":
-                HomeAssistant(usage_point_id).ecowatt()
+            HomeAssistant(usage_point_id).export()
             export_finish()
 
         try:
             if APP_CONFIG.home_assistant:
                 if APP_CONFIG.mqtt:
-                    if self.usage_point_id is None:
+                    if target == "ecowatt":
+                        # Global data: exported once for all the usage points
+                        title(detail)
+                        HomeAssistant().ecowatt()
+                        export_finish()
+                    elif self.usage_point_id is None:
                         for usage_point_config in self.usage_points_all:
                             if usage_point_config.enable:
                                 run(usage_point_config.usage_point_id, target)
@@ -506,32 +565,51 @@ class Job:
             logging.error(f"Erreur lors de l'{detail.lower()}")
             logging.error(e)
 
-    def export_home_assistant_ws(self):
-        """Export to Home Assistant Energy."""
-        detail = "Import des données vers l'onglet Energy de Home Assistant (WebSocket)"
-        usage_point_id = self.usage_point_config.usage_point_id
-        title(f"[{usage_point_id}] {detail}")
-        if APP_CONFIG.home_assistant_ws.enable:
-            HomeAssistantWs(usage_point_id)
-        else:
-            title("Désactivé dans la configuration (Exemple: https://tinyurl.com/2kbd62s9)")
+    def export_shared(self, target=None):
+        """Export the global data (tempo, ecowatt) with the registered exporters, once per cycle.
 
-    def export_influxdb(self):
-        """Export to influxdb data."""
-        detail = "Import des données vers InfluxDB"
-        usage_point_id = self.usage_point_config.usage_point_id
-        title(f"[{usage_point_id}] {detail}")
-        if APP_CONFIG.mqtt.enable:
-            ExportInfluxDB(usage_point_id)
-        else:
-            title("Désactivé dans la configuration (Exemple: https://tinyurl.com/2kbd62s9)")
+        Args:
+            target (str, optional): Run only this exporter. Defaults to None (all the exporters).
+
+        Returns:
+            SharedDataset: The global data, shared with the datasets of the usage points.
+        """
+        try:
+            shared = SharedDataset.load(
+                [
+                    usage_point_config.usage_point_id
+                    for usage_point_config in self.usage_points_all
+                    if usage_point_config.enable
+                ]
+            )
+            run_exporters(shared, target)
+            export_finish()
+            return shared
+        except Exception as e:
+            traceback.print_exc()
+            logging.error("Erreur lors de l'export des données globales")
+            logging.error(e)
+            return None
 
-    def export_mqtt(self):
-        """MQTT Export."""
-        detail = "Import des données vers MQTT"
+    def export(self, target=None, shared=None):
+        """Export the data of the usage point with the registered exporters.
+
+        The cache of the usage point is read once, the exporters run concurrently on the same dataset. The cache is
+        not read when no exporter is enabled.
+
+        Args:
+            target (str, optional): Run only this exporter. Defaults to None (all the exporters).
+            shared (SharedDataset, optional): The global data of the cycle. Defaults to None (read).
+        """
         usage_point_id = self.usage_point_config.usage_point_id
-        title(f"[{usage_point_id}] {detail}")
-        if APP_CONFIG.mqtt.enable:
-            ExportMqtt(usage_point_id)
-        else:
-            title("Désactivé dans la configuration (Exemple: https://tinyurl.com/2kbd62s9)")
+        try:
+            if exporters_enabled(target):
+                dataset = UsagePointDataset.load(usage_point_id, shared)
+            else:
+                dataset = UsagePointDataset(usage_point_id, shared)
+            run_exporters(dataset, target)
+            export_finish()
+        except Exception as e:
+            traceback.print_exc()
+            logging.error(f"[{usage_point_id}] Erreur lors de l'export des données")
+            logging.error(e)
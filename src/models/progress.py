@@ -0,0 +1,100 @@
+"""Progress of the import job, reported by the readiness endpoint."""
+import threading
+from datetime import datetime
+
+from const import TIMEZONE
+
+
+class ImportProgress:
+    """Progress of the import job, updated by the job thread and read by the routes.
+
+    States:
+        - waiting: the first import has not started yet.
+        - running: an import is running.
+        - finished: the last import succeeded.
+        - failed: the last import raised an error.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = "waiting"
+        self.target = None
+        self.step = None
+        self.usage_point_id = None
+        self.usage_points_done = 0
+        self.usage_points_total = 0
+        self.started_at = None
+        self.finished_at = None
+        self.imports = 0
+        self.error = None
+
+    def start(self, target=None, usage_points_total=0):
+        """Mark the start of an import.
+
+        Args:
+            target (str, optional): The target of the import. Defaults to None (all the data).
+            usage_points_total (int, optional): The number of usage points to import. Defaults to 0.
+        """
+        with self.lock:
+            self.state = "running"
+            self.target = target
+            self.step = None
+            self.usage_point_id = None
+            self.usage_points_done = 0
+            self.usage_points_total = usage_points_total
+            self.started_at = datetime.now(tz=TIMEZONE)
+            self.finished_at = None
+            self.error = None
+
+    def update(self, step, usage_point_id=None):
+        """Set the current step of the import.
+
+        Args:
+            step (str): The step (tempo, ecowatt, consumption...).
+            usage_point_id (str, optional): The usage point imported. Defaults to None (global data).
+        """
+        with self.lock:
+            self.step = step
+            self.usage_point_id = usage_point_id
+
+    def usage_point_done(self):
+        """Count a usage point as imported."""
+        with self.lock:
+            self.usage_points_done = self.usage_points_done + 1
+
+    def finish(self, error=None):
+        """Mark the end of an import.
+
+        Args:
+            error (Exception, optional): The error which stopped the import. Defaults to None.
+        """
+        with self.lock:
+            self.state = "failed" if error is not None else "finished"
+            self.step = None
+            self.usage_point_id = None
+            self.finished_at = datetime.now(tz=TIMEZONE)
+            self.imports = self.imports + 1
+            self.error = str(error) if error is not None else None
+
+    def status(self):
+        """Return a copy of the progress.
+
+        Returns:
+            dict: The progress of the import.
+        """
+        with self.lock:
+            return {
+                "state": self.state,
+                "target": self.target,
+                "step": self.step,
+                "usage_point_id": self.usage_point_id,
+                "usage_points_done": self.usage_points_done,
+                "usage_points_total": self.usage_points_total,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "imports": self.imports,
+                "error": self.error,
+            }
+
+
+IMPORT_PROGRESS = ImportProgress()
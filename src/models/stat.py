@@ -14,7 +14,7 @@ from database.max_power import DatabaseMaxPower
 from database.statistique import DatabaseStatistique
 from database.tempo import DatabaseTempo
 from database.usage_points import DatabaseUsagePoints
-from utils import is_between
+from utils import get_mesure_type
 
 now_date = datetime.now(timezone.utc)
 yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
@@ -32,6 +32,7 @@ class Stat:  # pylint: disable=R0902,R0904
         - measurement_direction: The measurement direction for the usage point.
         - usage_point_id_config: The configuration object for the usage point ID.
         - usage_point_id_contract: The contract object for the usage point ID.
+        - dataset: The snapshot of the usage point the data is read from, None to read the database.
         - date_format: The format string for date representation.
         - date_format_detail: The format string for detailed date representation.
         - value_current_week: The value of the current week.
@@ -103,12 +104,14 @@ class Stat:  # pylint: disable=R0902,R0904
         - delete(): Deletes the statistical data for the usage point.
     """
 
-    def __init__(self, usage_point_id, measurement_direction=None):
+    def __init__(self, usage_point_id, measurement_direction=None, dataset=None):
         """Initialize a new instance of the 'Stat' class.
 
         Parameters:
             usage_point_id (int): The ID of the usage point.
             measurement_direction (str, optional): The measurement direction for the usage point. Defaults to None.
+            dataset (UsagePointDataset, optional): The snapshot of the usage point: the daily, detail, max power and
+                tempo data are read from it instead of the database. Defaults to None.
 
         Attributes:
             config (object): The configuration object for the usage point.
@@ -150,8 +153,13 @@ class Stat:  # pylint: disable=R0902,R0904
         """
         self.usage_point_id = usage_point_id
         self.measurement_direction = measurement_direction
-        self.usage_point_id_config = DatabaseUsagePoints(self.usage_point_id).get()
-        self.usage_point_id_contract = DatabaseContracts(self.usage_point_id).get()
+        self.dataset = dataset
+        if self.dataset is None:
+            self.usage_point_id_config = DatabaseUsagePoints(self.usage_point_id).get()
+            self.usage_point_id_contract = DatabaseContracts(self.usage_point_id).get()
+        else:
+            self.usage_point_id_config = self.dataset.usage_point
+            self.usage_point_id_contract = self.dataset.contract
         self.date_format = "%Y-%m-%d"
         self.date_format_detail = "%Y-%m-%d %H:%M:%S"
         # STAT
@@ -177,7 +185,62 @@ class Stat:  # pylint: disable=R0902,R0904
         self.value_peak_offpeak_percent_hp_vs_hc = 0
         self.value_monthly_evolution = 0
         self.value_yearly_evolution = 0
-        self.usage_point_id_contract = DatabaseContracts(self.usage_point_id).get()
+
+    def daily_range(self, begin, end):
+        """Return the daily data between two dates (included), by descending date.
+
+        Args:
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+
+        Returns:
+            list: The daily data.
+        """
+        if self.dataset is None:
+            return DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end)
+        return self.dataset.daily[self.measurement_direction].get_range(begin, end)
+
+    def detail_range(self, begin, end):
+        """Return the detail data between two dates (included), by descending date.
+
+        Args:
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+
+        Returns:
+            list: The detail data.
+        """
+        if self.dataset is None:
+            return DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end)
+        return self.dataset.detail[self.measurement_direction].get_range(begin, end)
+
+    def max_power_range(self, begin, end):
+        """Return the daily max power between two dates (included), by descending date.
+
+        Args:
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+
+        Returns:
+            list: The daily max power.
+        """
+        if self.dataset is None:
+            return DatabaseMaxPower(self.usage_point_id).get_range(begin, end)
+        return self.dataset.max_power.get_range(begin, end)
+
+    def tempo_range(self, begin, end):
+        """Return the tempo colors between two dates (included), by descending date.
+
+        Args:
+            begin (datetime): The start of the range.
+            end (datetime): The end of the range.
+
+        Returns:
+            list: The tempo colors.
+        """
+        if self.dataset is None:
+            return DatabaseTempo().get_range(begin, end)
+        return [data for data in reversed(self.dataset.shared.tempo) if begin <= data.date <= end]
 
     def daily(self, index=0):
         """Calculate the daily value for the given index.
@@ -193,7 +256,7 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(yesterday_date - timedelta(days=index), datetime.min.time())
         end = datetime.combine(begin, datetime.max.time())
         value = 0
-        for data in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+        for data in self.daily_range(begin, end):
             value = value + data.value
         return {
             "value": value,
@@ -216,7 +279,7 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(yesterday_date - timedelta(days=index), datetime.min.time())
         end = datetime.combine(begin, datetime.max.time())
         value = 0
-        for data in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+        for data in self.detail_range(begin, end):
             day_measure_type = self.get_mesure_type(data.date)
             day_interval = data.interval if hasattr(data, "interval") and data.interval != 0 else 1
             if measure_type is None or (measure_type == "HP" and day_measure_type == "HP"):
@@ -250,16 +313,16 @@ class Stat:  # pylint: disable=R0902,R0904
             "red_hc": 0,
             "red_hp": 0,
         }
-        for data in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+        for data in self.detail_range(begin, end):
             hour = int(datetime.strftime(data.date, "%H"))
             if hour < TEMPO_BEGIN:
-                color = DatabaseTempo().get_range(begin - timedelta(days=1), end - timedelta(days=1))[0].color
+                color = self.tempo_range(begin - timedelta(days=1), end - timedelta(days=1))[0].color
                 color = f"{color.lower()}_hc"
             elif hour >= TEMPO_END:
-                color = DatabaseTempo().get_range(begin + timedelta(days=1), end + timedelta(days=1))[0].color
+                color = self.tempo_range(begin + timedelta(days=1), end + timedelta(days=1))[0].color
                 color = f"{color.lower()}_hc"
             else:
-                color = DatabaseTempo().get_range(begin, end)[0].color
+                color = self.tempo_range(begin, end)[0].color
                 color = f"{color.lower()}_hp"
             value[color] += data.value / (60 / data.interval)
         return {
@@ -282,7 +345,7 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(yesterday_date - timedelta(days=index), datetime.min.time())
         end = datetime.combine(begin, datetime.max.time())
         value = ""
-        for data in DatabaseTempo().get_range(begin, end):
+        for data in self.tempo_range(begin, end):
             logging.debug(f"tempo data: {data}")
             value = value + data.color
         return {
@@ -305,7 +368,7 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(yesterday_date - timedelta(days=index), datetime.min.time())
         end = datetime.combine(begin, datetime.max.time())
         value = 0
-        for data in DatabaseMaxPower(self.usage_point_id).get_range(begin, end):
+        for data in self.max_power_range(begin, end):
             value = value + data.value
         return {
             "value": value,
@@ -334,7 +397,7 @@ class Stat:  # pylint: disable=R0902,R0904
         end = datetime.combine(begin, datetime.max.time())
         value = 0
         boolv = "true"
-        for data in DatabaseMaxPower(self.usage_point_id).get_range(begin, end):
+        for data in self.max_power_range(begin, end):
             value = value + data.value
             if (value / 1000) < max_power:
                 boolv = "false"
@@ -358,7 +421,7 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(yesterday_date - timedelta(days=index), datetime.min.time())
         end = datetime.combine(begin, datetime.max.time())
         max_power_time = ""
-        for data in DatabaseMaxPower(self.usage_point_id).get_range(begin, end):
+        for data in self.max_power_range(begin, end):
             if data.event_date is None or data.event_date == "":
                 max_power_time = data.date
             else:
@@ -389,7 +452,7 @@ class Stat:  # pylint: disable=R0902,R0904
         daily_obj = []
         id_max = 7
         while day_idx < id_max:
-            day = DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end)
+            day = self.daily_range(begin, end)
             if day:
                 daily_obj.append({"date": day[0].date, "value": day[0].value})
             else:
@@ -409,8 +472,7 @@ class Stat:  # pylint: disable=R0902,R0904
         yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
         begin = datetime.combine(now_date - relativedelta(weeks=1), datetime.min.time())
         end = datetime.combine(yesterday_date, datetime.max.time())
-        for data in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_current_week = self.value_current_week + data.value
+        self.value_current_week = sum(data.value for data in self.daily_range(begin, end))
         logging.debug(f" current_week => {self.value_current_week}")
         return {
             "value": self.value_current_week,
@@ -428,8 +490,7 @@ class Stat:  # pylint: disable=R0902,R0904
         yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
         begin = datetime.combine(now_date - relativedelta(weeks=2), datetime.min.time())
         end = datetime.combine(yesterday_date - relativedelta(weeks=1), datetime.max.time())
-        for data in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_last_week = self.value_last_week + data.value
+        self.value_last_week = sum(data.value for data in self.daily_range(begin, end))
         logging.debug(f" last_week => {self.value_last_week}")
         return {
             "value": self.value_last_week,
@@ -458,7 +519,7 @@ class Stat:  # pylint: disable=R0902,R0904
         yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
         begin = datetime.combine(yesterday_date, datetime.min.time())
         end = datetime.combine(yesterday_date, datetime.max.time())
-        data = DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end)
+        data = self.daily_range(begin, end)
         if data:
             self.value_yesterday = data[0].value
         else:
@@ -480,7 +541,7 @@ class Stat:  # pylint: disable=R0902,R0904
         yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
         begin = datetime.combine(yesterday_date - timedelta(days=1), datetime.min.time())
         end = datetime.combine(yesterday_date - timedelta(days=1), datetime.max.time())
-        data = DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end)
+        data = self.daily_range(begin, end)
         if data:
             self.value_yesterday_1 = data[0].value
         else:
@@ -518,8 +579,7 @@ class Stat:  # pylint: disable=R0902,R0904
             datetime.min.time(),
         )
         end = datetime.combine(yesterday_date - relativedelta(years=1), datetime.max.time())
-        for data in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_current_week_last_year = self.value_current_week_last_year + data.value
+        self.value_current_week_last_year = sum(data.value for data in self.daily_range(begin, end))
         logging.debug(f" current_week_last_year => {self.value_current_week_last_year}")
         return {
             "value": self.value_current_week_last_year,
@@ -540,8 +600,7 @@ class Stat:  # pylint: disable=R0902,R0904
             datetime.min.time(),
         )
         end = datetime.combine(yesterday_date.replace(day=1) - timedelta(days=1), datetime.max.time())
-        for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_last_month = self.value_last_month + day.value
+        self.value_last_month = sum(day.value for day in self.daily_range(begin, end))
         logging.debug(f" last_month => {self.value_last_month}")
         return {
             "value": self.value_last_month,
@@ -559,8 +618,7 @@ class Stat:  # pylint: disable=R0902,R0904
         yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
         begin = datetime.combine(now_date.replace(day=1), datetime.min.time())
         end = yesterday_date
-        for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_current_month = self.value_current_month + day.value
+        self.value_current_month = sum(day.value for day in self.daily_range(begin, end))
         logging.debug(f" current_month => {self.value_current_month}")
         return {
             "value": self.value_current_month,
@@ -578,8 +636,7 @@ class Stat:  # pylint: disable=R0902,R0904
         yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
         begin = datetime.combine(now_date.replace(day=1), datetime.min.time()) - relativedelta(years=1)
         end = yesterday_date - relativedelta(years=1)
-        for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_current_month_last_year = self.value_current_month_last_year + day.value
+        self.value_current_month_last_year = sum(day.value for day in self.daily_range(begin, end))
         logging.debug(f" current_month_last_year => {self.value_current_month_last_year}")
         return {
             "value": self.value_current_month_last_year,
@@ -615,8 +672,7 @@ class Stat:  # pylint: disable=R0902,R0904
         end = datetime.combine(yesterday_date.replace(day=1) - timedelta(days=1), datetime.max.time()) - relativedelta(
             years=1
         )
-        for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_last_month_last_year = self.value_last_month_last_year + day.value
+        self.value_last_month_last_year = sum(day.value for day in self.daily_range(begin, end))
         logging.debug(f" last_month_last_year => {self.value_last_month_last_year}")
         return {
             "value": self.value_last_month_last_year,
@@ -647,8 +703,7 @@ class Stat:  # pylint: disable=R0902,R0904
         yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
         begin = datetime.combine(now_date.replace(month=1, day=1), datetime.min.time())
         end = yesterday_date
-        for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_current_year = self.value_current_year + day.value
+        self.value_current_year = sum(day.value for day in self.daily_range(begin, end))
         logging.debug(f" current_year => {self.value_current_year}")
         return {
             "value": self.value_current_year,
@@ -669,8 +724,7 @@ class Stat:  # pylint: disable=R0902,R0904
             datetime.min.time(),
         )
         end = yesterday_date - relativedelta(years=1)
-        for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_current_year_last_year = self.value_current_year_last_year + day.value
+        self.value_current_year_last_year = sum(day.value for day in self.daily_range(begin, end))
         logging.debug(f" current_year_last_year => {self.value_current_year_last_year}")
         return {
             "value": self.value_current_year_last_year,
@@ -691,8 +745,7 @@ class Stat:  # pylint: disable=R0902,R0904
         )
         last_day_of_month = calendar.monthrange(int(begin.strftime("%Y")), 12)[1]
         end = datetime.combine(begin.replace(month=1, day=last_day_of_month), datetime.max.time())
-        for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
-            self.value_last_year = self.value_last_year + day.value
+        self.value_last_year = sum(day.value for day in self.daily_range(begin, end))
         logging.debug(f" last_year => {self.value_last_year}")
         return {
             "value": self.value_last_year,
@@ -723,7 +776,9 @@ class Stat:  # pylint: disable=R0902,R0904
         yesterday_date = datetime.combine(now_date - relativedelta(days=1), datetime.max.time())
         begin = datetime.combine(yesterday_date, datetime.min.time())
         end = datetime.combine(now_date, datetime.max.time())
-        for day in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+        self.value_yesterday_hp = 0
+        self.value_yesterday_hc = 0
+        for day in self.detail_range(begin, end):
             measure_type = self.get_mesure_type(day.date)
             day_interval = day.interval if hasattr(day, "interval") and day.interval != 0 else 1
             if measure_type == "HP":
@@ -751,7 +806,7 @@ class Stat:  # pylint: disable=R0902,R0904
         value_peak_offpeak_percent_hp = 0
         value_peak_offpeak_percent_hc = 0
         value_peak_offpeak_percent_hp_vs_hc = 0
-        for day in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+        for day in self.detail_range(begin, end):
             measure_type = self.get_mesure_type(day.date)
             if measure_type == "HP":
                 value_peak_offpeak_percent_hp = value_peak_offpeak_percent_hp + day.value
@@ -784,10 +839,10 @@ class Stat:  # pylint: disable=R0902,R0904
         )
         value = 0
         if measure_type is None:
-            for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.daily_range(begin, end):
                 value = value + day.value
         else:
-            for day in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.detail_range(begin, end):
                 day_measure_type = self.get_mesure_type(day.date)
                 if day_measure_type == measure_type:
                     day_interval = day.interval if hasattr(day, "interval") and day.interval != 0 else 1
@@ -814,10 +869,10 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(end - relativedelta(years=1), datetime.min.time())
         value = 0
         if measure_type is None:
-            for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.daily_range(begin, end):
                 value = value + day.value
         else:
-            for day in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.detail_range(begin, end):
                 day_measure_type = self.get_mesure_type(day.date)
                 if day_measure_type == measure_type:
                     day_interval = day.interval if hasattr(day, "interval") and day.interval != 0 else 1
@@ -850,10 +905,10 @@ class Stat:  # pylint: disable=R0902,R0904
         )
         value = 0
         if measure_type is None:
-            for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.daily_range(begin, end):
                 value = value + day.value
         else:
-            for day in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.detail_range(begin, end):
                 day_measure_type = self.get_mesure_type(day.date)
                 if day_measure_type == measure_type:
                     day_interval = day.interval if hasattr(day, "interval") and day.interval != 0 else 1
@@ -880,10 +935,10 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(end - relativedelta(months=1), datetime.min.time())
         value = 0
         if measure_type is None:
-            for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.daily_range(begin, end):
                 value = value + day.value
         else:
-            for day in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.detail_range(begin, end):
                 day_measure_type = self.get_mesure_type(day.date)
                 if day_measure_type == measure_type:
                     day_interval = day.interval if hasattr(day, "interval") and day.interval != 0 else 1
@@ -925,10 +980,10 @@ class Stat:  # pylint: disable=R0902,R0904
         )
         value = 0
         if measure_type is None:
-            for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.daily_range(begin, end):
                 value = value + day.value
         else:
-            for day in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.detail_range(begin, end):
                 day_measure_type = self.get_mesure_type(day.date)
                 if day_measure_type == measure_type:
                     day_interval = day.interval if hasattr(day, "interval") and day.interval != 0 else 1
@@ -955,10 +1010,10 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(end - timedelta(days=7), datetime.min.time())
         value = 0
         if measure_type is None:
-            for day in DatabaseDaily(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.daily_range(begin, end):
                 value = value + day.value
         else:
-            for day in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+            for day in self.detail_range(begin, end):
                 day_measure_type = self.get_mesure_type(day.date)
                 if day_measure_type == measure_type:
                     day_interval = day.interval if hasattr(day, "interval") and day.interval != 0 else 1
@@ -992,26 +1047,7 @@ class Stat:  # pylint: disable=R0902,R0904
         offpeak_hours = {}
         for i in range(0, 7):
             offpeak_hours[i] = getattr(self.usage_point_id_config, f"offpeak_hours_{i}")
-        # GET WEEKDAY
-        date_days = measurement_date.weekday()
-        date_hour_minute = measurement_date.strftime("%H:%M")
-        measure_type = "HP"
-        day_offpeak_hours = offpeak_hours[date_days]
-        if day_offpeak_hours is not None:
-            for offpeak_hour in day_offpeak_hours.split(";"):
-                if offpeak_hour != "None" and offpeak_hour != "" and offpeak_hour is not None:
-                    offpeak_begin = offpeak_hour.split("-")[0].replace("h", ":").replace("H", ":")
-                    # FORMAT HOUR WITH 2 DIGIT
-                    offpeak_begin = datetime.strptime(offpeak_begin, "%H:%M")
-                    offpeak_begin = datetime.strftime(offpeak_begin, "%H:%M")
-                    offpeak_stop = offpeak_hour.split("-")[1].replace("h", ":").replace("H", ":")
-                    # FORMAT HOUR WITH 2 DIGIT
-                    offpeak_stop = datetime.strptime(offpeak_stop, "%H:%M")
-                    offpeak_stop = datetime.strftime(offpeak_stop, "%H:%M")
-                    result = is_between(date_hour_minute, (offpeak_begin, offpeak_stop))
-                    if result:
-                        measure_type = "HC"
-        return measure_type
+        return get_mesure_type(measurement_date, offpeak_hours)
 
     def generate_price(self):  # noqa: C901, PLR0912, PLR0915
         """Generate the price for the usage point based on the measurement data.
@@ -1131,7 +1167,7 @@ class Stat:  # pylint: disable=R0902,R0904
         begin = datetime.combine(specific_date, datetime.min.time())
         end = datetime.combine(specific_date, datetime.max.time())
         value = 0
-        for item in DatabaseDetail(self.usage_point_id, self.measurement_direction).get_range(begin, end):
+        for item in self.detail_range(begin, end):
             if self.get_mesure_type(item.date).upper() == mesure_type.upper():
                 day_interval = item.interval if hasattr(item, "interval") and item.interval != 0 else 1
                 value += item.value / (60 / day_interval)
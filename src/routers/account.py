@@ -7,6 +7,7 @@ from opentelemetry import trace
 
 from config.main import APP_CONFIG
 from models.ajax import Ajax
+from models.executor import run_read
 
 ROUTER = APIRouter(tags=["Account"], include_in_schema=False)
 
@@ -18,7 +19,7 @@ async def configuration(request: Request, usage_point_id):
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
         form = await request.form()
-        return Ajax(usage_point_id).configuration(form)
+        return await run_read(lambda: Ajax(usage_point_id).configuration(form))
 
 
 @ROUTER.post("/new_account")
@@ -27,12 +28,12 @@ async def new_account(request: Request):
     """Create account."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         form = await request.form()
-        return Ajax().new_account(form)
+        return await run_read(lambda: Ajax().new_account(form))
 
 
 @ROUTER.get("/account_status/{usage_point_id}")
 @ROUTER.get("/account_status/{usage_point_id}/", include_in_schema=False)
-def account_status(usage_point_id):
+async def account_status(usage_point_id):
     """Get account status."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-        return Ajax(usage_point_id).account_status()
+        return await run_read(lambda: Ajax(usage_point_id).account_status())
@@ -7,6 +7,7 @@ from opentelemetry import trace
 from config.main import APP_CONFIG
 from doc import DOCUMENTATION
 from models.ajax import Ajax
+from models.executor import run_job, run_read
 
 ROUTER = APIRouter(
     tags=["Ajax"],
@@ -18,11 +19,11 @@ ROUTER = APIRouter(
     summary="Force l'importation des données depuis la passerelle.",
 )
 @ROUTER.get("/import/{usage_point_id}/", include_in_schema=False)
-def import_all_data(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
+async def import_all_data(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
     """Force l'importation des données depuis la passerelle."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
-        return Ajax(usage_point_id).import_data()
+        return await run_job(lambda: Ajax(usage_point_id).import_data())
 
 
 @ROUTER.get(
@@ -30,7 +31,7 @@ def import_all_data(usage_point_id: str = Path(..., description=DOCUMENTATION["u
     summary="Permet de forcer une tâche d'importation.",
 )
 @ROUTER.get("/import/{usage_point_id}/{target}/", include_in_schema=False)
-def import_data(
+async def import_data(
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     target: str = Path(..., description=DOCUMENTATION["target_full"]),
 ):
@@ -53,25 +54,25 @@ def import_data(
     - influxdb
     """
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-        return Ajax(usage_point_id).import_data(target)
+        return await run_job(lambda: Ajax(usage_point_id).import_data(target))
 
 
 @ROUTER.get("/reset/{usage_point_id}", summary="Efface les données du point de livraison.")
 @ROUTER.get("/reset/{usage_point_id}/", include_in_schema=False)
-def reset_all_data(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
+async def reset_all_data(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
     """Efface les données du point de livraison."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
-        return Ajax(usage_point_id).reset_all_data()
+        return await run_job(lambda: Ajax(usage_point_id).reset_all_data())
 
 
 @ROUTER.get("/delete/{usage_point_id}", summary="Supprime le point de livraison.")
 @ROUTER.get("/delete/{usage_point_id}/", include_in_schema=False)
-def delete_all_data(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
+async def delete_all_data(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
     """Supprime le point de livraison."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
-        return Ajax(usage_point_id).delete_all_data()
+        return await run_job(lambda: Ajax(usage_point_id).delete_all_data())
 
 
 @ROUTER.get(
@@ -79,11 +80,11 @@ def delete_all_data(usage_point_id: str = Path(..., description=DOCUMENTATION["u
     summary="Efface le cache du point de livraison sur la passerelle.",
 )
 @ROUTER.get("/reset_gateway/{usage_point_id}/", include_in_schema=False)
-def reset_gateway(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
+async def reset_gateway(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
     """Efface le cache du point de livraison sur la passerelle."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
-        return Ajax(usage_point_id).reset_gateway()
+        return await run_job(lambda: Ajax(usage_point_id).reset_gateway())
 
 
 @ROUTER.get(
@@ -91,7 +92,7 @@ def reset_gateway(usage_point_id: str = Path(..., description=DOCUMENTATION["usa
     summary="Efface les données cible à une date spécifique.",
 )
 @ROUTER.get("/usage_point_id/{usage_point_id}/{target}/reset/{date}/", include_in_schema=False)
-def reset_data(
+async def reset_data(
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     target: str = Path(..., description=DOCUMENTATION["target"]),
     date: str = Path(..., description=DOCUMENTATION["date_format"]),
@@ -109,7 +110,7 @@ def reset_data(
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
         trace.get_current_span().set_attribute("target", target)
         trace.get_current_span().set_attribute("date", date)
-        return Ajax(usage_point_id).reset_data(target, date)
+        return await run_read(lambda: Ajax(usage_point_id).reset_data(target, date))
 
 
 @ROUTER.get(
@@ -120,7 +121,7 @@ def reset_data(
     "/usage_point_id/{usage_point_id}/{target}/blacklist/{date}/",
     include_in_schema=False,
 )
-def blacklist_data(
+async def blacklist_data(
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     target: str = Path(..., description=DOCUMENTATION["target"]),
     date: str = Path(..., description=DOCUMENTATION["date_format"]),
@@ -138,7 +139,7 @@ def blacklist_data(
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
         trace.get_current_span().set_attribute("target", target)
         trace.get_current_span().set_attribute("date", date)
-        return Ajax(usage_point_id).blacklist(target, date)
+        return await run_read(lambda: Ajax(usage_point_id).blacklist(target, date))
 
 
 @ROUTER.get(
@@ -149,7 +150,7 @@ def blacklist_data(
     "/usage_point_id/{usage_point_id}/{target}/whitelist/{date}/",
     include_in_schema=False,
 )
-def whitelist_data(
+async def whitelist_data(
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     target: str = Path(..., description=DOCUMENTATION["target"]),
     date: str = Path(..., description=DOCUMENTATION["date_format"]),
@@ -163,7 +164,7 @@ def whitelist_data(
     - production_detail
     - consumption_max_power
     """
-    return Ajax(usage_point_id).whitelist(target, date)
+    return await run_read(lambda: Ajax(usage_point_id).whitelist(target, date))
 
 
 @ROUTER.get(
@@ -171,7 +172,7 @@ def whitelist_data(
     summary="Importe les données à une date spécifique.",
 )
 @ROUTER.get("/usage_point_id/{usage_point_id}/{target}/import/{date}/", include_in_schema=False)
-def fetch_data(
+async def fetch_data(
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     target: str = Path(..., description=DOCUMENTATION["target"]),
     date: str = Path(..., description=DOCUMENTATION["date_format"]),
@@ -189,4 +190,4 @@ def fetch_data(
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
         trace.get_current_span().set_attribute("target", target)
         trace.get_current_span().set_attribute("date", date)
-        return Ajax(usage_point_id).fetch(target, date)
+        return await run_job(lambda: Ajax(usage_point_id).fetch(target, date))
@@ -17,82 +17,93 @@ from database.max_power import DatabaseMaxPower
 from database.usage_points import DatabaseUsagePoints
 from doc import DOCUMENTATION
 from models.ajax import Ajax
+from models.executor import run_job, run_read
 
 ROUTER = APIRouter(tags=["Données"])
 
 
 @ROUTER.get("/contract/{usage_point_id}")
 @ROUTER.get("/contract/{usage_point_id}/", include_in_schema=False)
-def get_contract(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
+async def get_contract(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
     """Renvoie les information du contrat remonter par Enedis."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
-        if DatabaseUsagePoints(usage_point_id).get() is not None:
-            data = DatabaseContracts(usage_point_id).get()
-            if data is None:
-                msg = (
-                    f"Aucune information de contrat disponible en cache pour Le point de livraison '{usage_point_id}'"
-                )
-                raise HTTPException(
-                    status_code=404,
-                    detail=msg,
-                )
-            return dict(sorted(data.__dict__.items()))
-        raise HTTPException(
-            status_code=404,
-            detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
-        )
+
+        def read():
+            if DatabaseUsagePoints(usage_point_id).get() is not None:
+                data = DatabaseContracts(usage_point_id).get()
+                if data is None:
+                    msg = (
+                        "Aucune information de contrat disponible en cache pour "
+                        f"Le point de livraison '{usage_point_id}'"
+                    )
+                    raise HTTPException(
+                        status_code=404,
+                        detail=msg,
+                    )
+                return dict(sorted(data.as_dict().items()))
+            raise HTTPException(
+                status_code=404,
+                detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
+            )
+
+        return await run_read(read)
 
 
 @ROUTER.get("/addresse/{usage_point_id}")
 @ROUTER.get("/addresse/{usage_point_id}/", include_in_schema=False)
-def get_addresse(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
+async def get_addresse(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
     """Renvoie les information postal remonter par Enedis."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-        if DatabaseUsagePoints(usage_point_id).get() is not None:
-            data = DatabaseAddresses(usage_point_id).get()
-            if data is None:
-                msg = (
-                    f"Aucune information postale disponible en cache pour Le point de livraison '{usage_point_id}'",
-                )
-                raise HTTPException(status_code=404, detail=msg)
-            return dict(sorted(data.__dict__.items()))
-        raise HTTPException(
-            status_code=404,
-            detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
-        )
+
+        def read():
+            if DatabaseUsagePoints(usage_point_id).get() is not None:
+                data = DatabaseAddresses(usage_point_id).get()
+                if data is None:
+                    msg = (
+                        "Aucune information postale disponible en cache pour "
+                        f"Le point de livraison '{usage_point_id}'",
+                    )
+                    raise HTTPException(status_code=404, detail=msg)
+                return dict(sorted(data.as_dict().items()))
+            raise HTTPException(
+                status_code=404,
+                detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
+            )
+
+        return await run_read(read)
 
 
 @ROUTER.put("/tempo", include_in_schema=False)
 @ROUTER.put("/tempo/", include_in_schema=False)
-def put_tempo():
+async def put_tempo():
     """Force la récupération des données Tempo."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-        return Ajax().fetch_tempo()
+        return await run_job(lambda: Ajax().fetch_tempo())
 
 
 @ROUTER.get("/tempo", summary="Retourne les données Tempo du cache local.")
 @ROUTER.get("/tempo/", include_in_schema=False)
-def tempo():
+async def tempo():
     """Retourne les données Tempo du cache local."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-        return Ajax().get_tempo()
+        return await run_read(lambda: Ajax().get_tempo())
 
 
 @ROUTER.put("/ecowatt", include_in_schema=False)
 @ROUTER.put("/ecowatt/", include_in_schema=False)
-def put_ecowatt():
+async def put_ecowatt():
     """Update ecowatt."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-        return Ajax().fetch_ecowatt()
+        return await run_job(lambda: Ajax().fetch_ecowatt())
 
 
 @ROUTER.get("/ecowatt", summary="Retourne les données Ecowatt du cache local.")
 @ROUTER.get("/ecowatt/", include_in_schema=False)
-def ecowatt():
+async def ecowatt():
     """Retourne les données Ecowatt du cache local."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
-        return Ajax().get_ecowatt()
+        return await run_read(lambda: Ajax().get_ecowatt())
 
 
 @ROUTER.put(
@@ -101,17 +112,21 @@ def ecowatt():
     tags=["Données"],
 )
 @ROUTER.put("/price/{usage_point_id}/", include_in_schema=False)
-def fetch_price(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
+async def fetch_price(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
     """Mise à jour le cache local du comparateur d'abonnement."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
         usage_point_id = usage_point_id.strip()
-        if DatabaseUsagePoints(usage_point_id).get() is not None:
-            return ast.literal_eval(Ajax(usage_point_id).generate_price())
-        raise HTTPException(
-            status_code=404,
-            detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
-        )
+
+        def job():
+            if DatabaseUsagePoints(usage_point_id).get() is not None:
+                return ast.literal_eval(Ajax(usage_point_id).generate_price())
+            raise HTTPException(
+                status_code=404,
+                detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
+            )
+
+        return await run_job(job)
 
 
 @ROUTER.get(
@@ -119,17 +134,21 @@ def fetch_price(usage_point_id: str = Path(..., description=DOCUMENTATION["usage
     summary="Retourne le résultat du comparateur d'abonnements.",
 )
 @ROUTER.get("/price/{usage_point_id}/", include_in_schema=False)
-def get_price(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
+async def get_price(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"])):
     """Retourne les données du cache local du comparateur d'abonnement."""
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
         usage_point_id = usage_point_id.strip()
-        if DatabaseUsagePoints(usage_point_id).get() is not None:
-            return Ajax(usage_point_id).get_price()
-        raise HTTPException(
-            status_code=404,
-            detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
-        )
+
+        def read():
+            if DatabaseUsagePoints(usage_point_id).get() is not None:
+                return Ajax(usage_point_id).get_price()
+            raise HTTPException(
+                status_code=404,
+                detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
+            )
+
+        return await run_read(read)
 
 
 @ROUTER.get(
@@ -140,7 +159,7 @@ def get_price(usage_point_id: str = Path(..., description=DOCUMENTATION["usage_p
     "/daily/{usage_point_id}/{measurement_direction}/{begin}/{end}/",
     include_in_schema=False,
 )
-def get_data_daily(
+async def get_data_daily(
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     measurement_direction: str = Path(..., description=DOCUMENTATION["measurement_direction"]),
     begin: str = Path(..., description=DOCUMENTATION["begin"]),
@@ -158,12 +177,16 @@ def get_data_daily(
                 status_code=404,
                 detail="'measurement_direction' inconnu, valeur possible consumption/production",
             )
-        data = DatabaseDaily(usage_point_id, measurement_direction).get_range(begin=begin, end=end)
-        output = {"unit": "w", "data": {}}
-        if data is not None:
-            for d in data:
-                output["data"][d.date] = d.value
-        return output
+
+        def read():
+            data = DatabaseDaily(usage_point_id, measurement_direction).get_range(begin=begin, end=end)
+            output = {"unit": "w", "data": {}}
+            if data is not None:
+                for d in data:
+                    output["data"][d.date] = d.value
+            return output
+
+        return await run_read(read)
 
 
 @ROUTER.get(
@@ -174,7 +197,7 @@ def get_data_daily(
     "/detail/{usage_point_id}/{measurement_direction}/{begin}/{end}/",
     include_in_schema=False,
 )
-def get_data_detail(
+async def get_data_detail(
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     measurement_direction: str = Path(..., description=DOCUMENTATION["measurement_direction"]),
     begin: str = Path(..., description=DOCUMENTATION["begin"]),
@@ -192,12 +215,16 @@ def get_data_detail(
                 status_code=404,
                 detail="'measurement_direction' inconnu, valeur possible consumption/production",
             )
-        data = DatabaseDetail(usage_point_id, measurement_direction).get_range(begin=begin, end=end)
-        output = {"unit": "w", "data": {}}
-        if data is not None:
-            for d in data:
-                output["data"][d.date] = d.value
-        return output
+
+        def read():
+            data = DatabaseDetail(usage_point_id, measurement_direction).get_range(begin=begin, end=end)
+            output = {"unit": "w", "data": {}}
+            if data is not None:
+                for d in data:
+                    output["data"][d.date] = d.value
+            return output
+
+        return await run_read(read)
 
 
 @ROUTER.get(
@@ -208,7 +235,7 @@ def get_data_detail(
     "/max_power/{usage_point_id}/{begin}/{end}/",
     include_in_schema=False,
 )
-def get_max_power(
+async def get_max_power(
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     begin: str = Path(..., description=DOCUMENTATION["begin"]),
     end: str = Path(..., description=DOCUMENTATION["end"]),
@@ -219,12 +246,16 @@ def get_max_power(
         usage_point_id = usage_point_id.strip()
         begin = datetime.strptime(begin, "%Y-%m-%d")
         end = datetime.strptime(end, "%Y-%m-%d")
-        data = DatabaseMaxPower(usage_point_id).get_range(begin=begin, end=end)
-        output = {"unit": "w", "data": {}}
-        if data is not None:
-            for d in data:
-                output["data"][d.event_date] = d.value
-        return output
+
+        def read():
+            data = DatabaseMaxPower(usage_point_id).get_range(begin=begin, end=end)
+            output = {"unit": "w", "data": {}}
+            if data is not None:
+                for d in data:
+                    output["data"][d.event_date] = d.value
+            return output
+
+        return await run_read(read)
 
 
 @ROUTER.get(
@@ -237,7 +268,7 @@ def get_max_power(
     response_class=HTMLResponse,
     include_in_schema=False,
 )
-def get_data(
+async def get_data(
     request: Request,
     usage_point_id: str = Path(..., description=DOCUMENTATION["usage_point_id"]),
     measurement_direction: str = Path(..., description=DOCUMENTATION["measurement_direction"]),
@@ -247,10 +278,13 @@ def get_data(
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
         trace.get_current_span().set_attribute("measurement_direction", measurement_direction)
         usage_point_id = usage_point_id.strip()
-        if DatabaseUsagePoints(usage_point_id).get() is not None:
-            return Ajax(usage_point_id).datatable(measurement_direction, request)
-        else:
+
+        def read():
+            if DatabaseUsagePoints(usage_point_id).get() is not None:
+                return Ajax(usage_point_id).datatable(measurement_direction, request)
             raise HTTPException(
                 status_code=404,
                 detail=f"Le point de livraison '{usage_point_id}' est inconnu!",
             )
+
+        return await run_read(read)
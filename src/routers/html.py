@@ -9,6 +9,7 @@ from opentelemetry import trace
 from config.main import APP_CONFIG
 from database import DB
 from models.ajax import Ajax
+from models.executor import run_read
 from templates.index import Index
 from templates.usage_point import UsagePoint
 
@@ -27,18 +28,18 @@ async def favicon():
 
 
 @ROUTER.get("/", response_class=HTMLResponse)
-def main():
+async def main():
     """Handle the root endpoint '/' and return the HTML generated by the 'display' method of the 'Index' class.
 
     Returns:
     - HTMLResponse: The HTML response generated by the 'display' method of the 'Index' class.
     """
-    return Index(DB).display()
+    return await run_read(lambda: Index(DB).display())
 
 
 @ROUTER.get("/usage_point_id/{usage_point_id}", response_class=HTMLResponse)
 @ROUTER.get("/usage_point_id/{usage_point_id}/", response_class=HTMLResponse)
-def usage_point_id(usage_point_id):
+async def usage_point_id(usage_point_id):
     """Handle the endpoint '/usage_point_id/{usage_point_id}' and '/usage_point_id/{usage_point_id}/'.
 
     Parameters:
@@ -49,12 +50,12 @@ def usage_point_id(usage_point_id):
     """
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
-        return UsagePoint(usage_point_id).display()
+        return await run_read(lambda: UsagePoint(usage_point_id).display())
 
 
 @ROUTER.get("/datatable/{usage_point_id}/{measurement_direction}")
 @ROUTER.get("/datatable/{usage_point_id}/{measurement_direction}/")
-def datatable(request: Request, usage_point_id, measurement_direction):
+async def datatable(request: Request, usage_point_id, measurement_direction):
     """Get datatable for a specific usage point and measurement direction.
 
     Parameters:
@@ -71,4 +72,4 @@ def datatable(request: Request, usage_point_id, measurement_direction):
     with APP_CONFIG.tracer.start_as_current_span(f"{__name__}.{inspect.currentframe().f_code.co_name}"):
         trace.get_current_span().set_attribute("usage_point_id", usage_point_id)
         trace.get_current_span().set_attribute("measurement_direction", measurement_direction)
-        return Ajax(usage_point_id).datatable(measurement_direction, request)
+        return await run_read(lambda: Ajax(usage_point_id).datatable(measurement_direction, request))
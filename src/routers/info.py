@@ -1,6 +1,7 @@
 """Routers pour les informations générales."""
 
 import inspect
+from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter
@@ -10,6 +11,7 @@ from pydantic import BaseModel
 from config.main import APP_CONFIG
 from database import DB
 from models.ajax import Ajax
+from models.progress import IMPORT_PROGRESS
 
 ROUTER = APIRouter(tags=["Infos"])
 
@@ -39,6 +41,47 @@ def import_status():
     return DB.lock_status()
 
 
+class ImportStatus(BaseModel):
+    """RESPONSE Get."""
+
+    state: str
+    target: Optional[str]
+    step: Optional[str]
+    usage_point_id: Optional[str]
+    usage_points_done: int
+    usage_points_total: int
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    imports: int
+    error: Optional[str]
+
+
+class ReadyStatus(BaseModel):
+    """RESPONSE Get."""
+
+    ready: bool = True
+    imported: bool = False
+    progress: ImportStatus
+
+
+@ROUTER.get(
+    "/ready",
+    response_model=ReadyStatus,
+    summary="Indique que le service est prêt et remonte l'avancement de l'importation des données.",
+)
+@ROUTER.get("/ready/", response_model=ReadyStatus, include_in_schema=False)
+async def ready():
+    """Indique que le service est prêt et remonte l'avancement de l'importation des données.
+
+    Le service répond dès son démarrage, la première importation s'exécute en tâche de fond :
+    - ready : le service accepte les requêtes.
+    - imported : au moins une importation est terminée.
+    - progress : l'avancement de l'importation (state : waiting, running, finished, failed).
+    """
+    progress = IMPORT_PROGRESS.status()
+    return {"ready": True, "imported": progress["imports"] > 0, "progress": progress}
+
+
 class GatewayStatus(BaseModel):
     """RESPONSE Get."""
 
@@ -361,6 +361,13 @@ class UsagePoint:
                         body += f'<div id="chart_daily_production_compare_{year}"></div>'
 
             body += "<h1>Mes données</h1>"
+            body += (
+                "<ul><li>La recherche des tableaux accepte une date (<code>2024</code>, <code>05/2024</code>, "
+                "<code>2024-05-12</code>, <code>12/05/2024</code>...) ou une valeur en W ou en kW, égale ou comparée "
+                "(<code>1200</code>, <code>&gt;1200</code>, <code>&lt;=1,5kw</code>...). Une valeur doit être égale à "
+                "celle du tableau : elle n'est plus recherchée comme une partie du texte.</li>"
+                "<li>Dans les tableaux horaires, un autre texte ne trouve aucun élément.</li></ul>"
+            )
             # CONSUMPTION DATATABLE
             if hasattr(self.usage_point_config, "consumption") and self.usage_point_config.consumption:
                 body += "<h2>Consommation</h2>"
@@ -13,11 +13,8 @@ from typing import ClassVar, Union
 
 import pytz
 import yaml
-from art import decor, text2art
 from dateutil.parser import parse
 from mergedeep import Strategy, merge
-from ruamel.yaml import YAML
-from ruamel.yaml import comments as com
 
 from __version__ import VERSION
 from const import URL_CONFIG_FILE
@@ -303,6 +300,8 @@ def log_usage_point_id(usage_point_id):
     Args:
         usage_point_id (str): The usage point ID to log.
     """
+    from art import decor  # Heavy, only needed to log
+
     text = f"Point de livraison : {usage_point_id}"
     separator()
     logging.info(f'{decor("barcode1")}{text: ^93}{decor("barcode1", reverse=True)}')
@@ -311,6 +310,8 @@ def log_usage_point_id(usage_point_id):
 
 def finish():
     """Finish the import process."""
+    from art import decor, text2art  # Heavy, only needed to log
+
     separator()
     for line in text2art("Import Finish!!!").splitlines():
         logging.info(f'{decor("barcode1")}{line: ^93}{decor("barcode1", reverse=True)}')
@@ -324,6 +325,8 @@ def get_version():
 
 def barcode_message(message):
     """Barcode message."""
+    from art import decor, text2art  # Heavy, only needed to log
+
     art = text2art(message)
     for line in art.splitlines():
         logging.info(f'{decor("barcode1")}{line: ^93}{decor("barcode1", reverse=True)}')
@@ -336,6 +339,8 @@ def logo(version):
         version (str): The version number of MyElectricalData.
 
     """
+    from art import decor, text2art  # Heavy, only needed to log
+
     art = text2art("MyElectricalData")
     separator()
     for line in art.splitlines():
@@ -389,6 +394,32 @@ def is_between(time, time_range):
     return start <= time < end
 
 
+def get_mesure_type(measurement_date, offpeak_hours):
+    """Determine the measurement type (HP or HC) of a date from the off-peak hours.
+
+    Args:
+        measurement_date (datetime): The date.
+        offpeak_hours (dict): The off-peak hours by weekday (0 is monday), ex: "22H00-6H00;12H00-14H00".
+
+    Returns:
+        str: The measurement type, either "HP" (high peak) or "HC" (off-peak).
+    """
+    date_hour_minute = measurement_date.strftime("%H:%M")
+    measure_type = "HP"
+    day_offpeak_hours = offpeak_hours[measurement_date.weekday()]
+    if day_offpeak_hours is not None:
+        for offpeak_hour in day_offpeak_hours.split(";"):
+            if offpeak_hour != "None" and offpeak_hour != "" and offpeak_hour is not None:
+                # FORMAT HOUR WITH 2 DIGIT
+                offpeak_begin, offpeak_stop = (
+                    "{:02d}:{:02d}".format(*map(int, bound.upper().replace(":", "H").split("H")))
+                    for bound in offpeak_hour.split("-")
+                )
+                if is_between(date_hour_minute, (offpeak_begin, offpeak_stop)):
+                    measure_type = "HC"
+    return measure_type
+
+
 def chunks_list(lst, n):
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
@@ -475,6 +506,9 @@ def load_config() -> ConfigOutput:
 
 def edit_config(data, file=None, comments=None, wipe=False):  # noqa: C901
     """Edit a value in a YAML file."""
+    from ruamel.yaml import YAML  # Only needed to write the configuration
+    from ruamel.yaml import comments as com
+
     if file is None:
         file = load_config().config_file
     with Path(file) as config_file:
@@ -0,0 +1,86 @@
+"""Batches of the configuration changes."""
+import threading
+
+import pytest
+
+
+@pytest.fixture()
+def store(monkeypatch):
+    """ConfigStore keeping the changes committed instead of writing them."""
+    from config.store import ConfigStore
+
+    store = ConfigStore()
+    store.committed = []
+    monkeypatch.setattr(store, "commit", lambda changes: store.committed.append(vars(changes)))
+    return store
+
+
+def test_change_out_of_batch_committed_at_once(store):
+    """Out of a batch, each change is committed at once."""
+    store.edit({"mqtt": {"enable": True}})
+    store.set_usage_point("pdl1", {"name": "Maison"})
+
+    assert [(changes["file"], changes["usage_points"]) for changes in store.committed] == [
+        ({"mqtt": {"enable": True}}, {}),
+        ({}, {"pdl1": {"name": "Maison"}}),
+    ]
+
+
+def test_nested_batches_committed_once(store):
+    """The changes of nested batches are committed once, at the end of the outermost batch."""
+    with store.batch():
+        store.edit({"mqtt": {"enable": True}}, comments={"mqtt": "MQTT"})
+        with store.batch():
+            store.edit({"mqtt": {"port": 1883}})
+            store.set_config("mqtt", {"enable": True, "port": 1883})
+        assert store.committed == []
+
+    assert store.committed == [
+        {
+            "file": {"mqtt": {"enable": True, "port": 1883}},
+            "comments": {"mqtt": "MQTT"},
+            "config": {"mqtt": {"enable": True, "port": 1883}},
+            "usage_points": {},
+        }
+    ]
+
+
+def test_batch_of_another_thread(store):
+    """A change of a thread is neither delayed nor committed by the batch running in another thread."""
+    in_batch = threading.Event()
+    changed = threading.Event()
+
+    def batch():
+        with store.batch():
+            store.set_usage_point("pdl1", {"name": "Maison"})
+            in_batch.set()
+            changed.wait(5)
+
+    thread = threading.Thread(target=batch)
+    thread.start()
+    in_batch.wait(5)
+    store.set_usage_point("pdl2", {"name": "Bureau"})
+    committed = [changes["usage_points"] for changes in store.committed]
+    changed.set()
+    thread.join(5)
+
+    assert committed == [{"pdl2": {"name": "Bureau"}}]
+    assert [changes["usage_points"] for changes in store.committed] == [
+        {"pdl2": {"name": "Bureau"}},
+        {"pdl1": {"name": "Maison"}},
+    ]
+
+
+def test_batch_not_committed_on_error(store):
+    """The changes of a batch left by an exception are dropped, the next changes are committed."""
+    with pytest.raises(ValueError, match="invalid"), store.batch():
+        store.edit({"mqtt": {"enable": True}})
+        with store.batch():
+            store.edit({"mqtt": {"port": "invalid"}})
+            raise ValueError("invalid")
+
+    assert store.committed == []
+
+    store.edit({"mqtt": {"port": 1883}})
+
+    assert [changes["file"] for changes in store.committed] == [{"mqtt": {"port": 1883}}]
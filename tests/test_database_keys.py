@@ -0,0 +1,42 @@
+"""Integer keys of the data tables: minute of the UTC date."""
+from datetime import datetime
+
+import pytest
+import pytz
+
+TIMEZONE = pytz.timezone("Europe/Paris")
+
+
+def test_repeated_dst_hour_keys():
+    """The two occurrences of 02:00 on the night of the autumn DST change get keys 60 minutes apart."""
+    from database.keys import epoch_minute
+
+    summer = TIMEZONE.localize(datetime(2023, 10, 29, 2), is_dst=True)  # noqa: DTZ001
+    winter = TIMEZONE.localize(datetime(2023, 10, 29, 2), is_dst=False)  # noqa: DTZ001
+
+    assert epoch_minute(summer) == int(summer.timestamp()) // 60
+    assert epoch_minute(winter) - epoch_minute(summer) == 60  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    "date",
+    [
+        datetime(2024, 1, 15, 12, 30),  # noqa: DTZ001
+        datetime(2024, 1, 15, 12, 30, tzinfo=TIMEZONE),
+        datetime(2024, 1, 15, 12, 30, tzinfo=pytz.utc).astimezone(TIMEZONE).replace(hour=12, minute=30),
+    ],
+)
+def test_wall_clock_dates(date):
+    """Naive dates, and dates with the LMT offset of `replace(tzinfo=TIMEZONE)`, are read as Europe/Paris time."""
+    from database.keys import epoch_minute
+
+    assert epoch_minute(date) == int(TIMEZONE.localize(datetime(2024, 1, 15, 12, 30)).timestamp()) // 60  # noqa: DTZ001
+
+
+def test_minute_date():
+    """`minute_date` is the inverse of `epoch_minute`."""
+    from database.keys import epoch_minute, minute_date
+
+    date = TIMEZONE.localize(datetime(2023, 10, 29, 2), is_dst=False)  # noqa: DTZ001
+
+    assert minute_date(epoch_minute(date)) == date
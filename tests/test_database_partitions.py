@@ -0,0 +1,157 @@
+"""Monthly partitions of the detail tables, on a mocked PostgreSQL engine."""
+import logging
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+import pytz
+
+TIMEZONE = pytz.timezone("Europe/Paris")
+
+
+def minute(*args):
+    """Return the key minute of a Europe/Paris wall-clock date."""
+    return int(TIMEZONE.localize(datetime(*args)).timestamp()) // 60  # noqa: DTZ001
+
+
+def statements(connection):
+    """Return the SQL statements executed on a mocked connection."""
+    return [str(call.args[0]) for call in connection.execute.call_args_list]
+
+
+@pytest.fixture()
+def engine():
+    """Engine of a PostgreSQL database, the connections mocked."""
+    engine = mock.MagicMock()
+    engine.dialect.name = "postgresql"
+    return engine
+
+
+@pytest.fixture()
+def connection(engine):
+    """Connection returned by the engine, in autocommit or in a transaction."""
+    connection = engine.execution_options.return_value.connect.return_value.__enter__.return_value
+    engine.begin.return_value.__enter__.return_value = connection
+    return connection
+
+
+def test_disabled_on_sqlite(engine):
+    """The partitions are only enabled on PostgreSQL."""
+    from database.partitions import DetailPartitions
+
+    engine.dialect.name = "sqlite"
+    partitions = DetailPartitions(engine, enabled=True)
+
+    partitions.prepare("consumption_detail", datetime(2024, 1, 1), datetime(2024, 3, 1))  # noqa: DTZ001
+
+    assert not partitions.enabled
+    assert partitions.range_clauses(mock.Mock(), datetime(2024, 1, 1)) == []  # noqa: DTZ001
+    engine.execution_options.assert_not_called()
+
+
+def test_create_sql(engine):
+    """A partition holds the minutes of a month, from its first minute (included) to the next month (excluded)."""
+    from database.partitions import DetailPartitions
+
+    sql = DetailPartitions(engine, enabled=True).create_sql("consumption_detail", datetime(2023, 10, 1))  # noqa: DTZ001
+
+    assert sql == (
+        "CREATE TABLE IF NOT EXISTS consumption_detail_p202310 PARTITION OF consumption_detail "
+        f"FOR VALUES FROM ({minute(2023, 10, 1)}) TO ({minute(2023, 11, 1)})"
+    )
+
+
+def test_prepare_creates_missing_partitions_once(engine, connection):
+    """The missing partitions of a range are created in autocommit, then cached."""
+    from database.partitions import DetailPartitions
+
+    partitions = DetailPartitions(engine, enabled=True)
+    begin = TIMEZONE.localize(datetime(2023, 12, 15))  # noqa: DTZ001
+    end = TIMEZONE.localize(datetime(2024, 2, 1))  # noqa: DTZ001
+
+    partitions.prepare("consumption_detail", begin, end)
+    partitions.prepare("consumption_detail", begin, end)
+
+    assert [sql.split(" PARTITION")[0] for sql in statements(connection)] == [
+        f"CREATE TABLE IF NOT EXISTS consumption_detail_p{month}" for month in ["202312", "202401", "202402"]
+    ]
+    engine.execution_options.assert_called_with(isolation_level="AUTOCOMMIT")
+
+
+def test_ensure_in_the_session(engine):
+    """A partition not prepared is created in the transaction of the insert, and not cached."""
+    from database.partitions import DetailPartitions
+
+    partitions = DetailPartitions(engine, enabled=True)
+    session = mock.Mock()
+
+    partitions.ensure(session, "production_detail", datetime(2024, 5, 31, 23, 30))  # noqa: DTZ001
+
+    assert statements(session)[0].startswith("CREATE TABLE IF NOT EXISTS production_detail_p202405 PARTITION OF")
+    assert partitions.partitions == set()
+
+
+def test_partition_table(engine, connection):
+    """The rows of a table not partitioned yet are moved to a partitioned table, one partition per month."""
+    from database.partitions import DetailPartitions
+
+    connection.execute.return_value.one.return_value = (minute(2024, 1, 31, 23, 30), minute(2024, 2, 1))
+
+    DetailPartitions(engine, enabled=True).partition_table(connection, "consumption_detail")
+
+    sql = statements(connection)
+    assert sql[0] == "ALTER TABLE consumption_detail RENAME TO consumption_detail_unpartitioned"
+    assert "CREATE TABLE consumption_detail (LIKE consumption_detail_unpartitioned INCLUDING DEFAULTS) " in sql[3]
+    assert "PARTITION BY RANGE (minute)" in sql[3]
+    assert [statement.split(" PARTITION OF")[0] for statement in sql if "PARTITION OF" in statement] == [
+        "CREATE TABLE IF NOT EXISTS consumption_detail_p202401",
+        "CREATE TABLE IF NOT EXISTS consumption_detail_p202402",
+    ]
+    assert sql[-2:] == [
+        "INSERT INTO consumption_detail SELECT * FROM consumption_detail_unpartitioned",
+        "DROP TABLE consumption_detail_unpartitioned",
+    ]
+
+
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_drop_expired(engine, connection, caplog, dry_run):
+    """The partitions of the months entirely older than the retention are logged, and dropped unless dry run."""
+    from database.partitions import DetailPartitions, month_start
+
+    current = month_start(datetime.now(tz=TIMEZONE))
+    expired = month_start(current - timedelta(days=70))
+    kept = month_start(current - timedelta(days=20))
+    partitions = DetailPartitions(engine, enabled=True, retention_days=31)
+    partitions.partitions = {f"consumption_detail_p{expired:%Y%m}", f"consumption_detail_p{kept:%Y%m}"}
+    existing = {f"consumption_detail_p{month:%Y%m}": month for month in [expired, kept]}
+
+    with mock.patch.object(
+        DetailPartitions, "existing", side_effect=lambda _, table: existing if table == "consumption_detail" else {}
+    ), caplog.at_level(logging.INFO):
+        dropped = partitions.drop_expired(dry_run=dry_run)
+
+    assert dropped == [f"consumption_detail_p{expired:%Y%m}"]
+    assert f"consumption_detail_p{expired:%Y%m} ({expired:%Y-%m}" in caplog.text
+    assert f"p{kept:%Y%m}" not in caplog.text
+    if dry_run:
+        connection.execute.assert_not_called()
+        assert len(partitions.partitions) == 2  # noqa: PLR2004
+    else:
+        assert statements(connection) == [f"DROP TABLE IF EXISTS consumption_detail_p{expired:%Y%m}"]
+        assert partitions.partitions == {f"consumption_detail_p{kept:%Y%m}"}
+
+
+def test_setup_partitions_and_logs_the_expired_ones(engine, connection):
+    """`setup` partitions the tables not partitioned yet, then logs the partitions to drop (dry run)."""
+    from database.partitions import DetailPartitions
+
+    connection.execute.return_value.scalar.side_effect = ["r", "p"]
+    partitions = DetailPartitions(engine, enabled=True, retention_days=31)
+
+    with mock.patch.object(DetailPartitions, "partition_table") as partition_table, mock.patch.object(
+        DetailPartitions, "existing", return_value={}
+    ), mock.patch.object(DetailPartitions, "drop_expired") as drop_expired:
+        partitions.setup()
+
+    partition_table.assert_called_once_with(connection, "consumption_detail")
+    drop_expired.assert_called_once_with(dry_run=True)
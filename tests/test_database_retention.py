@@ -0,0 +1,163 @@
+"""Rollup of the old detail data by the retention."""
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytz
+
+TIMEZONE = pytz.timezone("Europe/Paris")
+OFFPEAK_NIGHT = {day: "22H00-6H00" for day in range(7)}
+NO_OFFPEAK = {day: None for day in range(7)}
+
+Row = namedtuple("Row", ["usage_point_key", "minute", "usage_point_id", "date", "value", "interval", "measure_type"])
+
+
+def detail_rows(begin, values, interval=30):
+    """Build the detail data of a day: one row every `interval` minutes from `begin` (wall-clock time)."""
+    rows = []
+    for index, value in enumerate(values):
+        date = begin + timedelta(minutes=interval * index)
+        minute = int(TIMEZONE.localize(date).timestamp()) // 60
+        rows.append(Row(1, minute, "pdl1", date, value, interval, "consumption"))
+    return rows
+
+
+def energy(rows):
+    """Return the energy of the rows, in Wmin."""
+    return sum(row["value"] * row["interval"] if isinstance(row, dict) else row.value * row.interval for row in rows)
+
+
+def test_rollup_weighted_average_rounded():
+    """The power of a rollup is the average weighted by the interval, rounded (not truncated)."""
+    from database.retention import DatabaseRetention
+
+    rows = [
+        Row(1, 60, "pdl1", datetime(2022, 3, 1, 10), 1000, 10, "consumption"),  # noqa: DTZ001
+        Row(1, 70, "pdl1", datetime(2022, 3, 1, 10, 10), 2000, 20, "consumption"),  # noqa: DTZ001
+    ]
+
+    rollups = DatabaseRetention.rollups(rows, 60, NO_OFFPEAK)
+
+    assert [(rollup["minute"], rollup["value"], rollup["interval"]) for rollup in rollups] == [(60, 1667, 30)]
+
+
+@pytest.mark.parametrize("size", [60, 1440])
+def test_rollup_split_on_offpeak_boundary(size):
+    """A rollup never crosses an HC/HP boundary: its date gives the slot of all its records."""
+    from database.retention import DatabaseRetention
+
+    rows = detail_rows(datetime(2022, 3, 1, 21), [100, 200, 300, 400, 500, 600])  # noqa: DTZ001
+
+    rollups = DatabaseRetention.rollups(rows, size, OFFPEAK_NIGHT)
+
+    assert [(rollup["date"].strftime("%H:%M"), rollup["interval"]) for rollup in rollups] == [
+        ("21:00", 60),
+        ("22:00", 60 if size == 60 else 120),  # noqa: PLR2004
+        *([("23:00", 60)] if size == 60 else []),  # noqa: PLR2004
+    ]
+    assert energy(rollups) == energy(rows)
+
+
+def test_rollup_split_on_tempo_day():
+    """A daily rollup never crosses the start of the tempo day (06:00)."""
+    from database.retention import DatabaseRetention
+
+    rows = detail_rows(datetime(2022, 3, 1), [100] * 48)  # noqa: DTZ001
+
+    rollups = DatabaseRetention.rollups(rows, 1440, NO_OFFPEAK)
+
+    assert [(rollup["date"].strftime("%H:%M"), rollup["interval"]) for rollup in rollups] == [
+        ("00:00", 360),
+        ("06:00", 1080),
+    ]
+
+
+def test_rollup_dst_day():
+    """The hour repeated by the autumn DST change is rolled up in its own hourly rollups."""
+    from database.retention import DatabaseRetention
+
+    dates = [
+        (datetime(2022, 10, 29, 22, tzinfo=pytz.utc) + timedelta(minutes=30 * index)).astimezone(TIMEZONE)
+        for index in range(50)
+    ]
+    rows = [
+        Row(1, int(date.timestamp()) // 60, "pdl1", date.replace(tzinfo=None), 100 + index, 30, "consumption")
+        for index, date in enumerate(dates)
+    ]
+
+    rollups = DatabaseRetention.rollups(rows, 60, NO_OFFPEAK)
+
+    assert len(rollups) == 25  # noqa: PLR2004
+    assert [rollup["date"].strftime("%H:%M") for rollup in rollups[1:4]] == ["01:00", "02:00", "02:00"]
+    assert energy(rollups) == pytest.approx(energy(rows), abs=25 * 60)
+
+
+@pytest.mark.parametrize("size", [60, 1440])
+def test_rollup_keeps_energy_and_slots(size):
+    """Each rollup holds records of one HC/HP slot and one tempo day only, and keeps their energy (rounding aside)."""
+    from database.retention import TEMPO_BEGIN, DatabaseRetention
+    from utils import get_mesure_type
+
+    offpeak_hours = {day: "22H00-6H00;12H30-14H00" for day in range(7)}
+    rows = detail_rows(datetime(2022, 3, 1), [(index * 397) % 1511 for index in range(3 * 144)], interval=10)  # noqa: DTZ001
+
+    def slot(row):
+        tempo_day = row.date.date() - timedelta(days=int(row.date.hour * 100 + row.date.minute < TEMPO_BEGIN))
+        return get_mesure_type(row.date, offpeak_hours), tempo_day
+
+    rollups = DatabaseRetention.rollups(rows, size, offpeak_hours)
+
+    ends = [rollup["minute"] for rollup in rollups[1:]] + [rows[-1].minute + 1]
+    for rollup, end in zip(rollups, ends):
+        records = [row for row in rows if rollup["minute"] <= row.minute < end]
+        assert {slot(row) for row in records} == {slot(records[0])}
+        assert rollup["interval"] == sum(row.interval for row in records)
+        assert abs(rollup["value"] * rollup["interval"] - energy(records)) <= rollup["interval"] / 2
+    assert sum(rollup["interval"] for rollup in rollups) == sum(row.interval for row in rows)
+    assert len(rollups) < len(rows)
+
+
+def test_size_without_free_pages():
+    """On SQLite, the size does not count the free pages, so the pages freed by a deletion are reclaimed."""
+    from sqlalchemy import text
+
+    from database import DB
+    from database.retention import DatabaseRetention
+
+    with DB.engine.begin() as connection:
+        connection.execute(text("CREATE TABLE retention_size (data TEXT)"))
+        connection.execute(text("INSERT INTO retention_size VALUES (:data)"), [{"data": "x" * 4096}] * 64)
+    size_before = DatabaseRetention().size()
+    with DB.engine.begin() as connection:
+        connection.execute(text("DROP TABLE retention_size"))
+        page_size, page_count = (
+            connection.execute(text(f"PRAGMA {pragma}")).scalar() for pragma in ["page_size", "page_count"]
+        )
+
+    size_after = DatabaseRetention().size()
+
+    assert size_after < page_size * page_count
+    assert size_before - size_after >= 64 * 4096
+
+
+def test_downsample_marks_influxdb_watermarks():
+    """The rollup replaces the old records and marks the InfluxDB watermarks of the months rolled up."""
+    from database import DB
+    from database.detail import DatabaseDetail
+    from database.influxdb_sync import COMPACTED, DatabaseInfluxdbSync
+    from database.retention import DatabaseRetention
+
+    day = datetime.combine(datetime.now(tz=TIMEZONE).date() - timedelta(days=800), datetime.min.time())
+    with DB.unit_of_work():
+        for row in detail_rows(day + timedelta(hours=12), [1000, 1001, 1500, 1500]):
+            DatabaseDetail("pdl1").insert(TIMEZONE.localize(row.date), row.value, row.interval)
+        DatabaseInfluxdbSync("pdl1", "consumption_detail").set(day.strftime("%Y-%m"), 4, "checksum", day)
+    options = SimpleNamespace(downsample="hourly", downsample_after_days=365)
+
+    removed = DatabaseRetention(options).downsample()
+
+    rows = DatabaseDetail("pdl1").get_range(TIMEZONE.localize(day), TIMEZONE.localize(day + timedelta(days=1)), "asc")
+    assert removed["consumption_detail"] == 2  # noqa: PLR2004
+    assert [(row.value, row.interval) for row in rows] == [(1000, 60), (1500, 60)]
+    assert DatabaseInfluxdbSync("pdl1", "consumption_detail").get()[day.strftime("%Y-%m")].checksum == COMPACTED
@@ -0,0 +1,123 @@
+"""Search of the datatables: dates, values and free text."""
+from datetime import datetime
+
+import pytest
+
+
+def compiled(clause):
+    """Return the SQL and the parameters of a predicate."""
+    compiled = clause.compile()
+    return str(compiled), compiled.params
+
+
+@pytest.mark.parametrize(
+    ("term", "expected"),
+    [
+        ("2024", (datetime(2024, 1, 1), datetime(2025, 1, 1))),  # noqa: DTZ001
+        ("2024-5", (datetime(2024, 5, 1), datetime(2024, 6, 1))),  # noqa: DTZ001
+        ("12/2024", (datetime(2024, 12, 1), datetime(2025, 1, 1))),  # noqa: DTZ001
+        ("2024-02-29", (datetime(2024, 2, 29), datetime(2024, 3, 1))),  # noqa: DTZ001
+        ("31/12/2023", (datetime(2023, 12, 31), datetime(2024, 1, 1))),  # noqa: DTZ001
+        ("2023-02-29", None),
+        ("31/04/2024", None),
+        ("2024-13", None),
+        ("0/2024", None),
+        ("1850", None),
+        ("2024-05-12T10:00", None),
+        ("1200", None),
+    ],
+)
+def test_parse_date(term, expected):
+    """A date is a range of a year, a month or a day; an invalid date is not a date."""
+    from database.search import DatatableSearch
+
+    assert DatatableSearch.parse_date(term) == expected
+
+
+@pytest.mark.parametrize(
+    ("term", "expected"),
+    [
+        ("1200", ("=", 1200)),
+        ("=1200", ("=", 1200)),
+        (">1200", (">", 1200)),
+        (">=12.5", (">=", 12.5)),
+        ("<12,5", ("<", 12.5)),
+        ("<=1,5kw", ("<=", 1500)),
+        ("2KW", ("=", 2000)),
+        ("800w", ("=", 800)),
+        ("1,5", ("=", 1.5)),
+        ("1.5.2", None),
+        ("=>12", None),
+        ("12mw", None),
+        ("kw", None),
+        ("abc", None),
+    ],
+)
+def test_parse_value(term, expected):
+    """A value is an optional operator, a number (`.` or `,` decimals) and an optional unit, in W."""
+    from database.search import DatatableSearch
+
+    assert DatatableSearch.parse_value(term) == expected
+
+
+def test_terms():
+    """The terms are split on the spaces: dates, values and other texts."""
+    from database.search import DatatableSearch
+
+    search = DatatableSearch("  05/2024 >1,5kw  abc ")
+
+    assert search.date_ranges == [(datetime(2024, 5, 1), datetime(2024, 6, 1))]  # noqa: DTZ001
+    assert search.values == [(">", 1500)]
+    assert search.texts == ["abc"]
+
+
+@pytest.mark.parametrize("search", [None, "", "   "])
+def test_where_without_search(search):
+    """Without search there is no predicate."""
+    from database.search import DatatableSearch
+    from db_schema import ConsumptionDaily
+
+    assert DatatableSearch(search).where(ConsumptionDaily) is None
+
+
+def test_where_date_and_value():
+    """A date is a range on the date, a value an exact comparison of the value (no substring)."""
+    from database.search import DatatableSearch
+    from db_schema import ConsumptionDaily
+
+    sql, params = compiled(DatatableSearch("2024-05 1,5kw <=2000").where(ConsumptionDaily))
+
+    assert sql == (
+        "consumption_daily.date >= :date_1 AND consumption_daily.date < :date_2 "
+        "AND consumption_daily.value = :value_1 AND consumption_daily.value <= :value_2"
+    )
+    assert params == {
+        "date_1": datetime(2024, 5, 1),  # noqa: DTZ001
+        "date_2": datetime(2024, 6, 1),  # noqa: DTZ001
+        "value_1": 1500,
+        "value_2": 2000,
+    }
+
+
+def test_where_free_text():
+    """Another text is searched with LIKE on the date and the value."""
+    from database.search import DatatableSearch
+    from db_schema import ConsumptionDaily
+
+    sql, params = compiled(DatatableSearch("abc").where(ConsumptionDaily))
+
+    assert sql == (
+        "CAST(consumption_daily.date AS VARCHAR) LIKE :param_1 "
+        "OR CAST(consumption_daily.value AS VARCHAR) LIKE :param_2"
+    )
+    assert params == {"param_1": "%abc%", "param_2": "%abc%"}
+
+
+def test_where_free_text_disabled():
+    """Without free text (detail tables), another text matches nothing, whatever the other terms."""
+    from database.search import DatatableSearch
+    from db_schema import ConsumptionDetail
+
+    sql, _ = compiled(DatatableSearch("2024 abc").where(ConsumptionDetail, free_text=False))
+
+    assert sql == "false"
@@ -0,0 +1,67 @@
+"""Transactions of the session: autocommit outside a unit of work, one transaction inside."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+DATE = datetime(2024, 1, 31)  # noqa: DTZ001
+
+
+def stored_months(measurement):
+    """Return the months of the watermarks committed, read on a connection of its own."""
+    from database import DB
+    from db_schema import InfluxdbSync
+
+    with DB.engine.connect() as connection:
+        return (
+            connection.execute(select(InfluxdbSync.month).where(InfluxdbSync.measurement == measurement))
+            .scalars()
+            .all()
+        )
+
+
+def test_autocommit_outside_unit_of_work():
+    """Outside a unit of work, each write is committed at its flush."""
+    from database import DB
+    from database.influxdb_sync import DatabaseInfluxdbSync
+
+    DatabaseInfluxdbSync("pdl1", "autocommit").set("2024-01", 1, "checksum", DATE)
+
+    assert stored_months("autocommit") == ["2024-01"]
+    assert not DB.session().in_transaction()
+
+
+def test_unit_of_work_commits_at_the_end():
+    """Inside a unit of work, the writes (and the `commit` of the database classes) are only flushed."""
+    from database import DB
+    from database.influxdb_sync import DatabaseInfluxdbSync
+
+    with DB.unit_of_work() as session:
+        DatabaseInfluxdbSync("pdl1", "unit_of_work").set("2024-01", 1, "checksum", DATE)
+        session.commit()
+        DatabaseInfluxdbSync("pdl1", "unit_of_work").set("2024-02", 1, "checksum", DATE)
+
+        assert stored_months("unit_of_work") == []
+
+    assert sorted(stored_months("unit_of_work")) == ["2024-01", "2024-02"]
+
+
+def test_unit_of_work_rollback():
+    """An exception rolls the whole unit of work back, nested ones included, and the session is usable again."""
+    from database import DB
+    from database.influxdb_sync import DatabaseInfluxdbSync
+
+    with pytest.raises(ValueError, match="import failed"), DB.unit_of_work():
+        DatabaseInfluxdbSync("pdl1", "rollback").set("2024-01", 1, "checksum", DATE)
+        with DB.unit_of_work():
+            DatabaseInfluxdbSync("pdl1", "rollback").set("2024-02", 1, "checksum", DATE)
+            raise ValueError("import failed")
+
+    assert stored_months("rollback") == []
+    session = DB.session()
+    assert not session.in_unit_of_work()
+    assert not session.in_transaction()
+
+    DatabaseInfluxdbSync("pdl1", "rollback").set("2024-03", 1, "checksum", DATE)
+
+    assert stored_months("rollback") == ["2024-03"]
@@ -0,0 +1,114 @@
+"""Series and statistics of the dataset shared by the exporters."""
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+TIMEZONE = pytz.timezone("Europe/Paris")
+STAT_CALLS = [
+    ("daily", (0,)),
+    ("daily", (3,)),
+    ("detail", (0, "HP")),
+    ("detail", (1, "HC")),
+    ("current_week_array", ()),
+    ("current_week", ()),
+    ("last_week", ()),
+    ("yesterday", ()),
+    ("yesterday_1", ()),
+    ("current_week_last_year", ()),
+    ("last_month", ()),
+    ("current_month", ()),
+    ("current_year", ()),
+    ("last_year", ()),
+    ("yesterday_hc_hp", ()),
+    ("peak_offpeak_percent", ()),
+    ("get_year_linear", (0,)),
+    ("get_year_linear", (0, "HP")),
+    ("get_month_linear", (0, "HC")),
+    ("get_week_linear", (0,)),
+    ("get_daily", (datetime.now(tz=TIMEZONE).date() - timedelta(days=2), "HP")),
+]
+
+
+@pytest.fixture()
+def cache():
+    """Daily data of pdl1 over the last 400 days and detail data (30 minutes) over the last 8 days."""
+    from database import DB
+    from database.daily import DatabaseDaily
+    from database.detail import DatabaseDetail
+
+    today = datetime.combine(datetime.now(tz=TIMEZONE).date(), datetime.min.time())
+    with DB.unit_of_work():
+        for index in range(1, 401):
+            DatabaseDaily("pdl1").insert(TIMEZONE.localize(today - timedelta(days=index)), 1000 + index)
+        for index in range(8 * 48):
+            date = today - timedelta(days=8) + timedelta(minutes=30 * index)
+            DatabaseDetail("pdl1").insert(TIMEZONE.localize(date), 100 + index % 48, 30)
+    yield today
+    with DB.unit_of_work():
+        DatabaseDaily("pdl1").delete()
+        DatabaseDetail("pdl1").delete()
+
+
+def test_series_same_rows_as_the_database(cache):
+    """The ranges, dates and chunks of a series are the rows read from the table, naive or aware bounds."""
+    from database.daily import DatabaseDaily
+    from database.detail import DatabaseDetail
+    from models.export import UsagePointDataset
+
+    dataset = UsagePointDataset.load("pdl1")
+    detail = dataset.detail["consumption"]
+    begin = cache - timedelta(days=3, hours=1, minutes=15)
+    end = cache - timedelta(days=1)
+
+    for bounds in [(begin, end), (TIMEZONE.localize(begin), TIMEZONE.localize(end))]:
+        assert [row.date for row in detail.get_range(*bounds)] == [
+            row.date for row in DatabaseDetail("pdl1").get_range(*bounds)
+        ]
+        assert [row.date for row in dataset.daily["consumption"].get_range(*bounds)] == [
+            row.date for row in DatabaseDaily("pdl1").get_range(*bounds)
+        ]
+    day = TIMEZONE.localize(cache - timedelta(days=10))
+    assert dataset.daily["consumption"].get_date(day).value == DatabaseDaily("pdl1").get_date(day).value
+    assert [[row.date for row in chunk] for chunk in detail.chunks(TIMEZONE.localize(begin), chunk_size=50)] == [
+        [row.date for row in chunk]
+        for chunk in DatabaseDetail("pdl1").get_all_by_chunk(TIMEZONE.localize(begin), chunk_size=50)
+    ]
+    assert len(dataset.detail["production"]) == 0
+
+
+def test_stats_read_the_dataset(cache, monkeypatch):
+    """The statistics of the dataset are the ones of the database, without reading the tables again."""
+    from models.export import UsagePointDataset
+    from models.stat import Stat
+
+    expected = [getattr(Stat("pdl1", "consumption"), method)(*args) for method, args in STAT_CALLS]
+    dataset = UsagePointDataset.load("pdl1")
+    reads = []
+
+    def read(self, *args, **kwargs):
+        reads.append(type(self).__name__)
+        return []
+
+    for table, method in [
+        ("daily.DatabaseDaily", "get_range"),
+        ("daily.DatabaseDaily", "get_all_by_chunk"),
+        ("detail.DatabaseDetail", "get_range"),
+        ("detail.DatabaseDetail", "get_all_by_chunk"),
+        ("max_power.DatabaseMaxPower", "get_range"),
+        ("tempo.DatabaseTempo", "get_range"),
+    ]:
+        monkeypatch.setattr(f"database.{table}.{method}", read)
+
+    assert [getattr(dataset.stats["consumption"], method)(*args) for method, args in STAT_CALLS] == expected
+    assert reads == []
+
+
+def test_stats_shared_calls_idempotent(cache):
+    """A statistic shared by several exporters returns the same totals on each call."""
+    from models.export import UsagePointDataset
+
+    stat = UsagePointDataset.load("pdl1").stats["consumption"]
+
+    assert stat.current_week() == stat.current_week()
+    assert stat.yesterday_hc_hp() == stat.yesterday_hc_hp()
@@ -0,0 +1,92 @@
+"""Resume point of the incremental import into Home Assistant."""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytz
+
+TIMEZONE = pytz.timezone("Europe/Paris")
+
+
+def local(*args):
+    """Return an aware Europe/Paris datetime."""
+    return TIMEZONE.localize(datetime(*args))  # noqa: DTZ001
+
+
+def hours(begin, end):
+    """Return the hours from `begin` (included) to `end` (excluded)."""
+    count = int((end - begin).total_seconds()) // 3600
+    return [(begin + timedelta(hours=index)).astimezone(TIMEZONE) for index in range(count)]
+
+
+class Recorder:
+    """Home Assistant recorder holding hourly statistics, aggregated by month on request."""
+
+    def __init__(self, statistics):
+        """Store the hours of each statistic, each hour adding 1 to its sum."""
+        self.statistics = {
+            statistic_id: [(start, index + 1) for index, start in enumerate(starts)]
+            for statistic_id, starts in statistics.items()
+        }
+
+    def get_data(self, statistic_ids, begin, end, period="hour"):
+        """Answer `recorder/statistics_during_period` as Home Assistant: the periods starting before `end`."""
+        result = {}
+        for statistic_id in statistic_ids:
+            rows = {}
+            for start, total in self.statistics.get(statistic_id, []):
+                if period == "month":
+                    start = start.replace(day=1, hour=0)  # noqa: PLW2901
+                    if start < begin.astimezone(TIMEZONE).replace(day=1, hour=0, minute=0):
+                        continue
+                elif start < begin:
+                    continue
+                if start < end:
+                    rows[start] = {"start": start.timestamp() * 1000, "sum": total}
+            if rows:
+                result[statistic_id] = list(rows.values())
+        return {"result": result}
+
+
+@pytest.fixture()
+def home_assistant_ws(monkeypatch):
+    """HomeAssistantWs not connected, in incremental mode."""
+    from config.main import APP_CONFIG
+    from external_services.home_assistant_ws.main import HomeAssistantWs
+
+    monkeypatch.setattr(APP_CONFIG, "home_assistant_ws", SimpleNamespace(incremental=True, purge=False))
+    home_assistant_ws = HomeAssistantWs.__new__(HomeAssistantWs)
+    home_assistant_ws.usage_point_id = "pdl1"
+    first_detail = SimpleNamespace(first_date=datetime(2024, 1, 1))  # noqa: DTZ001
+    home_assistant_ws.dataset = SimpleNamespace(detail={"consumption": first_detail, "production": first_detail})
+    home_assistant_ws.purge_force = False
+    # Lookback window from 2024-03-10: the hours before are only read by the fallback
+    home_assistant_ws.resume_lookback = (datetime.now(tz=TIMEZONE) - local(2024, 3, 10)).days
+    return home_assistant_ws
+
+
+def test_resume_in_the_middle_of_a_month(home_assistant_ws):
+    """A statistic not updated in the window resumes from its sum just before `begin`, not from its month."""
+    base = "myelectricaldata:pdl1_consumption"
+    red = f"{base}_red"
+    recorder = Recorder(
+        {
+            base: hours(local(2024, 1, 1), local(2024, 3, 25, 11)),
+            # Tempo red days: hours in March before the window, and after the resume point
+            red: hours(local(2024, 2, 1), local(2024, 2, 3)) + hours(local(2024, 3, 4), local(2024, 3, 5))
+            + hours(local(2024, 3, 25, 6), local(2024, 3, 25, 8)),
+            # Not updated since January
+            f"{base}_white": hours(local(2024, 1, 8), local(2024, 1, 9)),
+        }
+    )
+    home_assistant_ws.current_stats = list(recorder.statistics)
+    home_assistant_ws.get_data = recorder.get_data
+
+    begin, sums = home_assistant_ws.get_resume_point("consumption")
+
+    assert begin == local(2024, 3, 25)
+    assert sums == {
+        base: len(hours(local(2024, 1, 1), local(2024, 3, 25))),
+        red: 48 + 24,
+        f"{base}_white": 24,
+    }
@@ -0,0 +1,280 @@
+"""Golden test of the Home Assistant hourly statistics: same payloads as the builder they replaced."""
+import calendar
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytz
+
+from utils import get_mesure_type
+
+TIMEZONE = pytz.timezone("Europe/Paris")
+TEMPO_BEGIN = 600
+USAGE_POINT_ID = "pdl1"
+OFFPEAK_HOURS = {day: "22H00-6H00;12H30-14H00" for day in range(7)}
+TEMPO_COLORS = {"2023-10-27": "BLUE", "2023-10-28": "WHITE", "2023-10-29": "RED", "2023-10-30": "BLUE"}
+TEMPO_PRICES = {
+    f"{color}_{hour_type}": price
+    for color, base in [("blue", 0.1296), ("white", 0.1609), ("red", 0.1568)]
+    for hour_type, price in [("hc", base), ("hp", base * 1.37)]
+}
+FLEX_STATUS = {"2023-10-28": "Sobriete", "2023-10-29": "Bonus", "2023-10-30": "Inconnu"}
+CONFIG = SimpleNamespace(
+    monthly_charge=15.65,
+    production_price=0.1276,
+    consumption_price_base=0.2516,
+    consumption_price_hc=0.2068,
+    consumption_price_hp=0.27,
+    consumption_price_flex_normal_hc=0.1932,
+    consumption_price_flex_normal_hp=0.2498,
+    consumption_price_flex_sobriete_hc=0.1932,
+    consumption_price_flex_sobriete_hp=0.7124,
+    consumption_price_flex_bonus_hc=0.1495,
+    consumption_price_flex_bonus_hp=0.2004,
+)
+
+Detail = namedtuple("Detail", ["date", "value", "interval"])
+
+# Three days around the autumn DST change (02:00 and 02:30 twice), every 30 minutes, some 10 minutes long
+DETAIL = [
+    Detail(
+        (datetime(2023, 10, 27, 22, tzinfo=pytz.utc) + timedelta(minutes=30 * index))
+        .astimezone(TIMEZONE)
+        .replace(tzinfo=None),
+        137 + (index * 397) % 1511,
+        10 if index % 7 == 0 else 30,
+    )
+    for index in range(3 * 48 + 2)
+]
+
+
+class Stat:
+    """Stat of the usage point, only its HC/HP slots."""
+
+    def __init__(self, usage_point_id, measurement_direction):
+        """Initialize Stat."""
+
+    @staticmethod
+    def get_mesure_type(date):
+        """Return HC or HP."""
+        return get_mesure_type(date, OFFPEAK_HOURS)
+
+
+class DatabaseTempo:
+    """Tempo colors and prices."""
+
+    @staticmethod
+    def get():
+        """Return the tempo days."""
+        return [
+            SimpleNamespace(date=datetime.strptime(day, "%Y-%m-%d"), color=color)  # noqa: DTZ007
+            for day, color in TEMPO_COLORS.items()
+        ]
+
+    @staticmethod
+    def get_config(_key):
+        """Return the tempo prices."""
+        return {key: str(price) for key, price in TEMPO_PRICES.items()}
+
+
+class FlexDayManager:
+    """Flex status of the days."""
+
+    def __init__(self, _db):
+        """Initialize FlexDayManager."""
+
+    @staticmethod
+    def get_flex_status(date):
+        """Return the flex status of a day."""
+        return FLEX_STATUS[date]
+
+
+def legacy_statistics(plan, measurement_direction, tariff_change_date, sum_offset):  # noqa: C901, PLR0912, PLR0915
+    """Build the statistics with the loop of `HomeAssistantWs.import_data` replaced by HourlyStatistics.
+
+    Returns:
+        dict: The (name, unit, tag, hours) by statistic id.
+    """
+    stats = Stat(USAGE_POINT_ID, "consumption")
+    tempo_price = DatabaseTempo.get_config("price")
+    tempo_color_ref = {tempo_data.date: tempo_data.color for tempo_data in DatabaseTempo.get()}
+    config = CONFIG
+    stats_kwh = {}
+    stats_euro = {}
+    strdate = ""
+    day_flex = "Inconnu"
+    first_time_slot = None
+    last_year = last_month = last_day = None
+    cost = 0
+    for data in DETAIL:
+        year, month, day = data.date.year, data.date.month, data.date.day
+        hour_minute = int(f'{data.date.strftime("%H")}{data.date.strftime("%M")}')
+        if first_time_slot is None or (year, month, day) != (last_year, last_month, last_day):
+            first_time_slot = data
+            last_day = day
+        last_year, last_month = year, month
+        if data == first_time_slot:
+            daily_charge = config.monthly_charge / calendar.monthrange(year, month)[1]
+        else:
+            daily_charge = 0
+        name = f"MyElectricalData - {USAGE_POINT_ID}"
+        statistic_id = f"myelectricaldata:{USAGE_POINT_ID}"
+        day_interval = data.interval if data.interval != 0 else 1
+        value = data.value / (60 / day_interval)
+        tag = None
+        if measurement_direction == "production":
+            name = f"{name} {measurement_direction}"
+            statistic_id = f"{statistic_id}_{measurement_direction}"
+            cost = value * config.production_price / 1000
+            daily_charge = 0
+        elif plan == "BASE":
+            name = f"{name} {plan} {measurement_direction}"
+            statistic_id = f"{statistic_id}_{plan.lower()}_{measurement_direction}"
+            cost = value * config.consumption_price_base / 1000
+            tag = "base"
+        elif plan == "HC/HP":
+            measure_type = stats.get_mesure_type(data.date)
+            name = f"{name} {measure_type} {measurement_direction}"
+            statistic_id = f"{statistic_id}_{measure_type.lower()}_{measurement_direction}"
+            price = config.consumption_price_hc if measure_type == "HC" else config.consumption_price_hp
+            cost = value * price / 1000
+            tag = measure_type.lower()
+        elif plan == "TEMPO":
+            hour_type = stats.get_mesure_type(data.date)
+            if TEMPO_BEGIN <= hour_minute <= 2359:  # noqa: PLR2004
+                date = datetime.combine(data.date, datetime.min.time())
+            else:
+                date = datetime.combine(data.date - timedelta(days=1), datetime.min.time())
+            day_color = tempo_color_ref[date]
+            tempo_color = f"{day_color}{hour_type}"
+            cost = value / 1000 * float(tempo_price[f"{day_color.lower()}_{hour_type.lower()}"])
+            name = f"{name} {tempo_color} {measurement_direction}"
+            statistic_id = f"{statistic_id}_{tempo_color.lower()}_{measurement_direction}"
+            tag = tempo_color.lower()
+        elif plan == "FLEX":
+            if tariff_change_date and data.date < tariff_change_date:
+                flex_hour = "normal_HP"
+                cost = value * config.consumption_price_base / 1000
+            else:
+                hour_type = stats.get_mesure_type(data.date)
+                newstrdate = data.date.strftime("%Y-%m-%d")
+                if newstrdate != strdate:
+                    strdate = newstrdate
+                    day_flex = FlexDayManager(None).get_flex_status(strdate)
+                if day_flex == "Inconnu":
+                    flex_hour = f"normal_{hour_type}"
+                    price = config.consumption_price_hc if hour_type == "HC" else config.consumption_price_hp
+                else:
+                    flex_hour = f"{day_flex.lower()}_{hour_type}"
+                    price = getattr(config, f"consumption_price_flex_{flex_hour.lower()}")
+                cost = value * price / 1000
+            name = f"{name} {flex_hour} {measurement_direction}"
+            statistic_id = f"{statistic_id}_{flex_hour.lower()}_{measurement_direction}"
+            tag = flex_hour.lower()
+
+        date = TIMEZONE.localize(data.date, "%Y-%m-%d %H:%M:%S")
+        date = date.replace(minute=0, second=0, microsecond=0)
+        key = date.strftime("%Y-%m-%d %H:%M:%S")
+
+        # KWH
+        if statistic_id not in stats_kwh:
+            stats_kwh[statistic_id] = {"name": name, "sum": sum_offset.get(statistic_id, 0), "data": {}}
+        if key not in stats_kwh[statistic_id]["data"]:
+            stats_kwh[statistic_id]["data"][key] = {"start": date.isoformat(), "state": 0, "sum": 0}
+        value = value / 1000
+        stats_kwh[statistic_id]["data"][key]["state"] = stats_kwh[statistic_id]["data"][key]["state"] + value
+        stats_kwh[statistic_id]["tag"] = tag
+        stats_kwh[statistic_id]["sum"] += value
+        stats_kwh[statistic_id]["data"][key]["sum"] = stats_kwh[statistic_id]["sum"]
+
+        # EURO
+        suffix, label = ("_revenue", "Revenue") if measurement_direction == "production" else ("_cost", "Cost")
+        statistic_id = f"{statistic_id}{suffix}"
+        if statistic_id not in stats_euro:
+            stats_euro[statistic_id] = {"name": f"{name} {label}", "sum": sum_offset.get(statistic_id, 0), "data": {}}
+        if key not in stats_euro[statistic_id]["data"]:
+            stats_euro[statistic_id]["data"][key] = {"start": date.isoformat(), "state": 0, "sum": 0}
+        stats_euro[statistic_id]["tag"] = tag
+        stats_euro[statistic_id]["data"][key]["state"] += cost
+        stats_euro[statistic_id]["sum"] += cost
+        stats_euro[statistic_id]["data"][key]["sum"] = stats_euro[statistic_id]["sum"]
+
+        if daily_charge > 0:
+            name_charge = f"MyElectricalData - {USAGE_POINT_ID} charge"
+            statistic_id_charge = f"myelectricaldata:{USAGE_POINT_ID}_charge"
+            if statistic_id_charge not in stats_kwh:
+                stats_kwh[statistic_id_charge] = {"name": name_charge, "sum": 0, "data": {}}
+            if key not in stats_kwh[statistic_id_charge]["data"]:
+                stats_kwh[statistic_id_charge]["data"][key] = {"start": date.isoformat(), "state": 0, "sum": 0}
+            stats_kwh[statistic_id_charge]["data"][key]["state"] = 0
+            stats_kwh[statistic_id_charge]["tag"] = "charge"
+            stats_kwh[statistic_id_charge]["sum"] = 0
+            stats_kwh[statistic_id_charge]["data"][key]["sum"] = 0
+
+            statistic_id_charge_cost = f"{statistic_id_charge}_cost"
+            if statistic_id_charge_cost not in stats_euro:
+                stats_euro[statistic_id_charge_cost] = {
+                    "name": f"{name_charge} Cost",
+                    "sum": sum_offset.get(statistic_id_charge_cost, 0),
+                    "data": {},
+                }
+            if key not in stats_euro[statistic_id_charge_cost]["data"]:
+                stats_euro[statistic_id_charge_cost]["data"][key] = {"start": date.isoformat(), "state": 0, "sum": 0}
+            charge = stats_euro[statistic_id_charge_cost]
+            charge["tag"] = "charge"
+            charge["data"][key]["state"] = charge["data"][key]["state"] + daily_charge
+            charge["sum"] += daily_charge
+            charge["data"][key]["sum"] = charge["sum"]
+
+    return {
+        statistic_id: (data["name"], unit, data.get("tag"), list(data["data"].values()))
+        for stats, unit in [(stats_kwh, "kWh"), (stats_euro, "EURO")]
+        for statistic_id, data in stats.items()
+    }
+
+
+@pytest.fixture(autouse=True)
+def sources(monkeypatch):
+    """HC/HP slots, tempo days and flex days of the usage point."""
+    monkeypatch.setattr("external_services.home_assistant_ws.statistics.Stat", Stat)
+    monkeypatch.setattr("external_services.home_assistant_ws.statistics.DatabaseTempo", DatabaseTempo)
+    monkeypatch.setattr("external_services.home_assistant_ws.statistics.DatabaseFlex", lambda: None)
+    monkeypatch.setattr("external_services.home_assistant_ws.statistics.FlexDayManager", FlexDayManager)
+
+
+@pytest.mark.parametrize(
+    ("plan", "measurement_direction"),
+    [
+        ("BASE", "consumption"),
+        ("HC/HP", "consumption"),
+        ("TEMPO", "consumption"),
+        ("FLEX", "consumption"),
+        (None, "production"),
+    ],
+)
+@pytest.mark.parametrize("sum_offset", [{}, {"myelectricaldata:pdl1_base_consumption": 1234.5}])
+def test_same_payloads_as_legacy_builder(plan, measurement_direction, sum_offset):
+    """The statistics streamed by chunks are identical to the ones of the previous builder, float sums included."""
+    from external_services.home_assistant_ws.statistics import HourlyStatistics
+
+    tariff_change_date = datetime(2023, 10, 28, 12)  # noqa: DTZ001
+    builder = HourlyStatistics(
+        USAGE_POINT_ID,
+        CONFIG,
+        measurement_direction,
+        plan=plan,
+        tariff_change_date=tariff_change_date,
+        sum_offset=sum_offset,
+        batch_size=5,
+    )
+    chunks = [DETAIL[index : index + 7] for index in range(0, len(DETAIL), 7)]
+
+    statistics = {}
+    for statistic, rows in builder.stream(chunks):
+        statistics.setdefault(
+            statistic["statistic_id"],
+            (statistic["name"], statistic["unit"], statistic["tag"], []),
+        )[3].extend(rows)
+
+    assert statistics == legacy_statistics(plan, measurement_direction, tariff_change_date, sum_offset)
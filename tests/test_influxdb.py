@@ -0,0 +1,221 @@
+"""Export to InfluxDB: line protocol, batches and watermarks."""
+import math
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytz
+
+DATE = datetime(2024, 1, 15, 12, 30, tzinfo=pytz.utc)
+Row = namedtuple("Row", ["date", "value", "interval"])
+ROWS = [Row(datetime(2024, 1, 1) + timedelta(days=index), 1000 + index, 0) for index in range(40)]  # noqa: DTZ001
+
+
+@pytest.fixture()
+def influxdb_config(monkeypatch):
+    """InfluxDB configuration, batches of 3 points."""
+    from config.main import APP_CONFIG
+
+    config = SimpleNamespace(
+        enable=False,
+        method="synchronous",
+        workers=2,
+        bucket="bucket",
+        org="org",
+        batching_options=SimpleNamespace(batch_size=3),
+    )
+    monkeypatch.setattr(APP_CONFIG, "influxdb", config)
+    return config
+
+
+class WriteApi:
+    """influxdb_client write API keeping the records written."""
+
+    def __init__(self, result=None):
+        """Return `result` from each write."""
+        self.records = []
+        self.result = result
+
+    def write(self, bucket, org, record, write_precision):
+        """Keep the record."""
+        self.records.append(record)
+        return self.result
+
+
+class Client:
+    """InfluxDB client keeping the batches written, `flush` failing with `flush_error`."""
+
+    def __init__(self, flush_error=None):
+        """Initialize the client."""
+        self.batches = []
+        self.flushed = False
+        self.flush_error = flush_error
+
+    def write_batch(self, batch):
+        """Keep the batch."""
+        self.batches.append(batch)
+
+    def flush(self):
+        """Raise `flush_error`."""
+        self.flushed = True
+        if self.flush_error is not None:
+            raise self.flush_error
+
+    @staticmethod
+    def count(*_args):
+        """No point in InfluxDB."""
+        return []
+
+
+def test_line_prefix():
+    """The tags are sorted and escaped, the empty tags are skipped."""
+    from external_services.influxdb.client import InfluxDB
+
+    prefix = InfluxDB.line_prefix("consumption detail", {"year": "2024", "name": "a,b=c", "empty": "", "none": None})
+
+    assert prefix == r"consumption\ detail,name=a\,b\=c,year=2024"
+
+
+def test_line_types():
+    """The fields are serialized as influxdb_client does, the NaN and None fields are skipped."""
+    from external_services.influxdb.client import InfluxDB
+
+    line = InfluxDB.line(
+        "m", {"int": 3, "float": 0.1, "bool": True, "str": 'a "b"', "nan": math.nan, "none": None}, DATE
+    )
+
+    assert line == f'm int=3i,float=0.1,bool=true,str="a \\"b\\"" {int(DATE.timestamp())}'
+
+
+def test_line_without_field():
+    """A point whose fields are all skipped is not serialized: InfluxDB rejects a point without field."""
+    from external_services.influxdb.client import InfluxDB
+
+    assert InfluxDB.line("m", {"nan": math.nan, "none": None}, DATE) is None
+
+
+@pytest.mark.usefixtures("influxdb_config")
+def test_write_lines_batches():
+    """The points are written by batches of `batch_size`, the empty points are skipped."""
+    from external_services.influxdb.client import InfluxDB
+
+    client = InfluxDB.__new__(InfluxDB)
+    client.__init__()
+    client.write_api = WriteApi()
+
+    count = client.write_lines(["a", None, "b", "c", "d", None, "e"])
+
+    assert count == 5  # noqa: PLR2004
+    assert client.write_api.records == [["a", "b", "c"], ["d", "e"]]
+
+
+def test_flush_asynchronous(influxdb_config):
+    """The ASYNCHRONOUS requests are awaited by `flush`, which raises their error."""
+    from external_services.influxdb.client import InfluxDB
+
+    influxdb_config.method = "asynchronous"
+    failed = SimpleNamespace(get=lambda: (_ for _ in ()).throw(ConnectionError("rejected")))
+    client = InfluxDB.__new__(InfluxDB)
+    client.__init__()
+    client.write_api = WriteApi(result=failed)
+
+    client.write_batch(["a"])
+
+    with pytest.raises(ConnectionError):
+        client.flush()
+    assert client.pending == []
+
+
+@pytest.mark.parametrize(("acknowledge", "error"), [(True, None), (False, TimeoutError), (True, ConnectionError)])
+def test_flush_batching(influxdb_config, acknowledge, error):
+    """The BATCHING write API is closed by `flush`: an error, or a batch not acknowledged, is raised."""
+    from external_services.influxdb.client import InfluxDB
+
+    influxdb_config.method = "batching"
+    client = InfluxDB.__new__(InfluxDB)
+    client.__init__()
+    write_api = WriteApi()
+
+    def close():
+        for record in write_api.records:
+            data = "\n".join(record).encode("utf-8")
+            if error is not None:
+                client.on_batch_error(None, data, error("rejected"))
+            elif acknowledge:
+                client.on_batch_written(None, data)
+
+    write_api.close = close
+    client.write_api = write_api
+    client.create_write_api = WriteApi
+
+    client.write_batch(["a", "b"])
+    client.write_batch(["c"])
+
+    if error is None:
+        client.flush()
+    else:
+        with pytest.raises(error):
+            client.flush()
+    assert isinstance(client.write_api, WriteApi)
+    assert client.write_api is not write_api
+
+
+def test_writer_flushes_client():
+    """The writer sends the points by batches and flushes the client before returning from `close`."""
+    from external_services.influxdb.writer import InfluxDBWriter
+
+    client = Client()
+    with InfluxDBWriter(client, batch_size=2, workers=2) as writer:
+        writer.put(["a", None, "b", "c"])
+
+    assert sorted(client.batches) == [["a", "b"], ["c"]]
+    assert client.flushed
+    assert writer.written == 3  # noqa: PLR2004
+
+
+def export(client, measurement):
+    """ExportInfluxDB of pdl1 sending ROWS to a measurement, not connected."""
+    from external_services.influxdb.main import ExportInfluxDB
+
+    exporter = ExportInfluxDB.__new__(ExportInfluxDB)
+    exporter.usage_point_id = "pdl1"
+    exporter.usage_point_config = SimpleNamespace(
+        consumption=True, production=False, consumption_detail=False, production_detail=False
+    )
+    exporter.influxdb_client = client
+    exporter.tz = pytz.utc
+    exporter.time_format = "%Y-%m-%dT%H:%M:%SZ"
+    exporter.daily = lambda: exporter.sync(
+        measurement, iter(ROWS), lambda rows: [str(row.value) for row in rows], "fp"
+    )
+    return exporter
+
+
+@pytest.mark.usefixtures("influxdb_config")
+def test_watermarks_saved_after_flush():
+    """The watermarks are saved once the points are flushed, the next sync does not write them again."""
+    from database.influxdb_sync import DatabaseInfluxdbSync
+
+    client = Client()
+    export(client, "test").run()
+
+    watermarks = DatabaseInfluxdbSync("pdl1", "test").get()
+    assert {month: watermark.count for month, watermark in watermarks.items()} == {"2024-01": 31, "2024-02": 9}
+    assert sum(len(batch) for batch in client.batches) == len(ROWS)
+
+    client = Client()
+    export(client, "test").run()
+
+    assert client.batches == []
+
+
+@pytest.mark.usefixtures("influxdb_config")
+def test_watermarks_not_saved_on_flush_error():
+    """A write error reported by the flush keeps the previous watermarks: the points are sent again."""
+    from database.influxdb_sync import DatabaseInfluxdbSync
+
+    with pytest.raises(ConnectionError):
+        export(Client(flush_error=ConnectionError("rejected")), "test_error").run()
+
+    assert DatabaseInfluxdbSync("pdl1", "test_error").get() == {}
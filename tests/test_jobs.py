@@ -5,7 +5,7 @@ import pytest
 from conftest import contains_logline, setenv
 from db_schema import UsagePoints
 
-EXPORT_METHODS = ["export_influxdb", "export_home_assistant_ws", "export_home_assistant", "export_mqtt"]
+EXPORT_METHODS = ["export"]
 PER_USAGE_POINT_METHODS = [
     "get_account_status",
     "get_contract",
@@ -17,7 +17,7 @@ PER_USAGE_POINT_METHODS = [
     "get_consumption_max_power",
     "stat_price",
 ] + EXPORT_METHODS
-PER_JOB_METHODS = ["get_gateway_status", "get_tempo", "get_ecowatt"]
+PER_JOB_METHODS = ["get_gateway_status", "get_tempo", "get_ecowatt", "export_shared"]
 
 
 @pytest.fixture(params=[None, "pdl1"])
@@ -0,0 +1,191 @@
+"""Migration f607b59e8a0d: the MD5 ids of the data tables replaced by the (usage_point_key, minute) keys."""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+import pytz
+import sqlalchemy as sa
+
+from alembic import command
+from alembic.config import Config
+
+SRC_PATH = Path(__file__).resolve().parents[1] / "src"
+TIMEZONE = pytz.timezone("Europe/Paris")
+
+# Night of the autumn DST change, every 30 minutes from 00:00 to 23:30: 50 rows, 02:00 and 02:30 twice
+DST_DAY = [
+    (datetime(2023, 10, 28, 22, tzinfo=pytz.utc) + timedelta(minutes=30 * index)).astimezone(TIMEZONE)
+    for index in range(50)
+]
+
+DETAIL_COLUMNS = {
+    "id": sa.String,
+    "usage_point_id": sa.Text,
+    "date": sa.DateTime,
+    "value": sa.Integer,
+    "interval": sa.Integer,
+    "measure_type": sa.Text,
+    "blacklist": sa.Integer,
+    "fail_count": sa.Integer,
+}
+
+
+def upgrade(engine, revision, action=command.upgrade):
+    """Upgrade the database in the process, as `Database.migrate` does."""
+    config = Config()
+    config.set_main_option("script_location", str(SRC_PATH / "alembic"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        action(config, revision)
+
+
+def schema(engine, tables):
+    """Return the columns, primary key, indexes and foreign keys of tables."""
+    inspector = sa.inspect(engine)
+    return {
+        table: (
+            [(column["name"], str(column["type"]), column["nullable"]) for column in inspector.get_columns(table)],
+            inspector.get_pk_constraint(table)["constrained_columns"],
+            sorted(
+                (index["name"], index["column_names"], bool(index["unique"])) for index in inspector.get_indexes(table)
+            ),
+            inspector.get_foreign_keys(table),
+        )
+        for table in tables
+    }
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    """SQLite database at the revision before the integer keys."""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    upgrade(engine, "f606b59e8a0d")
+    yield engine
+    engine.dispose()
+
+
+def insert_usage_point(connection, usage_point_id):
+    """Insert a usage point, the mandatory columns set to the empty value of their type."""
+    table = sa.Table("usage_points", sa.MetaData(), autoload_with=connection)
+    values = {
+        column.name: column.type.python_type()
+        for column in table.columns
+        if not column.nullable and column.server_default is None
+    }
+    connection.execute(table.insert(), {**values, "usage_point_id": usage_point_id})
+
+
+def insert_detail(connection, usage_point_id, dates, unique_id=None):
+    """Insert detail rows as the previous code did: MD5 id of the aware date, wall-clock date."""
+    connection.execute(
+        sa.table("consumption_detail", *[sa.column(name, type_()) for name, type_ in DETAIL_COLUMNS.items()]).insert(),
+        [
+            {
+                "id": unique_id(index)
+                if unique_id
+                else hashlib.md5(f"{usage_point_id}/{date}".encode("utf-8")).hexdigest(),  # noqa: S324
+                "usage_point_id": usage_point_id,
+                "date": date.replace(tzinfo=None),
+                "value": index,
+                "interval": 30,
+                "measure_type": "consumption",
+                "blacklist": 0,
+                "fail_count": 0,
+            }
+            for index, date in enumerate(dates)
+        ],
+    )
+
+
+def detail_rows(engine, usage_point_id):
+    """Return the (minute, date, value) of the detail rows of a usage point."""
+    with engine.connect() as connection:
+        return connection.execute(
+            sa.text(
+                "SELECT minute, date, value FROM consumption_detail WHERE usage_point_id = :usage_point_id "
+                "ORDER BY minute"
+            ),
+            {"usage_point_id": usage_point_id},
+        ).all()
+
+
+def test_repeated_dst_hour_kept(engine):
+    """The two occurrences of 02:00 and 02:30 are kept, keyed by their UTC minute."""
+    with engine.begin() as connection:
+        for usage_point_id in ["pdl1", "pdl2"]:
+            insert_usage_point(connection, usage_point_id)
+            insert_detail(connection, usage_point_id, DST_DAY)
+
+    upgrade(engine, "f607b59e8a0d")
+
+    for usage_point_id in ["pdl1", "pdl2"]:
+        rows = detail_rows(engine, usage_point_id)
+        assert [row.minute for row in rows] == [int(date.timestamp()) // 60 for date in DST_DAY]
+        assert [row.value for row in rows] == list(range(len(DST_DAY)))
+        repeated = [row.minute for row in rows if row.date.startswith("2023-10-29 02:00")]
+        assert repeated[1] - repeated[0] == 60  # noqa: PLR2004
+
+
+def test_orphan_rows_logged(engine, caplog):
+    """The rows of a usage point missing from usage_points are not copied, and logged."""
+    with engine.begin() as connection:
+        insert_usage_point(connection, "pdl1")
+        insert_detail(connection, "pdl1", DST_DAY[:4])
+        insert_detail(connection, "pdl9", DST_DAY[:3])
+
+    with caplog.at_level(logging.WARNING):
+        upgrade(engine, "f607b59e8a0d")
+
+    assert len(detail_rows(engine, "pdl1")) == 4  # noqa: PLR2004
+    assert detail_rows(engine, "pdl9") == []
+    assert "[pdl9] consumption_detail : 3 ligne(s) du 2023-10-29 00:00:00 au 2023-10-29 01:00:00" in caplog.text
+
+
+def test_key_conflict_logged(engine, caplog):
+    """Rows whose id does not tell the offset of the repeated hour share a key: the conflict is logged."""
+    repeated = [date for date in DST_DAY if date.hour == 2 and date.minute == 0]  # noqa: PLR2004
+    with engine.begin() as connection:
+        insert_usage_point(connection, "pdl1")
+        insert_detail(connection, "pdl1", repeated, unique_id=lambda index: f"unknown-{index}")
+
+    with caplog.at_level(logging.WARNING):
+        upgrade(engine, "f607b59e8a0d")
+
+    assert len(detail_rows(engine, "pdl1")) == 1
+    assert "[pdl1] consumption_detail : la ligne du 2023-10-29 02:00:00 (id unknown-1) a la même clé" in caplog.text
+
+
+def test_downgrade_restores_the_schema(engine):
+    """The downgrade rebuilds the tables with the MD5 ids as the previous migrations created them."""
+    tables = [
+        "consumption_daily",
+        "production_daily",
+        "consumption_detail",
+        "production_detail",
+        "consumption_daily_max_power",
+    ]
+    before = schema(engine, tables)
+    with engine.begin() as connection:
+        insert_usage_point(connection, "pdl1")
+        insert_detail(connection, "pdl1", DST_DAY[:4])
+
+    upgrade(engine, "f607b59e8a0d")
+    upgrade(engine, "f606b59e8a0d", action=command.downgrade)
+
+    assert schema(engine, tables) == before
+    with engine.connect() as connection:
+        assert connection.execute(sa.text("SELECT count(*) FROM consumption_detail")).scalar() == 4  # noqa: PLR2004
+
+
+def test_head_revision_read_without_alembic():
+    """The last revision read from the scripts is the head of alembic, and the revision of the migrated database."""
+    from alembic.script import ScriptDirectory
+    from database import DB
+
+    config = Config()
+    config.set_main_option("script_location", str(SRC_PATH / "alembic"))
+
+    assert DB.head_revision() == ScriptDirectory.from_config(config).get_current_head()
+    assert DB.current_revision() == DB.head_revision()
@@ -0,0 +1,84 @@
+"""Startup of the application: modules imported by `main`, listed with `python -X importtime`."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+SRC_PATH = Path(__file__).resolve().parents[1] / "src"
+
+# Optional integrations, only imported when they are enabled in the configuration
+LAZY_MODULES = [
+    "aiohttp",
+    # Only imported to upgrade the schema of the database
+    "alembic",
+    "art",
+    "deepdiff",
+    "influxdb_client",
+    "opentelemetry.exporter",
+    "opentelemetry.instrumentation",
+    "opentelemetry.sdk",
+    "paho",
+    "ruamel",
+]
+
+# Modules imported by `main` on a migrated database: 1633 before the lazy imports, 754 after. The count does not
+# depend on the speed of the host, a new eager import of a heavy dependency shows up as hundreds of modules.
+STARTUP_MODULES_BUDGET = 850
+
+
+def imported_modules(data_dir, module="main"):
+    """Import a module in a new interpreter and return the modules of its `-X importtime` report.
+
+    Returns:
+        list: The names of the modules imported, in the order of the report.
+    """
+    config = {"myelectricaldata": {"pdl1": {"enable": False, "token": "abcd"}}}
+    with (data_dir / "config.yaml").open("w") as fp:
+        yaml.dump(config, fp)
+    env = {
+        **os.environ,
+        "APPLICATION_PATH": str(SRC_PATH),
+        "APPLICATION_PATH_DATA": str(data_dir),
+        "APPLICATION_PATH_LOG": str(data_dir),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],  # noqa: S603
+        cwd=SRC_PATH,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+        check=True,
+    )
+    return [
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+    ]
+
+
+@pytest.fixture(scope="module")
+def startup_report(tmp_path_factory):
+    """Modules imported by `main`, once the database created by a first start."""
+    data_dir = tmp_path_factory.mktemp("startup")
+    imported_modules(data_dir)
+    return imported_modules(data_dir)
+
+
+def test_optional_integrations_not_imported(startup_report):
+    """The optional integrations, disabled in the configuration, are not imported at startup."""
+    imported = [
+        name
+        for name in startup_report
+        for module in LAZY_MODULES
+        if name == module or name.startswith(f"{module}.")
+    ]
+    assert imported == []
+
+
+def test_startup_modules_budget(startup_report):
+    """The number of modules imported at startup stays within the budget."""
+    assert len(startup_report) <= STARTUP_MODULES_BUDGET